@@ -0,0 +1,10 @@
+#!/usr/bin/env python3
+"""Launcher for the stand-in Helloz NSFW server and client benchmark."""
+import logging
+import sys
+
+from src.tools.helloz_benchmark import main
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    sys.exit(main())
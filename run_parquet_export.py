@@ -0,0 +1,10 @@
+#!/usr/bin/env python3
+"""Launcher for exporting scan results to Parquet for analytics."""
+import logging
+import sys
+
+from src.reporting.parquet_export import main
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    sys.exit(main())
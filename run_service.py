@@ -0,0 +1,17 @@
+#!/usr/bin/env python3
+"""Launcher for the headless scan service (local HTTP API)."""
+import argparse
+import logging
+
+from src.core import constants
+from src.service.http_api import main
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run the Nudity Detector scan service.')
+    parser.add_argument('--host', default=constants.SERVICE_HOST, help='Interface to bind (default: %(default)s)')
+    parser.add_argument('--port', type=int, default=constants.SERVICE_PORT, help='Port to listen on (default: %(default)s)')
+    parser.add_argument('--workers', type=int, default=constants.SERVICE_WORKER_COUNT, help='Shared worker threads (default: %(default)s)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main(host=args.host, port=args.port, worker_count=args.workers)
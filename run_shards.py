@@ -0,0 +1,10 @@
+#!/usr/bin/env python3
+"""Launcher for sharded multi-host scanning (coordinator / worker)."""
+import logging
+import sys
+
+from src.service.sharding import main
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    sys.exit(main())
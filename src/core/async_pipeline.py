@@ -0,0 +1,211 @@
+"""
+Asyncio scan pipeline for I/O-bound remote detectors.
+Discovery, media-type checks, image stages and per-file classification run
+as coroutines on one event loop; blocking work (directory listing, libmagic,
+file reads, frame decoding, thumbnails) is handed to a small executor. A
+scan can keep hundreds of requests in flight without an OS thread per
+request.
+
+classify_image and classify_video are coroutine functions taking a file
+path, e.g. from DetectorBackend.make_async_classifiers.
+"""
+
+import asyncio
+import logging
+import math
+import os
+from concurrent.futures import Executor
+from functools import partial
+from itertools import count
+from typing import AsyncIterator, List, Sequence, Tuple
+
+from ..processing.content_hash import find_duplicate_files
+from ..processing.media_processor import detect_media_type
+from . import constants
+from .utils import DeferredFile, work_key
+
+
+def _list_dir(path: str) -> Tuple[List[str], List[str]]:
+    """Return (subdirectories, files) directly inside *path*; empty lists if unreadable."""
+    dirs, files = [], []
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        dirs.append(entry.path)
+                    elif entry.is_file():
+                        files.append(entry.path)
+                except OSError:
+                    continue
+    except OSError as error:
+        logging.warning('Could not list %s: %s', path, error)
+    return dirs, files
+
+
+async def walk_files(folder_path: str, executor: Executor = None) -> AsyncIterator[str]:
+    """Yield every file below *folder_path*, listing one directory at a time off the loop."""
+    loop = asyncio.get_running_loop()
+    pending = [folder_path]
+    while pending:
+        dirs, files = await loop.run_in_executor(executor, _list_dir, pending.pop())
+        pending.extend(reversed(dirs))
+        for file_path in files:
+            yield file_path
+
+
+def apply_image_stages_async(classify_image, stages: Sequence, existing_files=frozenset(), executor: Executor = None):
+    """Coroutine counterpart of apply_image_stages: wrap *classify_image* in *stages*.
+
+    Stages run on *executor*: a stage whose before() handles the file skips
+    the detector, and after() runs for every stage that let it through.
+    Files in *existing_files* go straight to classify_image.
+    """
+    if not stages:
+        return classify_image
+
+    async def staged(file_path):
+        if file_path in existing_files:
+            await classify_image(file_path)
+            return
+        loop = asyncio.get_running_loop()
+        passed = []
+        for stage in stages:
+            if await loop.run_in_executor(executor, stage.before, file_path):
+                break
+            passed.append(stage)
+        else:
+            await classify_image(file_path)
+        for stage in reversed(passed):
+            await loop.run_in_executor(executor, stage.after, file_path)
+
+    return staged
+
+
+async def classify_files_async(
+    file_paths,
+    classify_image,
+    classify_video,
+    concurrency: int = constants.REMOTE_ASYNC_CONCURRENCY,
+    executor: Executor = None,
+    image_stages: Sequence = (),
+    existing_files=frozenset(),
+    max_deferred_rounds: int = constants.DEFERRED_MAX_ROUNDS,
+    schedule=None,
+) -> None:
+    """Classify files from an (async) iterable with *concurrency* coroutine workers.
+
+    Each file's media type is checked off the loop. Images go through
+    *image_stages* (see NearDuplicateStage and apply_image_stages_async).
+    Errors are logged per file and never stop the scan. Deferred files
+    (DeferredFile) are retried in later rounds, as in classify_files.
+    Without a *schedule* the queue holds up to twice *concurrency* files
+    ahead of the workers. With one each file is keyed off the loop as it is
+    listed, up to SCAN_LOOKAHEAD files are queued, and workers take the
+    lowest sort key first, as in classify_files.
+    """
+    if concurrency < 1:
+        raise ValueError(f'concurrency must be at least 1, got {concurrency}')
+    loop = asyncio.get_running_loop()
+    # Entries are (sort key, sequence, path); path None tells a worker to stop.
+    queue: asyncio.PriorityQueue = asyncio.PriorityQueue(
+        maxsize=constants.SCAN_LOOKAHEAD if schedule is not None else concurrency * 2,
+    )
+    sequence = count()
+    deferred: List[Tuple[str, float]] = []
+
+    classify_image = apply_image_stages_async(classify_image, image_stages, existing_files, executor)
+
+    async def _process(file_path):
+        media_type = await loop.run_in_executor(executor, detect_media_type, file_path)
+        if media_type == constants.MEDIA_TYPE_IMAGE:
+            await classify_image(file_path)
+        elif media_type == constants.MEDIA_TYPE_VIDEO:
+            await classify_video(file_path)
+        else:
+            logging.info('Skipping unsupported file: %s', file_path)
+
+    async def _worker():
+        while True:
+            _key, _seq, file_path = await queue.get()
+            try:
+                if file_path is None:
+                    return
+                await _process(file_path)
+            except DeferredFile as deferral:
+                deferred.append((file_path, deferral.retry_after))
+            except Exception as e:
+                logging.error('Error processing file %s: %s', file_path, e)
+            finally:
+                queue.task_done()
+
+    async def _put(file_path):
+        key = await loop.run_in_executor(executor, work_key, schedule, file_path) if schedule is not None else ()
+        await queue.put((key, next(sequence), file_path))
+
+    async def _enqueue(source):
+        if hasattr(source, '__aiter__'):
+            async for file_path in source:
+                await _put(file_path)
+        else:
+            for file_path in source:
+                await _put(file_path)
+
+    async def _run_round(source):
+        workers = [asyncio.create_task(_worker()) for _ in range(concurrency)]
+        try:
+            await _enqueue(source)
+        finally:
+            for _ in workers:
+                await queue.put(((math.inf,), next(sequence), None))
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    await _run_round(file_paths)
+    for round_number in range(1, max_deferred_rounds + 1):
+        if not deferred:
+            return
+        retry, deferred[:] = list(deferred), []
+        delay = max(retry_after for _path, retry_after in retry)
+        logging.warning('%d file(s) deferred by the detector; retry round %d in %.1fs', len(retry), round_number, delay)
+        await asyncio.sleep(delay)
+        await _run_round([file_path for file_path, _ in retry])
+    if deferred:
+        logging.warning('%d file(s) still deferred after %d retry round(s); they were left for the next scan',
+                        len(deferred), max_deferred_rounds)
+
+
+async def classify_folder_async(
+    folder_path: str,
+    classify_image,
+    classify_video,
+    concurrency: int = constants.REMOTE_ASYNC_CONCURRENCY,
+    executor: Executor = None,
+    image_stages: Sequence = (),
+    existing_files=frozenset(),
+    deduplicate: bool = False,
+    schedule=None,
+) -> dict:
+    """Async counterpart of classify_files_in_folder.
+
+    Files are classified while the tree is still being listed; a *schedule*
+    orders them within the lookahead window of classify_files_async. With
+    *deduplicate* the tree is listed first and byte-identical copies are
+    grouped off the loop; pass the returned groups to
+    record_duplicate_results() once the scan finishes.
+
+    Returns:
+        Mapping of canonical file path to its skipped duplicate paths
+        (empty unless *deduplicate* is set)
+    """
+    logging.debug('Starting async classification in folder: %s', folder_path)
+    duplicate_groups = {}
+    discovered = walk_files(folder_path, executor)
+    if deduplicate:
+        all_files = [file_path async for file_path in discovered]
+        loop = asyncio.get_running_loop()
+        discovered, duplicate_groups = await loop.run_in_executor(executor, partial(find_duplicate_files, all_files))
+    await classify_files_async(
+        discovered, classify_image, classify_video, concurrency, executor, image_stages, existing_files,
+        schedule=schedule,
+    )
+    return duplicate_groups
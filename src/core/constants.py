@@ -3,7 +3,9 @@ Centralized constants for the Nudity Detector application.
 Provides single source of truth for configuration values, avoiding magic numbers.
 """
 import json
+import logging
 import os
+from urllib.parse import urlsplit
 
 # ============================================================================
 # Media Type Configuration
@@ -75,6 +77,9 @@ DEFAULT_REPORT_DIR = 'reports'
 REPORT_FILE_NAME = 'nudity_report.xlsx'
 XLSX_EXTENSION = '.xlsx'
 SESSION_FILE_SUFFIX = '_session.json'
+SUMMARY_FILE_SUFFIX = '_summary.json'  # Per-run scan history summary next to the report
+RESULTS_DB_SUFFIX = '_results.sqlite3'  # Per-run SQLite results store next to the report
+RESULTS_STORE_BATCH_SIZE = 500  # Rows per insert transaction / fetch when streaming results
 SESSION_VERSION = 1
 SCAN_RUN_DATE_FORMAT = '%Y-%m-%d_%H-%M-%S'
 
@@ -88,7 +93,13 @@ REPORT_HEADERS = (
     'Detected Classes',
     'Thumbnail',
     'Date Classified',
+    'Duplicate Of',
 )
+REPORT_MAX_EMBEDDED_THUMBNAILS = 1000  # Highest-confidence rows that get an embedded image; 0 disables
+REPORT_THUMBNAIL_ROW_HEIGHT = 105  # points, for rows with an embedded thumbnail
+PARQUET_ROW_GROUP_SIZE = 10000  # Rows per Parquet row group in analytics exports
+PARQUET_OUTPUT = False  # Also append results to Parquet part files while a scan runs (needs pyarrow)
+PARQUET_OUTPUT_DIR_NAME = 'results_parquet'  # Per-run folder of those part files, next to the report
 
 # ============================================================================
 # Thumbnail Configuration
@@ -102,6 +113,8 @@ THUMBNAIL_SIZE_PREVIEW_IMAGE = (
 THUMBNAIL_FORMAT = 'PNG'
 THUMBNAIL_IMAGE_INDEX = 0.25  # Video frame at 25% progress
 NO_THUMBNAIL_TEXT = 'No thumbnail available'
+PREVIEW_CACHE_SIZE = 256  # Decoded preview textures kept in the GUI's LRU cache
+PREVIEW_PREFETCH_ROWS = 2  # Rows above and below the selection decoded ahead of time
 
 # ============================================================================
 # Video Frame Extraction
@@ -113,6 +126,30 @@ FRAME_TEMP_DIR_PREFIX_CLI_NUDENET = 'nudenet_frames_'
 FRAME_TEMP_DIR_PREFIX_CLI_HELLOZ_NSFW = 'helloz_nsfw_frames_'
 FRAME_FILE_NAME_PATTERN = 'frame_{}.jpg'
 
+# ============================================================================
+# Near-Duplicate Detection
+# ============================================================================
+PHASH_HASH_SIZE = 8  # dHash grid height; hashes are PHASH_HASH_SIZE ** 2 bits
+NEAR_DUPLICATE_MAX_DISTANCE = 6  # Max Hamming distance treated as the same image
+PHASH_INDEX_FILE_NAME = 'phash_index.json'  # Stored in DEFAULT_REPORT_DIR, shared by all runs
+CONTENT_HASH_CHUNK_SIZE = 1024 * 1024  # Bytes per read when hashing files for exact duplicates
+
+# ============================================================================
+# Cascade Prefilter
+# ============================================================================
+PREFILTER_SKIN_TONE = 'skin_tone'
+PREFILTER_SAMPLE_SIZE = (64, 64)  # Images are reduced to at most this size before the prefilter looks at them
+PREFILTER_MIN_SCORE = 0.05  # Images scoring below this are cleared without running the detector
+CASCADE_CLEARED = 'cleared'  # Cascade decision recorded for images the prefilter cleared
+CASCADE_ESCALATED = 'escalated'  # Cascade decision wrapped around the detector result of escalated images
+
+# ============================================================================
+# Watch Mode
+# ============================================================================
+WATCH_DEBOUNCE_SECONDS = 2.0  # A file must be quiet this long before it is classified
+WATCH_POLL_INTERVAL = 5.0  # Seconds between snapshots when inotify is unavailable
+WATCH_SAVE_INTERVAL = 30.0  # Minimum seconds between incremental report saves
+
 # ============================================================================
 # Helloz NSFW API
 # ============================================================================
@@ -123,6 +160,20 @@ HELLOZ_NSFW_REQUEST_TIMEOUT = 30  # seconds
 HELLOZ_NSFW_HEALTH_CHECK_TIMEOUT = 5  # seconds
 HELLOZ_NSFW_MAX_RETRIES = 3
 HELLOZ_NSFW_RETRY_BACKOFF = 1.0  # seconds; doubles on each attempt
+HELLOZ_NSFW_BALANCE_LEAST_OUTSTANDING = 'least_outstanding'  # Fewest requests in flight
+HELLOZ_NSFW_BALANCE_LATENCY = 'latency'  # Shortest expected wait (in flight x average latency)
+SUPPORTED_HELLOZ_NSFW_BALANCE = (HELLOZ_NSFW_BALANCE_LEAST_OUTSTANDING, HELLOZ_NSFW_BALANCE_LATENCY)
+HELLOZ_NSFW_EJECT_AFTER_FAILURES = 3  # Consecutive failures before an endpoint stops receiving requests
+HELLOZ_NSFW_EJECT_SECONDS = 30.0  # How long an ejected endpoint rests before one probe request re-admits it
+HELLOZ_NSFW_BREAKER_FAILURES = 5  # Consecutive failed requests (any replica) that pause all requests
+HELLOZ_NSFW_BREAKER_RESET_SECONDS = 15.0  # Pause before one probe request tests the service again
+HELLOZ_NSFW_LATENCY_TARGET = 10.0  # seconds; slower responses shrink the in-flight limit like failures do
+HELLOZ_NSFW_UPLOAD_MAX_EDGE = 0  # pixels; 0 uploads original files, otherwise larger images are downsized first
+UPLOAD_FORMAT_JPEG = 'jpeg'
+UPLOAD_FORMAT_WEBP = 'webp'
+SUPPORTED_UPLOAD_FORMATS = (UPLOAD_FORMAT_JPEG, UPLOAD_FORMAT_WEBP)
+HELLOZ_NSFW_UPLOAD_FORMAT = UPLOAD_FORMAT_JPEG  # Encoding of downsized uploads
+HELLOZ_NSFW_UPLOAD_QUALITY = 85  # Encoder quality (1-95) of downsized uploads
 
 
 _LOOPBACK_HOSTS = frozenset({'localhost', '127.0.0.1', '::1'})
@@ -175,6 +226,220 @@ def get_helloz_nsfw_connection_check_url():
     return f'{scheme}://{host}:{port}'
 
 
+def _endpoint_base_url(entry):
+    """Return 'scheme://host:port' for a configured endpoint ('host', 'host:port' or a URL)."""
+    entry = str(entry).strip().rstrip('/')
+    parts = urlsplit(entry if '://' in entry else f'//{entry}')
+    host = parts.hostname
+    if not host:
+        raise ValueError(f'Invalid Helloz NSFW endpoint: {entry!r}')
+    scheme = parts.scheme or ('http' if host in _LOOPBACK_HOSTS else 'https')
+    _validate_scheme(scheme, host)
+    netloc = f'[{host}]' if ':' in host else host
+    return f'{scheme}://{netloc}:{parts.port or HELLOZ_NSFW_PORT}'
+
+
+def get_helloz_nsfw_endpoints():
+    """Return the base URLs of the configured Helloz NSFW replicas, read from config each call.
+
+    'helloz_nsfw_endpoints' lists replicas as 'host:port' or full base URLs;
+    invalid or insecure entries are logged and dropped. Returns an empty
+    list when no replicas are configured.
+    """
+    entries = _load_app_config().get('helloz_nsfw_endpoints') or []
+    if isinstance(entries, str):
+        entries = [entries]
+    endpoints = []
+    for entry in entries:
+        try:
+            base_url = _endpoint_base_url(entry)
+        except ValueError as error:
+            logging.warning('Ignoring Helloz NSFW endpoint: %s', error)
+            continue
+        if base_url not in endpoints:
+            endpoints.append(base_url)
+    return endpoints
+
+
+def get_helloz_nsfw_urls():
+    """Return the upload URL of every Helloz NSFW replica; the single configured host when none are listed."""
+    endpoints = get_helloz_nsfw_endpoints()
+    if not endpoints:
+        return [get_helloz_nsfw_url()]
+    _host, _port, api_endpoint, _scheme = _load_helloz_config()
+    return [f'{base_url}{api_endpoint}' for base_url in endpoints]
+
+
+def get_helloz_nsfw_balance_config():
+    """Return (policy, eject_after_failures, eject_seconds) for routing across replicas, read from config each call."""
+    cfg = _load_app_config()
+    policy = cfg.get('helloz_nsfw_balance', HELLOZ_NSFW_BALANCE_LEAST_OUTSTANDING)
+    if policy not in SUPPORTED_HELLOZ_NSFW_BALANCE:
+        policy = HELLOZ_NSFW_BALANCE_LEAST_OUTSTANDING
+    try:
+        eject_after = max(1, int(cfg.get('helloz_nsfw_eject_after_failures', HELLOZ_NSFW_EJECT_AFTER_FAILURES)))
+    except (ValueError, TypeError):
+        eject_after = HELLOZ_NSFW_EJECT_AFTER_FAILURES
+    try:
+        eject_seconds = max(0.0, float(cfg.get('helloz_nsfw_eject_seconds', HELLOZ_NSFW_EJECT_SECONDS)))
+    except (ValueError, TypeError):
+        eject_seconds = HELLOZ_NSFW_EJECT_SECONDS
+    return policy, eject_after, eject_seconds
+
+
+def get_helloz_nsfw_flow_config():
+    """Return (breaker_failures, breaker_reset_seconds, latency_target) for overload protection, read from config each call."""
+    cfg = _load_app_config()
+    try:
+        failures = max(1, int(cfg.get('helloz_nsfw_breaker_failures', HELLOZ_NSFW_BREAKER_FAILURES)))
+    except (ValueError, TypeError):
+        failures = HELLOZ_NSFW_BREAKER_FAILURES
+    try:
+        reset_seconds = max(0.0, float(cfg.get('helloz_nsfw_breaker_reset_seconds', HELLOZ_NSFW_BREAKER_RESET_SECONDS)))
+    except (ValueError, TypeError):
+        reset_seconds = HELLOZ_NSFW_BREAKER_RESET_SECONDS
+    try:
+        latency_target = max(0.0, float(cfg.get('helloz_nsfw_latency_target', HELLOZ_NSFW_LATENCY_TARGET)))
+    except (ValueError, TypeError):
+        latency_target = HELLOZ_NSFW_LATENCY_TARGET
+    return failures, reset_seconds, latency_target
+
+
+def get_scan_schedule_config():
+    """Return (scan_order, scan_priority) for ordering work within a scan, read from config each call.
+
+    An empty scan_priority applies no user priority.
+    """
+    cfg = _load_app_config()
+    order = cfg.get('scan_order', SCAN_ORDER)
+    if order not in SUPPORTED_SCAN_ORDERS:
+        logging.warning('Unsupported scan_order %r; using %s', order, SCAN_ORDER)
+        order = SCAN_ORDER
+    return order, str(cfg.get('scan_priority') or '')
+
+
+def get_worker_pool_config():
+    """Return (video_worker_count, frame_decode_workers) for sizing the scan pools, read from config each call."""
+    cfg = _load_app_config()
+    try:
+        video_workers = max(0, int(cfg.get('video_worker_count', VIDEO_WORKER_COUNT)))
+    except (ValueError, TypeError):
+        video_workers = VIDEO_WORKER_COUNT
+    try:
+        decode_workers = max(0, int(cfg.get('frame_decode_workers', FRAME_DECODE_WORKERS)))
+    except (ValueError, TypeError):
+        decode_workers = FRAME_DECODE_WORKERS
+    return video_workers, decode_workers
+
+
+def get_helloz_nsfw_upload_config():
+    """Return (max_edge, format, quality) for the pre-upload transform, read from config each call.
+
+    A max_edge of 0 disables the transform and original files are uploaded.
+    """
+    cfg = _load_app_config()
+    try:
+        max_edge = max(0, int(cfg.get('helloz_nsfw_upload_max_edge', HELLOZ_NSFW_UPLOAD_MAX_EDGE)))
+    except (ValueError, TypeError):
+        max_edge = HELLOZ_NSFW_UPLOAD_MAX_EDGE
+    upload_format = str(cfg.get('helloz_nsfw_upload_format', HELLOZ_NSFW_UPLOAD_FORMAT)).lower()
+    if upload_format not in SUPPORTED_UPLOAD_FORMATS:
+        logging.warning('Unsupported helloz_nsfw_upload_format %r; using %s', upload_format, HELLOZ_NSFW_UPLOAD_FORMAT)
+        upload_format = HELLOZ_NSFW_UPLOAD_FORMAT
+    try:
+        quality = min(95, max(1, int(cfg.get('helloz_nsfw_upload_quality', HELLOZ_NSFW_UPLOAD_QUALITY))))
+    except (ValueError, TypeError):
+        quality = HELLOZ_NSFW_UPLOAD_QUALITY
+    return max_edge, upload_format, quality
+
+
+def _load_app_config():
+    """Return the parsed app_config.json as a dict; empty dict on error."""
+    try:
+        with open(_config_path(), 'r') as f:
+            cfg = json.load(f)
+        return cfg if isinstance(cfg, dict) else {}
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def get_near_duplicate_config():
+    """Return (enabled, max_distance) for near-duplicate skipping, read from config each call."""
+    cfg = _load_app_config()
+    enabled = bool(cfg.get('near_duplicate_skip', False))
+    try:
+        max_distance = max(0, int(cfg.get('near_duplicate_max_distance', NEAR_DUPLICATE_MAX_DISTANCE)))
+    except (ValueError, TypeError):
+        max_distance = NEAR_DUPLICATE_MAX_DISTANCE
+    return enabled, max_distance
+
+
+def get_prefilter_config():
+    """Return (prefilter name, min_score) for the cascade prefilter, read from config each call.
+
+    An empty name disables the prefilter; images scoring below min_score
+    (0-1) are cleared without running the detector.
+    """
+    cfg = _load_app_config()
+    name = cfg.get('prefilter') or ''
+    try:
+        min_score = min(1.0, max(0.0, float(cfg.get('prefilter_min_score', PREFILTER_MIN_SCORE))))
+    except (ValueError, TypeError):
+        min_score = PREFILTER_MIN_SCORE
+    return str(name), min_score
+
+
+def get_remote_concurrency():
+    """Return how many requests the asyncio pipeline keeps in flight, read from config each call."""
+    try:
+        return max(1, int(_load_app_config().get('remote_concurrency', REMOTE_ASYNC_CONCURRENCY)))
+    except (ValueError, TypeError):
+        return REMOTE_ASYNC_CONCURRENCY
+
+
+def get_report_max_embedded_thumbnails():
+    """Return how many thumbnails a report embeds as images, read from config each call."""
+    try:
+        return max(0, int(_load_app_config().get('report_max_embedded_thumbnails', REPORT_MAX_EMBEDDED_THUMBNAILS)))
+    except (ValueError, TypeError):
+        return REPORT_MAX_EMBEDDED_THUMBNAILS
+
+
+def get_parquet_output():
+    """Return True when scans should also write their results to Parquet as they save, read from config each call."""
+    return bool(_load_app_config().get('parquet_output', PARQUET_OUTPUT))
+
+
+def get_exact_duplicate_skip():
+    """Return True when byte-identical files should be classified once, read from config each call."""
+    return bool(_load_app_config().get('exact_duplicate_skip', False))
+
+
+def _class_value_map(value):
+    """Return {class: float} from a config mapping, dropping entries that are not numbers."""
+    result = {}
+    for name, number in (value.items() if isinstance(value, dict) else ()):
+        try:
+            result[str(name)] = float(number)
+        except (ValueError, TypeError):
+            continue
+    return result
+
+
+def get_scoring_config(model_name=None):
+    """Return (class_thresholds, class_weights) for detection scoring, read from config each call.
+
+    class_thresholds maps a class label to a threshold percent (overriding the
+    scan threshold, or counting a class the model does not score by default);
+    class_weights maps a label to a multiplier applied to its scores. Only
+    NudeNet scans score per class, so any other *model_name* gets empty maps.
+    """
+    if model_name is not None and model_name != MODEL_NUDENET:
+        return {}, {}
+    cfg = _load_app_config()
+    return _class_value_map(cfg.get('class_thresholds')), _class_value_map(cfg.get('class_weights'))
+
+
 # Backward-compatible module-level aliases (resolved at import time)
 HELLOZ_NSFW_URL = get_helloz_nsfw_url()
 HELLOZ_NSFW_CONNECTION_CHECK_URL = get_helloz_nsfw_connection_check_url()
@@ -189,6 +454,8 @@ GUI_WINDOW_MIN_HEIGHT = 700
 GUI_FRAME_PADDING = 16
 GUI_CONTROLS_PADDING = 12
 GUI_PREVIEW_PANEL_WIDTH = 30  # Character width
+HISTORY_REFRESH_BATCH_SIZE = 50  # Scan history rows added to the list per main-loop callback
+SESSION_LOAD_CHUNK_SIZE = 500  # Saved-session rows added to the results table per main-loop callback
 
 # GUI Theme Options
 THEME_SYSTEM = 'system'
@@ -228,6 +495,59 @@ BUTTON_PADX_LAST = (0, 0)
 WORKER_THREAD_COUNT = 10
 WORKER_THREAD_TIMEOUT = 5  # seconds
 DETECT_TIMEOUT = 60  # seconds for individual detections
+DEFERRED_MAX_ROUNDS = 5  # Times files deferred by an overloaded detector are retried before being left for the next scan
+REMOTE_ASYNC_CONCURRENCY = 256  # Requests in flight at once when a remote backend runs on the asyncio pipeline
+VIDEO_WORKER_COUNT = 0  # Of the worker threads, how many take videos first; 0 shares one pool for all files
+FRAME_DECODE_WORKERS = 0  # Threads decoding the next video frame while the current one is classified; 0 decodes inline
+
+# ============================================================================
+# Work Scheduling
+# ============================================================================
+SCAN_ORDER_DISCOVERY = 'discovery'  # Files start in the order the folder walk finds them
+SCAN_ORDER_COST = 'cost'  # Most expensive queued file first: long videos start early, small images fill gaps
+SUPPORTED_SCAN_ORDERS = (SCAN_ORDER_DISCOVERY, SCAN_ORDER_COST)
+SCAN_ORDER = SCAN_ORDER_DISCOVERY
+SCAN_LOOKAHEAD = 256  # Files queued ahead of the workers when a schedule orders them; the order applies within this window
+SCAN_PRIORITY_RECENT = 'recent'  # Files modified within SCAN_RECENT_SECONDS are scanned before the rest
+SCAN_RECENT_SECONDS = 7 * 24 * 3600
+COST_IMAGE = 1.0  # Cost units: one detector call on one image
+COST_IMAGE_PER_MB = 0.1  # Extra decode cost of large images
+COST_VIDEO_PER_MB = 2.0  # Fallback estimate for videos whose frame count cannot be read
+
+# ============================================================================
+# Headless Scan Service
+# ============================================================================
+SERVICE_HOST = '127.0.0.1'  # Local-only by default; the API has no authentication
+SERVICE_PORT = 6090
+SERVICE_WORKER_COUNT = WORKER_THREAD_COUNT  # Workers shared by all jobs
+SERVICE_MAX_ACTIVE_JOBS = 4  # Jobs interleaved at once; later submissions wait in the queue
+SERVICE_REPORT_SUBDIR = 'service'  # Under DEFAULT_REPORT_DIR; one report folder per job
+SERVICE_DB_FILE_NAME = 'jobs.sqlite3'
+SERVICE_STREAM_POLL_INTERVAL = 0.5  # seconds between result polls for ?follow=1 streams
+SERVICE_MAX_REQUEST_BYTES = 64 * 1024
+
+# ============================================================================
+# Sharded Multi-Host Scanning
+# ============================================================================
+SHARD_SIZE = 500  # Files per shard leased by a worker
+SHARD_LEASE_SECONDS = 300.0  # Lease length; renewed every third of it while a shard is processed
+SHARD_MAX_ATTEMPTS = 3  # Leases per shard before it is marked failed
+SHARD_DB_BUSY_TIMEOUT = 30.0  # seconds to wait for another process's write lock
+SHARD_POLL_INTERVAL = 5.0  # seconds between polls by idle workers and the coordinator
+SHARD_REPORT_SUBDIR = 'shards'  # Under DEFAULT_REPORT_DIR; one merged report folder per run
+
+# ============================================================================
+# Helloz NSFW Stand-in Server and Benchmark
+# ============================================================================
+LATENCY_FIXED = 'fixed'
+LATENCY_UNIFORM = 'uniform'  # mean +/- spread
+LATENCY_EXPONENTIAL = 'exponential'
+LATENCY_LOGNORMAL = 'lognormal'  # median mean, spread is sigma of the log
+SUPPORTED_LATENCY_DISTRIBUTIONS = (LATENCY_FIXED, LATENCY_UNIFORM, LATENCY_EXPONENTIAL, LATENCY_LOGNORMAL)
+FAKE_HELLOZ_LATENCY = 0.05  # seconds; mean scoring time per request
+FAKE_HELLOZ_MAX_CONCURRENCY = 8  # Requests scored at once; later ones queue (or get 503 when rejecting)
+BENCHMARK_FILE_COUNT = 200  # Synthetic images scanned per benchmark run
+BENCHMARK_IMAGE_SIZE = 1024  # pixels; edge of the synthetic images
 
 # ============================================================================
 # System Directories (Safety)
@@ -246,6 +566,7 @@ RESULT_FIELD_NUDITY = 'nudity_detected'
 RESULT_FIELD_CLASSES = 'detected_classes'
 RESULT_FIELD_THUMBNAIL = 'thumbnail'
 RESULT_FIELD_DATE = 'date_classified'
+RESULT_FIELD_DUPLICATE_OF = 'duplicate_of'
 
 # ============================================================================
 # GUI Styles
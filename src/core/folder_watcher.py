@@ -0,0 +1,242 @@
+"""Filesystem change feed for continuous (watch-mode) scanning.
+
+FolderWatcher reports files that were created, modified or moved into the
+watched folders. On Linux it uses inotify through ctypes; elsewhere, or when
+inotify is unavailable (e.g. the watch limit is exhausted), it falls back to
+periodically comparing directory snapshots. Events are debounced so a file
+is only reported once it has stopped changing.
+"""
+
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import sys
+import time
+from threading import Condition, Event, Thread
+from typing import Dict, List, Optional, Tuple
+
+from . import constants
+
+# inotify event masks (see inotify(7)).
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ISDIR = 0x40000000
+_WATCH_MASK = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+_EVENT_HEADER = struct.Struct('iIII')
+_READ_SIZE = 64 * 1024
+
+
+def _load_libc():
+    """Return libc with inotify symbols, or None when not available."""
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+    except OSError:
+        return None
+    return libc if hasattr(libc, 'inotify_init1') else None
+
+
+class FolderWatcher:
+    """Debounced change feed for one or more folder trees.
+
+    Call start(), then repeatedly get_changes() to receive batches of file
+    paths that have been quiet for at least *debounce_seconds*, and stop()
+    when done. Only files are reported; deletions are ignored.
+    """
+
+    def __init__(
+        self,
+        folders: List[str],
+        debounce_seconds: float = constants.WATCH_DEBOUNCE_SECONDS,
+        poll_interval: float = constants.WATCH_POLL_INTERVAL,
+        use_inotify: bool = True,
+    ) -> None:
+        self.folders = [os.path.abspath(folder) for folder in folders]
+        self.debounce_seconds = debounce_seconds
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        self.backend = ''
+        self._pending: Dict[str, float] = {}
+        self._condition = Condition()
+        self._stop_event = Event()
+        self._thread: Optional[Thread] = None
+        self._libc = None
+        self._fd = -1
+        self._watch_dirs: Dict[int, str] = {}
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self) -> None:
+        """Begin watching; chooses inotify when possible, polling otherwise."""
+        self._stop_event.clear()
+        if self.use_inotify and self._start_inotify():
+            self.backend = 'inotify'
+            target = self._run_inotify
+        else:
+            self.backend = 'polling'
+            self._snapshot = self._take_snapshot()
+            target = self._run_polling
+        logging.info('Watching %s using %s', ', '.join(self.folders), self.backend)
+        self._thread = Thread(target=target, daemon=True, name='folder-watcher')
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop watching and release the inotify descriptor."""
+        self._stop_event.set()
+        with self._condition:
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=max(self.poll_interval, 1.0) + 1.0)
+            self._thread = None
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    # ------------------------------------------------------------------
+    # Change feed
+    # ------------------------------------------------------------------
+
+    def _mark_changed(self, path: str) -> None:
+        with self._condition:
+            self._pending[path] = time.monotonic()
+            self._condition.notify_all()
+
+    def get_changes(self, timeout: float = 1.0) -> List[str]:
+        """Return files whose last change is older than the debounce window.
+
+        Blocks for at most *timeout* seconds. Returns an empty list when no
+        file has settled yet.
+        """
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while not self._stop_event.is_set():
+                now = time.monotonic()
+                ready = [path for path, changed in self._pending.items() if now - changed >= self.debounce_seconds]
+                if ready:
+                    for path in ready:
+                        del self._pending[path]
+                    return [path for path in ready if os.path.isfile(path)]
+                remaining = deadline - now
+                if remaining <= 0:
+                    return []
+                settle = min(
+                    (self.debounce_seconds - (now - changed) for changed in self._pending.values()),
+                    default=remaining,
+                )
+                self._condition.wait(min(remaining, max(settle, 0.01)))
+        return []
+
+    # ------------------------------------------------------------------
+    # inotify backend
+    # ------------------------------------------------------------------
+
+    def _start_inotify(self) -> bool:
+        self._libc = _load_libc()
+        if self._libc is None:
+            return False
+        fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            logging.warning('inotify_init1 failed (errno %d); falling back to polling', ctypes.get_errno())
+            return False
+        self._fd = fd
+        self._watch_dirs = {}
+        for folder in self.folders:
+            if not self._add_watch_tree(folder, report_existing=False):
+                os.close(self._fd)
+                self._fd = -1
+                return False
+        return True
+
+    def _add_watch_tree(self, folder: str, report_existing: bool) -> bool:
+        """Watch *folder* and its subfolders; optionally report files already in them."""
+        for root, _dirs, files in os.walk(folder):
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(root), _WATCH_MASK)
+            if wd < 0:
+                logging.warning(
+                    'inotify_add_watch failed for %s (errno %d); falling back to polling',
+                    root, ctypes.get_errno(),
+                )
+                return False
+            self._watch_dirs[wd] = root
+            if report_existing:
+                for file_name in files:
+                    self._mark_changed(os.path.join(root, file_name))
+        return True
+
+    def _run_inotify(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                readable, _, _ = select.select([self._fd], [], [], 0.5)
+            except (OSError, ValueError):
+                return
+            if not readable:
+                continue
+            try:
+                buffer = os.read(self._fd, _READ_SIZE)
+            except BlockingIOError:
+                continue
+            except OSError:
+                return
+            for mask, directory, name in self._parse_events(buffer):
+                if mask & _IN_Q_OVERFLOW:
+                    logging.warning('inotify event queue overflowed; some changes may be missed')
+                    continue
+                if directory is None or not name:
+                    continue
+                path = os.path.join(directory, name)
+                if mask & _IN_ISDIR:
+                    if mask & (_IN_CREATE | _IN_MOVED_TO):
+                        # Files may land in a new folder before its watch exists,
+                        # so report everything already inside it.
+                        self._add_watch_tree(path, report_existing=True)
+                else:
+                    self._mark_changed(path)
+
+    def _parse_events(self, buffer: bytes) -> List[Tuple[int, Optional[str], str]]:
+        events = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(buffer):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(buffer, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(buffer[offset:offset + length].rstrip(b'\0'))
+            offset += length
+            if mask & _IN_IGNORED:
+                self._watch_dirs.pop(wd, None)
+                continue
+            events.append((mask, self._watch_dirs.get(wd), name))
+        return events
+
+    # ------------------------------------------------------------------
+    # Polling backend
+    # ------------------------------------------------------------------
+
+    def _take_snapshot(self) -> Dict[str, Tuple[int, int]]:
+        snapshot = {}
+        for folder in self.folders:
+            for root, _dirs, files in os.walk(folder):
+                for file_name in files:
+                    path = os.path.join(root, file_name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def _run_polling(self) -> None:
+        while not self._stop_event.wait(self.poll_interval):
+            current = self._take_snapshot()
+            for path, signature in current.items():
+                if self._snapshot.get(path) != signature:
+                    self._mark_changed(path)
+            self._snapshot = current
@@ -11,6 +11,46 @@ from typing import Any, Dict, List
 from . import constants
 
 
+def _collect_class_scores(value: Any, scores: Dict[str, float]) -> None:
+    """Fold every (class, score) pair found in a detector payload into *scores* (max per class)."""
+    def _add(name, score):
+        if isinstance(score, (int, float)) and not isinstance(score, bool):
+            scores[name] = max(scores.get(name, 0.0), float(score))
+
+    if isinstance(value, list):
+        for item in value:
+            _collect_class_scores(item, scores)
+    elif isinstance(value, dict):
+        if 'class' in value:  # NudeNet detection
+            _add(str(value['class']), value.get('score'))
+        elif 'detections' in value:  # NudeNet video frame
+            _collect_class_scores(value['detections'], scores)
+        elif 'cascade' in value:  # Cascade decision; escalated images wrap the detector result
+            _collect_class_scores(value.get('result'), scores)
+        elif 'unsafe_score' in value:  # Helloz NSFW video frame
+            _add('nsfw', value['unsafe_score'])
+        elif isinstance(value.get('data'), dict):  # Helloz NSFW image response
+            for name, score in value['data'].items():
+                _add(str(name), score)
+
+
+def parse_class_scores(detected_classes: Any) -> Dict[str, float]:
+    """Return the highest score per class in a detected_classes value.
+
+    Understands NudeNet image/video and Helloz NSFW image/video payloads;
+    error entries and unparseable values give an empty dict.
+    """
+    if isinstance(detected_classes, str) and detected_classes.startswith('ERROR:'):
+        return {}
+    try:
+        payload = json.loads(detected_classes) if isinstance(detected_classes, str) else detected_classes
+    except (TypeError, ValueError):
+        return {}
+    scores: Dict[str, float] = {}
+    _collect_class_scores(payload, scores)
+    return scores
+
+
 @dataclass
 class ScanConfig:
     """Configuration for a scan session."""
@@ -18,6 +58,8 @@ class ScanConfig:
     model_name: str = constants.MODEL_NUDENET
     threshold_percent: float = constants.DEFAULT_THRESHOLD_PERCENT
     theme_mode: str = constants.THEME_SYSTEM
+    class_thresholds: Dict[str, float] = field(default_factory=dict)  # Per-class overrides, in percent
+    class_weights: Dict[str, float] = field(default_factory=dict)  # Per-class score multipliers
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary."""
@@ -31,6 +73,8 @@ class ScanConfig:
             model_name=data.get('model_name', constants.MODEL_NUDENET),
             threshold_percent=float(data.get('threshold_percent', constants.DEFAULT_THRESHOLD_PERCENT)),
             theme_mode=data.get('theme_mode', constants.THEME_SYSTEM),
+            class_thresholds={str(k): float(v) for k, v in (data.get('class_thresholds') or {}).items()},
+            class_weights={str(k): float(v) for k, v in (data.get('class_weights') or {}).items()},
         )
 
 
@@ -46,6 +90,7 @@ class ReportEntry:
     detected_classes: str
     thumbnail: str = ''
     date_classified: str = ''
+    duplicate_of: str = ''  # File whose result was reused for this entry, if any
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary."""
@@ -63,8 +108,13 @@ class ReportEntry:
             self.detected_classes,
             self.thumbnail,
             self.date_classified,
+            self.duplicate_of,
         ]
 
+    def class_scores(self) -> Dict[str, float]:
+        """Return the highest score per detected class parsed from detected_classes (see parse_class_scores)."""
+        return parse_class_scores(self.detected_classes)
+
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'ReportEntry':
         """Create from dictionary."""
@@ -78,6 +128,7 @@ class ReportEntry:
             detected_classes=data.get('detected_classes', '[]'),
             thumbnail=data.get('thumbnail', ''),
             date_classified=data.get('date_classified', ''),
+            duplicate_of=data.get('duplicate_of', '') or '',
         )
 
 
@@ -118,6 +169,45 @@ class SessionState:
         )
 
 
+@dataclass
+class ScanRunSummary:
+    """Small per-run summary shown in scan history, saved next to the report."""
+    saved_at: str = ''
+    model_name: str = ''
+    source_folder: str = ''
+    threshold_percent: float = constants.DEFAULT_THRESHOLD_PERCENT
+    result_count: int = 0  # Detected results, as listed when the session is loaded
+    total_count: int = 0  # Every classified file
+
+    @classmethod
+    def from_session(cls, session_state: SessionState, total_count: int = 0) -> 'ScanRunSummary':
+        """Summarize a session state."""
+        return cls(
+            saved_at=session_state.saved_at,
+            model_name=session_state.scan_config.model_name,
+            source_folder=session_state.scan_config.source_folder,
+            threshold_percent=session_state.scan_config.threshold_percent,
+            result_count=len(session_state.results),
+            total_count=total_count,
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary."""
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ScanRunSummary':
+        """Create from dictionary."""
+        return cls(
+            saved_at=data.get('saved_at', ''),
+            model_name=data.get('model_name', ''),
+            source_folder=data.get('source_folder', ''),
+            threshold_percent=float(data.get('threshold_percent', constants.DEFAULT_THRESHOLD_PERCENT)),
+            result_count=int(data.get('result_count', 0)),
+            total_count=int(data.get('total_count', 0)),
+        )
+
+
 @dataclass
 class DetectionResult:
     """Raw detection result from a detection model."""
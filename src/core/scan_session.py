@@ -1,6 +1,7 @@
 """Encapsulated scan-session context object."""
+from bisect import bisect_right
 from threading import Lock
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from .models import ReportEntry
 
@@ -16,18 +17,68 @@ class ScanSession:
 
     def __init__(self, initial_results: Optional[List] = None) -> None:
         self._results: List[ReportEntry] = list(initial_results or [])
+        self._by_file: Dict[str, ReportEntry] = {entry.file: entry for entry in self._results}
+        # Each result's sequence number (in add order, never reused), so the
+        # checkpoint position survives results being discarded
+        self._added = len(self._results)
+        self._sequence: List[int] = list(range(1, self._added + 1))
+        self._checkpointed = self._added
         self._lock = Lock()
 
     def add_result(self, entry: ReportEntry) -> int:
         """Append *entry* and return the new total count, both under the lock."""
         with self._lock:
+            self._added += 1
             self._results.append(entry)
+            self._sequence.append(self._added)
+            self._by_file[entry.file] = entry
             return len(self._results)
 
+    def find_result(self, file_path: str) -> Optional[ReportEntry]:
+        """Return the most recent entry recorded for *file_path*, or None."""
+        with self._lock:
+            return self._by_file.get(file_path)
+
+    def replace_result(self, entry: ReportEntry) -> bool:
+        """Swap the most recent entry for entry.file with *entry*; returns False if there is none."""
+        with self._lock:
+            for position in range(len(self._results) - 1, -1, -1):
+                if self._results[position].file == entry.file:
+                    self._results[position] = entry
+                    self._by_file[entry.file] = entry
+                    return True
+            return False
+
+    def discard_results(self, file_path: str) -> int:
+        """Remove every entry recorded for *file_path*; returns how many were removed."""
+        with self._lock:
+            kept = [position for position, entry in enumerate(self._results) if entry.file != file_path]
+            removed = len(self._results) - len(kept)
+            self._results[:] = [self._results[position] for position in kept]
+            self._sequence[:] = [self._sequence[position] for position in kept]
+            self._by_file.pop(file_path, None)
+            return removed
+
     def get_results(self) -> List[ReportEntry]:
         with self._lock:
             return list(self._results)
 
+    def take_checkpoint(self, batch_size: int) -> Optional[List[ReportEntry]]:
+        """Return the results added since the last checkpoint once there are *batch_size* of them, else None.
+
+        Copies only those results, so periodic checkpoints avoid copying the
+        whole list, and moves the checkpoint past them.
+        """
+        with self._lock:
+            start = bisect_right(self._sequence, self._checkpointed)
+            if len(self._results) - start < batch_size:
+                return None
+            self._checkpointed = self._added
+            return self._results[start:]
+
     def reset(self) -> None:
         with self._lock:
             self._results.clear()
+            self._sequence.clear()
+            self._by_file.clear()
+            self._checkpointed = self._added
@@ -0,0 +1,203 @@
+"""
+Per-class detection scores and bulk re-thresholding.
+ScoringEngine turns detector scores into a confidence and a detected flag
+using per-class thresholds and weights, for both scan entry points. Each
+result also keeps its raw class scores as a packed float32 vector over a
+class vocabulary, so a new threshold can be re-applied to a whole run with a
+few array operations instead of a rescan.
+"""
+
+import array
+from dataclasses import replace
+from threading import Lock
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from . import constants
+from .models import ReportEntry
+
+# Classes whose scores decide detection for each model; per-class thresholds may add others
+SCORED_CLASSES = {
+    constants.MODEL_NUDENET: constants.NUDITY_CLASSES,
+    constants.MODEL_HELLOZ_NSFW: frozenset({'nsfw'}),
+}
+
+
+def is_error_entry(entry: ReportEntry) -> bool:
+    return isinstance(entry.detected_classes, str) and entry.detected_classes.startswith('ERROR:')
+
+
+def pack_scores(scores: Mapping[str, float], class_index: Mapping[str, int]) -> bytes:
+    """Pack class scores into a float32 vector laid out by *class_index* (class -> column).
+
+    The vector stops at the last scored column, so results with no scores pack
+    to b'' and vectors written before the vocabulary grew stay valid.
+    """
+    if not scores:
+        return b''
+    vector = array.array('f', bytes(4 * (max(class_index[name] for name in scores) + 1)))
+    for name, score in scores.items():
+        vector[class_index[name]] = score
+    return vector.tobytes()
+
+
+def unpack_scores(blob: Optional[bytes], classes: Sequence[str]) -> Dict[str, float]:
+    """Inverse of pack_scores: {class: score} for the non-zero columns of *blob*."""
+    vector = np.frombuffer(blob or b'', dtype=np.float32)
+    return {classes[column]: float(vector[column]) for column in np.flatnonzero(vector)}
+
+
+def score_matrix(blobs: Sequence[Optional[bytes]], n_classes: int) -> np.ndarray:
+    """Stack packed score vectors into an (n, n_classes) float32 matrix; missing columns are zero."""
+    matrix = np.zeros((len(blobs), n_classes), dtype=np.float32)
+    lengths = np.fromiter((len(blob) if blob else 0 for blob in blobs), dtype=np.int64, count=len(blobs))
+    # Decode all vectors of one length with a single frombuffer call
+    for length in np.unique(lengths):
+        if not length:
+            continue
+        rows = np.flatnonzero(lengths == length)
+        width = int(length) // 4
+        packed = b''.join(blobs[row] for row in rows)
+        matrix[rows, :width] = np.frombuffer(packed, dtype=np.float32).reshape(len(rows), width)
+    return matrix
+
+
+class ScoringEngine:
+    """Applies per-class thresholds and weights to detector scores.
+
+    Class labels are mapped to column indices once; detections are scattered
+    into a dense per-class score vector, weighted, and compared against the
+    per-class limits in one vectorised step. The same engine scores a single
+    detection result at scan time and a whole score matrix on re-threshold,
+    so both give the same answer.
+
+    A class counts when the model scores it by default (SCORED_CLASSES) or it
+    has an entry in *class_thresholds*; its weight defaults to 1.0.
+    """
+
+    def __init__(self, model_name: str = constants.MODEL_NUDENET,
+                 threshold_percent: float = constants.DEFAULT_THRESHOLD_PERCENT,
+                 class_thresholds: Optional[Mapping[str, float]] = None,
+                 class_weights: Optional[Mapping[str, float]] = None, classes: Sequence[str] = ()) -> None:
+        self.model_name = model_name
+        self.threshold_percent = float(threshold_percent)
+        self.class_thresholds = dict(class_thresholds or {})
+        self.class_weights = dict(class_weights or {})
+        self.classes: List[str] = []
+        self._class_index: Dict[str, int] = {}
+        self._limits = np.empty(0, dtype=np.float64)
+        self._weights = np.empty(0, dtype=np.float64)
+        self._lock = Lock()
+        scored = SCORED_CLASSES.get(model_name, frozenset())
+        for name in (*classes, *sorted(scored), *self.class_thresholds):
+            self.class_index(name)
+
+    @classmethod
+    def from_config(cls, model_name: str, threshold_percent: float) -> 'ScoringEngine':
+        """Engine with the per-class thresholds and weights from the app config."""
+        class_thresholds, class_weights = constants.get_scoring_config(model_name)
+        return cls(model_name, threshold_percent, class_thresholds, class_weights)
+
+    def class_index(self, name: str) -> int:
+        """Return the column of class *name*, adding it to the vocabulary on first sight."""
+        index = self._class_index.get(name)
+        if index is not None:
+            return index
+        with self._lock:
+            if name not in self._class_index:
+                scored = name in SCORED_CLASSES.get(self.model_name, frozenset())
+                limit = self.class_thresholds.get(name, self.threshold_percent if scored else np.inf) / 100.0
+                # Rebind (not resize) so concurrent readers always see consistent arrays
+                self._limits = np.append(self._limits, limit)
+                self._weights = np.append(self._weights, self.class_weights.get(name, 1.0))
+                self.classes.append(name)
+                self._class_index[name] = len(self.classes) - 1
+            return self._class_index[name]
+
+    def class_vector(self, detection_result: Iterable[Mapping]) -> np.ndarray:
+        """Dense per-class scores (max per class) for one NudeNet detection result."""
+        records = list(detection_result or ())
+        labels = np.fromiter((self.class_index(str(r.get('label', ''))) for r in records), dtype=np.intp, count=len(records))
+        scores = np.fromiter((r.get('score', 0.0) or 0.0 for r in records), dtype=np.float64, count=len(records))
+        vector = np.zeros(len(self.classes), dtype=np.float64)
+        np.maximum.at(vector, labels, scores)
+        return vector
+
+    def score(self, detection_result: Iterable[Mapping]) -> Tuple[float, bool]:
+        """Return (confidence 0-1, nudity detected) for one NudeNet detection result."""
+        confidence, detected = self.score_matrix(self.class_vector(detection_result)[np.newaxis, :])
+        return float(confidence[0]), bool(detected[0])
+
+    def score_matrix(self, scores: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Score an (n, k) matrix whose columns are the first k engine classes.
+
+        Returns per row the highest weighted score among the counted classes
+        (0-1), and whether any counted class reaches its threshold.
+        """
+        width = scores.shape[1]
+        limits, weights = self._limits[:width], self._weights[:width]
+        counted = np.isfinite(limits)
+        if not counted.any():
+            return np.zeros(len(scores)), np.zeros(len(scores), dtype=bool)
+        weighted = np.clip(scores[:, counted] * weights[counted], 0.0, 1.0)
+        return weighted.max(axis=1), (weighted >= limits[counted]).any(axis=1)
+
+
+def apply_thresholds(scores: np.ndarray, classes: Sequence[str], model_names: Sequence[str], threshold_percent: float,
+                     class_thresholds: Optional[Mapping[str, float]] = None,
+                     class_weights: Optional[Mapping[str, float]] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Re-threshold a score matrix with one ScoringEngine per model.
+
+    Args:
+        scores: (n, k) class scores in the 0-1 range
+        classes: Class name of each of the k columns
+        model_names: Model that produced each of the n rows
+        threshold_percent: Threshold for the classes each model scores by default
+        class_thresholds: Optional {class: percent} overriding the threshold of a
+            class, or counting a class the model does not score by default
+        class_weights: Optional {class: weight} applied to scores before thresholding
+
+    Returns:
+        (confidence_percent, nudity_detected) arrays of length n.
+    """
+    model_names = np.asarray(model_names, dtype=object)
+    confidence = np.zeros(len(scores), dtype=np.float64)
+    detected = np.zeros(len(scores), dtype=bool)
+    for model_name in set(model_names.tolist()):
+        rows = model_names == model_name
+        engine = ScoringEngine(model_name, threshold_percent, class_thresholds, class_weights, classes=classes)
+        confidence[rows], detected[rows] = engine.score_matrix(scores[rows])
+    return np.round(confidence * 100, 2), detected
+
+
+def rethreshold_entries(entries: Iterable[ReportEntry], threshold_percent: float,
+                        class_thresholds: Optional[Mapping[str, float]] = None,
+                        class_weights: Optional[Mapping[str, float]] = None) -> List[ReportEntry]:
+    """Return copies of *entries* re-evaluated against new thresholds.
+
+    Scores come from each entry's detected_classes; error entries are
+    returned unchanged. Videos whose scan stopped at the first frame over the
+    old threshold are only re-scored on the frames that were classified.
+    """
+    entries = list(entries)
+    scored = [row for row, entry in enumerate(entries) if not is_error_entry(entry)]
+    class_index: Dict[str, int] = {}
+    blobs = []
+    for row in scored:
+        scores = entries[row].class_scores()
+        for name in scores:
+            class_index.setdefault(name, len(class_index))
+        blobs.append(pack_scores(scores, class_index))
+    classes = list(class_index)
+    confidence, detected = apply_thresholds(
+        score_matrix(blobs, len(classes)), classes, [entries[row].model_name for row in scored],
+        threshold_percent, class_thresholds, class_weights,
+    )
+    result = list(entries)
+    for position, row in enumerate(scored):
+        result[row] = replace(
+            entries[row], threshold_percent=float(threshold_percent),
+            confidence_percent=float(confidence[position]), nudity_detected=bool(detected[position]),
+        )
+    return result
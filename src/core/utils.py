@@ -11,35 +11,63 @@ Thread Safety:
 - All thread operations have explicit join() with timeout
 """
 
+import heapq
 import json
 import logging
 import os
 import pathlib
+import sqlite3
 import subprocess
 import sys
+import time
+from dataclasses import replace
 from datetime import datetime
+from itertools import count
 from queue import Queue
-from threading import Lock, Thread
-from typing import Optional, Tuple
-from weakref import WeakKeyDictionary
+from threading import Condition, Lock, Thread
+from typing import Dict, Iterator, List, Optional, Tuple
 
 try:
     from send2trash import send2trash
 except ImportError:
     send2trash = None
 
-from ..processing.media_processor import ThumbnailGenerator, detect_media_type, is_supported_file
+from ..processing.content_hash import find_duplicate_files
+from ..processing.image_stages import (  # noqa: F401 - re-exported for existing callers
+    NearDuplicateStage,
+    PrefilterStage,
+    apply_image_stages,
+    cascade_prefilter,
+    configure_image_stages,
+    get_phash_index_path,
+    load_phash_index,
+    save_phash_index,
+    skip_near_duplicates,
+    wrap_image_stage,
+)
+from ..processing.media_processor import (
+    ThumbnailGenerator,
+    detect_media_type,
+    frame_decoder_scope,
+    hold_frame_decoders,
+    is_supported_file,
+    release_frame_decoders,
+)
+from ..processing.work_cost import create_schedule
+from ..reporting.checkpoint_writer import queue_checkpoint, raise_checkpoint_error
 from ..reporting.report_manager import ReportManager
+from ..reporting.report_writer import end_report_run, forget_saved_entries, save_nudity_report
+from ..reporting.results_store import ResultsStore
 from . import constants
-from .models import ReportEntry, ScanConfig, SessionState
+from .folder_watcher import FolderWatcher
+from .models import ReportEntry, ScanConfig, ScanRunSummary, SessionState
 from .scan_session import ScanSession
+from .scoring import rethreshold_entries
 
 # ============================================================================
 # Public API (maintained for compatibility)
 # ============================================================================
 DEFAULT_REPORT_DIR = constants.DEFAULT_REPORT_DIR
-_checkpoint_writer_registry_lock = Lock()
-_checkpoint_writers = WeakKeyDictionary()
 
 
 def normalize_threshold(threshold_value) -> float:
@@ -65,13 +93,16 @@ def threshold_to_percent(threshold_value) -> float:
     return round(normalize_threshold(threshold_value) * 100, 2)
 
 
-def make_scan_config(source_folder='', model_name='nudenet', threshold_percent=60, theme_mode='system') -> dict:
+def make_scan_config(source_folder='', model_name='nudenet', threshold_percent=60, theme_mode='system',
+                     class_thresholds=None, class_weights=None) -> dict:
     """Create scan config dictionary."""
     config = ScanConfig(
         source_folder=source_folder,
         model_name=model_name,
         threshold_percent=threshold_to_percent(threshold_percent),
         theme_mode=theme_mode,
+        class_thresholds=dict(class_thresholds or {}),
+        class_weights=dict(class_weights or {}),
     )
     return config.to_dict()
 
@@ -102,43 +133,192 @@ def get_session_path(report_file_path: str) -> str:
     return ReportManager.get_session_path(report_file_path)
 
 
+def get_results_db_path(report_file_path: str) -> str:
+    """Get results store path for report file."""
+    return ReportManager.get_results_db_path(report_file_path)
+
+
 def load_report_entries(file_path: str) -> list:
-    """Load report entries from file."""
+    """Load report entries, from the run's results store when it exists."""
+    db_path = get_results_db_path(file_path)
+    if os.path.exists(db_path):
+        with ResultsStore(db_path) as store:
+            return [e.to_dict() for e in store.iter_entries()]
     entries = ReportManager.load_entries(file_path)
     return [e.to_dict() for e in entries]
 
 
-def save_nudity_report(report_data, file_path, session_state=None) -> None:
-    """Save report to Excel with session."""
-    if session_state is None:
-        session_state = create_session_state(results=get_detected_results(report_data))
+def get_session_report_path(file_path: str) -> str:
+    """Return the report workbook path for a saved report or session JSON path."""
+    if file_path.endswith(constants.XLSX_EXTENSION):
+        return file_path
+    return file_path.replace(constants.SESSION_FILE_SUFFIX, constants.XLSX_EXTENSION)
 
-    # Convert to ReportEntry objects
-    entries = []
-    for item in report_data:
-        if isinstance(item, dict):
-            entries.append(ReportEntry.from_dict(item))
-        else:
-            entries.append(item)
 
-    # Save report
-    ReportManager.save_entries(entries, file_path)
+def open_saved_session(file_path: str, chunk_size: int = constants.SESSION_LOAD_CHUNK_SIZE
+                       ) -> Tuple[ScanConfig, str, int, Iterator[List[ReportEntry]]]:
+    """Open a saved session for progressive loading.
 
-    # Save session
-    session_obj = SessionState.from_dict(session_state) if isinstance(session_state, dict) else session_state
-    ReportManager.save_session(session_obj, file_path)
+    Returns (scan config, report path, entry count, chunks of report entries).
+    For runs with a results store only the config is read up front, and the
+    chunks are streamed from the store without thumbnails (see
+    load_entry_thumbnail). Older runs are read from the session JSON and
+    workbook in full.
+    """
+    report_path = get_session_report_path(file_path)
+    db_path = get_results_db_path(report_path)
+    if os.path.exists(db_path):
+        with ResultsStore(db_path) as store:
+            return store.load_scan_config(), report_path, store.count(), _iter_store_chunks(db_path, chunk_size)
+
+    session_state = ReportManager.load_session(file_path)
+    entries = ReportManager.load_entries(report_path) if os.path.exists(report_path) else []
+    entries = entries or session_state.results
+    chunks = (entries[i:i + chunk_size] for i in range(0, len(entries), chunk_size))
+    return session_state.scan_config, report_path, len(entries), chunks
+
+
+def load_run_scan_config(file_path: str) -> ScanConfig:
+    """Return the scan config a saved run was made with, from its results store or session JSON."""
+    report_path = get_session_report_path(file_path)
+    db_path = get_results_db_path(report_path)
+    if os.path.exists(db_path):
+        with ResultsStore(db_path) as store:
+            return store.load_scan_config()
+    return ReportManager.load_session(file_path).scan_config
+
+
+def _iter_store_chunks(db_path: str, chunk_size: int) -> Iterator[List[ReportEntry]]:
+    with ResultsStore(db_path) as store:
+        chunk = []
+        for entry in store.iter_entries(include_thumbnails=False, batch_size=chunk_size):
+            chunk.append(entry)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def load_entry_thumbnail(report_path: str, file_path: str) -> str:
+    """Return one entry's stored base64 thumbnail from the run's results store ('' if none)."""
+    db_path = get_results_db_path(report_path)
+    if not os.path.exists(db_path):
+        return ''
+    try:
+        with ResultsStore(db_path) as store:
+            entry = store.get_entry(file_path)
+    except sqlite3.Error as e:
+        logging.warning('Could not read thumbnail for %s: %s', file_path, e)
+        return ''
+    return entry.thumbnail if entry else ''
+
+
+def copy_results_store(source_report_path: str, target_report_path: str) -> bool:
+    """Copy a run's results store to another report path; False if there is none to copy."""
+    source_db = get_results_db_path(source_report_path)
+    target_db = get_results_db_path(target_report_path)
+    if os.path.abspath(source_db) == os.path.abspath(target_db) or not os.path.exists(source_db):
+        return False
+    with ResultsStore(source_db) as store:
+        store.copy_to(target_db)
+    forget_saved_entries(target_db)
+    return True
+
+
+def rethreshold_report(file_path: str, threshold_percent: float, class_thresholds: Optional[Dict[str, float]] = None,
+                       class_weights: Optional[Dict[str, float]] = None, write_workbook: bool = True) -> Tuple[int, int]:
+    """Re-apply detection thresholds to a saved run without rescanning.
+
+    Runs with a results store are updated in place from the stored class
+    scores; older runs are re-scored from their report entries and saved with
+    a store. The session JSON and summary are exported again, and the
+    workbook unless write_workbook is False. Returns (detected count, total).
+    """
+    report_path = get_session_report_path(file_path)
+    db_path = get_results_db_path(report_path)
+    if not os.path.exists(db_path):
+        session_obj = ReportManager.load_session(file_path)
+        entries = ReportManager.load_entries(report_path) if os.path.exists(report_path) else session_obj.results
+        entries = rethreshold_entries(entries, threshold_percent, class_thresholds, class_weights)
+        session_obj.scan_config = replace(session_obj.scan_config, threshold_percent=float(threshold_percent),
+                                          class_thresholds=dict(class_thresholds or {}),
+                                          class_weights=dict(class_weights or {}))
+        session_obj.results = [entry for entry in entries if entry.nudity_detected]
+        save_nudity_report(entries, report_path, session_state=session_obj, write_workbook=write_workbook)
+        end_report_run(report_path)
+        return len(session_obj.results), len(entries)
+
+    forget_saved_entries(db_path)
+    with ResultsStore(db_path) as store:
+        detected = store.rethreshold(threshold_percent, class_thresholds, class_weights)
+        total = store.count()
+        session_obj = store.load_session_state()
+        if write_workbook:
+            store.export_xlsx(report_path)
+    ReportManager.save_session(session_obj, report_path)
+    ReportManager.save_summary(ScanRunSummary.from_session(session_obj, total_count=total), report_path)
+    return detected, total
+
+
+def load_scan_run_summary(file_path: str) -> ScanRunSummary:
+    """Load the scan history summary for a report.
+
+    Runs saved before summaries existed are summarized once from their results
+    store or session JSON, and the summary file is written for next time.
+    Unreadable runs give an empty summary.
+    """
+    summary = ReportManager.load_summary(file_path)
+    if summary is not None:
+        return summary
+    db_path = get_results_db_path(file_path)
+    session_path = ReportManager.get_session_path(file_path)
+    try:
+        if os.path.exists(db_path):
+            with ResultsStore(db_path) as store:
+                summary = store.summary()
+        elif os.path.exists(session_path):
+            with open(session_path, 'r', encoding='utf-8') as f:
+                summary = ScanRunSummary.from_session(SessionState.from_dict(json.load(f)))
+    except (OSError, ValueError, TypeError, AttributeError, sqlite3.Error) as e:
+        logging.warning('Could not summarize scan run %s: %s', file_path, e)
+    if summary is None:
+        return ScanRunSummary()
+    ReportManager.save_summary(summary, file_path)
+    return summary
 
 
 def load_scan_session(file_path: str) -> dict:
-    """Load session from file."""
+    """Load session from the run's results store, or from file for older runs."""
+    db_path = get_results_db_path(get_session_report_path(file_path))
+    if os.path.exists(db_path):
+        with ResultsStore(db_path) as store:
+            return store.load_session_state().to_dict()
     session = ReportManager.load_session(file_path)
     return session.to_dict()
 
 
 def load_existing_report(file_path: str) -> set:
-    """Get set of files already in report."""
-    entries = ReportManager.load_entries(file_path)
-    return {e.file for e in entries}
+    """Get set of files already in report (an indexed store query, or the File column)."""
+    db_path = get_results_db_path(file_path)
+    if os.path.exists(db_path):
+        with ResultsStore(db_path) as store:
+            return store.file_paths()
+    return ReportManager.load_file_paths(file_path)
+
+
+def export_report_csv(file_path: str, dest_path: str, nudity_detected: Optional[bool] = None) -> bool:
+    """Export a saved run to CSV from its results store, or from the workbook/session JSON of older runs."""
+    report_path = get_session_report_path(file_path)
+    db_path = get_results_db_path(report_path)
+    if os.path.exists(db_path):
+        with ResultsStore(db_path) as store:
+            return store.export_csv(dest_path, nudity_detected=nudity_detected)
+    entries = ReportManager.load_entries(report_path) if os.path.exists(report_path) else []
+    entries = entries or ReportManager.load_session(file_path).results
+    if nudity_detected is not None:
+        entries = [entry for entry in entries if entry.nudity_detected == nudity_detected]
+    return ReportManager.save_csv(entries, dest_path)
 
 
 # ============================================================================
@@ -340,6 +520,20 @@ def open_file_location(file_path: str, scan_root: str = '') -> Tuple[bool, str]:
 # ============================================================================
 # File Classification & Processing
 # ============================================================================
+class DeferredFile(Exception):
+    """Raised by a classifier when a file should be classified later instead of recorded as failed.
+
+    Remote detectors raise it while their service is overloaded. The scan
+    runners collect deferred files and classify them again once
+    *retry_after* seconds have passed.
+    """
+
+    def __init__(self, file_path: str, retry_after: float = 0.0, reason: str = '') -> None:
+        super().__init__(reason or f'{file_path} deferred')
+        self.file_path = file_path
+        self.retry_after = retry_after
+
+
 def process_file(file_path: str, classify_image, classify_video) -> None:
     """Process single file with appropriate classification function."""
     if not is_supported_file(file_path):
@@ -375,137 +569,505 @@ def count_supported_files(folder_path: str) -> int:
     return total
 
 
+def classify_files(
+    file_paths,
+    classify_image,
+    classify_video,
+    worker_count: int = constants.WORKER_THREAD_COUNT,
+    worker_timeout: int = constants.WORKER_THREAD_TIMEOUT,
+    max_deferred_rounds: int = constants.DEFERRED_MAX_ROUNDS,
+    schedule=None,
+    video_workers: Optional[int] = None,
+) -> None:
+    """Classify an iterable of file paths using worker threads.
+
+    Workers are started before *file_paths* is consumed, so a lazy iterable
+    (e.g. a directory walk) is processed while it is still being produced.
+    With a *schedule* (see WorkSchedule) each idle worker takes the queued
+    file with the lowest sort key instead of the oldest one, e.g. the most
+    expensive file first. Discovery then stays at most SCAN_LOOKAHEAD files
+    ahead of the workers, so the order applies within that window.
+
+    Images and videos wait in separate queues. *video_workers* of the
+    *worker_count* threads take videos first and the rest take images, so
+    a few long videos cannot hold every worker while images pile up. A
+    worker whose queue runs dry helps with the other one: video workers
+    take images at once, image workers take videos once discovery has
+    finished. Both pools call the same classifiers and so share their
+    detectors.
+
+    Files a classifier defers (DeferredFile) are classified again in a later
+    round, after the longest requested delay; files still deferred after
+    *max_deferred_rounds* rounds are logged and left for the next scan.
+
+    Args:
+        file_paths: Iterable of file paths to classify
+        classify_image: Image classification callable
+        classify_video: Video classification callable
+        worker_count: Number of concurrent worker threads
+        worker_timeout: Seconds to wait for each worker to finish
+        max_deferred_rounds: Rounds of retrying deferred files
+        schedule: Optional callable returning a sort key per file path
+        video_workers: Threads that take videos first (at most worker_count - 1);
+            None reads video_worker_count from the app config, 0 uses one shared pool
+    """
+    if worker_count < 1:
+        raise ValueError(f'worker_count must be at least 1, got {worker_count}')
+    if video_workers is None:
+        video_workers = constants.get_worker_pool_config()[0]
+    pools = _pool_sizes(worker_count, video_workers)
+
+    # Frame decode threads live for the scan and are shut down when it ends
+    with frame_decoder_scope():
+        deferred = _classify_round(file_paths, classify_image, classify_video, pools, worker_timeout, schedule)
+        for round_number in range(1, max_deferred_rounds + 1):
+            if not deferred:
+                return
+            delay = max(retry_after for _path, retry_after in deferred)
+            logging.warning('%d file(s) deferred by the detector; retry round %d in %.1fs', len(deferred), round_number, delay)
+            time.sleep(delay)
+            deferred = _classify_round([path for path, _ in deferred], classify_image, classify_video, pools, worker_timeout, schedule)
+    if deferred:
+        logging.warning('%d file(s) still deferred after %d retry round(s); they were left for the next scan',
+                        len(deferred), max_deferred_rounds)
+
+
+def work_key(schedule, file_path: str) -> tuple:
+    """Return *schedule*'s sort key for *file_path*; () (discovery order) without one or on error."""
+    if schedule is None:
+        return ()
+    try:
+        return tuple(schedule(file_path))
+    except Exception as e:
+        logging.debug('Could not estimate work for %s: %s', file_path, e)
+        return ()
+
+
+def _pool_sizes(worker_count: int, video_workers: int) -> Dict[str, int]:
+    """Split *worker_count* threads into image and video pools; the image pool always keeps one."""
+    videos = min(max(0, video_workers), worker_count - 1)
+    return {constants.MEDIA_TYPE_IMAGE: worker_count - videos, constants.MEDIA_TYPE_VIDEO: videos}
+
+
+def _media_queue(file_path: str) -> str:
+    """Queue for *file_path* by extension; process_file still verifies the content."""
+    if os.path.splitext(file_path)[1].lower() in constants.VIDEO_EXTENSIONS:
+        return constants.MEDIA_TYPE_VIDEO
+    return constants.MEDIA_TYPE_IMAGE
+
+
+class MediaQueues:
+    """Image and video work queues shared by the worker pools of one round.
+
+    Entries are (sort key, sequence, path) heaps; the sequence keeps equal
+    keys in discovery order. get() serves a worker from its own pool's
+    queue and lets it help with the other queue when its own is empty:
+    video workers take images straight away, image workers take videos only
+    once close() has been called (nothing more to discover) or the queues
+    are full. Without video workers every file goes into one queue. With a
+    *maxsize* put() blocks while that many files are queued.
+    """
+
+    def __init__(self, video_workers: int = 0, maxsize: int = 0) -> None:
+        self._heaps = {constants.MEDIA_TYPE_IMAGE: [], constants.MEDIA_TYPE_VIDEO: []}
+        self._sequence = count()
+        self._condition = Condition()
+        self._closed = False
+        self._shared = video_workers == 0
+        self.maxsize = maxsize
+
+    def _full(self) -> bool:
+        return 0 < self.maxsize <= len(self._heaps[constants.MEDIA_TYPE_IMAGE]) + len(self._heaps[constants.MEDIA_TYPE_VIDEO])
+
+    def put(self, file_path: str, key: tuple = ()) -> None:
+        pool = constants.MEDIA_TYPE_IMAGE if self._shared else _media_queue(file_path)
+        with self._condition:
+            while self._full():
+                self._condition.wait()
+            heapq.heappush(self._heaps[pool], (key, next(self._sequence), file_path))
+            self._condition.notify_all()
+
+    def close(self) -> None:
+        """Signal that no more files will be put; workers return None once both queues are empty."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def get(self, pool: str) -> Optional[str]:
+        """Block until there is a file for a worker of *pool*; None when the round is finished."""
+        other = constants.MEDIA_TYPE_VIDEO if pool == constants.MEDIA_TYPE_IMAGE else constants.MEDIA_TYPE_IMAGE
+        with self._condition:
+            while True:
+                if self._heaps[pool]:
+                    return self._pop(pool)
+                if self._heaps[other] and (pool == constants.MEDIA_TYPE_VIDEO or self._closed or self._full()):
+                    return self._pop(other)
+                if self._closed and not self._heaps[other]:
+                    return None
+                self._condition.wait()
+
+    def _pop(self, pool: str) -> str:
+        if self.maxsize:
+            self._condition.notify_all()  # Wake a put() waiting for room
+        return heapq.heappop(self._heaps[pool])[2]
+
+
+def _classify_round(file_paths, classify_image, classify_video, pools, worker_timeout,
+                    schedule=None) -> List[Tuple[str, float]]:
+    """Run one pass of classify_files; return the (path, retry_after) of deferred files."""
+    # A schedule orders the files within a window of SCAN_LOOKAHEAD queued files
+    queues = MediaQueues(pools[constants.MEDIA_TYPE_VIDEO], constants.SCAN_LOOKAHEAD if schedule is not None else 0)
+    deferred = []
+    deferred_lock = Lock()
+
+    def _worker(pool):
+        while True:
+            item = queues.get(pool)
+            if item is None:
+                break
+            try:
+                process_file(item, classify_image, classify_video)
+            except DeferredFile as deferral:
+                with deferred_lock:
+                    deferred.append((item, deferral.retry_after))
+            except Exception as e:
+                logging.error('Error processing file %s: %s', item, e)
+
+    # Start workers before queuing files so they can begin immediately.
+    workers = []
+    for pool, size in pools.items():
+        for index in range(size):
+            worker = Thread(target=_worker, args=(pool,), daemon=False, name=f'{pool}-worker-{index}')
+            worker.start()
+            workers.append(worker)
+
+    try:
+        # Stream files into the queues as they are discovered.
+        for file_path in file_paths:
+            queues.put(file_path, work_key(schedule, file_path))
+    finally:
+        # Let workers drain the queues and exit, even if directory
+        # traversal fails before all files are queued.
+        queues.close()
+
+    # Collect worker threads; apply timeout so a stuck worker is detected.
+    for worker in workers:
+        worker.join(timeout=worker_timeout)
+        if worker.is_alive():
+            logging.warning(
+                'Worker thread did not exit within %ds — '
+                'a detection may be stuck. Thread: %s',
+                worker_timeout,
+                worker.name,
+            )
+    with deferred_lock:
+        return list(deferred)
+
+
 def classify_files_in_folder(
     folder_path: str,
     classify_image,
     classify_video,
     worker_count: int = constants.WORKER_THREAD_COUNT,
     worker_timeout: int = constants.WORKER_THREAD_TIMEOUT,
-) -> None:
+    deduplicate: bool = False,
+    schedule=None,
+) -> dict:
     """Classify all supported files in folder using worker threads.
 
     Workers are started before directory traversal so they begin processing
     immediately as files are discovered (streaming discovery).
 
+    With *deduplicate* the whole tree is walked first and byte-identical
+    files are grouped (see find_duplicate_files); only one path per unique
+    content is queued. Pass the returned groups to record_duplicate_results()
+    once workers finish to fan each result out to its copies.
+
     Args:
         folder_path: Root folder to scan
         classify_image: Image classification callable
         classify_video: Video classification callable
         worker_count: Number of concurrent worker threads
         worker_timeout: Seconds to wait for each worker to finish
+        deduplicate: Classify each unique file content only once
+        schedule: Optional sort key per file; see classify_files
+
+    Returns:
+        Mapping of canonical file path to its skipped duplicate paths
+        (empty unless *deduplicate* is set)
     """
     if worker_count < 1:
         raise ValueError(f'worker_count must be at least 1, got {worker_count}')
 
     logging.debug('Starting classification in folder: %s', folder_path)
-    file_queue = Queue()
     os.makedirs(DEFAULT_REPORT_DIR, exist_ok=True)
 
+    duplicate_groups = {}
+    discovered = (
+        os.path.join(root, file_name)
+        for root, _, files in os.walk(folder_path)
+        for file_name in files
+    )
+    if deduplicate:
+        discovered, duplicate_groups = find_duplicate_files(discovered)
+    classify_files(discovered, classify_image, classify_video, worker_count, worker_timeout, schedule=schedule)
+    return duplicate_groups
+
+
+def record_duplicate_results(session: ScanSession, duplicate_groups: dict, report_path: str = '',
+                             existing_files=frozenset()) -> int:
+    """Copy each canonical file's result to its byte-identical duplicates.
+
+    A canonical file skipped because it is in *existing_files* (a resumed or
+    repeated run) has no result in *session*; its stored result in the
+    report at *report_path* is copied instead. Duplicates that already have
+    a row in that report are not added again.
+
+    Args:
+        session: ScanSession holding the canonical results
+        duplicate_groups: Mapping returned by classify_files_in_folder()
+        report_path: Report of the run *existing_files* was loaded from
+        existing_files: Paths already recorded in that report
+
+    Returns:
+        Number of duplicate entries added
+    """
+    added = 0
+    stored = None
+    for canonical, duplicates in (duplicate_groups or {}).items():
+        entry = session.find_result(canonical)
+        if entry is None and report_path and canonical in existing_files:
+            if stored is None:
+                stored = _StoredEntries(report_path)
+            entry = stored.get(canonical)
+        if entry is None:
+            logging.warning('No result for %s; its %d duplicate(s) were not recorded', canonical, len(duplicates))
+            continue
+        for duplicate in duplicates:
+            if duplicate in existing_files:
+                continue
+            session.add_result(replace(entry, file=duplicate, duplicate_of=canonical))
+            added += 1
+    return added
+
+
+class _StoredEntries:
+    """Looks up saved report entries by path, from the results store or else the workbook."""
+
+    def __init__(self, report_path: str) -> None:
+        self._db_path = get_results_db_path(report_path)
+        self._report_path = report_path
+        self._workbook = None
+
+    def get(self, file_path: str) -> Optional[ReportEntry]:
+        if os.path.exists(self._db_path):
+            with ResultsStore(self._db_path) as store:
+                return store.get_entry(file_path)
+        if self._workbook is None:
+            self._workbook = {entry.file: entry for entry in ReportManager.load_entries(self._report_path)}
+        return self._workbook.get(file_path)
+
+
+def start_folder_watcher(
+    folder_path: str,
+    debounce_seconds: float = constants.WATCH_DEBOUNCE_SECONDS,
+    poll_interval: float = constants.WATCH_POLL_INTERVAL,
+    use_inotify: bool = True,
+) -> FolderWatcher:
+    """Start recording changes under *folder_path* for a later watch_folder() call.
+
+    Start it before the initial scan of a watched folder so that files
+    created during the scan are not missed.
+    """
+    watcher = FolderWatcher(
+        [folder_path],
+        debounce_seconds=debounce_seconds,
+        poll_interval=poll_interval,
+        use_inotify=use_inotify,
+    )
+    watcher.start()
+    return watcher
+
+
+def watch_folder(
+    folder_path: str,
+    classify_image,
+    classify_video,
+    should_stop,
+    on_change=None,
+    on_flush=None,
+    worker_count: int = constants.WORKER_THREAD_COUNT,
+    debounce_seconds: float = constants.WATCH_DEBOUNCE_SECONDS,
+    poll_interval: float = constants.WATCH_POLL_INTERVAL,
+    save_interval: float = constants.WATCH_SAVE_INTERVAL,
+    use_inotify: bool = True,
+    watcher: Optional[FolderWatcher] = None,
+) -> int:
+    """Continuously classify files created, modified or moved into a folder.
+
+    Runs until *should_stop()* returns True. Changes are reported by a
+    FolderWatcher (inotify, or polling when unavailable) and debounced, then
+    each settled file goes through process_file() on a pool of worker threads.
+    Files already present when the watcher starts are not reported. To watch
+    after an initial scan, start the watcher before the scan (see
+    start_folder_watcher) and pass it as *watcher*: files created while the
+    scan runs, including in folders it has already walked, are then
+    classified once watching begins.
+
+    Args:
+        folder_path: Root folder to watch
+        classify_image: Image classification callable
+        classify_video: Video classification callable
+        should_stop: Zero-argument callable; watching ends once it returns True
+        on_change: Called with each changed path before it is queued, e.g. to
+            drop a stale result for a modified file
+        on_flush: Called with the number of files processed so far, at most
+            every *save_interval* seconds and once more when watching ends, so
+            results can be appended to the report incrementally
+        worker_count: Number of concurrent worker threads
+        debounce_seconds: Quiet period before a changed file is classified
+        poll_interval: Seconds between snapshots for the polling fallback
+        save_interval: Minimum seconds between on_flush calls
+        use_inotify: Try inotify before falling back to polling
+        watcher: Started FolderWatcher to take changes from; one is started
+            here when omitted. It is stopped when watching ends.
+
+    Returns:
+        Number of changed files processed
+    """
+    if worker_count < 1:
+        raise ValueError(f'worker_count must be at least 1, got {worker_count}')
+
+    file_queue = Queue()
     _SENTINEL = object()
+    deferrals: Dict[str, int] = {}
 
     def _worker():
         while True:
             item = file_queue.get()
-            if item is _SENTINEL:
-                file_queue.task_done()
-                break
             try:
+                if item is _SENTINEL:
+                    break
                 process_file(item, classify_image, classify_video)
+                deferrals.pop(item, None)
+            except DeferredFile as deferral:
+                # Re-queue before task_done() so the batch waits for the retry
+                deferrals[item] = deferrals.get(item, 0) + 1
+                if deferrals[item] <= constants.DEFERRED_MAX_ROUNDS:
+                    time.sleep(deferral.retry_after)
+                    file_queue.put(item)
+                else:
+                    deferrals.pop(item, None)
+                    logging.warning('Giving up on %s: %s', item, deferral)
             except Exception as e:
                 logging.error('Error processing file %s: %s', item, e)
             finally:
                 file_queue.task_done()
 
-    # Start workers before queuing files so they can begin immediately.
-    workers = []
-    for _ in range(worker_count):
-        worker = Thread(target=_worker, daemon=False)
+    workers = [Thread(target=_worker, daemon=False, name='watch-worker') for _ in range(worker_count)]
+    for worker in workers:
         worker.start()
-        workers.append(worker)
 
+    if watcher is None:
+        watcher = start_folder_watcher(folder_path, debounce_seconds, poll_interval, use_inotify)
+    processed = 0
+    flushed = 0
+    last_flush = time.monotonic()
+    hold_frame_decoders()
     try:
-        # Stream files into the queue as they are discovered.
-        for root, _, files in os.walk(folder_path):
-            for file_name in files:
-                file_queue.put(os.path.join(root, file_name))
+        while not should_stop():
+            changed = watcher.get_changes(timeout=0.5)
+            for file_path in changed:
+                if on_change is not None:
+                    on_change(file_path)
+                file_queue.put(file_path)
+            if changed:
+                # Wait for the batch so a file changed again meanwhile is
+                # re-queued only after its previous classification finished.
+                file_queue.join()
+                processed += len(changed)
+            if on_flush is not None and processed != flushed and time.monotonic() - last_flush >= save_interval:
+                on_flush(processed)
+                flushed = processed
+                last_flush = time.monotonic()
     finally:
-        # Send one sentinel per worker to signal completion, even if
-        # directory traversal fails before all files are queued.
+        watcher.stop()
         for _ in workers:
             file_queue.put(_SENTINEL)
+        for worker in workers:
+            worker.join(timeout=constants.WORKER_THREAD_TIMEOUT)
+        release_frame_decoders()
+        if on_flush is not None and processed != flushed:
+            on_flush(processed)
+    return processed
 
-    # Collect worker threads; apply timeout so a stuck worker is detected.
-    # We join workers *before* file_queue.join() so that a hung worker
-    # (one whose process_file() call never returns and never calls task_done())
-    # does not cause an indefinite block here.  Once all workers have exited
-    # they have called task_done() for every item they received, so a
-    # subsequent file_queue.join() will return immediately.
-    all_exited = True
-    for worker in workers:
-        worker.join(timeout=worker_timeout)
-        if worker.is_alive():
-            all_exited = False
-            logging.warning(
-                'Worker thread did not exit within %ds — '
-                'a detection may be stuck. Thread: %s',
-                worker_timeout,
-                worker.name,
-            )
 
-    if all_exited:
-        # All workers have finished; drain any residual unacknowledged items.
-        file_queue.join()
-    else:
-        logging.warning(
-            'Skipping file_queue.join() because one or more worker threads are still alive; '
-            'results may be incomplete.'
-        )
+def run_watch_mode(
+    folder_path: str,
+    classify_image,
+    classify_video,
+    session: ScanSession,
+    existing_files: set,
+    save_report,
+    **watch_options,
+) -> None:
+    """Watch *folder_path* from the CLI until interrupted with Ctrl+C.
 
+    A changed file that is already in the report (or was classified earlier
+    in this run) has its previous result dropped and is classified again.
+    *save_report* is called periodically and on exit to write the report.
+    Pass the watcher started before the initial scan as ``watcher=`` so
+    files created during that scan are classified too.
 
-# ============================================================================
-# Detection Result Handling
-# ============================================================================
-def _get_or_create_checkpoint_writer(session: ScanSession) -> dict:
-    with _checkpoint_writer_registry_lock:
-        writer_state = _checkpoint_writers.get(session)
-        if writer_state is not None:
-            return writer_state
+    Args:
+        folder_path: Root folder to watch
+        classify_image: Image classification callable
+        classify_video: Video classification callable
+        session: ScanSession results are recorded in
+        existing_files: Mutable set of already-reported paths the classifiers skip
+        save_report: Zero-argument callable that writes the current report
+        **watch_options: Extra keyword arguments passed to watch_folder()
+    """
+    def _on_change(file_path):
+        existing_files.discard(file_path)
+        if session.discard_results(file_path):
+            logging.info('Re-classifying modified file: %s', file_path)
 
-        writer_queue = Queue()
-        writer_errors = []
+    def _on_flush(count):
+        logging.info('Watch mode: %d changed file(s) processed, saving report', count)
+        save_report()
+
+    logging.info('Watching %s for new or changed files (Ctrl+C to stop)', folder_path)
+    try:
+        watch_folder(
+            folder_path,
+            classify_image,
+            classify_video,
+            should_stop=lambda: False,
+            on_change=_on_change,
+            on_flush=_on_flush,
+            **watch_options,
+        )
+    except KeyboardInterrupt:
+        logging.info('Watch mode stopped')
 
-        def _write_checkpoints():
-            while True:
-                checkpoint = writer_queue.get()
-                if checkpoint is None:
-                    break
-                entries, report_path = checkpoint
-                try:
-                    ReportManager.save_entries(entries, report_path)
-                except Exception as exc:
-                    writer_errors.append(exc)
-                    break
 
-        writer_thread = Thread(target=_write_checkpoints, daemon=True, name='checkpoint-writer')
-        writer_thread.start()
-        writer_state = {
-            'queue': writer_queue,
-            'errors': writer_errors,
-            'thread': writer_thread,
-        }
-        _checkpoint_writers[session] = writer_state
-        return writer_state
+# ============================================================================
+# Work Scheduling
+# ============================================================================
+def configure_schedule(frame_step: int = constants.VIDEO_FRAME_RATE):
+    """Return the WorkSchedule for the scan_order and scan_priority in the app config.
 
+    Returns None when files should run in discovery order.
+    """
+    order, priority = constants.get_scan_schedule_config()
+    return create_schedule(order, priority, frame_step)
 
-def _raise_checkpoint_writer_error(session: ScanSession) -> None:
-    with _checkpoint_writer_registry_lock:
-        writer_state = _checkpoint_writers.get(session)
-        if writer_state is None or not writer_state['errors']:
-            return
-        error = writer_state['errors'][0]
-    raise error
 
 
+# ============================================================================
+# Detection Result Handling
+# ============================================================================
 def handle_results(
     file_path: str,
     nudity_detected: bool,
@@ -516,13 +1078,14 @@ def handle_results(
     model_name: str = '',
     threshold_percent: float = constants.DEFAULT_THRESHOLD_PERCENT,
     report_dir: str = DEFAULT_REPORT_DIR,
+    duplicate_of: str = '',
 ) -> dict:
     """Handle detection results: create entry, generate thumbnail, and cache.
 
-    Every 500 entries a periodic checkpoint is written to disk. The snapshot of
-    current results is taken under the session lock (via session.get_results())
-    and queued onto a dedicated checkpoint-writer thread so worker threads never
-    perform workbook I/O inline.
+    Every RESULTS_STORE_BATCH_SIZE entries a periodic checkpoint inserts the new
+    entries into the run's results store. The batch is taken under the session
+    lock (via session.take_checkpoint()) and queued onto a dedicated
+    checkpoint-writer thread so worker threads never perform database I/O inline.
 
     Args:
         file_path: Original file path
@@ -534,11 +1097,12 @@ def handle_results(
         model_name: Detection model name
         threshold_percent: Detection threshold percentage
         report_dir: Report directory path
+        duplicate_of: File whose result was reused for this one, if any
 
     Returns:
         Report entry dictionary
     """
-    _raise_checkpoint_writer_error(session)
+    raise_checkpoint_error(session)
 
     # Generate thumbnail for detected items
     thumbnail = ''
@@ -561,16 +1125,16 @@ def handle_results(
         constants.RESULT_FIELD_CLASSES: json.dumps(raw_result, ensure_ascii=False) if not isinstance(raw_result, str) else raw_result,
         constants.RESULT_FIELD_THUMBNAIL: thumbnail,
         constants.RESULT_FIELD_DATE: datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        constants.RESULT_FIELD_DUPLICATE_OF: duplicate_of,
     }
     entry = ReportEntry.from_dict(entry_data)
-    count = session.add_result(entry)
-
-    # Periodically checkpoint — take a snapshot under the session lock, then
-    # queue workbook I/O onto a dedicated checkpoint writer thread.
-    if count % 500 == 0:
-        snapshot = session.get_results()  # brief lock acquire/copy/release
-        writer_state = _get_or_create_checkpoint_writer(session)
-        writer_state['queue'].put((snapshot, get_report_path(report_dir)))
-        _raise_checkpoint_writer_error(session)
+    session.add_result(entry)
+
+    # Periodically checkpoint — copy the entries added since the last checkpoint
+    # under the session lock, then queue the results-store insert onto a
+    # dedicated checkpoint writer thread.
+    batch = session.take_checkpoint(constants.RESULTS_STORE_BATCH_SIZE)
+    if batch is not None:
+        queue_checkpoint(session, batch, get_report_path(report_dir))
 
     return entry_data
@@ -0,0 +1,189 @@
+"""
+Minimal asyncio HTTP/1.1 client for remote detector backends.
+Uploads files as multipart/form-data over asyncio streams with keep-alive
+connection reuse, so hundreds of requests can be in flight from one thread.
+Only what the scoring services need is implemented: POST and GET,
+Content-Length and chunked response bodies, http and https with the
+system's default certificate store. Proxies and redirects are not
+followed, so endpoints must point at the services directly.
+"""
+
+import asyncio
+import json
+import ssl
+import uuid
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from ..core import constants
+
+
+class AsyncHttpError(OSError):
+    """Raised when a connection fails or a response cannot be parsed."""
+
+
+_EXCHANGE_ERRORS = (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError)
+
+
+class AsyncResponse:
+    """Status, headers and body of a completed request."""
+
+    def __init__(self, status_code: int, headers: Dict[str, str], body: bytes) -> None:
+        self.status_code = status_code
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        return json.loads(self.body)
+
+
+def encode_multipart(field: str, file_name: str, data: bytes,
+                     content_type: str = 'application/octet-stream') -> Tuple[str, bytes]:
+    """Return (content type header, body) for a single-file multipart/form-data upload."""
+    boundary = uuid.uuid4().hex
+    file_name = file_name.replace('"', '_').replace('\r', '_').replace('\n', '_')
+    head = (
+        f'--{boundary}\r\n'
+        f'Content-Disposition: form-data; name="{field}"; filename="{file_name}"\r\n'
+        f'Content-Type: {content_type}\r\n\r\n'
+    ).encode('utf-8')
+    return f'multipart/form-data; boundary={boundary}', head + data + f'\r\n--{boundary}--\r\n'.encode('ascii')
+
+
+class AsyncHttpClient:
+    """HTTP/1.1 client that keeps idle connections open for reuse.
+
+    At most *max_connections* requests are in flight at once; further
+    requests wait on a semaphore instead of opening more sockets. A request
+    is sent at most once: an idle connection the server has closed is
+    dropped before anything is written to it, and a failure after that is
+    raised for the caller's retry policy (see call_with_retry_async) to
+    handle.
+    """
+
+    def __init__(self, max_connections: int = constants.REMOTE_ASYNC_CONCURRENCY) -> None:
+        self.max_connections = max_connections
+        self._semaphore = asyncio.Semaphore(max_connections)
+        self._idle: Dict[Tuple[str, str, int], List[Tuple[asyncio.StreamReader, asyncio.StreamWriter]]] = defaultdict(list)
+        self._ssl_context: Optional[ssl.SSLContext] = None
+
+    async def post_file(self, url: str, field: str, file_name: str, data: bytes,
+                        timeout: float = constants.HELLOZ_NSFW_REQUEST_TIMEOUT) -> AsyncResponse:
+        """POST *data* as the file *field* of a multipart form."""
+        content_type, body = encode_multipart(field, file_name, data)
+        return await self.request('POST', url, body, {'Content-Type': content_type}, timeout)
+
+    async def get(self, url: str, timeout: float = constants.HELLOZ_NSFW_HEALTH_CHECK_TIMEOUT) -> AsyncResponse:
+        return await self.request('GET', url, b'', {}, timeout)
+
+    async def request(self, method: str, url: str, body: bytes = b'', headers: Optional[Dict[str, str]] = None,
+                      timeout: float = constants.HELLOZ_NSFW_REQUEST_TIMEOUT) -> AsyncResponse:
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            raise ValueError(f'Unsupported URL: {url}')
+        key = (parts.scheme, parts.hostname, parts.port or (443 if parts.scheme == 'https' else 80))
+        path = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+        head = f'{method} {path} HTTP/1.1\r\nHost: {parts.netloc}\r\nContent-Length: {len(body)}\r\n'
+        head += ''.join(f'{name}: {value}\r\n' for name, value in (headers or {}).items())
+        payload = (head + '\r\n').encode('latin-1') + body
+
+        async with self._semaphore:
+            connection = await self._take_idle(key)
+            try:
+                return await asyncio.wait_for(self._exchange(key, connection, payload), timeout)
+            except asyncio.TimeoutError as error:
+                raise AsyncHttpError(f'{method} {url} timed out after {timeout}s') from error
+            except _EXCHANGE_ERRORS as error:
+                raise AsyncHttpError(f'{method} {url} failed: {error}') from error
+
+    async def close(self) -> None:
+        connections = [conn for idle in self._idle.values() for conn in idle]
+        self._idle.clear()
+        for _reader, writer in connections:
+            writer.close()
+        for _reader, writer in connections:
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+    async def __aenter__(self) -> 'AsyncHttpClient':
+        return self
+
+    async def __aexit__(self, *_exc) -> None:
+        await self.close()
+
+    # ------------------------------------------------------------------
+
+    async def _take_idle(self, key):
+        idle = self._idle.get(key)
+        if idle:
+            # Let the loop process a close the server sent while the connection was idle
+            await asyncio.sleep(0)
+        while idle:
+            reader, writer = idle.pop()
+            if not writer.is_closing() and not reader.at_eof():
+                return reader, writer
+            writer.close()
+        return None
+
+    async def _open(self, key):
+        scheme, host, port = key
+        ssl_context = None
+        if scheme == 'https':
+            if self._ssl_context is None:
+                self._ssl_context = ssl.create_default_context()
+            ssl_context = self._ssl_context
+        return await asyncio.open_connection(host, port, ssl=ssl_context)
+
+    async def _exchange(self, key, connection, payload: bytes) -> AsyncResponse:
+        reader, writer = connection or await self._open(key)
+        keep = False
+        try:
+            writer.write(payload)
+            await writer.drain()
+            version, status_code, headers = await self._read_head(reader)
+            body = await self._read_body(reader, headers)
+            connection_header = headers.get('connection', '').lower()
+            persistent = connection_header == 'keep-alive' if version == 'HTTP/1.0' else connection_header != 'close'
+            # Bodies without a length end at EOF, so that connection cannot be reused
+            keep = persistent and ('content-length' in headers or headers.get('transfer-encoding', '').lower() == 'chunked')
+            return AsyncResponse(status_code, headers, body)
+        finally:
+            if keep:
+                self._idle[key].append((reader, writer))
+            else:
+                writer.close()
+
+    @staticmethod
+    async def _read_head(reader: asyncio.StreamReader) -> Tuple[str, int, Dict[str, str]]:
+        status_line = await reader.readuntil(b'\r\n')
+        parts = status_line.decode('latin-1').split(None, 2)
+        if len(parts) < 2 or not parts[0].startswith('HTTP/'):
+            raise ValueError(f'Malformed status line: {status_line!r}')
+        headers = {}
+        while True:
+            line = await reader.readuntil(b'\r\n')
+            if line == b'\r\n':
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        return parts[0], int(parts[1]), headers
+
+    @staticmethod
+    async def _read_body(reader: asyncio.StreamReader, headers: Dict[str, str]) -> bytes:
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int((await reader.readuntil(b'\r\n')).split(b';', 1)[0], 16)
+                if size == 0:
+                    # Skip trailers up to the terminating blank line
+                    while await reader.readuntil(b'\r\n') != b'\r\n':
+                        pass
+                    return b''.join(chunks)
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+        if 'content-length' in headers:
+            return await reader.readexactly(int(headers['content-length']))
+        return await reader.read()
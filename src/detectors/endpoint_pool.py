@@ -0,0 +1,186 @@
+"""
+Client-side load balancing across Helloz NSFW replicas.
+An EndpointPool routes each request to one of several scoring containers,
+tracking requests in flight, average latency and consecutive failures per
+endpoint. Endpoints that keep failing are ejected for a while and then
+re-admitted by a single probe request. The pool is shared by every worker
+of a scan (threads or coroutines), so load spreads across replicas and a
+dead replica stops receiving traffic for all of them at once.
+"""
+
+import logging
+import time
+from itertools import count
+from threading import Lock
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from ..core import constants
+
+logger = logging.getLogger(__name__)
+
+_LATENCY_SMOOTHING = 0.2  # Weight of the newest sample in the latency moving average
+
+
+class Endpoint:
+    """Routing state of one replica; only EndpointPool mutates it, under its lock."""
+
+    def __init__(self, url: str) -> None:
+        self.url = url
+        self.outstanding = 0
+        self.latency = None  # Moving average in seconds; None until the first response
+        self.failures = 0  # Consecutive failures
+        self.ejected_until = 0.0
+        self.requests = 0
+
+    def as_dict(self) -> dict:
+        return {
+            'url': self.url,
+            'outstanding': self.outstanding,
+            'latency': self.latency,
+            'failures': self.failures,
+            'ejected_until': self.ejected_until,
+            'requests': self.requests,
+        }
+
+
+class EndpointPool:
+    """Pick an endpoint per request and record how it went.
+
+    *policy* is HELLOZ_NSFW_BALANCE_LEAST_OUTSTANDING (fewest requests in
+    flight, latency breaking ties) or HELLOZ_NSFW_BALANCE_LATENCY (shortest
+    expected wait, i.e. requests in flight times average latency). After
+    *eject_after* consecutive failures (connection errors or 5xx) an
+    endpoint is skipped for *eject_seconds*; then one probe request is let
+    through, and a success re-admits it while a failure ejects it again.
+    """
+
+    def __init__(self, urls: Sequence[str], policy: str = constants.HELLOZ_NSFW_BALANCE_LEAST_OUTSTANDING,
+                 eject_after: int = constants.HELLOZ_NSFW_EJECT_AFTER_FAILURES,
+                 eject_seconds: float = constants.HELLOZ_NSFW_EJECT_SECONDS,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        if not urls:
+            raise ValueError('EndpointPool needs at least one URL')
+        if policy not in constants.SUPPORTED_HELLOZ_NSFW_BALANCE:
+            raise ValueError(f'Unsupported balance policy: {policy}')
+        self.endpoints: List[Endpoint] = [Endpoint(url) for url in dict.fromkeys(urls)]
+        self.policy = policy
+        self.eject_after = max(1, int(eject_after))
+        self.eject_seconds = eject_seconds
+        self._clock = clock
+        self._lock = Lock()
+        self._turn = count()  # Rotates the scan start so ties do not always favour the first endpoint
+
+    @property
+    def urls(self) -> Tuple[str, ...]:
+        return tuple(endpoint.url for endpoint in self.endpoints)
+
+    def acquire(self) -> Endpoint:
+        """Return the endpoint the next request should go to and count it as in flight.
+
+        When every endpoint is ejected the one due back soonest is used, so
+        requests keep flowing (and fail fast) instead of stalling.
+        """
+        with self._lock:
+            now = self._clock()
+            start = next(self._turn) % len(self.endpoints)
+            rotated = self.endpoints[start:] + self.endpoints[:start]
+            candidates = [endpoint for endpoint in rotated if self._admits(endpoint, now)]
+            if candidates:
+                endpoint = min(candidates, key=self._cost)
+            else:
+                endpoint = min(rotated, key=lambda e: e.ejected_until)
+            endpoint.outstanding += 1
+            endpoint.requests += 1
+            return endpoint
+
+    def release(self, endpoint: Endpoint, ok: bool, latency: float = None) -> None:
+        """Record the outcome of a request acquired from this pool."""
+        with self._lock:
+            endpoint.outstanding = max(0, endpoint.outstanding - 1)
+            if latency is not None:
+                endpoint.latency = latency if endpoint.latency is None else (
+                    _LATENCY_SMOOTHING * latency + (1 - _LATENCY_SMOOTHING) * endpoint.latency
+                )
+            if ok:
+                if endpoint.failures >= self.eject_after:
+                    logger.info('Helloz NSFW endpoint %s re-admitted', endpoint.url)
+                endpoint.failures = 0
+                endpoint.ejected_until = 0.0
+                return
+            endpoint.failures += 1
+            if endpoint.failures >= self.eject_after:
+                endpoint.ejected_until = self._clock() + self.eject_seconds
+                logger.warning(
+                    'Helloz NSFW endpoint %s ejected for %.0fs after %d consecutive failures',
+                    endpoint.url, self.eject_seconds, endpoint.failures,
+                )
+
+    def send(self, request: Callable[[str], object]):
+        """Call *request(url)* on the chosen endpoint and record the outcome.
+
+        A raised exception or a response with a 5xx status_code counts as a
+        failure; the response (or exception) is passed through unchanged.
+        """
+        endpoint = self.acquire()
+        started = self._clock()
+        try:
+            response = request(endpoint.url)
+        except BaseException:
+            self.release(endpoint, ok=False)
+            raise
+        self.release(endpoint, ok=_succeeded(response), latency=self._clock() - started)
+        return response
+
+    async def send_async(self, request):
+        """Coroutine counterpart of send: awaits *request(url)*."""
+        endpoint = self.acquire()
+        started = self._clock()
+        try:
+            response = await request(endpoint.url)
+        except BaseException:
+            self.release(endpoint, ok=False)
+            raise
+        self.release(endpoint, ok=_succeeded(response), latency=self._clock() - started)
+        return response
+
+    def snapshot(self) -> List[dict]:
+        """Per-endpoint routing state, for logging and status output."""
+        with self._lock:
+            return [endpoint.as_dict() for endpoint in self.endpoints]
+
+    # ------------------------------------------------------------------
+
+    def _admits(self, endpoint: Endpoint, now: float) -> bool:
+        if endpoint.failures < self.eject_after:
+            return True
+        # Ejected endpoints come back one probe at a time once their rest is over
+        return endpoint.ejected_until <= now and endpoint.outstanding == 0
+
+    def _cost(self, endpoint: Endpoint):
+        latency = endpoint.latency or 0.0  # Unmeasured endpoints are tried first
+        if self.policy == constants.HELLOZ_NSFW_BALANCE_LATENCY:
+            return (endpoint.outstanding + 1) * latency, endpoint.outstanding
+        return endpoint.outstanding, latency
+
+
+def _succeeded(response) -> bool:
+    return getattr(response, 'status_code', 200) < 500
+
+
+_shared_pools: Dict[tuple, EndpointPool] = {}
+_shared_lock = Lock()
+
+
+def shared_endpoint_pool(urls: Sequence[str]) -> EndpointPool:
+    """Return the process-wide pool for *urls* with the configured balance settings.
+
+    Scans against the same replicas share one pool, so health learned by one
+    scan (or one worker) applies to all of them.
+    """
+    policy, eject_after, eject_seconds = constants.get_helloz_nsfw_balance_config()
+    key = (tuple(urls), policy, eject_after, eject_seconds)
+    with _shared_lock:
+        pool = _shared_pools.get(key)
+        if pool is None:
+            pool = _shared_pools[key] = EndpointPool(urls, policy, eject_after, eject_seconds)
+        return pool
@@ -0,0 +1,324 @@
+"""
+Overload protection for remote detectors.
+A CircuitBreaker stops every worker from sending requests once the service
+keeps failing, and lets a single probe through after a cool-down. An
+AdaptiveLimiter caps requests in flight with AIMD: the limit grows by one
+per window of healthy responses and halves on a 5xx, a connection error or
+a response slower than the latency target. FlowControl combines the two and
+is shared by all workers talking to the same service, threads or coroutines.
+
+call_with_retry / call_with_retry_async retry failed requests with jittered
+exponential backoff, but never while the breaker is open: CircuitOpenError
+propagates so the caller can defer the file instead of recording an error.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from threading import Condition, Lock
+from typing import Callable, Dict, List, Optional
+
+from ..core import constants
+from ..core.utils import DeferredFile
+
+logger = logging.getLogger(__name__)
+
+BREAKER_CLOSED = 'closed'
+BREAKER_OPEN = 'open'
+BREAKER_HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of sending a request while the circuit breaker is open."""
+
+    def __init__(self, retry_after: float) -> None:
+        super().__init__(f'Remote detector unavailable; circuit open for another {retry_after:.1f}s')
+        self.retry_after = retry_after
+
+
+def response_ok(response) -> bool:
+    """True unless *response* has a 5xx status_code."""
+    return getattr(response, 'status_code', 200) < 500
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker.
+
+    Closed: requests flow. After *failure_threshold* consecutive failures it
+    opens and rejects requests for *reset_seconds*; then it is half-open and
+    admits one probe. A successful probe closes it, a failed one re-opens it;
+    requests admitted before the breaker opened do not change its state
+    when they complete.
+    """
+
+    def __init__(self, failure_threshold: int = constants.HELLOZ_NSFW_BREAKER_FAILURES,
+                 reset_seconds: float = constants.HELLOZ_NSFW_BREAKER_RESET_SECONDS,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_seconds = reset_seconds
+        self._clock = clock
+        self._lock = Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._probe = None  # Token of the half-open probe in flight
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state(self._clock())
+
+    def retry_after(self) -> float:
+        """Seconds until the breaker admits a probe; 0 when closed."""
+        with self._lock:
+            if self._opened_at is None:
+                return 0.0
+            return max(0.0, self._opened_at + self.reset_seconds - self._clock())
+
+    def admit(self) -> Optional[object]:
+        """Claim permission to send one request; raises CircuitOpenError when refused.
+
+        Returns a probe token when the request is the half-open probe, else
+        None; pass it back to record() with the outcome.
+        """
+        with self._lock:
+            now = self._clock()
+            state = self._state(now)
+            if state == BREAKER_CLOSED:
+                return None
+            if state == BREAKER_HALF_OPEN and self._probe is None:
+                self._probe = object()
+                return self._probe
+            raise CircuitOpenError(max(0.0, self._opened_at + self.reset_seconds - now) or self.reset_seconds)
+
+    def record(self, ok: bool, token: Optional[object] = None) -> None:
+        """Record the outcome of a request; *token* is what admit() returned for it."""
+        with self._lock:
+            probe = token is not None and token is self._probe
+            if probe:
+                self._probe = None
+            elif self._opened_at is not None:
+                # Only the probe decides whether an open breaker closes or re-opens
+                return
+            if ok:
+                if self._opened_at is not None:
+                    logger.info('Remote detector recovered; circuit closed')
+                self._failures = 0
+                self._opened_at = None
+                return
+            self._failures += 1
+            if probe or (self._opened_at is None and self._failures >= self.failure_threshold):
+                self._opened_at = self._clock()
+                logger.warning(
+                    'Remote detector failing (%d consecutive failures); pausing requests for %.0fs',
+                    self._failures, self.reset_seconds,
+                )
+
+    def _state(self, now: float) -> str:
+        if self._opened_at is None:
+            return BREAKER_CLOSED
+        if now - self._opened_at >= self.reset_seconds:
+            return BREAKER_HALF_OPEN
+        return BREAKER_OPEN
+
+
+class AdaptiveLimiter:
+    """AIMD limit on requests in flight, usable from threads and coroutines.
+
+    A healthy response (below *latency_target* seconds) raises the limit by
+    1/limit, i.e. by one per window of requests; a failure or a slow response
+    multiplies it by *decrease_ratio*, at most once per window so one burst
+    of failures does not collapse it to the minimum.
+    """
+
+    def __init__(self, maximum: int, minimum: int = 1,
+                 latency_target: float = constants.HELLOZ_NSFW_LATENCY_TARGET,
+                 decrease_ratio: float = 0.5) -> None:
+        self.maximum = max(1, int(maximum))
+        self.minimum = max(1, min(int(minimum), self.maximum))
+        self.latency_target = latency_target
+        self.decrease_ratio = decrease_ratio
+        self.limit = float(self.maximum)
+        self.in_flight = 0
+        self._since_decrease = self.maximum
+        self._condition = Condition()
+        self._async_waiters: List[asyncio.Future] = []
+
+    def _try_acquire(self) -> bool:
+        if self.in_flight < max(self.minimum, int(self.limit)):
+            self.in_flight += 1
+            return True
+        return False
+
+    def acquire(self) -> None:
+        """Block the calling thread until a request slot is free."""
+        with self._condition:
+            while not self._try_acquire():
+                self._condition.wait()
+
+    async def acquire_async(self) -> None:
+        """Wait, without blocking the event loop, until a request slot is free."""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._condition:
+                if self._try_acquire():
+                    return
+                waiter = loop.create_future()
+                self._async_waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                with self._condition:
+                    if waiter in self._async_waiters:
+                        self._async_waiters.remove(waiter)
+                raise
+
+    def release(self, ok: bool, latency: float = None) -> None:
+        """Free a slot and adjust the limit from the outcome of its request."""
+        with self._condition:
+            self.in_flight = max(0, self.in_flight - 1)
+            self._since_decrease += 1
+            if ok and (latency is None or latency <= self.latency_target):
+                self.limit = min(float(self.maximum), self.limit + 1.0 / self.limit)
+            elif self._since_decrease >= self.limit:
+                self.limit = max(float(self.minimum), self.limit * self.decrease_ratio)
+                self._since_decrease = 0
+                logger.info('Remote detector concurrency reduced to %d', int(self.limit))
+            free = max(0, max(self.minimum, int(self.limit)) - self.in_flight)
+            self._condition.notify(free)
+            waiters, self._async_waiters = self._async_waiters[:free], self._async_waiters[free:]
+        for waiter in waiters:
+            waiter.get_loop().call_soon_threadsafe(_wake, waiter)
+
+
+def _wake(waiter: asyncio.Future) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class FlowControl:
+    """Circuit breaker plus adaptive concurrency around every request to one service."""
+
+    def __init__(self, breaker: CircuitBreaker, limiter: AdaptiveLimiter,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.breaker = breaker
+        self.limiter = limiter
+        self._clock = clock
+
+    @property
+    def is_open(self) -> bool:
+        """True while requests are being refused (open, or half-open with a probe in flight)."""
+        return self.breaker.state != BREAKER_CLOSED
+
+    def call(self, request: Callable[[], object]):
+        """Send *request()* under the breaker and limiter; raises CircuitOpenError when refused."""
+        token = self.breaker.admit()
+        self.limiter.acquire()
+        started = self._clock()
+        ok = False
+        try:
+            response = request()
+            ok = response_ok(response)
+            return response
+        finally:
+            self.limiter.release(ok, self._clock() - started)
+            self.breaker.record(ok, token)
+
+    async def call_async(self, request):
+        """Coroutine counterpart of call: awaits *request()*."""
+        token = self.breaker.admit()
+        try:
+            await self.limiter.acquire_async()
+        except BaseException:
+            self.breaker.record(False, token)
+            raise
+        started = self._clock()
+        ok = False
+        try:
+            response = await request()
+            ok = response_ok(response)
+            return response
+        finally:
+            self.limiter.release(ok, self._clock() - started)
+            self.breaker.record(ok, token)
+
+
+def defer_if_overloaded(file_path: str, error: Exception, flow: FlowControl = None) -> Optional[DeferredFile]:
+    """Return a DeferredFile for *file_path* when *error* came from an overloaded service, else None.
+
+    That is a CircuitOpenError, or any failure while *flow*'s breaker is open
+    (it opened while the file was being retried).
+    """
+    if isinstance(error, CircuitOpenError):
+        return DeferredFile(file_path, error.retry_after, str(error))
+    if flow is not None and flow.is_open:
+        return DeferredFile(file_path, flow.breaker.retry_after(), str(error))
+    return None
+
+
+def _backoff_delay(backoff: float, attempt: int) -> float:
+    # Jitter spreads retries from many workers instead of synchronising them
+    return backoff * (2 ** attempt) * random.uniform(0.5, 1.0)
+
+
+def call_with_retry(request: Callable[[], object], flow: FlowControl = None,
+                    retries: int = constants.HELLOZ_NSFW_MAX_RETRIES,
+                    backoff: float = constants.HELLOZ_NSFW_RETRY_BACKOFF):
+    """Call *request()* until it returns a response below 500; raises on retry exhaustion.
+
+    Retries on 5xx responses and on OSError (which covers requests'
+    RequestException and AsyncHttpError). With *flow* every attempt goes
+    through its breaker and limiter, and CircuitOpenError is raised as soon
+    as the breaker refuses an attempt.
+    """
+    last_exc = None
+    for attempt in range(retries):
+        try:
+            response = flow.call(request) if flow is not None else request()
+            if response.status_code < 500:
+                return response
+            logger.warning('HTTP %s on attempt %d/%d, retrying…', response.status_code, attempt + 1, retries)
+        except OSError as exc:
+            last_exc = exc
+            logger.warning('Request failed on attempt %d/%d: %s', attempt + 1, retries, exc)
+        if attempt < retries - 1:
+            time.sleep(_backoff_delay(backoff, attempt))
+    raise last_exc or RuntimeError(f'HTTP service unavailable after {retries} retries')
+
+
+async def call_with_retry_async(request, flow: FlowControl = None,
+                                retries: int = constants.HELLOZ_NSFW_MAX_RETRIES,
+                                backoff: float = constants.HELLOZ_NSFW_RETRY_BACKOFF):
+    """Coroutine counterpart of call_with_retry: awaits *request()*."""
+    last_exc = None
+    for attempt in range(retries):
+        try:
+            response = await (flow.call_async(request) if flow is not None else request())
+            if response.status_code < 500:
+                return response
+            logger.warning('HTTP %s on attempt %d/%d, retrying…', response.status_code, attempt + 1, retries)
+        except OSError as exc:
+            last_exc = exc
+            logger.warning('Request failed on attempt %d/%d: %s', attempt + 1, retries, exc)
+        if attempt < retries - 1:
+            await asyncio.sleep(_backoff_delay(backoff, attempt))
+    raise last_exc or RuntimeError(f'HTTP service unavailable after {retries} retries')
+
+
+_shared: Dict[tuple, FlowControl] = {}
+_shared_lock = Lock()
+
+
+def shared_flow_control(key) -> FlowControl:
+    """Return the process-wide FlowControl for the service identified by *key*, with configured limits."""
+    failures, reset_seconds, latency_target = constants.get_helloz_nsfw_flow_config()
+    maximum = constants.get_remote_concurrency()
+    cache_key = (key, failures, reset_seconds, latency_target, maximum)
+    with _shared_lock:
+        flow = _shared.get(cache_key)
+        if flow is None:
+            flow = _shared[cache_key] = FlowControl(
+                CircuitBreaker(failures, reset_seconds),
+                AdaptiveLimiter(maximum, latency_target=latency_target),
+            )
+        return flow
@@ -1,7 +1,8 @@
+import asyncio
 import logging
 import os
 import sys
-import time
+from functools import partial
 
 import requests
 
@@ -9,58 +10,79 @@ from ..core import constants
 from ..core.models import ReportEntry
 from ..core.scan_session import ScanSession
 from ..core.utils import (
+    apply_image_stages,
     classify_files_in_folder,
+    configure_image_stages,
+    configure_schedule,
     create_session_state,
+    end_report_run,
     get_detected_results,
     get_report_path,
     handle_results,
     load_existing_report,
     make_scan_config,
     normalize_threshold,
+    record_duplicate_results,
+    run_watch_mode,
     save_nudity_report,
+    save_phash_index,
+    start_folder_watcher,
 )
-from ..processing.media_processor import FrameExtractor, detect_media_type
+from ..processing.media_processor import FrameExtractor, close_frames, detect_media_type, prefetch_frames, shared_frame_decoder
+from ..processing.upload_transform import read_upload, shared_upload_transform
+from .endpoint_pool import EndpointPool, shared_endpoint_pool
+from .flow_control import call_with_retry, call_with_retry_async, defer_if_overloaded, shared_flow_control
+from .registry import EXECUTION_ASYNC, get_backend, scan_folder_async
 
 logger = logging.getLogger(__name__)
 
 
+def get_endpoint_pool():
+    """Return the shared EndpointPool over the configured Helloz NSFW replicas."""
+    return shared_endpoint_pool(constants.get_helloz_nsfw_urls())
+
+
+def get_flow_control(pool=None):
+    """Return the shared FlowControl (circuit breaker and adaptive limit) for the Helloz NSFW service."""
+    return shared_flow_control((pool or get_endpoint_pool()).urls)
+
+
+def get_upload_transform():
+    """Return the shared pre-upload transform, or None when uploads are sent unchanged."""
+    return shared_upload_transform()
+
+
+def _send(url, request):
+    """Call *request* with *url*, or route it through *url* when that is an EndpointPool."""
+    if isinstance(url, EndpointPool):
+        return url.send(request)
+    return request(url)
+
+
 def _post_with_retry(url, files, timeout,
                      retries=constants.HELLOZ_NSFW_MAX_RETRIES,
-                     backoff=constants.HELLOZ_NSFW_RETRY_BACKOFF):
-    """POST with exponential backoff; raises on retry exhaustion.
+                     backoff=constants.HELLOZ_NSFW_RETRY_BACKOFF,
+                     flow=None):
+    """POST with jittered exponential backoff; raises on retry exhaustion.
 
     Returns the first response whose status code is below 500.
     Retries on 5xx responses and on RequestException (network errors).
     Rewinds any file-like objects in `files` before each attempt so that
-    repeated tries always send the full body.
+    repeated tries always send the full body. *url* may be an EndpointPool,
+    in which case every attempt is routed (a retry usually lands on another
+    replica). With *flow* (a FlowControl) attempts wait for the adaptive
+    limit, and CircuitOpenError is raised while the breaker is open.
     """
-    last_exc = None
-    for attempt in range(retries):
+    def attempt():
         # Rewind file handles before each attempt so retries send the full body.
         for _key, value in files.items():
             # Support plain file objects and (filename, fileobj[, content_type]) tuples.
             obj = value[1] if isinstance(value, tuple) else value
             if hasattr(obj, 'seek'):
                 obj.seek(0)
-        try:
-            response = requests.post(url, files=files, timeout=timeout)
-            if response.status_code < 500:
-                return response
-            logger.warning(
-                'HTTP %s on attempt %d/%d, retrying\u2026',
-                response.status_code, attempt + 1, retries,
-            )
-        except requests.exceptions.RequestException as exc:
-            last_exc = exc
-            logger.warning(
-                'Request failed on attempt %d/%d: %s',
-                attempt + 1, retries, exc,
-            )
-        if attempt < retries - 1:
-            time.sleep(backoff * (2 ** attempt))
-    raise last_exc or RuntimeError(
-        f'HTTP service unavailable after {retries} retries'
-    )
+        return _send(url, lambda target: requests.post(target, files=files, timeout=timeout))
+
+    return call_with_retry(attempt, flow, retries, backoff)
 
 
 def _record_error(file_path, error, model_name, threshold_percent, session):
@@ -99,7 +121,15 @@ def extract_frames(file_path, frame_rate=constants.VIDEO_FRAME_RATE):
 
 
 def make_classify_image(existing_files, threshold_value, threshold_percent, session):
-    """Factory: return a classify_image function closed over the given parameters."""
+    """Factory: return a classify_image function closed over the given parameters.
+
+    While the service is overloaded (circuit breaker open) files are
+    deferred with DeferredFile instead of recorded as errors. Uploads go
+    through the configured pre-upload transform (see get_upload_transform).
+    """
+    upload_url = get_endpoint_pool()
+    flow = get_flow_control(upload_url)
+    transform = get_upload_transform()
 
     def classify_image(file_path):
         if file_path in existing_files:
@@ -107,8 +137,8 @@ def make_classify_image(existing_files, threshold_value, threshold_percent, sess
             return
 
         try:
-            with open(file_path, 'rb') as image_file:
-                response = _post_with_retry(constants.get_helloz_nsfw_url(), files={'file': image_file}, timeout=constants.HELLOZ_NSFW_REQUEST_TIMEOUT)
+            upload = read_upload(file_path, transform)
+            response = _post_with_retry(upload_url, files={'file': upload}, timeout=constants.HELLOZ_NSFW_REQUEST_TIMEOUT, flow=flow)
 
             if response.status_code != 200:
                 raise RuntimeError(f'Unexpected HTTP {response.status_code} for {file_path}')
@@ -126,6 +156,10 @@ def make_classify_image(existing_files, threshold_value, threshold_percent, sess
                 threshold_percent=threshold_percent,
             )
         except Exception as error:
+            deferral = defer_if_overloaded(file_path, error, flow)
+            if deferral is not None:
+                logger.warning('Deferring %s: %s', file_path, error)
+                raise deferral from error
             logger.error('Error classifying image %s: %s', file_path, error)
             _record_error(file_path, error, constants.MODEL_HELLOZ_NSFW, threshold_percent, session)
 
@@ -145,15 +179,19 @@ def make_classify_video(existing_files, threshold_value, threshold_percent, sess
             temp_prefix=constants.FRAME_TEMP_DIR_PREFIX_CLI_HELLOZ_NSFW,
         )
         frame_error_count = 0
-        upload_url = constants.get_helloz_nsfw_url()
+        upload_url = get_endpoint_pool()
+        flow = get_flow_control(upload_url)
+        transform = get_upload_transform()
+        frames = None
         try:
+            frames = prefetch_frames(extractor.iter_frames(file_path), shared_frame_decoder())
             frame_scores = []
             max_confidence = 0.0
 
-            for frame_path in extractor.iter_frames(file_path):
+            for frame_path in frames:
                 try:
-                    with open(frame_path, 'rb') as image_file:
-                        response = _post_with_retry(upload_url, files={'file': image_file}, timeout=constants.HELLOZ_NSFW_REQUEST_TIMEOUT)
+                    upload = read_upload(frame_path, transform)
+                    response = _post_with_retry(upload_url, files={'file': upload}, timeout=constants.HELLOZ_NSFW_REQUEST_TIMEOUT, flow=flow)
                     if response.status_code != 200:
                         logger.error('Failed to classify frame %s. HTTP status: %s', frame_path, response.status_code)
                         frame_error_count += 1
@@ -166,6 +204,8 @@ def make_classify_video(existing_files, threshold_value, threshold_percent, sess
                     if max_confidence >= threshold_value:
                         break
                 except Exception as frame_error:
+                    if defer_if_overloaded(file_path, frame_error, flow) is not None:
+                        raise
                     logger.warning('Failed to classify frame %s: %s', frame_path, frame_error)
                     frame_error_count += 1
 
@@ -183,30 +223,192 @@ def make_classify_video(existing_files, threshold_value, threshold_percent, sess
                 threshold_percent=threshold_percent,
             )
         except Exception as error:
+            deferral = defer_if_overloaded(file_path, error, flow)
+            if deferral is not None:
+                logger.warning('Deferring %s: %s', file_path, error)
+                raise deferral from error
             logger.error('Error classifying video %s: %s', file_path, error)
             _record_error(file_path, error, constants.MODEL_HELLOZ_NSFW, threshold_percent, session)
         finally:
+            close_frames(frames)
             extractor.cleanup()
 
     return classify_video
 
 
+async def _post_with_retry_async(client, url, file_name, data, timeout,
+                                 retries=constants.HELLOZ_NSFW_MAX_RETRIES,
+                                 backoff=constants.HELLOZ_NSFW_RETRY_BACKOFF,
+                                 flow=None):
+    """Async counterpart of _post_with_retry on an AsyncHttpClient; raises on retry exhaustion.
+
+    *url* may be an EndpointPool and *flow* a FlowControl, as for _post_with_retry.
+    """
+    def attempt():
+        if isinstance(url, EndpointPool):
+            return url.send_async(lambda target: client.post_file(target, 'file', file_name, data, timeout=timeout))
+        return client.post_file(url, 'file', file_name, data, timeout=timeout)
+
+    return await call_with_retry_async(attempt, flow, retries, backoff)
+
+
+async def _score_upload(client, url, file_path, executor, flow=None, transform=None,
+                        timeout=constants.HELLOZ_NSFW_REQUEST_TIMEOUT):
+    """Read (and transform) *file_path* off the loop, upload it and return (result, nsfw score)."""
+    loop = asyncio.get_running_loop()
+    file_name, data = await loop.run_in_executor(executor, read_upload, file_path, transform)
+    response = await _post_with_retry_async(client, url, file_name, data, timeout, flow=flow)
+    if response.status_code != 200:
+        raise RuntimeError(f'Unexpected HTTP {response.status_code} for {file_path}')
+    result = response.json()
+    return result, float(result.get('data', {}).get('nsfw', 0.0))
+
+
+def make_classify_image_async(client, executor, existing_files, threshold_value, threshold_percent, session,
+                              upload_url=None, request_timeout=constants.HELLOZ_NSFW_REQUEST_TIMEOUT, transform=None):
+    """Factory: coroutine counterpart of make_classify_image for the asyncio pipeline.
+
+    Uploads go through *client*; file reads, thumbnails and error entries
+    (libmagic) run on *executor*. *upload_url* (an EndpointPool) and
+    *transform* default to the configured ones.
+    """
+    upload_url = upload_url or get_endpoint_pool()
+    flow = get_flow_control(upload_url)
+    transform = transform or get_upload_transform()
+
+    async def classify_image(file_path):
+        if file_path in existing_files:
+            logger.info('Skipping already scanned file: %s', file_path)
+            return
+
+        loop = asyncio.get_running_loop()
+        try:
+            result, confidence_score = await _score_upload(client, upload_url, file_path, executor, flow, transform, request_timeout)
+            await loop.run_in_executor(executor, partial(
+                handle_results,
+                file_path,
+                confidence_score >= threshold_value,
+                result,
+                session=session,
+                confidence_score=confidence_score,
+                media_type=constants.MEDIA_TYPE_IMAGE,
+                model_name=constants.MODEL_HELLOZ_NSFW,
+                threshold_percent=threshold_percent,
+            ))
+        except Exception as error:
+            deferral = defer_if_overloaded(file_path, error, flow)
+            if deferral is not None:
+                logger.warning('Deferring %s: %s', file_path, error)
+                raise deferral from error
+            logger.error('Error classifying image %s: %s', file_path, error)
+            await loop.run_in_executor(
+                executor, _record_error, file_path, error, constants.MODEL_HELLOZ_NSFW, threshold_percent, session,
+            )
+
+    return classify_image
+
+
+def make_classify_video_async(client, executor, existing_files, threshold_value, threshold_percent, session,
+                              upload_url=None, request_timeout=constants.HELLOZ_NSFW_REQUEST_TIMEOUT, transform=None):
+    """Factory: coroutine counterpart of make_classify_video for the asyncio pipeline.
+
+    Frames are decoded one at a time on *executor* and uploaded in order,
+    stopping at the first frame over the threshold. Options are as for
+    make_classify_image_async.
+    """
+    upload_url = upload_url or get_endpoint_pool()
+    flow = get_flow_control(upload_url)
+    transform = transform or get_upload_transform()
+
+    async def classify_video(file_path):
+        if file_path in existing_files:
+            logger.info('Skipping already scanned file: %s', file_path)
+            return
+
+        loop = asyncio.get_running_loop()
+        extractor = FrameExtractor(
+            frame_rate=constants.VIDEO_FRAME_RATE,
+            temp_prefix=constants.FRAME_TEMP_DIR_PREFIX_CLI_HELLOZ_NSFW,
+        )
+        frames = extractor.iter_frames(file_path)
+        frame_error_count = 0
+        try:
+            frame_scores = []
+            max_confidence = 0.0
+
+            while True:
+                frame_path = await loop.run_in_executor(executor, next, frames, None)
+                if frame_path is None:
+                    break
+                try:
+                    _result, confidence_score = await _score_upload(client, upload_url, frame_path, executor, flow, transform, request_timeout)
+                except Exception as frame_error:
+                    if defer_if_overloaded(file_path, frame_error, flow) is not None:
+                        raise
+                    logger.warning('Failed to classify frame %s: %s', frame_path, frame_error)
+                    frame_error_count += 1
+                    continue
+                max_confidence = max(max_confidence, confidence_score)
+                frame_scores.append({'frame': os.path.basename(frame_path), 'unsafe_score': confidence_score})
+                if max_confidence >= threshold_value:
+                    break
+
+            if frame_error_count > 0 and not frame_scores:
+                raise RuntimeError(f'All {frame_error_count} frame(s) failed classification')
+
+            await loop.run_in_executor(executor, partial(
+                handle_results,
+                file_path,
+                max_confidence >= threshold_value,
+                frame_scores,
+                session=session,
+                confidence_score=max_confidence,
+                media_type=constants.MEDIA_TYPE_VIDEO,
+                model_name=constants.MODEL_HELLOZ_NSFW,
+                threshold_percent=threshold_percent,
+            ))
+        except Exception as error:
+            deferral = defer_if_overloaded(file_path, error, flow)
+            if deferral is not None:
+                logger.warning('Deferring %s: %s', file_path, error)
+                raise deferral from error
+            logger.error('Error classifying video %s: %s', file_path, error)
+            await loop.run_in_executor(
+                executor, _record_error, file_path, error, constants.MODEL_HELLOZ_NSFW, threshold_percent, session,
+            )
+        finally:
+            # Close the frame generator (releasing the capture) on the executor as well
+            await loop.run_in_executor(executor, lambda: (frames.close(), extractor.cleanup()))
+
+    return classify_video
+
+
 def _check_server_reachable(timeout=constants.HELLOZ_NSFW_HEALTH_CHECK_TIMEOUT):
-    """Return True when the Helloz NSFW server responds with a non-5xx status."""
-    try:
-        r = requests.get(constants.get_helloz_nsfw_connection_check_url(), timeout=timeout)
-        return r.status_code < 500
-    except requests.exceptions.RequestException:
-        return False
+    """Return True when a Helloz NSFW server responds with a non-5xx status.
 
+    With several replicas configured, one reachable replica is enough; the
+    endpoint pool routes around the others.
+    """
+    reachable = False
+    for check_url in constants.get_helloz_nsfw_endpoints() or [constants.get_helloz_nsfw_connection_check_url()]:
+        try:
+            r = requests.get(check_url, timeout=timeout)
+            ok = r.status_code < 500
+        except requests.exceptions.RequestException:
+            ok = False
+        if not ok:
+            logger.warning('Helloz NSFW server not reachable at %s', check_url)
+        reachable = reachable or ok
+    return reachable
 
-def main():
+
+def main(watch=False):
     logging.info('Starting Helloz NSFW CLI scan')
     if not _check_server_reachable():
         logging.error(
             'Helloz NSFW server is not reachable at %s. '
             'Start the Docker service and retry.',
-            constants.get_helloz_nsfw_connection_check_url(),
+            ', '.join(constants.get_helloz_nsfw_endpoints() or [constants.get_helloz_nsfw_connection_check_url()]),
         )
         sys.exit(1)
     report_path = get_report_path()
@@ -226,8 +428,38 @@ def main():
     classify_image = make_classify_image(existing_files, threshold_value, threshold_percent, session)
     classify_video = make_classify_video(existing_files, threshold_value, threshold_percent, session)
 
+    image_stages, phash_index = configure_image_stages(session, constants.MODEL_HELLOZ_NSFW, threshold_percent)
+    classify_image = apply_image_stages(classify_image, image_stages, existing_files)
+
     logger.debug('User input folder: %s', folder_to_classify)
-    classify_files_in_folder(folder_to_classify, classify_image, classify_video)
+    # Watch from before the scan so files created while it runs are not missed
+    watcher = start_folder_watcher(folder_to_classify) if watch else None
+    backend = get_backend(constants.MODEL_HELLOZ_NSFW)
+    schedule = configure_schedule()
+    if backend.execution_strategy() == EXECUTION_ASYNC:
+        duplicate_groups = asyncio.run(scan_folder_async(
+            backend,
+            folder_to_classify,
+            session,
+            threshold_percent,
+            image_stages=image_stages,
+            existing_files=existing_files,
+            deduplicate=constants.get_exact_duplicate_skip(),
+            schedule=schedule,
+        ))
+    else:
+        duplicate_groups = classify_files_in_folder(
+            folder_to_classify,
+            classify_image,
+            classify_video,
+            worker_count=backend.worker_count(constants.WORKER_THREAD_COUNT),
+            deduplicate=constants.get_exact_duplicate_skip(),
+            schedule=schedule,
+        )
+    record_duplicate_results(session, duplicate_groups, report_path, existing_files)
+    transform = get_upload_transform()
+    if transform is not None:
+        logger.info(transform.stats.summary())
 
     all_results = session.get_results()
     error_count = sum(
@@ -242,10 +474,20 @@ def main():
             error_count,
         )
 
-    session_state = create_session_state(scan_config=scan_config, results=get_detected_results(all_results))
-    save_nudity_report(all_results, report_path, session_state=session_state)
-    logger.info('Report saved to %s', report_path)
+    def save_report():
+        if phash_index is not None:
+            save_phash_index(phash_index)
+        all_results = session.get_results()
+        session_state = create_session_state(scan_config=scan_config, results=get_detected_results(all_results))
+        save_nudity_report(all_results, report_path, session_state=session_state)
+        logger.info('Report saved to %s', report_path)
+
+    save_report()
+
+    if watch:
+        run_watch_mode(folder_to_classify, classify_image, classify_video, session, existing_files, save_report, watcher=watcher)
+    end_report_run(report_path)
 
 
 if __name__ == '__main__':
-    main()
+    main(watch='--watch' in sys.argv[1:])
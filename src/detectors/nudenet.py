@@ -1,23 +1,34 @@
 import logging
 import os
+import sys
 
 from nudenet import NudeDetector
 
 from ..core import constants
 from ..core.models import ReportEntry
 from ..core.scan_session import ScanSession
+from ..core.scoring import ScoringEngine
 from ..core.utils import (
+    apply_image_stages,
     classify_files_in_folder,
+    configure_image_stages,
+    configure_schedule,
     create_session_state,
+    end_report_run,
     get_detected_results,
     get_report_path,
     handle_results,
     load_existing_report,
     make_scan_config,
     normalize_threshold,
+    record_duplicate_results,
+    run_watch_mode,
     save_nudity_report,
+    save_phash_index,
+    start_folder_watcher,
 )
-from ..processing.media_processor import FrameExtractor, detect_media_type
+from ..processing.media_processor import FrameExtractor, close_frames, detect_media_type, prefetch_frames, shared_frame_decoder
+from .registry import get_backend
 
 logger = logging.getLogger(__name__)
 
@@ -41,13 +52,10 @@ def simplify_nudenet_results(detection_result):
     ]
 
 
-def get_nudenet_confidence(detection_result):
-    class_scores = [
-        record.get("score", 0.0)
-        for record in detection_result
-        if record.get("label") in constants.NUDITY_CLASSES_BROAD
-    ]
-    return max(class_scores, default=0.0)
+def get_nudenet_confidence(detection_result, engine=None):
+    """Return the highest (weighted) score among the classes *engine* counts, 0-1."""
+    engine = engine or ScoringEngine(constants.MODEL_NUDENET)
+    return engine.score(detection_result)[0]
 
 
 def _record_error(file_path, error, threshold_percent, session):
@@ -66,21 +74,13 @@ def _record_error(file_path, error, threshold_percent, session):
     session.add_result(entry)
 
 
-def main():
-    report_path = get_report_path()
-    existing_files = load_existing_report(report_path)
-    detector = NudeDetector()
-    session = ScanSession()
+def make_classify_image(detector, existing_files, threshold_value, threshold_percent, session, engine=None):
+    """Factory: return a classify_image function closed over the given parameters.
 
-    folder_to_classify = input('Enter the path to the folder: ').strip()
-    threshold_percent = prompt_threshold_percent()
-    threshold_value = normalize_threshold(threshold_percent)
-    scan_config = make_scan_config(
-        source_folder=folder_to_classify,
-        model_name=constants.MODEL_NUDENET,
-        threshold_percent=threshold_percent,
-        theme_mode=constants.THEME_SYSTEM,
-    )
+    Detections are scored by *engine* (default: the app config's per-class
+    thresholds and weights at *threshold_percent*).
+    """
+    engine = engine or ScoringEngine.from_config(constants.MODEL_NUDENET, threshold_percent)
 
     def classify_image(file_path):
         if file_path in existing_files:
@@ -89,8 +89,7 @@ def main():
 
         try:
             detection_result = detector.detect(file_path)
-            confidence_score = get_nudenet_confidence(detection_result)
-            nudity_detected = confidence_score >= threshold_value
+            confidence_score, nudity_detected = engine.score(detection_result)
             simplified_results = simplify_nudenet_results(detection_result)
             handle_results(
                 file_path,
@@ -106,6 +105,17 @@ def main():
             logger.error('Error classifying image %s: %s', file_path, error)
             _record_error(file_path, error, threshold_percent, session)
 
+    return classify_image
+
+
+def make_classify_video(detector, existing_files, threshold_value, threshold_percent, session, engine=None):
+    """Factory: return a classify_video function closed over the given parameters.
+
+    Frames are scored by *engine* like make_classify_image; scanning stops at
+    the first frame that is detected.
+    """
+    engine = engine or ScoringEngine.from_config(constants.MODEL_NUDENET, threshold_percent)
+
     def classify_video(file_path):
         if file_path in existing_files:
             logger.info('Skipping already scanned file: %s', file_path)
@@ -115,21 +125,26 @@ def main():
             frame_rate=constants.VIDEO_FRAME_RATE,
             temp_prefix=constants.FRAME_TEMP_DIR_PREFIX_CLI_NUDENET,
         )
+        frames = None
         try:
+            frames = prefetch_frames(extractor.iter_frames(file_path), shared_frame_decoder())
             detection_results = []
             max_confidence = 0.0
+            nudity_detected = False
 
-            for frame_path in extractor.iter_frames(file_path):
+            for frame_path in frames:
                 frame_result = detector.detect(frame_path)
                 simplified_frame = simplify_nudenet_results(frame_result)
                 detection_results.append({'frame': os.path.basename(frame_path), 'detections': simplified_frame})
-                max_confidence = max(max_confidence, get_nudenet_confidence(frame_result))
-                if max_confidence >= threshold_value:
+                frame_confidence, frame_detected = engine.score(frame_result)
+                max_confidence = max(max_confidence, frame_confidence)
+                if frame_detected:
+                    nudity_detected = True
                     break
 
             handle_results(
                 file_path,
-                max_confidence >= threshold_value,
+                nudity_detected,
                 detection_results,
                 session=session,
                 confidence_score=max_confidence,
@@ -141,10 +156,49 @@ def main():
             logger.error('Error classifying video %s: %s', file_path, error)
             _record_error(file_path, error, threshold_percent, session)
         finally:
+            close_frames(frames)
             extractor.cleanup()
 
+    return classify_video
+
+
+def main(watch=False):
+    report_path = get_report_path()
+    existing_files = load_existing_report(report_path)
+    detector = NudeDetector()
+    session = ScanSession()
+
+    folder_to_classify = input('Enter the path to the folder: ').strip()
+    threshold_percent = prompt_threshold_percent()
+    threshold_value = normalize_threshold(threshold_percent)
+    engine = ScoringEngine.from_config(constants.MODEL_NUDENET, threshold_percent)
+    scan_config = make_scan_config(
+        source_folder=folder_to_classify,
+        model_name=constants.MODEL_NUDENET,
+        threshold_percent=threshold_percent,
+        theme_mode=constants.THEME_SYSTEM,
+        class_thresholds=engine.class_thresholds,
+        class_weights=engine.class_weights,
+    )
+
+    classify_image = make_classify_image(detector, existing_files, threshold_value, threshold_percent, session, engine)
+    classify_video = make_classify_video(detector, existing_files, threshold_value, threshold_percent, session, engine)
+
+    image_stages, phash_index = configure_image_stages(session, constants.MODEL_NUDENET, threshold_percent)
+    classify_image = apply_image_stages(classify_image, image_stages, existing_files)
+
     logger.debug('User input folder: %s', folder_to_classify)
-    classify_files_in_folder(folder_to_classify, classify_image, classify_video)
+    # Watch from before the scan so files created while it runs are not missed
+    watcher = start_folder_watcher(folder_to_classify) if watch else None
+    duplicate_groups = classify_files_in_folder(
+        folder_to_classify,
+        classify_image,
+        classify_video,
+        worker_count=get_backend(constants.MODEL_NUDENET).worker_count(constants.WORKER_THREAD_COUNT),
+        deduplicate=constants.get_exact_duplicate_skip(),
+        schedule=configure_schedule(),
+    )
+    record_duplicate_results(session, duplicate_groups, report_path, existing_files)
 
     all_results = session.get_results()
     error_count = sum(
@@ -157,10 +211,21 @@ def main():
             '%d file(s) could not be classified — check report for ERROR entries.',
             error_count,
         )
-    session_state = create_session_state(scan_config=scan_config, results=get_detected_results(all_results))
-    save_nudity_report(all_results, report_path, session_state=session_state)
-    logger.info('Report saved to %s', report_path)
+
+    def save_report():
+        if phash_index is not None:
+            save_phash_index(phash_index)
+        all_results = session.get_results()
+        session_state = create_session_state(scan_config=scan_config, results=get_detected_results(all_results))
+        save_nudity_report(all_results, report_path, session_state=session_state)
+        logger.info('Report saved to %s', report_path)
+
+    save_report()
+
+    if watch:
+        run_watch_mode(folder_to_classify, classify_image, classify_video, session, existing_files, save_report, watcher=watcher)
+    end_report_run(report_path)
 
 
 if __name__ == '__main__':
-    main()
+    main(watch='--watch' in sys.argv[1:])
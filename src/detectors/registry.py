@@ -0,0 +1,199 @@
+"""
+Detector backend registry.
+Each detection model is described by a DetectorBackend: how to load it, how
+to build the classify_image / classify_video callables for a scan, and what
+it can do (BackendCapabilities). Scan runners look backends up by model name
+and let the capabilities decide how to execute them, so a new model is added
+by registering one backend instead of extending every scan entry point.
+"""
+
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from threading import Lock
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+from ..core import constants
+from ..core.async_pipeline import classify_folder_async
+from ..core.scan_session import ScanSession
+from ..core.utils import normalize_threshold
+from .async_http import AsyncHttpClient
+
+EXECUTION_SERIAL = 'serial'  # One call at a time
+EXECUTION_THREADS = 'threads'  # Concurrent calls from a thread pool
+EXECUTION_ASYNC = 'async'  # Coroutines on the asyncio pipeline (remote backends)
+
+
+@dataclass(frozen=True)
+class BackendCapabilities:
+    """What a detector backend supports; scan runners pick an execution strategy from it."""
+    thread_safe: bool = True  # One loaded model may be called from several threads at once
+    remote: bool = False  # Scores over the network, so calls are I/O-bound
+
+
+class DetectorBackend:
+    """Base class for a detection model.
+
+    Subclasses set *name* and *capabilities* and implement make_classifiers;
+    load_model returns the object make_classifiers needs (None for remote
+    backends). Loaded models are cached by the caller, e.g. DetectorPool.
+    """
+
+    name = ''
+    capabilities = BackendCapabilities()
+
+    def load_model(self) -> Any:
+        return None
+
+    def make_classifiers(self, model: Any, session: ScanSession, threshold_percent: float,
+                         existing_files=frozenset()) -> Tuple[Callable, Callable]:
+        """Return (classify_image, classify_video) recording results into *session*."""
+        raise NotImplementedError
+
+    def make_async_classifiers(self, model: Any, session: ScanSession, threshold_percent: float,
+                               client, executor, existing_files=frozenset()) -> Tuple[Callable, Callable]:
+        """Return coroutine (classify_image, classify_video) for the asyncio pipeline.
+
+        *client* is the AsyncHttpClient requests go through and *executor*
+        runs blocking work. Only remote backends need to implement this.
+        """
+        raise NotImplementedError
+
+    @property
+    def supports_async(self) -> bool:
+        return type(self).make_async_classifiers is not DetectorBackend.make_async_classifiers
+
+    def execution_strategy(self) -> str:
+        if self.capabilities.remote and self.supports_async:
+            return EXECUTION_ASYNC
+        return EXECUTION_THREADS if self.capabilities.thread_safe else EXECUTION_SERIAL
+
+    def worker_count(self, configured: int) -> int:
+        """Number of workers to run this backend with, given the configured count.
+
+        Backends that are not thread-safe get one worker. Local models are
+        CPU-bound, so more workers than CPUs only add contention and the
+        count is capped (and logged) at the CPU count; remote backends wait
+        on the network and use the configured count as is.
+        """
+        configured = max(1, int(configured))
+        if not self.capabilities.thread_safe:
+            return 1
+        if self.capabilities.remote:
+            return configured
+        cpus = os.cpu_count() or 1
+        if configured > cpus:
+            logging.info('Running %s with %d workers (one per CPU) instead of the configured %d', self.name, cpus, configured)
+            return cpus
+        return configured
+
+    def guard(self, classifier: Callable) -> Callable:
+        """Serialise calls to *classifier* when the backend is not thread-safe."""
+        if self.capabilities.thread_safe:
+            return classifier
+        lock = Lock()
+
+        def guarded(file_path):
+            with lock:
+                return classifier(file_path)
+
+        return guarded
+
+
+class NudeNetBackend(DetectorBackend):
+    """Local NudeNet ONNX detector; one loaded model is shared by all worker threads."""
+
+    name = constants.MODEL_NUDENET
+    capabilities = BackendCapabilities(thread_safe=True)
+
+    def load_model(self):
+        from nudenet import NudeDetector
+        return NudeDetector()
+
+    def make_classifiers(self, model, session, threshold_percent, existing_files=frozenset()):
+        from . import nudenet
+        threshold_value = normalize_threshold(threshold_percent)
+        return (
+            nudenet.make_classify_image(model, existing_files, threshold_value, threshold_percent, session),
+            nudenet.make_classify_video(model, existing_files, threshold_value, threshold_percent, session),
+        )
+
+
+class HellozNsfwBackend(DetectorBackend):
+    """Helloz NSFW HTTP service; nothing is loaded locally."""
+
+    name = constants.MODEL_HELLOZ_NSFW
+    capabilities = BackendCapabilities(thread_safe=True, remote=True)
+
+    def make_classifiers(self, model, session, threshold_percent, existing_files=frozenset()):
+        from . import helloz_nsfw
+        threshold_value = normalize_threshold(threshold_percent)
+        return (
+            helloz_nsfw.make_classify_image(existing_files, threshold_value, threshold_percent, session),
+            helloz_nsfw.make_classify_video(existing_files, threshold_value, threshold_percent, session),
+        )
+
+    def make_async_classifiers(self, model, session, threshold_percent, client, executor, existing_files=frozenset()):
+        from . import helloz_nsfw
+        threshold_value = normalize_threshold(threshold_percent)
+        return (
+            helloz_nsfw.make_classify_image_async(client, executor, existing_files, threshold_value, threshold_percent, session),
+            helloz_nsfw.make_classify_video_async(client, executor, existing_files, threshold_value, threshold_percent, session),
+        )
+
+
+_BACKENDS: Dict[str, DetectorBackend] = {}
+_registry_lock = Lock()
+
+
+def register_backend(backend: DetectorBackend) -> DetectorBackend:
+    """Register *backend* under its name, replacing any backend of the same name."""
+    if not backend.name:
+        raise ValueError('Detector backend must have a name')
+    with _registry_lock:
+        _BACKENDS[backend.name] = backend
+    return backend
+
+
+def get_backend(name: str) -> DetectorBackend:
+    """Return the backend registered as *name*.
+
+    Raises:
+        ValueError: If no backend has that name
+    """
+    backend: Optional[DetectorBackend] = _BACKENDS.get(name)
+    if backend is None:
+        raise ValueError(f'Unsupported model: {name}')
+    return backend
+
+
+def backend_names() -> Tuple[str, ...]:
+    """Names of all registered backends, in registration order."""
+    return tuple(_BACKENDS)
+
+
+async def scan_folder_async(backend: DetectorBackend, folder_path: str, session: ScanSession, threshold_percent: float,
+                            image_stages: Sequence = (), existing_files=frozenset(), deduplicate: bool = False,
+                            concurrency: Optional[int] = None, schedule=None) -> dict:
+    """Scan *folder_path* with *backend* on the asyncio pipeline.
+
+    Up to *concurrency* (default: the remote_concurrency config) requests are
+    in flight over one AsyncHttpClient; blocking work shares one small
+    thread pool. *schedule* orders the work as in classify_files. Returns
+    the duplicate groups of classify_folder_async.
+    """
+    concurrency = concurrency or constants.get_remote_concurrency()
+    with ThreadPoolExecutor(thread_name_prefix='scan-io') as executor:
+        async with AsyncHttpClient(concurrency) as client:
+            classify_image, classify_video = backend.make_async_classifiers(
+                backend.load_model(), session, threshold_percent, client, executor, existing_files,
+            )
+            return await classify_folder_async(
+                folder_path, classify_image, classify_video, concurrency, executor,
+                image_stages, existing_files, deduplicate, schedule,
+            )
+
+
+register_backend(NudeNetBackend())
+register_backend(HellozNsfwBackend())
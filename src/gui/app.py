@@ -14,13 +14,12 @@ import gi
 
 gi.require_version('Gtk', '4.0')
 gi.require_version('Adw', '1')
-from gi.repository import Adw, Gio, GLib, Gtk
+from gi.repository import Adw, GLib, Gtk
 
 from ..core import constants
 from ..core.utils import get_report_path
 from .dialogs import DialogsMixin
 from .preview import PreviewMixin
-from .result_item import ResultItem
 from .results import ResultsMixin
 from .scan_history import ScanHistoryMixin
 from .scanning import ScanningMixin
@@ -84,6 +83,13 @@ class NudityDetectorWindow(
             self._video_frame_rate = max(1, int(cfg.get('video_frame_rate', constants.VIDEO_FRAME_RATE)))
         except (ValueError, TypeError):
             self._video_frame_rate = constants.VIDEO_FRAME_RATE
+        self._exact_duplicate_skip = bool(cfg.get('exact_duplicate_skip', False))
+        self._near_duplicate_skip = bool(cfg.get('near_duplicate_skip', False))
+        try:
+            self._near_duplicate_max_distance = max(0, int(cfg.get('near_duplicate_max_distance', constants.NEAR_DUPLICATE_MAX_DISTANCE)))
+        except (ValueError, TypeError):
+            self._near_duplicate_max_distance = constants.NEAR_DUPLICATE_MAX_DISTANCE
+        self._watch_after_scan = bool(cfg.get('watch_after_scan', False))
 
         self.is_processing = False
         self.processing_thread = None
@@ -323,6 +329,83 @@ class NudityDetectorWindow(
         detect_timeout_help.set_hexpand(True)
         pg.attach(detect_timeout_help, 2, 2, 1, 1)
 
+        exact_dup_label = Gtk.Label(label='Skip Exact Duplicates')
+        exact_dup_label.set_xalign(0)
+        pg.attach(exact_dup_label, 0, 3, 1, 1)
+
+        self.exact_duplicate_switch = Gtk.Switch()
+        self.exact_duplicate_switch.set_active(self._exact_duplicate_skip)
+        self.exact_duplicate_switch.set_halign(Gtk.Align.START)
+        pg.attach(self.exact_duplicate_switch, 1, 3, 1, 1)
+
+        exact_dup_help = Gtk.Label(
+            label='Classify byte-identical files once and copy the result to every copy. The folder is fully indexed before scanning starts.'
+        )
+        exact_dup_help.set_xalign(0)
+        exact_dup_help.add_css_class('dim-label')
+        exact_dup_help.set_wrap(True)
+        exact_dup_help.set_hexpand(True)
+        pg.attach(exact_dup_help, 2, 3, 1, 1)
+
+        near_dup_label = Gtk.Label(label='Skip Near-Duplicates')
+        near_dup_label.set_xalign(0)
+        pg.attach(near_dup_label, 0, 4, 1, 1)
+
+        self.near_duplicate_switch = Gtk.Switch()
+        self.near_duplicate_switch.set_active(self._near_duplicate_skip)
+        self.near_duplicate_switch.set_halign(Gtk.Align.START)
+        pg.attach(self.near_duplicate_switch, 1, 4, 1, 1)
+
+        near_dup_help = Gtk.Label(
+            label='Reuse the score of an already-scanned image for resized or re-encoded copies of it.'
+        )
+        near_dup_help.set_xalign(0)
+        near_dup_help.add_css_class('dim-label')
+        near_dup_help.set_wrap(True)
+        near_dup_help.set_hexpand(True)
+        pg.attach(near_dup_help, 2, 4, 1, 1)
+
+        near_dup_distance_label = Gtk.Label(label='Duplicate Distance')
+        near_dup_distance_label.set_xalign(0)
+        pg.attach(near_dup_distance_label, 0, 5, 1, 1)
+
+        near_dup_distance_adj = Gtk.Adjustment(
+            value=self._near_duplicate_max_distance,
+            lower=0,
+            upper=32,
+            step_increment=1,
+            page_increment=4,
+        )
+        self.near_duplicate_distance_spin = Gtk.SpinButton(adjustment=near_dup_distance_adj, climb_rate=1, digits=0)
+        pg.attach(self.near_duplicate_distance_spin, 1, 5, 1, 1)
+
+        near_dup_distance_help = Gtk.Label(
+            label=f'Maximum differing hash bits for two images to count as duplicates. Default: {constants.NEAR_DUPLICATE_MAX_DISTANCE}'
+        )
+        near_dup_distance_help.set_xalign(0)
+        near_dup_distance_help.add_css_class('dim-label')
+        near_dup_distance_help.set_wrap(True)
+        near_dup_distance_help.set_hexpand(True)
+        pg.attach(near_dup_distance_help, 2, 5, 1, 1)
+
+        watch_label = Gtk.Label(label='Watch Folder')
+        watch_label.set_xalign(0)
+        pg.attach(watch_label, 0, 6, 1, 1)
+
+        self.watch_switch = Gtk.Switch()
+        self.watch_switch.set_active(self._watch_after_scan)
+        self.watch_switch.set_halign(Gtk.Align.START)
+        pg.attach(self.watch_switch, 1, 6, 1, 1)
+
+        watch_help = Gtk.Label(
+            label='After the scan finishes, keep classifying new or changed files in the folder until Stop is pressed.'
+        )
+        watch_help.set_xalign(0)
+        watch_help.add_css_class('dim-label')
+        watch_help.set_wrap(True)
+        watch_help.set_hexpand(True)
+        pg.attach(watch_help, 2, 6, 1, 1)
+
         # --- Helloz NSFW ---
         sg = _frame('Helloz NSFW')
 
@@ -525,6 +608,11 @@ class NudityDetectorWindow(
         self.load_session_button.connect('clicked', self._on_load_session_clicked)
         action_box.append(self.load_session_button)
 
+        self.apply_threshold_button = Gtk.Button(label='Apply Threshold')
+        self.apply_threshold_button.set_tooltip_text('Re-evaluate the loaded results at the current threshold without rescanning')
+        self.apply_threshold_button.connect('clicked', self._on_apply_threshold_clicked)
+        action_box.append(self.apply_threshold_button)
+
         self.open_report_button = Gtk.Button(label='Open Report')
         self.open_report_button.set_sensitive(False)
         self.open_report_button.connect('clicked', self._on_open_report_clicked)
@@ -553,14 +641,32 @@ class NudityDetectorWindow(
         self.summary_label.set_margin_bottom(8)
         results_outer.append(self.summary_label)
 
+        # Filter bar
+        filter_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=8)
+        filter_box.set_margin_bottom(8)
+        results_outer.append(filter_box)
+
+        self.results_search_entry = Gtk.SearchEntry()
+        self.results_search_entry.set_placeholder_text('Filter by file name or path')
+        self.results_search_entry.set_hexpand(True)
+        self.results_search_entry.connect('search-changed', self._on_results_search_changed)
+        filter_box.append(self.results_search_entry)
+
+        min_confidence_label = Gtk.Label(label='Min Confidence %')
+        filter_box.append(min_confidence_label)
+
+        min_confidence_adj = Gtk.Adjustment(value=0, lower=0, upper=100, step_increment=1, page_increment=10)
+        self.results_min_confidence_spin = Gtk.SpinButton(adjustment=min_confidence_adj, climb_rate=1, digits=0)
+        self.results_min_confidence_spin.connect('value-changed', self._on_results_min_confidence_changed)
+        filter_box.append(self.results_min_confidence_spin)
+
         # Results table + preview side by side
         results_hbox = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=12)
         results_hbox.set_vexpand(True)
         results_outer.append(results_hbox)
 
         # ColumnView
-        self._list_store = Gio.ListStore(item_type=ResultItem)
-        selection_model = Gtk.SingleSelection(model=self._list_store)
+        selection_model = self._create_results_model()
         selection_model.set_autoselect(False)
         selection_model.connect('selection-changed', self._on_result_selection_changed)
 
@@ -582,7 +688,14 @@ class NudityDetectorWindow(
             col = Gtk.ColumnViewColumn(title=title, factory=factory)
             col.set_fixed_width(min_width)
             col.set_expand(attr == 'path')
+            col.set_sorter(self._results_column_sorter(attr))
             self.column_view.append_column(col)
+            if attr == 'confidence':
+                confidence_column = col
+
+        # Highest-confidence hits first; clicking a header re-sorts in place
+        self._results_sort_model.set_sorter(self.column_view.get_sorter())
+        self.column_view.sort_by_column(confidence_column, Gtk.SortType.DESCENDING)
 
         cv_scroll = Gtk.ScrolledWindow()
         cv_scroll.set_vexpand(True)
@@ -746,6 +859,16 @@ class NudityDetectorWindow(
         config_path = os.path.join(constants.CONFIG_DIR, constants.CONFIG_FILE_NAME)
         try:
             os.makedirs(constants.CONFIG_DIR, exist_ok=True)
+            # Settings without controls in the window (per-class scoring, prefilter, Helloz replicas, scan order,
+            # pool sizes, Parquet output) are carried over from the file
+            class_thresholds, class_weights = constants.get_scoring_config()
+            prefilter_name, prefilter_min_score = constants.get_prefilter_config()
+            balance_policy, eject_after, eject_seconds = constants.get_helloz_nsfw_balance_config()
+            breaker_failures, breaker_reset_seconds, latency_target = constants.get_helloz_nsfw_flow_config()
+            upload_max_edge, upload_format, upload_quality = constants.get_helloz_nsfw_upload_config()
+            scan_order, scan_priority = constants.get_scan_schedule_config()
+            video_worker_count, frame_decode_workers = constants.get_worker_pool_config()
+            parquet_output = constants.get_parquet_output()
             data = {
                 'theme': self._get_theme_mode(),
                 'model': self._get_model(),
@@ -756,11 +879,34 @@ class NudityDetectorWindow(
                 'worker_thread_count': self._get_worker_thread_count(),
                 'worker_thread_timeout': self._get_worker_thread_timeout(),
                 'detect_timeout': self._get_detect_timeout(),
+                'exact_duplicate_skip': self._get_exact_duplicate_skip(),
+                'near_duplicate_skip': self._get_near_duplicate_skip(),
+                'near_duplicate_max_distance': self._get_near_duplicate_max_distance(),
+                'watch_after_scan': self._get_watch_after_scan(),
                 'helloz_nsfw_host': self._get_helloz_nsfw_host(),
                 'helloz_nsfw_port': self._get_helloz_nsfw_port(),
                 'helloz_nsfw_api_endpoint': self._get_helloz_nsfw_api_endpoint(),
                 'helloz_nsfw_request_timeout': self._get_helloz_nsfw_request_timeout(),
                 'helloz_nsfw_health_check_timeout': self._get_helloz_nsfw_health_check_timeout(),
+                'helloz_nsfw_endpoints': constants.get_helloz_nsfw_endpoints(),
+                'helloz_nsfw_balance': balance_policy,
+                'helloz_nsfw_eject_after_failures': eject_after,
+                'helloz_nsfw_eject_seconds': eject_seconds,
+                'helloz_nsfw_breaker_failures': breaker_failures,
+                'helloz_nsfw_breaker_reset_seconds': breaker_reset_seconds,
+                'helloz_nsfw_latency_target': latency_target,
+                'helloz_nsfw_upload_max_edge': upload_max_edge,
+                'helloz_nsfw_upload_format': upload_format,
+                'helloz_nsfw_upload_quality': upload_quality,
+                'scan_order': scan_order,
+                'scan_priority': scan_priority,
+                'video_worker_count': video_worker_count,
+                'frame_decode_workers': frame_decode_workers,
+                'parquet_output': parquet_output,
+                'class_thresholds': class_thresholds,
+                'class_weights': class_weights,
+                'prefilter': prefilter_name,
+                'prefilter_min_score': prefilter_min_score,
             }
             with open(config_path, 'w', encoding='utf-8') as f:
                 json.dump(data, f, indent=2)
@@ -794,6 +940,18 @@ class NudityDetectorWindow(
     def _get_detect_timeout(self) -> int:
         return max(1, int(self.detect_timeout_spin.get_value()))
 
+    def _get_exact_duplicate_skip(self) -> bool:
+        return bool(self.exact_duplicate_switch.get_active())
+
+    def _get_near_duplicate_skip(self) -> bool:
+        return bool(self.near_duplicate_switch.get_active())
+
+    def _get_near_duplicate_max_distance(self) -> int:
+        return max(0, int(self.near_duplicate_distance_spin.get_value()))
+
+    def _get_watch_after_scan(self) -> bool:
+        return bool(self.watch_switch.get_active())
+
     def _get_helloz_nsfw_host(self) -> str:
         return self.helloz_nsfw_host_entry.get_text().strip() or constants.HELLOZ_NSFW_HOST
 
@@ -816,6 +974,11 @@ class NudityDetectorWindow(
         endpoint = self._get_helloz_nsfw_api_endpoint()
         return f'http://{host}:{port}{endpoint}'
 
+    def _get_helloz_nsfw_urls(self) -> list:
+        """Upload URLs of the configured replicas, or of the host and port set in the window."""
+        endpoint = self._get_helloz_nsfw_api_endpoint()
+        return [f'{base_url}{endpoint}' for base_url in constants.get_helloz_nsfw_endpoints()] or [self._get_helloz_nsfw_url()]
+
     def _get_helloz_nsfw_check_url(self) -> str:
         host = self._get_helloz_nsfw_host()
         port = self._get_helloz_nsfw_port()
@@ -856,6 +1019,10 @@ class NudityDetectorWindow(
         self.worker_thread_count_spin.set_sensitive(not processing)
         self.worker_thread_timeout_spin.set_sensitive(not processing)
         self.detect_timeout_spin.set_sensitive(not processing)
+        self.exact_duplicate_switch.set_sensitive(not processing)
+        self.near_duplicate_switch.set_sensitive(not processing)
+        self.near_duplicate_distance_spin.set_sensitive(not processing)
+        self.watch_switch.set_sensitive(not processing)
         self.helloz_nsfw_host_entry.set_sensitive(not processing)
         self.helloz_nsfw_port_spin.set_sensitive(not processing)
         self.helloz_nsfw_endpoint_entry.set_sensitive(not processing)
@@ -864,6 +1031,7 @@ class NudityDetectorWindow(
         for button_name in (
             'save_session_button',
             'load_session_button',
+            'apply_threshold_button',
             'open_report_button',
             'open_reports_button',
         ):
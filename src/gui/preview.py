@@ -1,11 +1,14 @@
 import base64
+import os
+import threading
+from collections import OrderedDict, deque
 from io import BytesIO
 
 import gi
 
 gi.require_version('Gtk', '4.0')
 gi.require_version('Adw', '1')
-from gi.repository import Gdk, GdkPixbuf
+from gi.repository import Gdk, GLib
 
 try:
     from PIL import Image
@@ -13,13 +16,107 @@ except ImportError:
     Image = None
 
 from ..core import constants
+from ..core.utils import load_entry_thumbnail
 from ..processing.media_processor import ThumbnailGenerator
 
+_MISSING = object()
+
+
+def pil_to_texture(pil_image):
+    """Build a Gdk.MemoryTexture directly from a PIL image's pixel buffer.
+
+    RGB and RGBA images are wrapped as-is; other modes are converted first.
+    There is no PNG encode/decode round trip, and the result can be created
+    off the main thread.
+    """
+    if pil_image.mode not in ('RGB', 'RGBA'):
+        has_alpha = 'A' in pil_image.getbands() or 'transparency' in pil_image.info
+        pil_image = pil_image.convert('RGBA' if has_alpha else 'RGB')
+    if pil_image.mode == 'RGBA':
+        memory_format, bytes_per_pixel = Gdk.MemoryFormat.R8G8B8A8, 4
+    else:
+        memory_format, bytes_per_pixel = Gdk.MemoryFormat.R8G8B8, 3
+    width, height = pil_image.size
+    return Gdk.MemoryTexture.new(
+        width, height, memory_format, GLib.Bytes.new(pil_image.tobytes()), width * bytes_per_pixel,
+    )
+
+
+class PreviewLoader:
+    """Decodes preview textures on a background thread into an LRU cache.
+
+    Each request replaces whatever is still queued, so holding an arrow key
+    never builds a backlog: only the current row and its prefetched
+    neighbours are decoded. Failed decodes are cached as None.
+    """
+
+    def __init__(self, decode, capacity=constants.PREVIEW_CACHE_SIZE):
+        self._decode = decode
+        self._capacity = capacity
+        self._cache = OrderedDict()
+        self._pending = deque()
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def get(self, key, default=None):
+        """Return the cached texture for *key* (None if it failed to decode), or *default*."""
+        with self._cond:
+            if key not in self._cache:
+                return default
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+    def request(self, key, entry, on_ready=None, prefetch=()):
+        """Queue *entry* and then the (key, entry) pairs in *prefetch* for decoding.
+
+        on_ready(key, texture) is called on the GTK main loop once *entry* is
+        ready (immediately queued if it is already cached).
+        """
+        with self._cond:
+            self._pending.clear()
+            self._pending.append((key, entry, on_ready))
+            self._pending.extend((prefetch_key, prefetch_entry, None) for prefetch_key, prefetch_entry in prefetch)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True, name='preview-loader')
+                self._thread.start()
+            self._cond.notify()
+
+    def clear(self):
+        with self._cond:
+            self._cache.clear()
+            self._pending.clear()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                job = self._pending.popleft()
+            self._process(*job)
+
+    def _process(self, key, entry, on_ready):
+        texture = self.get(key, _MISSING)
+        if texture is _MISSING:
+            try:
+                texture = self._decode(entry)
+            except Exception:
+                texture = None
+            with self._cond:
+                self._cache[key] = texture
+                while len(self._cache) > self._capacity:
+                    self._cache.popitem(last=False)
+        if on_ready is not None:
+            GLib.idle_add(on_ready, key, texture)
+
 
 class PreviewMixin:
     """Thumbnail loading and preview panel.  Mixed into NudityDetectorWindow."""
 
+    _preview_loader = None
+    _preview_key = None
+
     def clear_thumbnail_preview(self):
+        self._preview_key = None
         self.thumbnail_picture.set_paintable(None)
         self._thumb_placeholder.set_text(constants.NO_THUMBNAIL_TEXT)
         self.thumbnail_meta_label.set_text('Select a result to preview.')
@@ -30,8 +127,7 @@ class PreviewMixin:
             self.clear_thumbnail_preview()
             return
 
-        thumbnail_b64 = entry.get('thumbnail', '') or ''
-        meta_text = (
+        self.thumbnail_meta_label.set_text(
             f"Type: {entry.get('media_type', 'unknown')}\n"
             f"Confidence: {entry.get('confidence_percent', 0):.2f}%\n"
             f"Model: {entry.get('model_name', '')}"
@@ -39,33 +135,86 @@ class PreviewMixin:
 
         if Image is None:
             self._thumb_placeholder.set_text(constants.NO_THUMBNAIL_TEXT)
-            self.thumbnail_meta_label.set_text(meta_text)
             return
 
-        pil_image = self._load_preview_image(entry, thumbnail_b64)
-        if pil_image is not None:
-            try:
-                pixbuf = self._pil_to_pixbuf(pil_image)
-                texture = Gdk.Texture.new_for_pixbuf(pixbuf)
-                self.thumbnail_picture.set_paintable(texture)
-                self._thumb_placeholder.set_text('')
-                self.thumbnail_meta_label.set_text(meta_text)
-                return
-            except Exception:
-                pass
-
+        if self._preview_loader is None:
+            self._preview_loader = PreviewLoader(self._decode_preview)
+        key = self._preview_cache_key(entry)
+        self._preview_key = key
+        prefetch = [(self._preview_cache_key(e), e) for e in self._preview_neighbours()]
+        texture = self._preview_loader.get(key, _MISSING)
+        if texture is _MISSING:
+            self.thumbnail_picture.set_paintable(None)
+            self._thumb_placeholder.set_text('Loading preview...')
+            self._preview_loader.request(key, entry, self._on_preview_ready, prefetch)
+        else:
+            self._show_preview_texture(entry, texture)
+            self._preview_loader.request(key, entry, None, prefetch)
+
+    def _on_preview_ready(self, key, texture):
+        if key == self._preview_key:
+            entry = self.get_selected_entry()
+            if entry is not None:
+                self._show_preview_texture(entry, texture)
+        return False
+
+    def _show_preview_texture(self, entry, texture):
+        if texture is not None:
+            self.thumbnail_picture.set_paintable(texture)
+            self._thumb_placeholder.set_text('')
+            return
         self.thumbnail_picture.set_paintable(None)
         self._thumb_placeholder.set_text(
-            constants.NO_THUMBNAIL_TEXT if not thumbnail_b64 else 'Thumbnail unavailable'
+            'Thumbnail unavailable' if entry.get('thumbnail') else constants.NO_THUMBNAIL_TEXT
         )
-        self.thumbnail_meta_label.set_text(meta_text)
+
+    def _preview_cache_key(self, entry):
+        """Cache key for an entry's preview: its path and mtime, or the report for a missing file."""
+        file_path = entry.get('file', '')
+        try:
+            return file_path, os.stat(file_path).st_mtime_ns
+        except (OSError, ValueError):
+            return file_path, self.last_report_path
+
+    def _preview_neighbours(self):
+        """Return the results just below and above the selected row, nearest first.
+
+        Neighbours are taken in display order (after sorting and filtering)
+        and mapped back to detected_results through each row's index.
+        """
+        selection = self.column_view.get_model()
+        position = selection.get_selected()
+        n_rows = selection.get_n_items()
+        if not isinstance(position, int) or not isinstance(n_rows, int) or not 0 <= position < n_rows:
+            return []
+        count = len(self.detected_results)
+        neighbours = []
+        for distance in range(1, constants.PREVIEW_PREFETCH_ROWS + 1):
+            for row in (position + distance, position - distance):
+                if not 0 <= row < n_rows:
+                    continue
+                idx = getattr(selection.get_item(row), 'index', None)
+                if isinstance(idx, int) and 0 <= idx < count:
+                    neighbours.append(self.detected_results[idx])
+        return neighbours
+
+    def _decode_preview(self, entry):
+        """Build the preview texture for an entry (runs on the preview loader thread)."""
+        thumbnail_b64 = entry.get('thumbnail', '') or ''
+        file_path = entry.get('file', '')
+        if not thumbnail_b64 and file_path and not os.path.exists(file_path):
+            # Rows loaded from a saved session carry no thumbnail; fetch the stored one on demand
+            thumbnail_b64 = entry['thumbnail'] = load_entry_thumbnail(self.last_report_path, file_path)
+        pil_image = self._load_preview_image(entry, thumbnail_b64)
+        if pil_image is None:
+            return None
+        return pil_to_texture(pil_image)
 
     def _load_preview_image(self, entry, thumbnail_b64):
         """Return a PIL image for preview, sourcing from the original file when available."""
         file_path = entry.get('file', '')
         media_type = entry.get('media_type', '')
         if file_path:
-            import os
             if os.path.exists(file_path):
                 try:
                     return self._load_preview_from_file(file_path, media_type)
@@ -83,9 +232,10 @@ class PreviewMixin:
         resampler = Image.Resampling.LANCZOS if hasattr(Image, 'Resampling') else Image.LANCZOS
         if media_type == constants.MEDIA_TYPE_IMAGE:
             with Image.open(file_path) as im:
-                img = im.copy()
-            img.thumbnail(constants.THUMBNAIL_SIZE_PREVIEW_IMAGE, resampler)
-            return img
+                # JPEGs decode straight at a reduced scale instead of full resolution
+                im.draft('RGB', constants.THUMBNAIL_SIZE_PREVIEW_IMAGE)
+                im.thumbnail(constants.THUMBNAIL_SIZE_PREVIEW_IMAGE, resampler)
+                return im.copy()
         if media_type == constants.MEDIA_TYPE_VIDEO:
             b64 = ThumbnailGenerator.generate_from_video(file_path, constants.THUMBNAIL_SIZE_PREVIEW_IMAGE)
             if b64:
@@ -101,15 +251,3 @@ class PreviewMixin:
             return img.resize((w, h), resampler)
         img.thumbnail((w, h), resampler)
         return img
-
-    def _pil_to_pixbuf(self, pil_image):
-        """Convert a PIL Image to a GdkPixbuf.Pixbuf via PNG bytes."""
-        if pil_image.mode != 'RGBA':
-            pil_image = pil_image.convert('RGBA')
-        buf = BytesIO()
-        pil_image.save(buf, format='PNG')
-        buf.seek(0)
-        loader = GdkPixbuf.PixbufLoader.new_with_type('png')
-        loader.write(buf.read())
-        loader.close()
-        return loader.get_pixbuf()
@@ -5,14 +5,27 @@ from gi.repository import GObject
 
 
 class ResultItem(GObject.Object):
-    """GObject-backed model for a single row in the ColumnView results table."""
+    """GObject-backed model for a single row in the ColumnView results table.
+
+    Fields are GObject properties so the table's sorters and filters can read
+    them through Gtk.PropertyExpression without calling back into Python.
+    """
     __gtype_name__ = 'ResultItem'
 
-    def __init__(self, index, name, media_type, confidence, model_name, path):
+    index = GObject.Property(type=int, default=0)
+    name = GObject.Property(type=str, default='')
+    media_type = GObject.Property(type=str, default='')
+    confidence = GObject.Property(type=str, default='')
+    confidence_value = GObject.Property(type=float, default=0.0)
+    model_name = GObject.Property(type=str, default='')
+    path = GObject.Property(type=str, default='')
+
+    def __init__(self, index, name, media_type, confidence, model_name, path, confidence_value=0.0):
         super().__init__()
         self.index = index
         self.name = name
         self.media_type = media_type
         self.confidence = confidence
+        self.confidence_value = confidence_value
         self.model_name = model_name
         self.path = path
@@ -3,21 +3,50 @@ import os
 import gi
 
 gi.require_version('Gtk', '4.0')
-from gi.repository import Gtk
+from gi.repository import Gio, Gtk
 
 from ..core.utils import (
     delete_file_safely,
+    end_report_run,
     open_file,
     open_file_location,
     save_nudity_report,
 )
 from .result_item import ResultItem
 
+# ColumnView attribute -> (ResultItem property, numeric sort)
+RESULT_SORT_KEYS = {
+    'name': ('name', False),
+    'media_type': ('media-type', False),
+    'confidence': ('confidence-value', True),
+    'model_name': ('model-name', False),
+    'path': ('path', False),
+}
+
+
+def _result_expression(prop):
+    return Gtk.PropertyExpression.new(ResultItem, None, prop)
+
+
+def _make_result_item(index, entry):
+    confidence = float(entry.get('confidence_percent', 0) or 0)
+    return ResultItem(
+        index=index,
+        name=os.path.basename(entry.get('file', '')),
+        media_type=entry.get('media_type', 'unknown'),
+        confidence=f"{confidence:.2f}%",
+        model_name=entry.get('model_name', ''),
+        path=entry.get('file', ''),
+        confidence_value=confidence,
+    )
+
 
 class ResultsMixin:
     """Results table population, row selection, row actions, and clear-all.
     Mixed into NudityDetectorWindow."""
 
+    _results_min_confidence = 0.0
+
     # ------------------------------------------------------------------
     # Button handlers
     # ------------------------------------------------------------------
@@ -35,51 +64,88 @@ class ResultsMixin:
     # Table population
     # ------------------------------------------------------------------
 
+    def _create_results_model(self):
+        """Build the store -> filter -> sort -> selection chain behind the results table.
+
+        Sorting and text filtering read ResultItem properties natively, so
+        changing the sort column or the filter never rebuilds the store.
+        """
+        self._list_store = Gio.ListStore(item_type=ResultItem)
+        self._results_text_filter = Gtk.StringFilter(expression=_result_expression('path'))
+        self._results_text_filter.set_ignore_case(True)
+        self._results_text_filter.set_match_mode(Gtk.StringFilterMatchMode.SUBSTRING)
+        self._results_confidence_filter = Gtk.CustomFilter.new(self._result_meets_min_confidence)
+        results_filter = Gtk.EveryFilter()
+        results_filter.append(self._results_text_filter)
+        results_filter.append(self._results_confidence_filter)
+        filter_model = Gtk.FilterListModel(model=self._list_store, filter=results_filter)
+        self._results_sort_model = Gtk.SortListModel(model=filter_model)
+        return Gtk.SingleSelection(model=self._results_sort_model)
+
+    @staticmethod
+    def _results_column_sorter(attr):
+        """Return the Gtk.Sorter for a results column, or None if it is not sortable."""
+        if attr not in RESULT_SORT_KEYS:
+            return None
+        prop, numeric = RESULT_SORT_KEYS[attr]
+        if numeric:
+            return Gtk.NumericSorter(expression=_result_expression(prop))
+        sorter = Gtk.StringSorter(expression=_result_expression(prop))
+        sorter.set_ignore_case(True)
+        return sorter
+
     def populate_results(self, results):
-        self._list_store.remove_all()
-        for index, entry in enumerate(results):
-            item = ResultItem(
-                index=index,
-                name=os.path.basename(entry.get('file', '')),
-                media_type=entry.get('media_type', 'unknown'),
-                confidence=f"{float(entry.get('confidence_percent', 0)):.2f}%",
-                model_name=entry.get('model_name', ''),
-                path=entry.get('file', ''),
-            )
-            self._list_store.append(item)
+        items = [_make_result_item(index, entry) for index, entry in enumerate(results)]
+        # One splice emits a single items-changed, so the sort model sorts once
+        self._list_store.splice(0, self._list_store.get_n_items(), items)
+
+        self.update_results_summary(len(results))
+        self.update_result_action_state()
+        self.clear_thumbnail_preview()
 
-        if results:
+    def update_results_summary(self, count):
+        if count:
             self.summary_label.set_text(
-                f'{len(results)} explicit item(s) detected. Review actions are available below.'
+                f'{count} explicit item(s) detected. Review actions are available below.'
             )
         else:
             self.summary_label.set_text('No explicit media detected in the current session.')
-        self.update_result_action_state()
-        self.clear_thumbnail_preview()
 
     def append_results(self, new_entries, start_index):
         """Append only new result entries to the list store without a full rebuild.
 
         Called during an active scan to add incremental results as they arrive,
-        avoiding the O(n) cost of remove_all() + re-append on every flush.
+        avoiding the O(n) cost of remove_all() + re-append on every flush. The
+        batch is spliced in at once so the sort model merges it in one pass.
 
         Args:
             new_entries: List of result dicts to append (the NEW items only).
             start_index: Absolute index for the first item in new_entries within
                 the full detected_results list (used for ResultItem.index).
         """
-        for offset, entry in enumerate(new_entries):
-            item = ResultItem(
-                index=start_index + offset,
-                name=os.path.basename(entry.get('file', '')),
-                media_type=entry.get('media_type', 'unknown'),
-                confidence=f"{float(entry.get('confidence_percent', 0)):.2f}%",
-                model_name=entry.get('model_name', ''),
-                path=entry.get('file', ''),
-            )
-            self._list_store.append(item)
+        items = [_make_result_item(start_index + offset, entry) for offset, entry in enumerate(new_entries)]
+        if items:
+            self._list_store.splice(self._list_store.get_n_items(), 0, items)
         self.update_result_action_state()
 
+    # ------------------------------------------------------------------
+    # Filtering
+    # ------------------------------------------------------------------
+
+    def _result_meets_min_confidence(self, item):
+        return item.confidence_value >= self._results_min_confidence
+
+    def _on_results_search_changed(self, entry):
+        self._results_text_filter.set_search(entry.get_text().strip())
+
+    def _on_results_min_confidence_changed(self, spin):
+        value = spin.get_value()
+        if value == self._results_min_confidence:
+            return
+        change = Gtk.FilterChange.MORE_STRICT if value > self._results_min_confidence else Gtk.FilterChange.LESS_STRICT
+        self._results_min_confidence = value
+        self._results_confidence_filter.changed(change)
+
     # ------------------------------------------------------------------
     # Selection
     # ------------------------------------------------------------------
@@ -99,14 +165,25 @@ class ResultsMixin:
         self.open_location_button.set_sensitive(sensitive)
         self.delete_button.set_sensitive(sensitive)
 
-    def get_selected_entry(self):
+    def get_selected_index(self):
+        """Index into detected_results of the selected row, or None.
+
+        Rows are shown sorted and filtered, so the selection position is not
+        the result index; the selected ResultItem carries it instead.
+        """
         selection = self.column_view.get_model()
         if not isinstance(selection, Gtk.SingleSelection):
             return None
-        idx = selection.get_selected()
-        if idx == Gtk.INVALID_LIST_POSITION or idx >= len(self.detected_results):
+        if selection.get_selected() == Gtk.INVALID_LIST_POSITION:
             return None
-        return self.detected_results[idx]
+        idx = getattr(selection.get_selected_item(), 'index', None)
+        if not isinstance(idx, int) or not 0 <= idx < len(self.detected_results):
+            return None
+        return idx
+
+    def get_selected_entry(self):
+        idx = self.get_selected_index()
+        return None if idx is None else self.detected_results[idx]
 
     # ------------------------------------------------------------------
     # Row actions
@@ -140,13 +217,10 @@ class ResultsMixin:
             self.log_message(f'Could not open location: {error_message}', 'error')
 
     def delete_selected_result(self):
-        selection = self.column_view.get_model()
-        if not isinstance(selection, Gtk.SingleSelection):
-            return
-        idx = selection.get_selected()
         entry = self.get_selected_entry()
         if entry is None:
             return
+        idx = self.get_selected_index()
         self._ask_yes_no(
             'Delete detected file',
             f"Move this file to trash if possible?\n\n{entry.get('file', '')}",
@@ -167,5 +241,6 @@ class ResultsMixin:
             save_nudity_report(remaining, self.last_report_path, session_state=self.build_session_state())
         else:
             save_nudity_report(self.detected_results, self.last_report_path, session_state=self.build_session_state())
+        end_report_run(self.last_report_path)
         self.populate_results(self.detected_results)
         self.log_message(f"Deleted {entry.get('file', '')}. {message}", 'success')
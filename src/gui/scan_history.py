@@ -1,4 +1,3 @@
-import json
 import os
 import shutil
 import threading
@@ -11,7 +10,14 @@ gi.require_version('Adw', '1')
 from gi.repository import Adw, Gio, GLib, GObject, Gtk
 
 from ..core import constants
-from ..core.utils import DEFAULT_REPORT_DIR, get_report_path, load_scan_session
+from ..core.utils import (
+    DEFAULT_REPORT_DIR,
+    export_report_csv,
+    get_report_path,
+    get_results_db_path,
+    load_scan_run_summary,
+    load_scan_session,
+)
 
 
 class ScanRunItem(GObject.Object):
@@ -30,10 +36,37 @@ class ScanRunItem(GObject.Object):
         self.report_path = report_path
 
 
+def _scan_run_row(report_dir, subdir):
+    """Return the ScanRunItem fields for one run folder, read from its summary."""
+    subdir_path = os.path.join(report_dir, subdir)
+    report_path = get_report_path(subdir_path)
+    session_path = os.path.join(subdir_path, 'nudity_report_session.json')
+
+    # Parse display date from dirname (YYYY-MM-DD_HH-MM-SS)
+    try:
+        dt = datetime.strptime(subdir, constants.SCAN_RUN_DATE_FORMAT)
+        display_date = dt.strftime('%Y-%m-%d  %H:%M:%S')
+    except ValueError:
+        display_date = subdir
+
+    summary = load_scan_run_summary(report_path)
+    return dict(
+        dir_name=subdir,
+        display_date=display_date,
+        model_name=summary.model_name,
+        result_count=str(summary.result_count),
+        source_folder=summary.source_folder,
+        session_path=session_path if os.path.exists(session_path) else report_path,
+        report_path=report_path,
+    )
+
+
 class ScanHistoryMixin:
     """Previous scan runs list with Load and Export actions.
     Mixed into NudityDetectorWindow."""
 
+    _history_refresh_generation = 0
+
     # ------------------------------------------------------------------
     # Build tab widget
     # ------------------------------------------------------------------
@@ -150,61 +183,48 @@ class ScanHistoryMixin:
     # ------------------------------------------------------------------
 
     def refresh_scan_history(self):
-        """Re-read the reports/ directory and rebuild the history list store."""
+        """Rebuild the history list store from the per-run summaries in reports/.
+
+        Summaries are read on a background thread and appended in batches on
+        the main loop; a newer refresh makes any unfinished older one stop.
+        """
         self._history_store.remove_all()
+        self._history_selection.set_selected(Gtk.INVALID_LIST_POSITION)
+        self._update_history_action_state(False)
         report_dir = DEFAULT_REPORT_DIR
         if not os.path.isdir(report_dir):
-            self._history_selection.set_selected(Gtk.INVALID_LIST_POSITION)
-            self._update_history_action_state(False)
             return
 
-        subdirs = sorted(
-            (d for d in os.listdir(report_dir)
-             if os.path.isdir(os.path.join(report_dir, d))),
-            reverse=True,
-        )
+        self._history_refresh_generation += 1
+        generation = self._history_refresh_generation
 
-        for subdir in subdirs:
-            subdir_path = os.path.join(report_dir, subdir)
-            session_path = os.path.join(subdir_path, 'nudity_report_session.json')
-            report_path = get_report_path(subdir_path)
+        def _append_rows(rows):
+            if generation == self._history_refresh_generation:
+                for row in rows:
+                    self._history_store.append(ScanRunItem(**row))
+            return False
 
-            # Parse display date from dirname (YYYY-MM-DD_HH-MM-SS)
+        def _do_refresh():
             try:
-                dt = datetime.strptime(subdir, constants.SCAN_RUN_DATE_FORMAT)
-                display_date = dt.strftime('%Y-%m-%d  %H:%M:%S')
-            except ValueError:
-                display_date = subdir
-
-            model_name = ''
-            result_count = '0'
-            source_folder = ''
-
-            if os.path.exists(session_path):
-                try:
-                    with open(session_path, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                    scan_cfg = data.get('scan_config', {})
-                    model_name = scan_cfg.get('model_name', '')
-                    source_folder = scan_cfg.get('source_folder', '')
-                    result_count = str(len(data.get('results', [])))
-                except (OSError, json.JSONDecodeError):
-                    pass
-
-            load_path = session_path if os.path.exists(session_path) else report_path
-            item = ScanRunItem(
-                dir_name=subdir,
-                display_date=display_date,
-                model_name=model_name,
-                result_count=result_count,
-                source_folder=source_folder,
-                session_path=load_path,
-                report_path=report_path,
-            )
-            self._history_store.append(item)
-
-        self._history_selection.set_selected(Gtk.INVALID_LIST_POSITION)
-        self._update_history_action_state(False)
+                subdirs = sorted(
+                    (d for d in os.listdir(report_dir)
+                     if os.path.isdir(os.path.join(report_dir, d))),
+                    reverse=True,
+                )
+            except OSError:
+                return
+            rows = []
+            for subdir in subdirs:
+                if generation != self._history_refresh_generation:
+                    return
+                rows.append(_scan_run_row(report_dir, subdir))
+                if len(rows) >= constants.HISTORY_REFRESH_BATCH_SIZE:
+                    GLib.idle_add(_append_rows, rows)
+                    rows = []
+            if rows:
+                GLib.idle_add(_append_rows, rows)
+
+        threading.Thread(target=_do_refresh, daemon=True).start()
 
     # ------------------------------------------------------------------
     # Selection
@@ -254,8 +274,12 @@ class ScanHistoryMixin:
         xlsx_filter = Gtk.FileFilter()
         xlsx_filter.set_name('Excel Report (*.xlsx)')
         xlsx_filter.add_pattern('*.xlsx')
+        csv_filter = Gtk.FileFilter()
+        csv_filter.set_name('CSV, without thumbnails (*.csv)')
+        csv_filter.add_pattern('*.csv')
         filters = Gio.ListStore(item_type=Gtk.FileFilter)
         filters.append(xlsx_filter)
+        filters.append(csv_filter)
         dialog.set_filters(filters)
         dialog.save(self, None, lambda d, r: self._on_history_export_done(d, r, item))
 
@@ -274,6 +298,18 @@ class ScanHistoryMixin:
                 'The selected export location is not a local filesystem path.'
             )
             return
+        if dest_path.endswith('.csv'):
+            run_files = (item.report_path, item.session_path, get_results_db_path(item.report_path))
+            if any(os.path.exists(path) for path in run_files):
+                if export_report_csv(item.session_path, dest_path):
+                    self.log_message(f'Exported report to {dest_path}', 'success')
+                else:
+                    self._show_error('Export Failed', f'Could not write {dest_path}.')
+                    self.log_message(f'Export failed: could not write {dest_path}.', 'error')
+            else:
+                self._show_error('Export Failed', 'No report data found for this scan run.')
+                self.log_message('Export failed: no report data found for this scan run.', 'error')
+            return
         if not dest_path.endswith('.xlsx'):
             dest_path += '.xlsx'
 
@@ -1,7 +1,9 @@
+import asyncio
 import logging
 import os
 import sys
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from functools import partial
 
@@ -11,21 +13,38 @@ gi.require_version('Gtk', '4.0')
 from gi.repository import GLib
 
 from ..core import constants
+from ..core.async_pipeline import apply_image_stages_async, classify_folder_async
 from ..core.scan_session import ScanSession
+from ..core.scoring import ScoringEngine
 from ..core.utils import (
     DEFAULT_REPORT_DIR,
+    DeferredFile,
+    apply_image_stages,
     classify_files_in_folder,
+    configure_image_stages,
+    configure_schedule,
     count_supported_files,
     create_session_state,
     detect_with_timeout,
+    end_report_run,
     get_detected_results,
     get_report_path,
     handle_results,
     make_scan_config,
     normalize_threshold,
+    record_duplicate_results,
     save_nudity_report,
+    save_phash_index,
+    start_folder_watcher,
+    watch_folder,
 )
-from ..processing.media_processor import FrameExtractor
+from ..detectors import helloz_nsfw
+from ..detectors.async_http import AsyncHttpClient
+from ..detectors.endpoint_pool import EndpointPool, shared_endpoint_pool
+from ..detectors.flow_control import call_with_retry, defer_if_overloaded, shared_flow_control
+from ..detectors.registry import EXECUTION_ASYNC, get_backend
+from ..processing.media_processor import FrameExtractor, close_frames, prefetch_frames, shared_frame_decoder
+from ..processing.upload_transform import create_upload_transform, read_upload
 
 
 class ScanningMixin:
@@ -75,6 +94,7 @@ class ScanningMixin:
             return
 
         self.is_processing = True
+        self._session_load_generation += 1  # abandon any session still loading
         self.detected_results = []
         self.populate_results([])
         self._scan_session = ScanSession()
@@ -101,12 +121,15 @@ class ScanningMixin:
         try:
             os.makedirs(scan_run_dir, exist_ok=True)
             initial_report_path = get_report_path(scan_run_dir)
+            class_thresholds, class_weights = constants.get_scoring_config(self._get_model())
             initial_session = create_session_state(
                 scan_config=make_scan_config(
                     source_folder=folder_path,
                     model_name=self._get_model(),
                     threshold_percent=int(self.threshold_spin.get_value()),
                     theme_mode=self._get_theme_mode(),
+                    class_thresholds=class_thresholds,
+                    class_weights=class_weights,
                 ),
                 results=[],
             )
@@ -144,16 +167,14 @@ class ScanningMixin:
             frame_rate=self._get_video_frame_rate(),
             temp_prefix=temp_prefix,
         )
-        return extractor, extractor.iter_frames(file_path)
+        return extractor, prefetch_frames(extractor.iter_frames(file_path), shared_frame_decoder())
 
     # ------------------------------------------------------------------
     # NudeNet classifiers
     # ------------------------------------------------------------------
 
     def create_nudenet_classifiers(self, existing_files, threshold_value, threshold_percent, session):
-        from nudenet import NudeDetector
-
-        detector = NudeDetector()
+        detector = get_backend(constants.MODEL_NUDENET).load_model()
 
         def simplify_results(detection_result):
             return [
@@ -161,13 +182,7 @@ class ScanningMixin:
                 for record in detection_result
             ]
 
-        def confidence_for_results(detection_result):
-            scores = [
-                record.get('score', 0.0)
-                for record in detection_result
-                if record.get('label') in constants.NUDITY_CLASSES
-            ]
-            return max(scores, default=0.0)
+        engine = ScoringEngine.from_config(constants.MODEL_NUDENET, threshold_percent)
 
         detect_timeout = self._get_detect_timeout()
 
@@ -196,10 +211,10 @@ class ScanningMixin:
             if detection_result is None:
                 GLib.idle_add(self.log_message, f'No result returned for {os.path.basename(file_path)}', 'warning')
                 return
-            confidence_score = confidence_for_results(detection_result)
+            confidence_score, nudity_detected = engine.score(detection_result)
             handle_results(
                 file_path,
-                confidence_score >= threshold_value,
+                nudity_detected,
                 simplify_results(detection_result),
                 session=session,
                 confidence_score=confidence_score,
@@ -217,6 +232,7 @@ class ScanningMixin:
             try:
                 detection_results = []
                 max_confidence = 0.0
+                nudity_detected = False
                 for frame_path in frame_paths:
                     if not self.is_processing:
                         break
@@ -239,12 +255,14 @@ class ScanningMixin:
                     detection_results.append(
                         {'frame': os.path.basename(frame_path), 'detections': simplified_frame}
                     )
-                    max_confidence = max(max_confidence, confidence_for_results(frame_result))
-                    if max_confidence >= threshold_value:
+                    frame_confidence, frame_detected = engine.score(frame_result)
+                    max_confidence = max(max_confidence, frame_confidence)
+                    if frame_detected:
+                        nudity_detected = True
                         break
                 handle_results(
                     file_path,
-                    max_confidence >= threshold_value,
+                    nudity_detected,
                     detection_results,
                     session=session,
                     confidence_score=max_confidence,
@@ -253,6 +271,7 @@ class ScanningMixin:
                     threshold_percent=threshold_percent,
                 )
             finally:
+                close_frames(frame_paths)
                 extractor.cleanup()
 
         return classify_image, classify_video
@@ -261,26 +280,37 @@ class ScanningMixin:
     # Helloz NSFW classifiers
     # ------------------------------------------------------------------
 
-    def request_helloz_nsfw_score(self, image_path, requests_module, helloz_nsfw_url, request_timeout):
+    def request_helloz_nsfw_score(self, image_path, requests_module, helloz_nsfw_url, request_timeout, flow_control=None, upload_transform=None):
+        # helloz_nsfw_url is a URL or an EndpointPool that routes across replicas; failed
+        # requests are retried, and flow_control raises CircuitOpenError while the service is down.
+        # upload_transform, when set, downsizes and re-encodes the image before it is sent.
         request_url = helloz_nsfw_url or constants.HELLOZ_NSFW_URL
-        with open(image_path, 'rb') as image_file:
-            response = requests_module.post(
-                request_url,
-                files={'file': image_file},
-                timeout=request_timeout,
-            )
+        upload = read_upload(image_path, upload_transform)
+
+        def post(url):
+            return requests_module.post(url, files={'file': upload}, timeout=request_timeout)
+
+        def send():
+            return request_url.send(post) if isinstance(request_url, EndpointPool) else post(request_url)
+
+        response = call_with_retry(send, flow_control)
         if response.status_code != 200:
             return None
         result = response.json()
         confidence_score = float(result.get('data', {}).get('nsfw', 0.0))
         return result, confidence_score
 
-    def run_helloz_nsfw_image(self, file_path, existing_files, threshold_value, threshold_percent, requests_module, helloz_nsfw_url, request_timeout, session):
+    def run_helloz_nsfw_image(self, file_path, existing_files, threshold_value, threshold_percent, requests_module, helloz_nsfw_url, request_timeout, session,
+                              flow_control=None, upload_transform=None):
         if not self.is_processing or file_path in existing_files:
             return
         if self._verbose_log:
             GLib.idle_add(self.log_message, f'Processing image: {os.path.basename(file_path)}')
-        scored_result = self.request_helloz_nsfw_score(file_path, requests_module, helloz_nsfw_url, request_timeout)
+        try:
+            scored_result = self.request_helloz_nsfw_score(file_path, requests_module, helloz_nsfw_url, request_timeout, flow_control, upload_transform)
+        except Exception as error:
+            self._defer_if_overloaded(file_path, error, flow_control)
+            raise
         if scored_result is None:
             GLib.idle_add(self.log_message, f'Failed to classify {os.path.basename(file_path)}', 'error')
             return
@@ -296,7 +326,8 @@ class ScanningMixin:
             threshold_percent=threshold_percent,
         )
 
-    def run_helloz_nsfw_video(self, file_path, existing_files, threshold_value, threshold_percent, requests_module, helloz_nsfw_url, request_timeout, session):
+    def run_helloz_nsfw_video(self, file_path, existing_files, threshold_value, threshold_percent, requests_module, helloz_nsfw_url, request_timeout, session,
+                              flow_control=None, upload_transform=None):
         if not self.is_processing or file_path in existing_files:
             return
         if self._verbose_log:
@@ -308,7 +339,13 @@ class ScanningMixin:
             for frame_path in frame_paths:
                 if not self.is_processing:
                     break
-                scored_result = self.request_helloz_nsfw_score(frame_path, requests_module, helloz_nsfw_url, request_timeout)
+                try:
+                    scored_result = self.request_helloz_nsfw_score(
+                        frame_path, requests_module, helloz_nsfw_url, request_timeout, flow_control, upload_transform,
+                    )
+                except Exception as error:
+                    self._defer_if_overloaded(file_path, error, flow_control)
+                    raise
                 if scored_result is None:
                     continue
                 _result, confidence_score = scored_result
@@ -327,13 +364,24 @@ class ScanningMixin:
                 threshold_percent=threshold_percent,
             )
         finally:
+            close_frames(frame_paths)
             extractor.cleanup()
 
+    def _defer_if_overloaded(self, file_path, error, flow_control):
+        """Raise DeferredFile instead of *error* when the Helloz service is overloaded."""
+        deferral = defer_if_overloaded(file_path, error, flow_control)
+        if deferral is not None:
+            GLib.idle_add(self.log_message, f'Helloz NSFW overloaded; {os.path.basename(file_path)} will be retried', 'warning')
+            raise deferral from error
+
     def create_helloz_nsfw_classifiers(self, existing_files, threshold_value, threshold_percent, session):
         import requests
 
-        helloz_nsfw_url = self._get_helloz_nsfw_url()
+        helloz_nsfw_url = shared_endpoint_pool(self._get_helloz_nsfw_urls())
+        flow_control = shared_flow_control(helloz_nsfw_url.urls)
         request_timeout = self._get_helloz_nsfw_request_timeout()
+        # A fresh transform per scan, so its stats describe this scan only
+        upload_transform = self._upload_transform = create_upload_transform(*constants.get_helloz_nsfw_upload_config())
         return (
             partial(
                 self.run_helloz_nsfw_image,
@@ -344,6 +392,8 @@ class ScanningMixin:
                 helloz_nsfw_url=helloz_nsfw_url,
                 request_timeout=request_timeout,
                 session=session,
+                flow_control=flow_control,
+                upload_transform=upload_transform,
             ),
             partial(
                 self.run_helloz_nsfw_video,
@@ -354,9 +404,52 @@ class ScanningMixin:
                 helloz_nsfw_url=helloz_nsfw_url,
                 request_timeout=request_timeout,
                 session=session,
+                flow_control=flow_control,
+                upload_transform=upload_transform,
             ),
         )
 
+    async def scan_helloz_nsfw_async(self, folder_path, existing_files, threshold_value, threshold_percent, session,
+                                     image_stages, with_progress, deduplicate=False, schedule=None):
+        """Classify *folder_path* with Helloz NSFW on the asyncio pipeline.
+
+        Up to remote_concurrency uploads are in flight over one AsyncHttpClient,
+        using the replicas, timeout and upload transform set in the window.
+        *with_progress* wraps each coroutine classifier, outside the image
+        stages so skipped files count as processed. Returns the duplicate
+        groups of classify_folder_async.
+        """
+        concurrency = constants.get_remote_concurrency()
+        options = {
+            'upload_url': shared_endpoint_pool(self._get_helloz_nsfw_urls()),
+            'request_timeout': self._get_helloz_nsfw_request_timeout(),
+            'transform': self._upload_transform,
+        }
+        with ThreadPoolExecutor(thread_name_prefix='scan-io') as executor:
+            async with AsyncHttpClient(concurrency) as client:
+                classify_image = helloz_nsfw.make_classify_image_async(
+                    client, executor, existing_files, threshold_value, threshold_percent, session, **options,
+                )
+                classify_video = helloz_nsfw.make_classify_video_async(
+                    client, executor, existing_files, threshold_value, threshold_percent, session, **options,
+                )
+                classify_image = apply_image_stages_async(classify_image, image_stages, existing_files, executor)
+                return await classify_folder_async(
+                    folder_path, with_progress(classify_image), with_progress(classify_video), concurrency,
+                    executor, (), existing_files, deduplicate, schedule,
+                )
+
+    # ------------------------------------------------------------------
+    # Registered backends without GUI-specific classifiers
+    # ------------------------------------------------------------------
+
+    def create_backend_classifiers(self, existing_files, threshold_value, threshold_percent, session):
+        backend = get_backend(self._get_model())
+        classify_image, classify_video = backend.make_classifiers(
+            backend.load_model(), session, threshold_percent, existing_files,
+        )
+        return backend.guard(classify_image), backend.guard(classify_video)
+
     # ------------------------------------------------------------------
     # Main worker thread
     # ------------------------------------------------------------------
@@ -366,6 +459,7 @@ class ScanningMixin:
         threshold_percent = self.threshold_spin.get_value()
         threshold_value = normalize_threshold(threshold_percent)
         theme_mode = self._get_theme_mode()
+        class_thresholds, class_weights = constants.get_scoring_config(model_name)
         report_path = get_report_path(scan_run_dir)
         existing_files = set()
         update_interval = self._get_progress_interval()
@@ -393,7 +487,7 @@ class ScanningMixin:
 
         # ------------------------------------------------------------------
         # Async save thread — receives (snapshot, session, path) from worker
-        # threads so Excel writes never block file-processing workers.
+        # threads so report writes never block file-processing workers.
         # ------------------------------------------------------------------
         from queue import Queue as _Queue
         _save_queue = _Queue()
@@ -405,7 +499,8 @@ class ScanningMixin:
                     break
                 snap, sess, path = item
                 try:
-                    save_nudity_report(snap, path, session_state=sess)
+                    # Results store and session only; the workbook is exported once at the end
+                    save_nudity_report(snap, path, session_state=sess, write_workbook=False)
                 except Exception as exc:
                     logging.exception('Intermediate report save failed: %s', exc)
                     GLib.idle_add(self.log_message, f'Warning: could not save intermediate report: {exc}', 'warning')
@@ -424,6 +519,8 @@ class ScanningMixin:
                         model_name=model_name,
                         threshold_percent=threshold_percent,
                         theme_mode=theme_mode,
+                        class_thresholds=class_thresholds,
+                        class_weights=class_weights,
                     ),
                     results=snapshot,
                 )
@@ -451,48 +548,111 @@ class ScanningMixin:
                 f'Progress: {count}/{total_files} files scanned — {detected_count} detection(s) so far.',
             )
 
+        def _count_attempt():
+            with count_lock:
+                files_processed[0] += 1
+                count = files_processed[0]
+            if count % update_interval == 0:
+                _flush_intermediate(count)
+
         def _with_progress(fn):
             """Wrap a classifier to count files attempted while scanning is active.
 
-            The counter is incremented in a ``finally`` block so that exceptions
-            inside ``fn`` still count toward attempted files and don't inflate
-            the "skipped" total.
+            Files whose classifier raises still count toward attempted files so
+            they don't inflate the "skipped" total. A DeferredFile propagates
+            uncounted; the round that classifies the file counts it.
             """
             def wrapper(file_path):
                 if not self.is_processing:
                     return
                 try:
                     fn(file_path)
-                finally:
-                    with count_lock:
-                        files_processed[0] += 1
-                        count = files_processed[0]
-                    if count % update_interval == 0:
-                        _flush_intermediate(count)
+                except DeferredFile:
+                    raise
+                except Exception:
+                    _count_attempt()
+                    raise
+                _count_attempt()
             return wrapper
 
+        def _with_progress_async(fn):
+            """Coroutine counterpart of _with_progress for the asyncio pipeline."""
+            async def wrapper(file_path):
+                if not self.is_processing:
+                    return
+                try:
+                    await fn(file_path)
+                except DeferredFile:
+                    raise
+                except Exception:
+                    _count_attempt()
+                    raise
+                _count_attempt()
+            return wrapper
+
+        phash_index = None
+        self._upload_transform = None  # Set by classifier factories that transform uploads
+        watcher = None
+
         try:
-            if model_name == constants.MODEL_NUDENET:
-                classify_image, classify_video = self.create_nudenet_classifiers(
-                    existing_files, threshold_value, threshold_percent, scan_session,
-                )
+            backend = get_backend(model_name)
+            # The built-in models have GUI classifiers that honour Stop and log to the window
+            create_classifiers = {
+                constants.MODEL_NUDENET: self.create_nudenet_classifiers,
+                constants.MODEL_HELLOZ_NSFW: self.create_helloz_nsfw_classifiers,
+            }.get(model_name, self.create_backend_classifiers)
+            classify_image, classify_video = create_classifiers(
+                existing_files, threshold_value, threshold_percent, scan_session,
+            )
+
+            image_stages, phash_index = configure_image_stages(
+                scan_session,
+                model_name,
+                threshold_percent,
+                near_duplicate_skip=self._get_near_duplicate_skip(),
+                near_duplicate_distance=self._get_near_duplicate_max_distance(),
+            )
+            classify_image = apply_image_stages(classify_image, image_stages, existing_files)
+
+            # Watch mode reuses the classifiers without the one-shot progress counter.
+            watch_classifiers = (classify_image, classify_video)
+            # Watch from before the scan so files created while it runs are not missed
+            if self._get_watch_after_scan():
+                watcher = start_folder_watcher(folder_path)
+
+            if model_name == constants.MODEL_HELLOZ_NSFW and backend.execution_strategy() == EXECUTION_ASYNC:
+                # The initial scan uploads over one event loop; watch mode keeps the threaded classifiers
+                duplicate_groups = asyncio.run(self.scan_helloz_nsfw_async(
+                    folder_path,
+                    existing_files,
+                    threshold_value,
+                    threshold_percent,
+                    scan_session,
+                    image_stages,
+                    _with_progress_async,
+                    deduplicate=self._get_exact_duplicate_skip(),
+                    schedule=configure_schedule(self._get_video_frame_rate()),
+                ))
             else:
-                classify_image, classify_video = self.create_helloz_nsfw_classifiers(
-                    existing_files, threshold_value, threshold_percent, scan_session,
+                duplicate_groups = classify_files_in_folder(
+                    folder_path,
+                    _with_progress(classify_image),
+                    _with_progress(classify_video),
+                    worker_count=backend.worker_count(self._get_worker_thread_count()),
+                    worker_timeout=self._get_worker_thread_timeout(),
+                    deduplicate=self._get_exact_duplicate_skip(),
+                    schedule=configure_schedule(self._get_video_frame_rate()),
                 )
+            # Byte-identical copies were never queued; they count as processed
+            # once the canonical file's result has been copied to them.
+            duplicate_count = record_duplicate_results(scan_session, duplicate_groups)
+            if duplicate_count:
+                GLib.idle_add(self.log_message, f'Reused results for {duplicate_count} duplicate file(s).')
 
-            classify_image = _with_progress(classify_image)
-            classify_video = _with_progress(classify_video)
-
-            classify_files_in_folder(
-                folder_path,
-                classify_image,
-                classify_video,
-                worker_count=self._get_worker_thread_count(),
-                worker_timeout=self._get_worker_thread_timeout(),
-            )
+            if phash_index is not None:
+                save_phash_index(phash_index)
 
-            processed = files_processed[0]
+            processed = files_processed[0] + duplicate_count
             skipped = total_files - processed
             all_results = scan_session.get_results()
             self.detected_results = get_detected_results(all_results)
@@ -536,16 +696,64 @@ class ScanningMixin:
                         f'Warning: {skipped} file(s) were skipped, timed out, or encountered errors.',
                         'warning',
                     )
+            if self._upload_transform is not None:
+                GLib.idle_add(self.log_message, self._upload_transform.stats.summary())
+            if not was_stopped and self._get_watch_after_scan():
+                GLib.idle_add(self.refresh_scan_history)
+                self._watch_for_changes(folder_path, *watch_classifiers, scan_session, report_path, phash_index, watcher)
             GLib.idle_add(self.refresh_scan_history)
         except Exception as error:
             GLib.idle_add(self.log_message, f'Error during processing: {error}', 'error')
         finally:
+            if watcher is not None:
+                watcher.stop()  # Stopped already unless the scan ended before watching began
             # Always drain and terminate the async save thread before finish_processing
             # so there is no background writer touching report files after the scan ends.
             _save_queue.put(None)
             save_thread.join()
+            end_report_run(report_path)
             GLib.idle_add(self.finish_processing)
 
+    def _watch_for_changes(self, folder_path, classify_image, classify_video, scan_session, report_path, phash_index,
+                           watcher=None):
+        """Classify new or changed files in *folder_path* until Stop is pressed.
+
+        Runs on the processing thread after the initial scan; *watcher* is the
+        FolderWatcher started before that scan. The report is rewritten at
+        most every WATCH_SAVE_INTERVAL seconds while files change.
+        """
+        def _on_change(file_path):
+            # A modified file replaces its earlier result instead of adding a row.
+            scan_session.discard_results(file_path)
+            if self._verbose_log:
+                GLib.idle_add(self.log_message, f'Change detected: {os.path.basename(file_path)}')
+
+        def _on_flush(count):
+            if phash_index is not None:
+                save_phash_index(phash_index)
+            all_results = scan_session.get_results()
+            self.detected_results = get_detected_results(all_results)
+            save_nudity_report(all_results, report_path, session_state=self.build_session_state())
+            GLib.idle_add(self.populate_results, list(self.detected_results))
+            GLib.idle_add(
+                self.log_message,
+                f'Watch: {count} new or changed file(s) processed — {len(self.detected_results)} detection(s) in total.',
+            )
+
+        GLib.idle_add(self.status_label.set_text, 'Watching for changes...')
+        GLib.idle_add(self.log_message, f'Watching {folder_path} for new or changed files. Press Stop to finish.')
+        processed = watch_folder(
+            folder_path,
+            classify_image,
+            classify_video,
+            should_stop=lambda: not self.is_processing,
+            on_change=_on_change,
+            on_flush=_on_flush,
+            worker_count=self._get_worker_thread_count(),
+            watcher=watcher,
+        )
+        GLib.idle_add(self.log_message, f'Stopped watching after {processed} changed file(s).', 'success')
+
     # ------------------------------------------------------------------
     # Progress pulse / fraction
     # ------------------------------------------------------------------
@@ -1,5 +1,7 @@
 import json
 import os
+import sqlite3
+import threading
 
 import gi
 
@@ -8,16 +10,19 @@ gi.require_version('Adw', '1')
 from gi.repository import Gio, GLib, Gtk
 
 from ..core import constants
-from ..core.models import ReportEntry
 from ..core.scan_session import ScanSession
 from ..core.utils import (
     DEFAULT_REPORT_DIR,
+    copy_results_store,
     create_session_state,
+    end_report_run,
     get_detected_results,
     get_report_path,
-    load_report_entries,
-    load_scan_session,
+    get_results_db_path,
+    load_run_scan_config,
     make_scan_config,
+    open_saved_session,
+    rethreshold_report,
     save_nudity_report,
 )
 
@@ -26,6 +31,8 @@ class SessionMixin:
     """Session persistence, report access, and scan config helpers.
     Mixed into NudityDetectorWindow."""
 
+    _session_load_generation = 0
+
     # ------------------------------------------------------------------
     # Button handlers
     # ------------------------------------------------------------------
@@ -36,6 +43,9 @@ class SessionMixin:
     def _on_load_session_clicked(self, _button):
         self.load_session_dialog()
 
+    def _on_apply_threshold_clicked(self, _button):
+        self.apply_threshold_to_session()
+
     def _on_open_report_clicked(self, _button):
         self.open_report()
 
@@ -47,11 +57,15 @@ class SessionMixin:
     # ------------------------------------------------------------------
 
     def build_scan_config(self):
+        model_name = self._get_model()
+        class_thresholds, class_weights = constants.get_scoring_config(model_name)
         return make_scan_config(
             source_folder=self.folder_entry.get_text().strip(),
-            model_name=self._get_model(),
+            model_name=model_name,
             threshold_percent=int(round(self.threshold_spin.get_value())),
             theme_mode=self._get_theme_mode(),
+            class_thresholds=class_thresholds,
+            class_weights=class_weights,
         )
 
     def build_session_state(self):
@@ -84,7 +98,7 @@ class SessionMixin:
         if latest and os.path.exists(latest):
             try:
                 self.load_session_from_path(latest, show_feedback=False)
-                self.log_message(f'Loaded previous session from {latest}')
+                self.log_message(f'Loading previous session from {latest}')
             except (OSError, IOError, json.JSONDecodeError):
                 self.log_message('No previous session could be loaded.', 'warning')
 
@@ -111,9 +125,13 @@ class SessionMixin:
                 report_path = file.get_path()
                 if not report_path.endswith(constants.XLSX_EXTENSION):
                     report_path += constants.XLSX_EXTENSION
+                # Rows loaded from a saved session carry no thumbnails; start the
+                # new report from a copy of the old store so they are kept.
+                copy_results_store(self.last_report_path, report_path)
                 self.last_report_path = report_path
                 results = self._scan_session.get_results() if hasattr(self, '_scan_session') and self._scan_session else []
-                save_nudity_report(results, report_path, session_state=self.build_session_state())
+                save_nudity_report(results, report_path, session_state=self.build_session_state(), full=True)
+                end_report_run(report_path)
                 self.open_report_button.set_sensitive(True)
                 self.log_message(f'Saved session report to {report_path}', 'success')
         except GLib.Error:
@@ -144,23 +162,89 @@ class SessionMixin:
             pass
 
     def load_session_from_path(self, file_path, show_feedback):
-        session_state = load_scan_session(file_path)
-        report_path = (
-            file_path
-            if file_path.endswith(constants.XLSX_EXTENSION)
-            else file_path.replace('_session.json', constants.XLSX_EXTENSION)
-        )
-        report_entries = load_report_entries(report_path) if os.path.exists(report_path) else []
-        detected_results = session_state.get('results') or get_detected_results(report_entries)
-        scan_config = session_state.get('scan_config', {})
+        """Load a saved session on a background thread.
+
+        The scan config is applied first, then result rows are added to the
+        table in chunks while the progress bar shows how many have been read.
+        Thumbnails are not loaded; the preview fetches one when a row is
+        selected. Starting another load or a scan abandons an unfinished one.
+        """
+        self._session_load_generation += 1
+        generation = self._session_load_generation
+        self.detected_results = []
+        self._scan_session = ScanSession()
+        self.populate_results([])
+        self.summary_label.set_text('Loading session...')
+        self.progress_bar.set_fraction(0.0)
+
+        def _current():
+            return generation == self._session_load_generation
+
+        def _apply_config(scan_config, report_path):
+            if _current():
+                self._apply_loaded_scan_config(scan_config)
+                self.last_report_path = report_path
+            return False
+
+        def _add_chunk(chunk, loaded, total):
+            if not _current():
+                return False
+            for entry in chunk:
+                self._scan_session.add_result(entry)
+            detected = get_detected_results([entry.to_dict() for entry in chunk])
+            self.append_results(detected, len(self.detected_results))
+            self.detected_results.extend(detected)
+            self.progress_bar.set_fraction(min(loaded / total, 1.0) if total else 1.0)
+            self.summary_label.set_text(f'Loading session... {loaded} of {total} result(s) read.')
+            return False
+
+        def _finish(report_path):
+            if not _current():
+                return False
+            self.progress_bar.set_fraction(0.0)
+            self.update_results_summary(len(self.detected_results))
+            self.open_report_button.set_sensitive(os.path.exists(report_path))
+            if show_feedback:
+                self.log_message(f'Loaded session from {file_path}', 'success')
+            return False
+
+        def _fail(error):
+            if _current():
+                self.progress_bar.set_fraction(0.0)
+                self.update_results_summary(len(self.detected_results))
+                self.log_message(f'Could not load session from {file_path}: {error}', 'error')
+            return False
+
+        def _do_load():
+            try:
+                scan_config, report_path, total, chunks = open_saved_session(file_path)
+                GLib.idle_add(_apply_config, scan_config, report_path)
+                loaded = 0
+                for chunk in chunks:
+                    if not _current():
+                        return
+                    loaded += len(chunk)
+                    GLib.idle_add(_add_chunk, chunk, loaded, total)
+            except (OSError, ValueError, sqlite3.Error) as error:
+                GLib.idle_add(_fail, error)
+                return
+            GLib.idle_add(_finish, report_path)
+
+        threading.Thread(target=_do_load, daemon=True).start()
+
+        # Ensure the Scan tab is visible after loading a session
+        if hasattr(self, 'view_stack'):
+            self.view_stack.set_visible_child_name('scan')
 
-        self.folder_entry.set_text(scan_config.get('source_folder', ''))
-        if scan_config.get('model_name', 'nudenet') == constants.MODEL_NUDENET:
+    def _apply_loaded_scan_config(self, scan_config):
+        """Set the folder, model, theme and threshold controls from a loaded ScanConfig."""
+        self.folder_entry.set_text(scan_config.source_folder)
+        if scan_config.model_name == constants.MODEL_NUDENET:
             self.nudenet_radio.set_active(True)
         else:
             self.helloz_nsfw_radio.set_active(True)
 
-        theme = scan_config.get('theme_mode', 'system')
+        theme = scan_config.theme_mode
         try:
             idx = list(constants.SUPPORTED_THEMES).index(theme)
         except ValueError:
@@ -168,23 +252,53 @@ class SessionMixin:
         self.theme_dropdown.set_selected(idx)
         self._apply_theme(theme)
 
-        self.threshold_spin.set_value(float(scan_config.get('threshold_percent', 60)))
+        self.threshold_spin.set_value(float(scan_config.threshold_percent))
 
-        self.detected_results = detected_results
-        self._scan_session = ScanSession(initial_results=[
-            entry if not isinstance(entry, dict) else ReportEntry.from_dict(entry)
-            for entry in (report_entries or detected_results)
-        ])
-        self.populate_results(self.detected_results)
-        self.last_report_path = report_path
-        self.open_report_button.set_sensitive(os.path.exists(report_path))
+    # ------------------------------------------------------------------
+    # Re-threshold
+    # ------------------------------------------------------------------
 
-        if show_feedback:
-            self.log_message(f'Loaded session from {file_path}', 'success')
+    def apply_threshold_to_session(self):
+        """Re-evaluate the current run at the threshold control's value, then reload it.
 
-        # Ensure the Scan tab is visible after loading a session
-        if hasattr(self, 'view_stack'):
-            self.view_stack.set_visible_child_name('scan')
+        Runs on a background thread from the stored class scores; nothing is
+        rescanned.
+        """
+        report_path = self.last_report_path
+        if self.is_processing:
+            return
+        if not (os.path.exists(get_results_db_path(report_path)) or os.path.exists(report_path)):
+            self._show_warning('Warning', 'No saved scan results to re-evaluate.')
+            return
+        threshold_percent = float(self.threshold_spin.get_value())
+        self.apply_threshold_button.set_sensitive(False)
+        self.summary_label.set_text(f'Re-applying a {threshold_percent:.0f}% threshold...')
+
+        def _done(detected, total):
+            self.apply_threshold_button.set_sensitive(True)
+            self.log_message(
+                f'Re-evaluated {total} result(s) at {threshold_percent:.0f}%: {detected} detected.', 'success',
+            )
+            self.load_session_from_path(report_path, show_feedback=False)
+            return False
+
+        def _fail(error):
+            self.apply_threshold_button.set_sensitive(True)
+            self.update_results_summary(len(self.detected_results))
+            self.log_message(f'Could not re-apply the threshold: {error}', 'error')
+            return False
+
+        def _do_rethreshold():
+            try:
+                # Per-class settings of the model the run was scanned with, not the one selected now
+                model_name = load_run_scan_config(report_path).model_name
+                detected, total = rethreshold_report(report_path, threshold_percent, *constants.get_scoring_config(model_name))
+            except (OSError, ValueError, sqlite3.Error) as error:
+                GLib.idle_add(_fail, error)
+                return
+            GLib.idle_add(_done, detected, total)
+
+        threading.Thread(target=_do_rethreshold, daemon=True).start()
 
     # ------------------------------------------------------------------
     # Open report / reports folder
@@ -0,0 +1,108 @@
+"""
+Exact-duplicate detection for the Nudity Detector application.
+Groups byte-identical files so each unique content is classified only once.
+Files are grouped by size first; only size collisions are hashed, first on a
+leading chunk and then in full, so unique files are never read. Unsupported
+files are never hashed; they pass through to be skipped by the scan.
+"""
+
+import hashlib
+import logging
+import os
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+from ..core import constants
+from .media_processor import is_supported_file
+
+
+def _new_hasher():
+    """Return a fast non-cryptographic hasher, falling back to BLAKE2b."""
+    if xxhash is not None:
+        return xxhash.xxh3_128()
+    return hashlib.blake2b(digest_size=16)
+
+
+def hash_file_contents(file_path: str, chunk_size: int = constants.CONTENT_HASH_CHUNK_SIZE,
+                       max_bytes: Optional[int] = None) -> Optional[str]:
+    """Hash a file's contents using chunked reads.
+
+    Args:
+        file_path: Path to file
+        chunk_size: Bytes read per chunk
+        max_bytes: Stop after this many bytes (None hashes the whole file)
+
+    Returns:
+        Hex digest, or None if the file cannot be read
+    """
+    hasher = _new_hasher()
+    remaining = max_bytes
+    try:
+        with open(file_path, 'rb') as f:
+            while remaining is None or remaining > 0:
+                chunk = f.read(chunk_size if remaining is None else min(chunk_size, remaining))
+                if not chunk:
+                    break
+                hasher.update(chunk)
+                if remaining is not None:
+                    remaining -= len(chunk)
+    except OSError as e:
+        logging.warning('Could not hash %s: %s', file_path, e)
+        return None
+    return hasher.hexdigest()
+
+
+def _split_by_hash(paths: List[str], max_bytes: Optional[int]) -> List[List[str]]:
+    """Split *paths* into groups of equal (partial) content hash; drops singletons."""
+    by_hash = defaultdict(list)
+    for path in paths:
+        digest = hash_file_contents(path, max_bytes=max_bytes)
+        if digest is not None:
+            by_hash[digest].append(path)
+    return [group for group in by_hash.values() if len(group) > 1]
+
+
+def find_duplicate_files(file_paths: Iterable[str]) -> Tuple[List[str], Dict[str, List[str]]]:
+    """Separate unique contents from byte-identical copies.
+
+    The first path seen for each content (in *file_paths* order) is the
+    canonical copy that should be classified; the others can reuse its result.
+
+    Args:
+        file_paths: Candidate file paths, typically in discovery order
+
+    Returns:
+        Tuple of (paths to classify, mapping of canonical path to its duplicates)
+    """
+    ordered = list(file_paths)
+    by_size = defaultdict(list)
+    for path in ordered:
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            continue
+        if size > 0 and is_supported_file(path):
+            by_size[size].append(path)
+
+    duplicate_groups: Dict[str, List[str]] = {}
+    for size, same_size in by_size.items():
+        if len(same_size) < 2:
+            continue
+        # Large files are compared on a leading chunk first so differing
+        # videos of identical size are usually told apart after one read.
+        head_bytes = constants.CONTENT_HASH_CHUNK_SIZE
+        candidates = _split_by_hash(same_size, head_bytes) if size > head_bytes else [same_size]
+        for candidate in candidates:
+            for group in _split_by_hash(candidate, None):
+                duplicate_groups[group[0]] = group[1:]
+
+    duplicates = {path for group in duplicate_groups.values() for path in group}
+    unique_paths = [path for path in ordered if path not in duplicates]
+    if duplicates:
+        logging.info('Found %d duplicate file(s) across %d group(s)', len(duplicates), len(duplicate_groups))
+    return unique_paths, duplicate_groups
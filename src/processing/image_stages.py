@@ -0,0 +1,304 @@
+"""
+Image pre-stages that run before the detector.
+A stage's before(file_path) may record a result for the image itself and
+return True, so the detector is skipped; after(file_path) runs once the
+detector has classified an image the stage let through. NearDuplicateStage
+reuses the score of an indexed near-duplicate (see perceptual_hash) and
+PrefilterStage clears images a cheap prefilter scores as safe (see
+prefilter). configure_image_stages builds the stages enabled in the app
+config and apply_image_stages wraps a classifier in them.
+"""
+
+import json
+import logging
+import os
+from dataclasses import replace
+from threading import Lock
+from typing import Dict, Optional
+
+from ..core import constants
+from ..core.scan_session import ScanSession
+from ..core.scoring import rethreshold_entries
+from .perceptual_hash import PerceptualHashIndex, compute_dhash
+from .prefilter import create_prefilter
+
+
+def get_phash_index_path(report_dir=constants.DEFAULT_REPORT_DIR) -> str:
+    """Get the path of the perceptual hash index shared by all scan runs."""
+    return os.path.join(report_dir, constants.PHASH_INDEX_FILE_NAME)
+
+
+def load_phash_index(report_dir=constants.DEFAULT_REPORT_DIR) -> PerceptualHashIndex:
+    """Load the persisted perceptual hash index (empty if none exists yet)."""
+    return PerceptualHashIndex.load(get_phash_index_path(report_dir))
+
+
+def save_phash_index(index: PerceptualHashIndex, report_dir=constants.DEFAULT_REPORT_DIR) -> bool:
+    """Persist *index* so later scans can reuse its scores, dropping files that no longer exist."""
+    pruned = index.prune_missing()
+    if pruned:
+        logging.info('Dropped %d missing file(s) from the perceptual hash index', pruned)
+    return index.save(get_phash_index_path(report_dir))
+
+
+class NearDuplicateStage:
+    """Image pre-stage that reuses the score of an indexed near-duplicate.
+
+    before() hashes the image and, when the index holds an entry for the same
+    model within *max_distance* bits, records that entry's class scores
+    (re-scored with the scan's threshold and per-class scoring config) for the
+    file with ``duplicate_of`` pointing at the original, and returns True: the
+    detector is not run. after() indexes the result once the file has been
+    classified.
+    """
+
+    def __init__(
+        self,
+        session: ScanSession,
+        index: PerceptualHashIndex,
+        model_name: str,
+        threshold_percent: float = constants.DEFAULT_THRESHOLD_PERCENT,
+        max_distance: int = constants.NEAR_DUPLICATE_MAX_DISTANCE,
+        report_dir: str = constants.DEFAULT_REPORT_DIR,
+    ) -> None:
+        self.session = session
+        self.index = index
+        self.model_name = model_name
+        self.threshold_percent = threshold_percent
+        self.max_distance = max_distance
+        self.report_dir = report_dir
+        self._class_thresholds, self._class_weights = constants.get_scoring_config(model_name)
+        self._hashes: Dict[str, int] = {}
+        self._lock = Lock()
+
+    def before(self, file_path: str) -> bool:
+        image_hash = compute_dhash(file_path)
+        if image_hash is None:
+            return False
+
+        match = self.index.find_match(image_hash, self.max_distance, self.model_name)
+        if match is None or match.file == file_path:
+            with self._lock:
+                self._hashes[file_path] = image_hash
+            return False
+
+        from ..core.utils import handle_results  # core.utils imports this module
+
+        logging.info('Reusing result of near-duplicate %s for %s', match.file, file_path)
+        [rescored] = rethreshold_entries([match], self.threshold_percent, self._class_thresholds, self._class_weights)
+        handle_results(
+            file_path,
+            rescored.nudity_detected,
+            match.detected_classes,
+            session=self.session,
+            confidence_score=rescored.confidence_percent / 100.0,
+            media_type=constants.MEDIA_TYPE_IMAGE,
+            model_name=self.model_name,
+            threshold_percent=self.threshold_percent,
+            report_dir=self.report_dir,
+            duplicate_of=match.file,
+        )
+        return True
+
+    def after(self, file_path: str) -> None:
+        with self._lock:
+            image_hash = self._hashes.pop(file_path, None)
+        if image_hash is None:
+            return
+        entry = self.session.find_result(file_path)
+        if entry is not None and not entry.detected_classes.startswith('ERROR:'):
+            self.index.add(image_hash, entry)
+
+
+def wrap_image_stage(classify_image, stage, existing_files=frozenset()):
+    """Run *stage* around a synchronous image classifier.
+
+    Files in *existing_files* go straight to classify_image so its own skip
+    logic applies. Otherwise stage.before() runs first and, unless it handled
+    the file, classify_image and then stage.after() follow.
+    """
+    def classify_image_staged(file_path):
+        if file_path in existing_files:
+            classify_image(file_path)
+            return
+        if stage.before(file_path):
+            return
+        classify_image(file_path)
+        stage.after(file_path)
+
+    return classify_image_staged
+
+
+def skip_near_duplicates(
+    classify_image,
+    session: ScanSession,
+    index: PerceptualHashIndex,
+    model_name: str,
+    threshold_percent: float = constants.DEFAULT_THRESHOLD_PERCENT,
+    max_distance: int = constants.NEAR_DUPLICATE_MAX_DISTANCE,
+    report_dir: str = constants.DEFAULT_REPORT_DIR,
+    existing_files=frozenset(),
+):
+    """Wrap an image classifier so near-duplicate images reuse earlier scores.
+
+    The wrapper hashes each image before inference (see NearDuplicateStage);
+    a near-duplicate of an indexed image reuses its score and the detector is
+    not run. Otherwise the image is classified normally and its result indexed.
+
+    Two near-duplicates classified concurrently by different workers may both
+    miss the index; that only costs one redundant inference.
+
+    Args:
+        classify_image: Image classification callable
+        session: ScanSession results are recorded in
+        index: Perceptual hash index shared by the scan's workers
+        model_name: Detection model name (scores are only reused per model)
+        threshold_percent: Detection threshold percentage
+        max_distance: Maximum Hamming distance treated as a duplicate
+        report_dir: Report directory path
+        existing_files: Files already in the report; passed straight through
+            to classify_image so its own skip logic applies
+
+    Returns:
+        Wrapped classify_image callable
+    """
+    stage = NearDuplicateStage(session, index, model_name, threshold_percent, max_distance, report_dir)
+    return wrap_image_stage(classify_image, stage, existing_files)
+
+
+class PrefilterStage:
+    """Image pre-stage that clears images a cheap prefilter scores below *min_score*.
+
+    Cleared images are recorded as not detected without running the
+    detector; their detected_classes hold the cascade decision, e.g.
+    ``{"cascade": "cleared", "prefilter": "skin_tone", "score": 0.01}``.
+    Images scoring at or above *min_score*, or that the prefilter cannot
+    score (score None), are escalated: after() wraps the detector result as
+    ``{"cascade": "escalated", "prefilter": ..., "score": ..., "result": ...}``.
+    """
+
+    def __init__(
+        self,
+        session: ScanSession,
+        prefilter,
+        model_name: str,
+        threshold_percent: float = constants.DEFAULT_THRESHOLD_PERCENT,
+        min_score: float = constants.PREFILTER_MIN_SCORE,
+        report_dir: str = constants.DEFAULT_REPORT_DIR,
+    ) -> None:
+        self.session = session
+        self.prefilter = prefilter
+        self.prefilter_name = getattr(prefilter, 'name', type(prefilter).__name__)
+        self.model_name = model_name
+        self.threshold_percent = threshold_percent
+        self.min_score = min_score
+        self.report_dir = report_dir
+        self._escalated: Dict[str, Optional[float]] = {}
+        self._lock = Lock()
+
+    def _decision(self, cascade: str, score: Optional[float]) -> dict:
+        return {'cascade': cascade, 'prefilter': self.prefilter_name, 'score': None if score is None else round(score, 4)}
+
+    def before(self, file_path: str) -> bool:
+        score = self.prefilter(file_path)
+        if score is None or score >= self.min_score:
+            with self._lock:
+                self._escalated[file_path] = score
+            return False
+
+        from ..core.utils import handle_results  # core.utils imports this module
+
+        logging.debug('Prefilter %s cleared %s (score %.4f)', self.prefilter_name, file_path, score)
+        handle_results(
+            file_path,
+            False,
+            self._decision(constants.CASCADE_CLEARED, score),
+            session=self.session,
+            confidence_score=0.0,
+            media_type=constants.MEDIA_TYPE_IMAGE,
+            model_name=self.model_name,
+            threshold_percent=self.threshold_percent,
+            report_dir=self.report_dir,
+        )
+        return True
+
+    def after(self, file_path: str) -> None:
+        with self._lock:
+            if file_path not in self._escalated:
+                return
+            score = self._escalated.pop(file_path)
+        entry = self.session.find_result(file_path)
+        if entry is None or str(entry.detected_classes).startswith('ERROR:'):
+            return
+        try:
+            result = json.loads(entry.detected_classes)
+        except (TypeError, ValueError):
+            result = entry.detected_classes
+        detected_classes = json.dumps({**self._decision(constants.CASCADE_ESCALATED, score), 'result': result}, ensure_ascii=False)
+        # A new entry rather than an in-place edit, so the next incremental save sees the change
+        self.session.replace_result(replace(entry, detected_classes=detected_classes))
+
+
+def cascade_prefilter(
+    classify_image,
+    session: ScanSession,
+    prefilter,
+    model_name: str,
+    threshold_percent: float = constants.DEFAULT_THRESHOLD_PERCENT,
+    min_score: float = constants.PREFILTER_MIN_SCORE,
+    report_dir: str = constants.DEFAULT_REPORT_DIR,
+    existing_files=frozenset(),
+):
+    """Wrap an image classifier so a cheap prefilter runs before it (see PrefilterStage).
+
+    Args:
+        classify_image: Image classification callable (the expensive stage)
+        session: ScanSession results are recorded in
+        prefilter: Callable returning a 0-1 score for a file path, or None
+        model_name: Detection model name recorded for cleared images
+        threshold_percent: Detection threshold percentage
+        min_score: Prefilter score below which an image is cleared
+        report_dir: Report directory path
+        existing_files: Files already in the report; passed straight through
+            to classify_image so its own skip logic applies
+
+    Returns:
+        Wrapped classify_image callable
+    """
+    stage = PrefilterStage(session, prefilter, model_name, threshold_percent, min_score, report_dir)
+    return wrap_image_stage(classify_image, stage, existing_files)
+
+
+def configure_image_stages(session: ScanSession, model_name: str,
+                           threshold_percent: float = constants.DEFAULT_THRESHOLD_PERCENT,
+                           near_duplicate_skip: Optional[bool] = None, near_duplicate_distance: Optional[int] = None):
+    """Build the image pre-stages enabled in the app config, in the order they run.
+
+    Near-duplicate reuse runs before the prefilter, so a cleared image's
+    copies are cleared too. *near_duplicate_skip* and
+    *near_duplicate_distance* override the config values when given (the
+    GUI has controls for them).
+
+    Returns:
+        (stages, phash_index); phash_index is None unless near-duplicate
+        skipping is enabled, and must be saved after the scan.
+    """
+    stages = []
+    config_skip, config_distance = constants.get_near_duplicate_config()
+    near_duplicate_skip = config_skip if near_duplicate_skip is None else near_duplicate_skip
+    near_duplicate_distance = config_distance if near_duplicate_distance is None else near_duplicate_distance
+    phash_index = load_phash_index() if near_duplicate_skip else None
+    if phash_index is not None:
+        stages.append(NearDuplicateStage(session, phash_index, model_name, threshold_percent, near_duplicate_distance))
+    prefilter_name, prefilter_min_score = constants.get_prefilter_config()
+    prefilter = create_prefilter(prefilter_name)
+    if prefilter is not None:
+        stages.append(PrefilterStage(session, prefilter, model_name, threshold_percent, prefilter_min_score))
+    return stages, phash_index
+
+
+def apply_image_stages(classify_image, stages, existing_files=frozenset()):
+    """Wrap a synchronous image classifier in *stages* (first stage outermost)."""
+    for stage in reversed(stages):
+        classify_image = wrap_image_stage(classify_image, stage, existing_files)
+    return classify_image
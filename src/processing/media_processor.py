@@ -9,8 +9,11 @@ import logging
 import os
 import shutil
 import tempfile
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
 from io import BytesIO
-from typing import Generator, List, Optional, Tuple
+from threading import BoundedSemaphore, Lock
+from typing import Dict, Generator, Iterator, List, Optional, Tuple
 
 import magic
 
@@ -176,6 +179,128 @@ class FrameExtractor:
             self.frame_paths = []
 
 
+class FrameDecoder:
+    """Thread pool that reads video frames ahead, never queueing a read.
+
+    submit() runs a read on a free decode thread, or returns None when all
+    *workers* are busy so the caller reads inline instead. More videos than
+    decode threads therefore never wait on each other's reads, and
+    prefetching is never slower than decoding inline.
+    """
+
+    def __init__(self, workers: int) -> None:
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='frame-decode')
+        self._slots = BoundedSemaphore(workers)
+
+    def submit(self, fn, *args) -> Optional[Future]:
+        if not self._slots.acquire(blocking=False):
+            return None
+        try:
+            future = self._executor.submit(fn, *args)
+        except RuntimeError:
+            # Shut down (the scan ended while a late worker still runs): read inline
+            self._slots.release()
+            return None
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _future: self._slots.release())
+        return future
+
+    def shutdown(self) -> None:
+        """Stop the decode threads; later submit() calls return None."""
+        self._executor.shutdown(wait=False)
+
+
+def prefetch_frames(frames: Iterator[str], decoder: Optional[FrameDecoder] = None) -> Generator[str, None, None]:
+    """Yield from *frames* while *decoder* reads the next frame in the background.
+
+    One frame is read ahead, so decoding frame N+1 overlaps the caller's
+    work on frame N; frames of one video are still decoded one at a time,
+    as a cv2 capture must not be read from two threads. When every decode
+    thread is busy the next frame is read inline. Closing the generator (or
+    breaking out of the loop) waits for the pending read and closes
+    *frames*. Without a decoder frames are decoded inline.
+    """
+    if decoder is None:
+        yield from frames
+        return
+    done = object()
+    pending = decoder.submit(next, frames, done)
+    try:
+        while True:
+            frame = pending.result() if pending is not None else next(frames, done)
+            if frame is done:
+                return
+            pending = decoder.submit(next, frames, done)
+            yield frame
+    finally:
+        if pending is not None:
+            wait([pending])
+        close_frames(frames)
+
+
+def close_frames(frames: Optional[Iterator[str]]) -> None:
+    """Close a frame generator (if any) so its capture is released before the frames are cleaned up."""
+    close = getattr(frames, 'close', None)
+    if close is not None:
+        close()
+
+
+_decoders: Dict[int, FrameDecoder] = {}
+_decoders_lock = Lock()
+_decoder_holds = 0  # Scans currently running; the shared decoders live while it is above 0
+
+
+def shared_frame_decoder() -> Optional[FrameDecoder]:
+    """Return the shared frame decoder sized by frame_decode_workers for the running scans.
+
+    None when frame_decode_workers is 0 or no scan holds the decoders (see
+    hold_frame_decoders), so frames are decoded inline.
+    """
+    workers = constants.get_worker_pool_config()[1]
+    if workers <= 0:
+        return None
+    with _decoders_lock:
+        if not _decoder_holds:
+            return None
+        decoder = _decoders.get(workers)
+        if decoder is None:
+            decoder = _decoders[workers] = FrameDecoder(workers)
+        return decoder
+
+
+def hold_frame_decoders() -> None:
+    """Keep the shared frame decoders available until the matching release_frame_decoders()."""
+    global _decoder_holds
+    with _decoders_lock:
+        _decoder_holds += 1
+
+
+def release_frame_decoders() -> None:
+    """End a hold_frame_decoders(); the last scan to finish shuts the decode threads down."""
+    global _decoder_holds
+    with _decoders_lock:
+        _decoder_holds = max(0, _decoder_holds - 1)
+        if _decoder_holds:
+            return
+        decoders = list(_decoders.values())
+        _decoders.clear()
+    for decoder in decoders:
+        decoder.shutdown()
+
+
+@contextmanager
+def frame_decoder_scope():
+    """Hold the shared frame decoders for the duration of a scan."""
+    hold_frame_decoders()
+    try:
+        yield
+    finally:
+        release_frame_decoders()
+
+
 class ThumbnailGenerator:
     """Generates base64-encoded thumbnails from images and videos."""
 
@@ -0,0 +1,263 @@
+"""
+Perceptual hashing for near-duplicate detection.
+Computes difference hashes (dHash) for images and indexes them in a BK-tree so
+that resized, re-encoded or lightly edited copies of an already-scored image
+can reuse its result instead of being inferred again.
+"""
+
+import json
+import logging
+import os
+from threading import Lock
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+from ..core import constants
+from ..core.models import ReportEntry
+
+# Fields persisted for each indexed hash. The thumbnail is deliberately left
+# out to keep the on-disk index small; it is regenerated for reused results.
+_INDEXED_FIELDS = (
+    constants.RESULT_FIELD_FILE,
+    constants.RESULT_FIELD_MEDIA_TYPE,
+    constants.RESULT_FIELD_MODEL,
+    constants.RESULT_FIELD_THRESHOLD,
+    constants.RESULT_FIELD_CONFIDENCE,
+    constants.RESULT_FIELD_NUDITY,
+    constants.RESULT_FIELD_CLASSES,
+)
+
+
+def compute_dhash(file_path: str, hash_size: int = constants.PHASH_HASH_SIZE) -> Optional[int]:
+    """Compute a difference hash for an image file.
+
+    The image is reduced to a (hash_size + 1) x hash_size greyscale grid and
+    each bit records whether a pixel is brighter than its right-hand
+    neighbour. JPEG decoding uses draft mode so large photos are decoded at a
+    fraction of their full resolution.
+
+    Args:
+        file_path: Path to image file
+        hash_size: Grid height; the hash has hash_size ** 2 bits
+
+    Returns:
+        Hash as an integer, or None if the image cannot be decoded
+    """
+    if Image is None:
+        logging.debug('PIL not available for perceptual hashing: %s', file_path)
+        return None
+
+    try:
+        with Image.open(file_path) as img:
+            img.draft('L', (hash_size * 8, hash_size * 8))
+            grey = img.convert('L').resize((hash_size + 1, hash_size), Image.Resampling.BILINEAR)
+            pixels = grey.tobytes()
+    except Exception as e:
+        logging.debug('Failed to compute perceptual hash for %s: %s', file_path, e)
+        return None
+
+    value = 0
+    row_width = hash_size + 1
+    for row in range(hash_size):
+        offset = row * row_width
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def hamming_distance(first: int, second: int) -> int:
+    """Return the number of differing bits between two hashes."""
+    return (first ^ second).bit_count()
+
+
+class BKTree:
+    """Burkhard-Keller tree over integer hashes using Hamming distance.
+
+    Neighbour queries only descend into children whose edge distance lies
+    within [d - max_distance, d + max_distance] of the query's distance to the
+    current node (triangle inequality), so small-radius lookups touch a tiny
+    fraction of the tree even with millions of hashes.
+    """
+
+    def __init__(self) -> None:
+        # Each node is [hash, values, children] where children maps an edge
+        # distance to a child node.
+        self._root: Optional[list] = None
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, hash_value: int, value) -> None:
+        """Insert *value* under *hash_value*; identical hashes share one node."""
+        self._size += 1
+        if self._root is None:
+            self._root = [hash_value, [value], {}]
+            return
+
+        node = self._root
+        while True:
+            distance = hamming_distance(hash_value, node[0])
+            if distance == 0:
+                node[1].append(value)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [hash_value, [value], {}]
+                return
+            node = child
+
+    def query(self, hash_value: int, max_distance: int) -> List[Tuple[int, int, object]]:
+        """Return (distance, hash, value) for every entry within *max_distance*.
+
+        Results are sorted by ascending distance.
+        """
+        if self._root is None:
+            return []
+
+        matches = []
+        pending = [self._root]
+        while pending:
+            node = pending.pop()
+            distance = hamming_distance(hash_value, node[0])
+            if distance <= max_distance:
+                matches.extend((distance, node[0], value) for value in node[1])
+            low, high = distance - max_distance, distance + max_distance
+            pending.extend(child for edge, child in node[2].items() if low <= edge <= high)
+        matches.sort(key=lambda match: match[0])
+        return matches
+
+    def items(self) -> Iterator[Tuple[int, object]]:
+        """Yield every (hash, value) pair in the tree."""
+        pending = [self._root] if self._root is not None else []
+        while pending:
+            node = pending.pop()
+            for value in node[1]:
+                yield node[0], value
+            pending.extend(node[2].values())
+
+
+class PerceptualHashIndex:
+    """Thread-safe index of scored images keyed by perceptual hash.
+
+    Workers query the index before running inference; a hit within the
+    configured Hamming distance for the same model returns the earlier
+    ReportEntry so its score can be reused. Each file is indexed once per
+    model: adding it again replaces that model's earlier hash and result. The
+    index can be persisted to a JSON file so duplicates are also recognised
+    across scan runs.
+    """
+
+    def __init__(self) -> None:
+        # The tree maps hashes to (file, model) keys; _entries holds the
+        # current (hash, record) of each key. Tree nodes left behind by a
+        # replaced hash are skipped on lookup and dropped when the tree is
+        # rebuilt.
+        self._tree = BKTree()
+        self._entries: Dict[Tuple[str, str], Tuple[int, Dict]] = {}
+        self._stale = 0
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def add(self, hash_value: int, entry: ReportEntry) -> None:
+        """Index the scored *entry* under *hash_value*, replacing any earlier entry for its file and model."""
+        record = {key: getattr(entry, key) for key in _INDEXED_FIELDS}
+        with self._lock:
+            self._put(hash_value, record)
+
+    def _put(self, hash_value: int, record: Dict) -> None:
+        key = (record[constants.RESULT_FIELD_FILE], record.get(constants.RESULT_FIELD_MODEL) or '')
+        previous = self._entries.get(key)
+        self._entries[key] = (hash_value, record)
+        if previous is not None and previous[0] == hash_value:
+            return
+        self._tree.add(hash_value, key)
+        if previous is not None:
+            self._stale += 1
+            if self._stale > len(self._entries):
+                self._rebuild()
+
+    def _rebuild(self) -> None:
+        self._tree = BKTree()
+        for key, (hash_value, _record) in self._entries.items():
+            self._tree.add(hash_value, key)
+        self._stale = 0
+
+    def prune_missing(self) -> int:
+        """Drop entries whose files no longer exist.
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            missing = [key for key in self._entries if not os.path.exists(key[0])]
+            for key in missing:
+                del self._entries[key]
+            if missing:
+                self._rebuild()
+        return len(missing)
+
+    def find_match(self, hash_value: int, max_distance: int, model_name: str = '') -> Optional[ReportEntry]:
+        """Return the closest indexed entry within *max_distance*, or None.
+
+        When *model_name* is given, only entries scored by that model match.
+        """
+        with self._lock:
+            candidates = [
+                self._entries[key][1]
+                for _distance, node_hash, key in self._tree.query(hash_value, max_distance)
+                if self._entries.get(key, (None,))[0] == node_hash
+            ]
+        for record in candidates:
+            if model_name and record.get(constants.RESULT_FIELD_MODEL) != model_name:
+                continue
+            return ReportEntry.from_dict(record)
+        return None
+
+    def save(self, file_path: str) -> bool:
+        """Persist the index to *file_path* as JSON.
+
+        Returns:
+            True if successful
+        """
+        with self._lock:
+            rows: List[Dict] = [
+                {'hash': format(hash_value, 'x'), **record}
+                for hash_value, record in self._entries.values()
+            ]
+        try:
+            os.makedirs(os.path.dirname(file_path) or '.', exist_ok=True)
+            temp_path = f'{file_path}.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(rows, f, ensure_ascii=False)
+            os.replace(temp_path, file_path)
+            return True
+        except OSError as e:
+            logging.error('Failed to save perceptual hash index to %s: %s', file_path, e)
+            return False
+
+    @classmethod
+    def load(cls, file_path: str) -> 'PerceptualHashIndex':
+        """Load an index from *file_path*; returns an empty index on error."""
+        index = cls()
+        if not os.path.exists(file_path):
+            return index
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                rows = json.load(f)
+            for row in rows:
+                hash_value = int(row.pop('hash'), 16)
+                index._put(hash_value, row)
+            if index._stale:
+                index._rebuild()
+        except (OSError, ValueError, KeyError, AttributeError, TypeError) as e:
+            logging.warning('Failed to load perceptual hash index from %s: %s', file_path, e)
+            return cls()
+        return index
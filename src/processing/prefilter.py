@@ -0,0 +1,84 @@
+"""
+Cheap first-stage classifiers for the detection cascade.
+A prefilter scores an image in a few milliseconds; images scoring below the
+configured minimum are cleared as safe without running the full detector or
+a remote request, and only the rest are escalated.
+
+A prefilter is any callable taking a file path and returning a score in the
+0-1 range, or None when it cannot tell (the image is then escalated). New
+prefilters are registered in PREFILTERS under the name used in the config.
+"""
+
+import logging
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+from ..core import constants
+
+# Skin-tone box in the YCbCr chroma plane (Chai & Ngan); luma is ignored so
+# the test holds across lighting
+_SKIN_CB = (77, 127)
+_SKIN_CR = (133, 173)
+# Greyscale images carry no chroma, so the skin-tone test cannot tell and
+# they are escalated: by mode, or by mean chroma distance from neutral (128)
+_GREYSCALE_MODES = frozenset({'1', 'L', 'LA', 'I', 'I;16', 'F'})
+_GREYSCALE_MAX_CHROMA = 4.0
+
+
+class SkinTonePrefilter:
+    """Scores an image by the fraction of its pixels that fall in the skin-tone range.
+
+    Documents, screenshots and landscapes have almost no skin-coloured
+    pixels, so they score near zero. Greyscale and black-and-white images
+    have no colour to test and return None. JPEGs are decoded in draft mode
+    at a fraction of their full resolution.
+    """
+
+    name = constants.PREFILTER_SKIN_TONE
+
+    def __init__(self, sample_size: Tuple[int, int] = constants.PREFILTER_SAMPLE_SIZE) -> None:
+        self.sample_size = sample_size
+
+    def __call__(self, file_path: str) -> Optional[float]:
+        if Image is None:
+            return None
+        try:
+            with Image.open(file_path) as img:
+                if img.mode in _GREYSCALE_MODES:
+                    return None
+                img.draft('YCbCr', self.sample_size)
+                img.thumbnail(self.sample_size, Image.Resampling.BILINEAR)
+                pixels = np.asarray(img.convert('YCbCr'))
+        except Exception as e:
+            logging.debug('Prefilter could not decode %s: %s', file_path, e)
+            return None
+        if not pixels.size:
+            return None
+        cb, cr = pixels[..., 1], pixels[..., 2]
+        chroma = np.maximum(np.abs(cb.astype(np.int16) - 128), np.abs(cr.astype(np.int16) - 128))
+        if chroma.mean() <= _GREYSCALE_MAX_CHROMA:
+            return None
+        skin = (cb >= _SKIN_CB[0]) & (cb <= _SKIN_CB[1]) & (cr >= _SKIN_CR[0]) & (cr <= _SKIN_CR[1])
+        return float(skin.mean())
+
+
+PREFILTERS: Dict[str, Callable[[], Callable[[str], Optional[float]]]] = {
+    constants.PREFILTER_SKIN_TONE: SkinTonePrefilter,
+}
+
+
+def create_prefilter(name: str) -> Optional[Callable[[str], Optional[float]]]:
+    """Return the prefilter registered as *name*, or None when it is empty or unknown."""
+    if not name:
+        return None
+    factory = PREFILTERS.get(name)
+    if factory is None:
+        logging.warning('Unknown prefilter %r; scanning without one', name)
+        return None
+    return factory()
@@ -0,0 +1,188 @@
+"""
+Pre-upload transform for remote detectors.
+Remote scorers resize every image to a small model input, so uploading a
+30MB PNG wastes bandwidth and server decode time. An UploadTransform decodes
+the image (JPEGs in draft mode, at a fraction of full resolution), downsizes
+it to a maximum edge and re-encodes it as JPEG or WebP in memory. Images
+that are already small JPEG/WebP files, animated images and files that do
+not decode are uploaded unchanged.
+
+Every upload is counted in UploadStats (bytes before and after, time spent
+transforming) so a scan can report what the transform saved and cost.
+"""
+
+import io
+import logging
+import os
+import time
+from threading import Lock
+from typing import Dict, Optional, Tuple
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+    ImageOps = None
+
+from ..core import constants
+
+_PIL_FORMATS = {constants.UPLOAD_FORMAT_JPEG: 'JPEG', constants.UPLOAD_FORMAT_WEBP: 'WEBP'}
+_EXTENSIONS = {constants.UPLOAD_FORMAT_JPEG: '.jpg', constants.UPLOAD_FORMAT_WEBP: '.webp'}
+_PASSTHROUGH_FORMATS = frozenset(_PIL_FORMATS.values())  # Small files already in these formats are sent as is
+
+
+class UploadStats:
+    """Thread-safe totals for the uploads prepared by one transform."""
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.files = 0
+            self.transformed = 0
+            self.bytes_in = 0
+            self.bytes_out = 0
+            self.seconds = 0.0
+
+    def record(self, bytes_in: int, bytes_out: int, seconds: float, transformed: bool) -> None:
+        with self._lock:
+            self.files += 1
+            self.transformed += int(transformed)
+            self.bytes_in += bytes_in
+            self.bytes_out += bytes_out
+            self.seconds += seconds
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                'files': self.files,
+                'transformed': self.transformed,
+                'bytes_in': self.bytes_in,
+                'bytes_out': self.bytes_out,
+                'seconds': self.seconds,
+            }
+
+    def summary(self) -> str:
+        """One-line report of bytes saved and time spent, for the scan log."""
+        stats = self.snapshot()
+        if not stats['files']:
+            return 'Upload transform: no files uploaded'
+        saved = 1 - stats['bytes_out'] / stats['bytes_in'] if stats['bytes_in'] else 0.0
+        return (
+            f"Upload transform: {stats['transformed']}/{stats['files']} file(s) re-encoded, "
+            f"{_format_bytes(stats['bytes_in'])} -> {_format_bytes(stats['bytes_out'])} ({saved:.0%} smaller), "
+            f"{stats['seconds']:.1f}s spent ({stats['seconds'] / stats['files'] * 1000:.1f} ms per file)"
+        )
+
+
+def _format_bytes(size: int) -> str:
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return f'{size:.0f} {unit}' if unit == 'B' else f'{size:.1f} {unit}'
+        size /= 1024
+    return f'{size:.1f} GB'
+
+
+class UploadTransform:
+    """Callable returning (file_name, bytes) to upload for an image path.
+
+    Images whose longest edge exceeds *max_edge*, or that are not already
+    JPEG/WebP, are downsized and re-encoded as *upload_format* at *quality*.
+    The original bytes are sent whenever the re-encoded image would not be
+    smaller, so the transform never makes an upload larger.
+    """
+
+    def __init__(self, max_edge: int, upload_format: str = constants.HELLOZ_NSFW_UPLOAD_FORMAT,
+                 quality: int = constants.HELLOZ_NSFW_UPLOAD_QUALITY) -> None:
+        if max_edge <= 0:
+            raise ValueError('UploadTransform needs a positive max_edge')
+        if upload_format not in _PIL_FORMATS:
+            raise ValueError(f'Unsupported upload format: {upload_format}')
+        self.max_edge = int(max_edge)
+        self.upload_format = upload_format
+        self.quality = int(quality)
+        self.stats = UploadStats()
+
+    def __call__(self, file_path: str) -> Tuple[str, bytes]:
+        started = time.perf_counter()
+        original = _read_file(file_path)
+        encoded = self._encode(file_path) if Image is not None else None
+        transformed = encoded is not None and len(encoded) < len(original)
+        if transformed:
+            file_name = os.path.splitext(os.path.basename(file_path))[0] + _EXTENSIONS[self.upload_format]
+            data = encoded
+        else:
+            file_name, data = os.path.basename(file_path), original
+        self.stats.record(len(original), len(data), time.perf_counter() - started, transformed)
+        return file_name, data
+
+    def _encode(self, file_path: str) -> Optional[bytes]:
+        """Return the downsized, re-encoded image, or None to upload the original."""
+        size = (self.max_edge, self.max_edge)
+        try:
+            with Image.open(file_path) as img:
+                if getattr(img, 'is_animated', False):
+                    return None
+                if img.format in _PASSTHROUGH_FORMATS and max(img.size) <= self.max_edge:
+                    return None
+                img.draft('RGB', size)
+                img = ImageOps.exif_transpose(img)
+                img.thumbnail(size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+                img = _flatten(img)
+                buffer = io.BytesIO()
+                img.save(buffer, format=_PIL_FORMATS[self.upload_format], quality=self.quality)
+                return buffer.getvalue()
+        except Exception as e:
+            logging.debug('Upload transform could not re-encode %s: %s', file_path, e)
+            return None
+
+
+def _flatten(img):
+    """Return *img* as RGB, compositing any transparency onto white."""
+    if img.mode == 'RGB':
+        return img
+    if img.mode == 'P' and 'transparency' in img.info:
+        img = img.convert('RGBA')
+    if img.mode in ('RGBA', 'LA'):
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        background.paste(img, mask=img.getchannel('A'))
+        return background
+    return img.convert('RGB')
+
+
+def _read_file(file_path: str) -> bytes:
+    with open(file_path, 'rb') as f:
+        return f.read()
+
+
+def read_upload(file_path: str, transform: Optional[UploadTransform] = None) -> Tuple[str, bytes]:
+    """Return (file_name, bytes) to upload for *file_path*, through *transform* when given."""
+    if transform is not None:
+        return transform(file_path)
+    return os.path.basename(file_path), _read_file(file_path)
+
+
+def create_upload_transform(max_edge: int, upload_format: str = constants.HELLOZ_NSFW_UPLOAD_FORMAT,
+                            quality: int = constants.HELLOZ_NSFW_UPLOAD_QUALITY) -> Optional[UploadTransform]:
+    """Return an UploadTransform, or None when *max_edge* is 0 (upload originals)."""
+    if max_edge <= 0:
+        return None
+    return UploadTransform(max_edge, upload_format, quality)
+
+
+_shared: Dict[tuple, UploadTransform] = {}
+_shared_lock = Lock()
+
+
+def shared_upload_transform() -> Optional[UploadTransform]:
+    """Return the process-wide transform for the configured Helloz NSFW upload settings, or None when disabled."""
+    config = constants.get_helloz_nsfw_upload_config()
+    if config[0] <= 0:
+        return None
+    with _shared_lock:
+        transform = _shared.get(config)
+        if transform is None:
+            transform = _shared[config] = UploadTransform(*config)
+        return transform
@@ -0,0 +1,132 @@
+"""
+Cost estimates and priorities for ordering the files of a scan.
+Scanning files in walk order lets a few long videos found late keep the
+scan running long after every other worker is idle. A WorkSchedule gives
+each file a sort key so the scan runners start the most expensive queued
+file first (longest-processing-time-first): long videos start early and
+small images fill the gaps around them.
+
+Costs are in detector calls: an image is about one call (plus decode time
+for large files), a video is one call per sampled frame, read from the
+container's frame count without decoding. Estimates are taken as files
+are discovered, so cost ordering opens every video once during the walk
+(a demuxer open and header read; slow on network shares), which is why
+it is opt-in. An optional priority puts whole groups of files first (e.g.
+recently modified ones); cost orders files within a group. New priorities
+are registered in PRIORITIES under the name used in the config.
+"""
+
+import logging
+import os
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+from ..core import constants
+
+_MB = 1024 * 1024
+
+
+def probe_video_frames(file_path: str) -> Optional[int]:
+    """Return the frame count in the video's container header, or None when it cannot be read.
+
+    Opens the file with cv2.VideoCapture, which reads the header but decodes
+    no frames.
+    """
+    if cv2 is None:
+        return None
+    cap = cv2.VideoCapture(file_path)
+    try:
+        if not cap.isOpened():
+            return None
+        frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        return frames if frames > 0 else None
+    finally:
+        cap.release()
+
+
+class CostEstimator:
+    """Estimates the detector calls a file needs from its extension, size and frame count.
+
+    *frame_step* is the video sampling interval (every Nth frame is
+    classified), as for FrameExtractor.
+    """
+
+    def __init__(self, frame_step: int = constants.VIDEO_FRAME_RATE) -> None:
+        self.frame_step = max(1, int(frame_step))
+
+    def __call__(self, file_path: str) -> float:
+        ext = os.path.splitext(file_path)[1].lower()
+        try:
+            size_mb = os.path.getsize(file_path) / _MB
+        except OSError:
+            return 0.0
+        if ext in constants.VIDEO_EXTENSIONS:
+            frames = probe_video_frames(file_path)
+            if frames is None:
+                return size_mb * constants.COST_VIDEO_PER_MB
+            return frames / self.frame_step
+        if ext in constants.IMAGE_EXTENSIONS:
+            return constants.COST_IMAGE + size_mb * constants.COST_IMAGE_PER_MB
+        return 0.0  # Unsupported files are skipped almost immediately
+
+
+class RecentFirst:
+    """Priority: files modified within *window* seconds go before older ones."""
+
+    name = constants.SCAN_PRIORITY_RECENT
+
+    def __init__(self, window: float = constants.SCAN_RECENT_SECONDS, clock: Callable[[], float] = time.time) -> None:
+        self.window = window
+        self._clock = clock
+
+    def __call__(self, file_path: str) -> int:
+        try:
+            modified = os.path.getmtime(file_path)
+        except OSError:
+            return 1
+        return 0 if self._clock() - modified <= self.window else 1
+
+
+PRIORITIES: Dict[str, Callable[[], Callable[[str], int]]] = {
+    constants.SCAN_PRIORITY_RECENT: RecentFirst,
+}
+
+
+class WorkSchedule:
+    """Sort key for scan work: lower keys are classified first.
+
+    The key is (priority, -cost): files in a lower priority group go first
+    and, within a group, the most expensive file first. Without *estimate*
+    files keep their discovery order within each group.
+    """
+
+    def __init__(self, estimate: Optional[Callable[[str], float]] = None,
+                 priority: Optional[Callable[[str], int]] = None) -> None:
+        self.estimate = estimate
+        self.priority = priority
+
+    def __call__(self, file_path: str) -> Tuple[int, float]:
+        group = self.priority(file_path) if self.priority is not None else 0
+        cost = self.estimate(file_path) if self.estimate is not None else 0.0
+        return group, -cost
+
+
+def create_schedule(order: str = constants.SCAN_ORDER, priority: str = '',
+                    frame_step: int = constants.VIDEO_FRAME_RATE) -> Optional[WorkSchedule]:
+    """Return the WorkSchedule for a scan_order and scan_priority, or None for plain discovery order."""
+    estimate = CostEstimator(frame_step) if order == constants.SCAN_ORDER_COST else None
+    priority_key = None
+    if priority:
+        factory = PRIORITIES.get(priority)
+        if factory is None:
+            logging.warning('Unknown scan priority %r; scanning without one', priority)
+        else:
+            priority_key = factory()
+    if estimate is None and priority_key is None:
+        return None
+    return WorkSchedule(estimate, priority_key)
@@ -0,0 +1,68 @@
+"""
+Periodic checkpoints of a scan in progress.
+Each ScanSession gets one checkpoint-writer thread that inserts batches of
+new entries into the run's results store, so worker threads never perform
+database I/O inline. A failed write is raised on the session's next
+checkpoint.
+"""
+
+from queue import Queue
+from threading import Lock, Thread
+from typing import List
+from weakref import WeakKeyDictionary
+
+from ..core.models import ReportEntry
+from ..core.scan_session import ScanSession
+from .results_store import ResultsStore
+
+_checkpoint_writer_registry_lock = Lock()
+_checkpoint_writers = WeakKeyDictionary()
+
+
+def _get_or_create_checkpoint_writer(session: ScanSession) -> dict:
+    with _checkpoint_writer_registry_lock:
+        writer_state = _checkpoint_writers.get(session)
+        if writer_state is not None:
+            return writer_state
+
+        writer_queue = Queue()
+        writer_errors = []
+
+        def _write_checkpoints():
+            while True:
+                checkpoint = writer_queue.get()
+                if checkpoint is None:
+                    break
+                entries, report_path = checkpoint
+                try:
+                    with ResultsStore.for_report(report_path) as store:
+                        store.add_entries(entries)
+                except Exception as exc:
+                    writer_errors.append(exc)
+                    break
+
+        writer_thread = Thread(target=_write_checkpoints, daemon=True, name='checkpoint-writer')
+        writer_thread.start()
+        writer_state = {
+            'queue': writer_queue,
+            'errors': writer_errors,
+            'thread': writer_thread,
+        }
+        _checkpoint_writers[session] = writer_state
+        return writer_state
+
+
+def raise_checkpoint_error(session: ScanSession) -> None:
+    """Raise the error that stopped the session's checkpoint writer, if any."""
+    with _checkpoint_writer_registry_lock:
+        writer_state = _checkpoint_writers.get(session)
+        if writer_state is None or not writer_state['errors']:
+            return
+        error = writer_state['errors'][0]
+    raise error
+
+
+def queue_checkpoint(session: ScanSession, entries: List[ReportEntry], report_path: str) -> None:
+    """Queue *entries* for insertion into the results store of *report_path* on the session's writer thread."""
+    _get_or_create_checkpoint_writer(session)['queue'].put((entries, report_path))
+    raise_checkpoint_error(session)
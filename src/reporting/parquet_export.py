@@ -0,0 +1,268 @@
+"""
+Columnar (Parquet) export of scan results for analytics.
+Writes ReportEntry records with typed columns and the per-class scores parsed
+from detected_classes, in row groups so exports stream with bounded memory,
+and concatenates many scan runs into one dataset. With parquet_output enabled
+a scan also appends its results to Parquet part files as it saves (see
+ParquetScanOutput).
+Requires the optional pyarrow package.
+"""
+
+import argparse
+import glob
+import logging
+import os
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+from ..core import constants
+from ..core.models import ReportEntry
+from .report_manager import ReportManager
+from .results_store import ResultsStore
+
+_COLUMN_NAMES = (
+    'run_id', 'file', 'media_type', 'model_name', 'threshold_percent', 'confidence_percent',
+    'nudity_detected', 'date_classified', 'duplicate_of', 'error', 'class_scores',
+)
+
+
+def _require_pyarrow() -> None:
+    if pa is None:
+        raise ImportError('Parquet export requires pyarrow (pip install pyarrow)')
+
+
+def results_schema():
+    """Return the Arrow schema of an exported results dataset."""
+    _require_pyarrow()
+    return pa.schema([
+        ('run_id', pa.string()),
+        ('file', pa.string()),
+        ('media_type', pa.string()),
+        ('model_name', pa.string()),
+        ('threshold_percent', pa.float64()),
+        ('confidence_percent', pa.float64()),
+        ('nudity_detected', pa.bool_()),
+        ('date_classified', pa.timestamp('s')),
+        ('duplicate_of', pa.string()),
+        ('error', pa.string()),
+        ('class_scores', pa.map_(pa.string(), pa.float64())),
+    ])
+
+
+def _parse_date(value: str) -> Optional[datetime]:
+    try:
+        return datetime.strptime(value, '%Y-%m-%d %H:%M:%S')
+    except (TypeError, ValueError):
+        return None
+
+
+def run_id_for_report(path: str) -> str:
+    """Default run id for a report, workbook or results store: its run folder name."""
+    return os.path.basename(os.path.dirname(os.path.abspath(path)))
+
+
+class ParquetResultsWriter:
+    """Appends entries to a Parquet file one row group at a time.
+
+    Entries are buffered column-wise and flushed every *chunk_size* rows, so a
+    caller can feed results while a scan runs without holding them all.
+    """
+
+    def __init__(self, path: str, run_id: str = '', chunk_size: int = constants.PARQUET_ROW_GROUP_SIZE) -> None:
+        _require_pyarrow()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.path = path
+        self.run_id = run_id
+        self.chunk_size = max(1, chunk_size)
+        self.rows_written = 0
+        self._schema = results_schema()
+        self._writer = pq.ParquetWriter(path, self._schema)
+        self._buffer: Dict[str, List] = {name: [] for name in _COLUMN_NAMES}
+
+    def __enter__(self) -> 'ParquetResultsWriter':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def write(self, entries: Iterable[ReportEntry]) -> int:
+        """Buffer *entries*, flushing full row groups; returns how many were added."""
+        added = 0
+        for entry in entries:
+            is_error = isinstance(entry.detected_classes, str) and entry.detected_classes.startswith('ERROR:')
+            row = (
+                self.run_id, entry.file, entry.media_type, entry.model_name, float(entry.threshold_percent),
+                float(entry.confidence_percent), bool(entry.nudity_detected), _parse_date(entry.date_classified),
+                entry.duplicate_of or None, entry.detected_classes if is_error else None,
+                list(entry.class_scores().items()),
+            )
+            for name, value in zip(_COLUMN_NAMES, row):
+                self._buffer[name].append(value)
+            added += 1
+            if len(self._buffer['file']) >= self.chunk_size:
+                self.flush()
+        return added
+
+    def write_table(self, table) -> None:
+        """Append an Arrow table that already has the results schema."""
+        self.flush()
+        self._writer.write_table(table.cast(self._schema))
+        self.rows_written += table.num_rows
+
+    def flush(self) -> None:
+        if not self._buffer['file']:
+            return
+        table = pa.Table.from_pydict(self._buffer, schema=self._schema)
+        self._writer.write_table(table)
+        self.rows_written += table.num_rows
+        self._buffer = {name: [] for name in _COLUMN_NAMES}
+
+    def close(self) -> None:
+        if self._writer is None:
+            return
+        self.flush()
+        self._writer.close()
+        self._writer = None
+
+
+class ParquetScanOutput:
+    """Appends a run's results to Parquet part files while the run is scanned.
+
+    Part files go in the PARQUET_OUTPUT_DIR_NAME folder next to the report.
+    append() adds the entries saved since the previous save; full row groups
+    are written as they fill and close() finishes the current part, so every
+    closed part is a complete Parquet file. A file whose result changes
+    (e.g. in watch mode) gets a new row; its latest date_classified wins.
+    """
+
+    def __init__(self, report_path: str, chunk_size: int = constants.PARQUET_ROW_GROUP_SIZE) -> None:
+        _require_pyarrow()
+        self.directory = os.path.join(os.path.dirname(os.path.abspath(report_path)), constants.PARQUET_OUTPUT_DIR_NAME)
+        self.run_id = run_id_for_report(report_path)
+        self.chunk_size = chunk_size
+        self._writer: Optional[ParquetResultsWriter] = None
+
+    def _parts(self) -> List[str]:
+        return sorted(glob.glob(os.path.join(self.directory, 'part-*.parquet')))
+
+    def reset(self) -> None:
+        """Delete the run's part files, before the run is written again in full."""
+        self.close()
+        for part in self._parts():
+            os.remove(part)
+
+    def append(self, entries: Iterable[ReportEntry]) -> int:
+        entries = list(entries)
+        if not entries:
+            return 0
+        if self._writer is None:
+            path = os.path.join(self.directory, f'part-{len(self._parts()):05d}.parquet')
+            self._writer = ParquetResultsWriter(path, self.run_id, self.chunk_size)
+        return self._writer.write(entries)
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+def export_entries(entries: Iterable[ReportEntry], path: str, run_id: str = '',
+                   chunk_size: int = constants.PARQUET_ROW_GROUP_SIZE) -> int:
+    """Write *entries* to a Parquet file; returns the number of rows."""
+    with ParquetResultsWriter(path, run_id, chunk_size) as writer:
+        writer.write(entries)
+    return writer.rows_written
+
+
+def export_report(report_path: str, path: str, run_id: Optional[str] = None) -> int:
+    """Export a run's results, from its results store when present, else from the workbook.
+
+    *report_path* may be the report workbook or the results store itself.
+    """
+    run_id = run_id_for_report(report_path) if run_id is None else run_id
+    db_path = report_path if report_path.endswith(constants.RESULTS_DB_SUFFIX) else ReportManager.get_results_db_path(report_path)
+    if os.path.exists(db_path):
+        with ResultsStore(db_path) as store:
+            return export_entries(store.iter_entries(include_thumbnails=False), path, run_id)
+    return export_entries(ReportManager.iter_entries(report_path), path, run_id)
+
+
+def _iter_dataset_inputs(inputs: Iterable[str], output_path: str):
+    """Yield ('parquet' | 'store', path) for every input file or directory.
+
+    Scan output folders found while walking a directory are skipped, since
+    the results store next to them holds the same rows.
+    """
+    output_path = os.path.abspath(output_path)
+    for source in inputs:
+        if os.path.isdir(source):
+            for root, dirs, files in os.walk(source):
+                dirs[:] = sorted(name for name in dirs if name != constants.PARQUET_OUTPUT_DIR_NAME)
+                for file_name in sorted(files):
+                    yield from _iter_dataset_inputs([os.path.join(root, file_name)], output_path)
+        elif os.path.abspath(source) == output_path:
+            continue
+        elif source.endswith('.parquet'):
+            yield 'parquet', source
+        elif source.endswith(constants.RESULTS_DB_SUFFIX):
+            yield 'store', source
+
+
+def concat_datasets(inputs: Iterable[str], output_path: str, chunk_size: int = constants.PARQUET_ROW_GROUP_SIZE) -> int:
+    """Combine many runs into one Parquet dataset; returns the number of rows.
+
+    *inputs* are Parquet exports, results stores, or directories searched
+    recursively for both (e.g. the reports folder). Parquet files without a
+    run id get their file name (without extension) as one.
+    """
+    _require_pyarrow()
+    sources = list(_iter_dataset_inputs(inputs, output_path))
+    with ParquetResultsWriter(output_path, chunk_size=chunk_size) as writer:
+        for kind, source in sources:
+            if kind == 'store':
+                writer.run_id = run_id_for_report(source)
+                with ResultsStore(source) as store:
+                    writer.write(store.iter_entries(include_thumbnails=False))
+                writer.flush()
+                continue
+            default_run_id = os.path.splitext(os.path.basename(source))[0]
+            for batch in pq.ParquetFile(source).iter_batches(batch_size=chunk_size):
+                table = pa.Table.from_batches([batch])
+                if 'run_id' not in table.column_names:
+                    table = table.append_column('run_id', pa.array([default_run_id] * table.num_rows, pa.string()))
+                writer.write_table(table.select(list(_COLUMN_NAMES)))
+            logging.info('Added %s', source)
+    return writer.rows_written
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Export scan results to Parquet for analytics.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    export = commands.add_parser('export', help='Export one run (report workbook or results store)')
+    export.add_argument('report')
+    export.add_argument('output')
+    export.add_argument('--run-id', help='Run id column value (default: the run folder name)')
+
+    concat = commands.add_parser('concat', help='Combine many runs into one dataset')
+    concat.add_argument('output')
+    concat.add_argument('inputs', nargs='+', help='Parquet files, results stores, or folders containing them')
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == 'export':
+            rows = export_report(args.report, args.output, args.run_id)
+        else:
+            rows = concat_datasets(args.inputs, args.output)
+    except ImportError as error:
+        logging.error('%s', error)
+        return 1
+    logging.info('Wrote %d row(s) to %s', rows, args.output)
+    return 0
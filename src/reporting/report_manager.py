@@ -5,11 +5,13 @@ Single responsibility: Report and session file management only.
 """
 
 import base64
+import csv
+import heapq
 import json
 import logging
 import os
 from io import BytesIO
-from typing import List
+from typing import Iterable, Iterator, List, Optional, Sequence, Set, Tuple
 
 import openpyxl
 
@@ -24,7 +26,24 @@ except ImportError:
     XLImage = None
 
 from ..core import constants
-from ..core.models import ReportEntry, SessionState
+from ..core.models import ReportEntry, ScanRunSummary, SessionState
+
+# Report header -> (ReportEntry field, value used when the cell is empty)
+_REPORT_COLUMN_FIELDS = {
+    'File': (constants.RESULT_FIELD_FILE, ''),
+    'Media Type': (constants.RESULT_FIELD_MEDIA_TYPE, constants.MEDIA_TYPE_UNKNOWN),
+    'Model': (constants.RESULT_FIELD_MODEL, ''),
+    'Threshold Percent': (constants.RESULT_FIELD_THRESHOLD, constants.DEFAULT_THRESHOLD_PERCENT),
+    'Confidence Percent': (constants.RESULT_FIELD_CONFIDENCE, 0.0),
+    'Nudity Detected': (constants.RESULT_FIELD_NUDITY, False),
+    'Detected Classes': (constants.RESULT_FIELD_CLASSES, '[]'),
+    'Thumbnail': (constants.RESULT_FIELD_THUMBNAIL, ''),
+    'Date Classified': (constants.RESULT_FIELD_DATE, ''),
+    'Duplicate Of': (constants.RESULT_FIELD_DUPLICATE_OF, ''),
+}
+# Columns of the original report schema, which may be located by position
+_LEGACY_REPORT_HEADERS = constants.REPORT_HEADERS[:9]
+_THUMBNAIL_COLUMN = openpyxl.utils.get_column_letter(constants.REPORT_HEADERS.index('Thumbnail') + 1)
 
 
 class ReportManager:
@@ -55,6 +74,32 @@ class ReportManager:
         base_name, _ = os.path.splitext(report_file_path)
         return f'{base_name}{constants.SESSION_FILE_SUFFIX}'
 
+    @staticmethod
+    def get_summary_path(report_file_path: str) -> str:
+        """Get scan history summary path corresponding to report file.
+
+        Args:
+            report_file_path: Path to report Excel file
+
+        Returns:
+            Path to corresponding summary JSON file
+        """
+        base_name, _ = os.path.splitext(report_file_path)
+        return f'{base_name}{constants.SUMMARY_FILE_SUFFIX}'
+
+    @staticmethod
+    def get_results_db_path(report_file_path: str) -> str:
+        """Get results store path corresponding to report file.
+
+        Args:
+            report_file_path: Path to report Excel file
+
+        Returns:
+            Path to corresponding SQLite results store
+        """
+        base_name, _ = os.path.splitext(report_file_path)
+        return f'{base_name}{constants.RESULTS_DB_SUFFIX}'
+
     @staticmethod
     def validate_report_dir(report_dir: str) -> tuple[bool, str]:
         """Validate report directory is writable and safe.
@@ -82,95 +127,159 @@ class ReportManager:
             return False, f'Report directory not writable: {e}'
 
     @staticmethod
-    def load_entries(file_path: str) -> List[ReportEntry]:
-        """Load report entries from Excel file.
+    def iter_entries(file_path: str, columns: Optional[Sequence[str]] = None) -> Iterator[ReportEntry]:
+        """Stream report entries from an Excel file without loading it whole.
 
-        Supports both old schema (Copied File) and new schema (Thumbnail).
+        The workbook is opened in read-only mode, so rows are parsed one at a
+        time and embedded images are never loaded. Passing *columns* (report
+        header names) projects the read: only those cells are converted and
+        the remaining ReportEntry fields keep their defaults, e.g.
+        ``columns=('File',)`` for resume and skip checks. The File column is
+        always read. Supports both old schema (Copied File) and new schema
+        (Thumbnail).
 
         Args:
             file_path: Path to Excel report file
+            columns: Header names to read, or None for every column
 
-        Returns:
-            List of ReportEntry objects
+        Yields:
+            ReportEntry objects in sheet order; malformed rows are logged and skipped
+
+        Raises:
+            Exception: If the workbook cannot be opened or read
         """
         if not os.path.exists(file_path):
-            return []
-
-        try:
-            workbook = openpyxl.load_workbook(file_path)
-            sheet = workbook.active
+            return
 
-            if sheet.max_row < 2:  # No data rows
-                return []
+        wanted = list(_REPORT_COLUMN_FIELDS) if columns is None else ['File', *[c for c in columns if c != 'File']]
+        unknown = [column for column in wanted if column not in _REPORT_COLUMN_FIELDS]
+        if unknown:
+            raise ValueError(f'Unknown report column(s): {", ".join(unknown)}')
 
-            normalized_headers = {
-                str(cell.value).strip(): idx
-                for idx, cell in enumerate(sheet[1])
-                if cell.value
-            }
+        workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = next(rows, None)
+            if not header:
+                return
+            normalized_headers = {str(value).strip(): idx for idx, value in enumerate(header) if value}
+
+            # Map columns by header name. Columns of the original schema fall back
+            # to their position; later additions have none (older reports lack them).
+            column_indexes = {}
+            for column in wanted:
+                idx = normalized_headers.get(column)
+                if idx is None and column in _LEGACY_REPORT_HEADERS:
+                    idx = _LEGACY_REPORT_HEADERS.index(column)
+                if idx is not None:
+                    column_indexes[column] = idx
+            if 'File' not in column_indexes:
+                return
 
-            entries = []
-            for row_idx, row in enumerate(sheet.iter_rows(min_row=2, values_only=True), start=2):
-                if not row or not row[0]:  # Skip empty rows
+            # Stop converting cells past the last projected column
+            rows = workbook.active.iter_rows(min_row=2, max_col=max(column_indexes.values()) + 1, values_only=True)
+            for row_idx, row in enumerate(rows, start=2):
+                if not row or not row[column_indexes['File']]:  # Skip empty rows
                     continue
-
                 try:
-                    # Map columns by header name
-                    entry_data = {
-                        constants.RESULT_FIELD_FILE: row[normalized_headers.get('File', 0)] or '',
-                        constants.RESULT_FIELD_MEDIA_TYPE: row[normalized_headers.get('Media Type', 1)] or constants.MEDIA_TYPE_UNKNOWN,
-                        constants.RESULT_FIELD_MODEL: row[normalized_headers.get('Model', 2)] or '',
-                        constants.RESULT_FIELD_THRESHOLD: row[normalized_headers.get('Threshold Percent', 3)] or constants.DEFAULT_THRESHOLD_PERCENT,
-                        constants.RESULT_FIELD_CONFIDENCE: row[normalized_headers.get('Confidence Percent', 4)] or 0.0,
-                        constants.RESULT_FIELD_NUDITY: bool(row[normalized_headers.get('Nudity Detected', 5)]),
-                        constants.RESULT_FIELD_CLASSES: row[normalized_headers.get('Detected Classes', 6)] or '[]',
-                        constants.RESULT_FIELD_THUMBNAIL: row[normalized_headers.get('Thumbnail', 7)] or '',
-                        constants.RESULT_FIELD_DATE: row[normalized_headers.get('Date Classified', 8)] or '',
-                    }
-                    entries.append(ReportEntry.from_dict(entry_data))
+                    entry_data = {}
+                    for column, idx in column_indexes.items():
+                        field_name, default = _REPORT_COLUMN_FIELDS[column]
+                        entry_data[field_name] = (row[idx] if idx < len(row) else None) or default
+                    yield ReportEntry.from_dict(entry_data)
                 except (IndexError, ValueError, KeyError) as e:
                     logging.warning('Skipping malformed report row %d: %s', row_idx, e)
-                    continue
+        finally:
+            workbook.close()
+
+    @staticmethod
+    def load_entries(file_path: str) -> List[ReportEntry]:
+        """Load report entries from Excel file.
+
+        Supports both old schema (Copied File) and new schema (Thumbnail).
 
-            return entries
+        Args:
+            file_path: Path to Excel report file
+
+        Returns:
+            List of ReportEntry objects
+        """
+        try:
+            return list(ReportManager.iter_entries(file_path))
         except Exception as e:
             logging.error('Failed to load report entries from %s: %s', file_path, e)
             return []
 
     @staticmethod
-    def save_entries(entries: List[ReportEntry], file_path: str) -> bool:
-        """Save report entries to Excel file.
+    def load_file_paths(file_path: str) -> Set[str]:
+        """Load only the File column of a report.
 
         Args:
-            entries: List of ReportEntry objects
-            file_path: Path to save Excel file
+            file_path: Path to Excel report file
 
         Returns:
-            True if successful
+            Set of file paths already in the report
         """
         try:
-            os.makedirs(os.path.dirname(file_path) or '.', exist_ok=True)
+            return {entry.file for entry in ReportManager.iter_entries(file_path, columns=('File',))}
+        except Exception as e:
+            logging.error('Failed to load report file paths from %s: %s', file_path, e)
+            return set()
 
-            if os.path.exists(file_path):
-                workbook = openpyxl.load_workbook(file_path)
-                sheet = workbook.active
-            else:
-                workbook = openpyxl.Workbook()
-                sheet = workbook.active
-                sheet.title = 'Nudity Report'
+    @staticmethod
+    def save_entries(entries: Iterable[ReportEntry], file_path: str, max_thumbnails: Optional[int] = None) -> bool:
+        """Save report entries to Excel file.
 
-            # Clear old data and write headers
-            sheet.delete_rows(1, sheet.max_row or 1)
-            sheet.append(constants.REPORT_HEADERS)
+        The workbook is written in write-only mode: rows stream to disk as they
+        are produced, so *entries* may be any iterable, e.g. a disk-backed
+        store. Only the *max_thumbnails* highest-confidence rows get an
+        embedded image; the base64 Thumbnail cell is kept for every row.
+        Choosing those rows takes an extra pass, so a one-shot iterator is
+        read into memory first when thumbnails are embedded. Sheets after the
+        report sheet of an existing file (e.g. 'Session') keep their values.
 
-            # Write entries
-            for entry in entries:
-                sheet.append(entry.to_row())
+        Args:
+            entries: ReportEntry objects in report order
+            file_path: Path to save Excel file
+            max_thumbnails: Embedded image cap; None reads it from config, 0 disables
 
-            # Embed thumbnails
-            ReportManager._embed_thumbnails(sheet, entries)
+        Returns:
+            True if successful
+        """
+        if max_thumbnails is None:
+            max_thumbnails = constants.get_report_max_embedded_thumbnails()
+        if XLImage is None or Image is None:
+            max_thumbnails = 0
+        try:
+            os.makedirs(os.path.dirname(file_path) or '.', exist_ok=True)
+            if max_thumbnails and iter(entries) is entries:
+                entries = list(entries)
+            thumbnail_rows = ReportManager._select_thumbnail_rows(entries, max_thumbnails) if max_thumbnails else set()
 
-            workbook.save(file_path)
+            workbook = openpyxl.Workbook(write_only=True)
+            try:
+                sheet = workbook.create_sheet('Nudity Report')
+                # Row and column dimensions must be set before the cells they apply to are written
+                sheet.column_dimensions[_THUMBNAIL_COLUMN].width = 15
+                sheet.append(constants.REPORT_HEADERS)
+
+                thumbnails = []
+                for row_idx, entry in enumerate(entries, start=2):
+                    if row_idx in thumbnail_rows:
+                        sheet.row_dimensions[row_idx].height = constants.REPORT_THUMBNAIL_ROW_HEIGHT
+                        thumbnails.append((row_idx, entry.thumbnail))
+                    sheet.append(entry.to_row())
+
+                ReportManager._embed_thumbnails(sheet, thumbnails)
+                ReportManager._copy_other_sheets(file_path, workbook)
+
+                workbook.save(file_path)
+            finally:
+                # A failed save leaves the write-only row streams open; close them here
+                # rather than leaving them to the garbage collector
+                for open_sheet in workbook.worksheets:
+                    if not open_sheet.closed:
+                        open_sheet.close()
             logging.info('Report saved to %s', file_path)
             return True
         except Exception as e:
@@ -178,52 +287,80 @@ class ReportManager:
             return False
 
     @staticmethod
-    def _embed_thumbnails(sheet, entries: List[ReportEntry]) -> None:
+    def save_csv(entries: Iterable[ReportEntry], file_path: str) -> bool:
+        """Save report entries to a CSV file with the report headers, without thumbnails.
+
+        Returns:
+            True if successful
+        """
+        headers = [header for header in constants.REPORT_HEADERS if header != 'Thumbnail']
+        try:
+            os.makedirs(os.path.dirname(file_path) or '.', exist_ok=True)
+            with open(file_path, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(headers)
+                for entry in entries:
+                    row = dict(zip(constants.REPORT_HEADERS, entry.to_row()))
+                    writer.writerow([row[header] for header in headers])
+            logging.info('CSV export saved to %s', file_path)
+            return True
+        except OSError as e:
+            logging.error('Failed to export CSV to %s: %s', file_path, e)
+            return False
+
+    @staticmethod
+    def _copy_other_sheets(file_path: str, workbook) -> None:
+        """Copy the values of every sheet after the report sheet of an existing *file_path* into *workbook*.
+
+        Keeps sheets such as 'Session' (see create_demo_session) when the report is rewritten.
+        """
+        if not os.path.exists(file_path):
+            return
+        try:
+            source = openpyxl.load_workbook(file_path, read_only=True)
+        except Exception as e:
+            logging.warning('Could not keep the other sheets of %s: %s', file_path, e)
+            return
+        try:
+            for source_sheet in source.worksheets[1:]:
+                target = workbook.create_sheet(source_sheet.title)
+                for row in source_sheet.iter_rows(values_only=True):
+                    target.append(row)
+        finally:
+            source.close()
+
+    @staticmethod
+    def _select_thumbnail_rows(entries: Iterable[ReportEntry], max_thumbnails: int) -> Set[int]:
+        """Return the sheet rows of the *max_thumbnails* highest-confidence entries with a thumbnail."""
+        ranked = heapq.nlargest(
+            max_thumbnails,
+            ((entry.confidence_percent, -row_idx) for row_idx, entry in enumerate(entries, start=2) if entry.thumbnail),
+        )
+        return {-negated_row for _confidence, negated_row in ranked}
+
+    @staticmethod
+    def _embed_thumbnails(sheet, thumbnails: List[Tuple[int, str]]) -> None:
         """Embed thumbnail images into report sheet.
 
+        Thumbnails are already PNG, so the decoded bytes are embedded as-is.
+
         Args:
-            sheet: openpyxl worksheet
-            entries: List of ReportEntry objects
+            sheet: openpyxl worksheet (regular or write-only)
+            thumbnails: (sheet row, base64 thumbnail) pairs
         """
         if XLImage is None or Image is None:
             logging.debug('Cannot embed thumbnails: openpyxl Image or PIL not available')
             return
 
-        try:
-            # Find Thumbnail column
-            headers = [cell.value for cell in sheet[1]]
-            if 'Thumbnail' not in headers:
-                return
-
-            thumbnail_col_idx = headers.index('Thumbnail') + 1
-            thumbnail_col = openpyxl.utils.get_column_letter(thumbnail_col_idx)
-            sheet.column_dimensions[thumbnail_col].width = 15
-
-            # Embed thumbnails
-            for row_idx, entry in enumerate(entries, start=2):
-                if not entry.thumbnail:
-                    continue
-
-                try:
-                    thumbnail_data = base64.b64decode(entry.thumbnail)
-                    img = Image.open(BytesIO(thumbnail_data))
-
-                    img_bytes = BytesIO()
-                    img.save(img_bytes, format='PNG')
-                    img_bytes.seek(0)
-
-                    cell_ref = f'{thumbnail_col}{row_idx}'
-                    xl_image = XLImage(img_bytes)
-                    xl_image.width = 100
-                    xl_image.height = 100
-                    sheet.add_image(xl_image, cell_ref)
-
-                    sheet.row_dimensions[row_idx].height = 105
-                except Exception as e:
-                    logging.debug('Failed to embed thumbnail in %s%d: %s', thumbnail_col, row_idx, e)
-                    continue
-        except Exception as e:
-            logging.warning('Failed to embed thumbnails: %s', e)
+        for row_idx, thumbnail in thumbnails:
+            cell_ref = f'{_THUMBNAIL_COLUMN}{row_idx}'
+            try:
+                xl_image = XLImage(BytesIO(base64.b64decode(thumbnail)))
+                xl_image.width = 100
+                xl_image.height = 100
+                sheet.add_image(xl_image, cell_ref)
+            except Exception as e:
+                logging.debug('Failed to embed thumbnail in %s: %s', cell_ref, e)
 
     @staticmethod
     def save_session(session_state: SessionState, report_file_path: str) -> bool:
@@ -249,6 +386,42 @@ class ReportManager:
             logging.error('Failed to save session: %s', e)
             return False
 
+    @staticmethod
+    def save_summary(summary: ScanRunSummary, report_file_path: str) -> bool:
+        """Save the scan history summary for a report.
+
+        Args:
+            summary: ScanRunSummary object
+            report_file_path: Path to corresponding report file
+
+        Returns:
+            True if successful
+        """
+        summary_path = ReportManager.get_summary_path(report_file_path)
+        try:
+            os.makedirs(os.path.dirname(summary_path) or '.', exist_ok=True)
+            temp_path = f'{summary_path}.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(summary.to_dict(), f, ensure_ascii=False)
+            os.replace(temp_path, summary_path)
+            return True
+        except OSError as e:
+            logging.error('Failed to save scan summary to %s: %s', summary_path, e)
+            return False
+
+    @staticmethod
+    def load_summary(report_file_path: str) -> Optional[ScanRunSummary]:
+        """Load the scan history summary for a report, or None if missing or unreadable."""
+        summary_path = ReportManager.get_summary_path(report_file_path)
+        try:
+            with open(summary_path, 'r', encoding='utf-8') as f:
+                return ScanRunSummary.from_dict(json.load(f))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            logging.warning('Failed to load scan summary from %s: %s', summary_path, e)
+            return None
+
     @staticmethod
     def load_session(file_path: str) -> SessionState:
         """Load session state from file (JSON or Excel).
@@ -273,15 +446,17 @@ class ReportManager:
         # Try embedded session in Excel
         if os.path.exists(file_path) and file_path.endswith(constants.XLSX_EXTENSION):
             try:
-                workbook = openpyxl.load_workbook(file_path)
-                if 'Session' in workbook.sheetnames:
-                    raw_session = workbook['Session']['A1'].value
-                    if raw_session:
-                        try:
-                            data = json.loads(raw_session)
-                            return SessionState.from_dict(data)
-                        except json.JSONDecodeError as e:
-                            logging.warning('Could not parse embedded session: %s', e)
+                workbook = openpyxl.load_workbook(file_path, read_only=True)
+                try:
+                    raw_session = workbook['Session']['A1'].value if 'Session' in workbook.sheetnames else None
+                finally:
+                    workbook.close()
+                if raw_session:
+                    try:
+                        data = json.loads(raw_session)
+                        return SessionState.from_dict(data)
+                    except json.JSONDecodeError as e:
+                        logging.warning('Could not parse embedded session: %s', e)
 
                 # Fallback: create from report entries
                 entries = ReportManager.load_entries(file_path)
@@ -0,0 +1,123 @@
+"""
+Saving a scan run's report.
+save_nudity_report writes the run's entries to its SQLite results store and
+exports the workbook, session JSON and summary from it. Between saves of one
+run it remembers what was last written, so intermediate saves only touch the
+changed rows, and keeps the run's Parquet scan output open; end_report_run
+releases both when the run ends.
+"""
+
+import logging
+import os
+import sqlite3
+from threading import Lock
+from typing import Dict, List, Tuple
+
+from ..core import constants
+from ..core.models import ReportEntry, ScanRunSummary, SessionState
+from .parquet_export import ParquetScanOutput
+from .report_manager import ReportManager
+from .results_store import ResultsStore
+
+_saved_entries: Dict[str, Dict[str, ReportEntry]] = {}  # Results store path -> entries as last saved there
+_parquet_outputs: Dict[str, Tuple[ParquetScanOutput, Lock]] = {}  # Results store path -> open scan output
+_saved_entries_lock = Lock()  # Guards both maps; file I/O happens outside it
+
+
+def _write_parquet_output(db_path: str, report_path: str, entries: List[ReportEntry], full: bool, final: bool) -> None:
+    """Mirror a save into the run's Parquet scan output when parquet_output is enabled."""
+    if not constants.get_parquet_output():
+        return
+    try:
+        with _saved_entries_lock:
+            output, output_lock = _parquet_outputs.get(db_path) or (None, None)
+            if output is None:
+                output, output_lock = _parquet_outputs[db_path] = (ParquetScanOutput(report_path), Lock())
+        with output_lock:
+            if full:
+                output.reset()
+            output.append(entries)
+            if final:
+                output.close()
+    except (ImportError, OSError) as e:
+        logging.warning('Could not write Parquet output for %s: %s', report_path, e)
+
+
+def forget_saved_entries(db_path: str) -> None:
+    """Make the next save to *db_path* replace the store in full; call after writing it directly."""
+    with _saved_entries_lock:
+        _saved_entries.pop(os.path.abspath(db_path), None)
+
+
+def end_report_run(file_path: str) -> None:
+    """Release what save_nudity_report keeps for the report at *file_path* once its run has ended.
+
+    Drops the entries remembered from the last save and closes the run's
+    Parquet scan output; a later save of the report replaces the store in full.
+    """
+    db_path = os.path.abspath(ReportManager.get_results_db_path(file_path))
+    with _saved_entries_lock:
+        _saved_entries.pop(db_path, None)
+        output, output_lock = _parquet_outputs.pop(db_path, None) or (None, None)
+    if output is not None:
+        with output_lock:
+            output.close()
+
+
+def save_nudity_report(report_data, file_path, session_state=None, write_workbook=True, full=False) -> None:
+    """Save report entries to the run's results store and export the report files.
+
+    The SQLite store next to *file_path* is the primary copy. The first save
+    of a report in this process (or any save with *full*, e.g. a re-export)
+    replaces the store's rows; later saves write only the entries added,
+    changed or removed since the previous save, so saving during a scan does
+    not rewrite the whole run each time. With parquet_output enabled the
+    same rows are appended to the run's Parquet scan output, whose current
+    part is finished by each save that writes the workbook. Call
+    end_report_run() when the run ends to release what is kept between saves.
+
+    The workbook and session JSON are exports of the store: pass
+    write_workbook=False for intermediate saves that should skip rewriting
+    them (the session JSON is still written if the store cannot be updated).
+    """
+    # Convert to ReportEntry objects
+    entries = []
+    for item in report_data:
+        if isinstance(item, dict):
+            entries.append(ReportEntry.from_dict(item))
+        else:
+            entries.append(item)
+    if session_state is None:
+        session_state = SessionState(results=[entry for entry in entries if entry.nudity_detected])
+    session_obj = SessionState.from_dict(session_state) if isinstance(session_state, dict) else session_state
+
+    # Save results, then export the report from them
+    store_saved = False
+    db_path = os.path.abspath(ReportManager.get_results_db_path(file_path))
+    current = {entry.file: entry for entry in entries}
+    with _saved_entries_lock:
+        saved = None if full else _saved_entries.pop(db_path, None)
+    try:
+        with ResultsStore(db_path) as store:
+            if saved is None:
+                store.replace_entries(entries)
+                changed = entries
+            else:
+                changed = [entry for file, entry in current.items() if saved.get(file) != entry]
+                store.update_entries(changed, [file for file in saved if file not in current])
+            with _saved_entries_lock:
+                _saved_entries[db_path] = current
+            _write_parquet_output(db_path, file_path, changed, full=saved is None, final=write_workbook)
+            store.save_session_state(session_obj)
+            if write_workbook:
+                store.export_xlsx(file_path)
+            store_saved = True
+    except sqlite3.Error as e:
+        logging.error('Failed to update results store for %s: %s', file_path, e)
+        if write_workbook:
+            ReportManager.save_entries(entries, file_path)
+
+    # Export the session, and save the small summary the scan history list reads
+    if write_workbook or not store_saved:
+        ReportManager.save_session(session_obj, file_path)
+    ReportManager.save_summary(ScanRunSummary.from_session(session_obj, total_count=len(entries)), file_path)
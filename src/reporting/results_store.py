@@ -0,0 +1,434 @@
+"""
+SQLite results store for a scan run.
+Primary storage for a run's report entries and session state; the Excel
+workbook, session JSON and CSV files are exports produced from it.
+Single responsibility: Result persistence and querying only.
+"""
+
+import base64
+import binascii
+import json
+import os
+import sqlite3
+from threading import Lock
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+import numpy as np
+
+from ..core import constants
+from ..core.models import ReportEntry, ScanConfig, ScanRunSummary, SessionState, parse_class_scores
+from ..core.scoring import apply_thresholds, pack_scores, score_matrix
+from .report_manager import ReportManager
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    file TEXT NOT NULL UNIQUE,
+    media_type TEXT NOT NULL,
+    model_name TEXT NOT NULL,
+    threshold_percent REAL NOT NULL,
+    confidence_percent REAL NOT NULL,
+    nudity_detected INTEGER NOT NULL,
+    detected_classes TEXT NOT NULL,
+    thumbnail BLOB,
+    date_classified TEXT NOT NULL,
+    duplicate_of TEXT NOT NULL DEFAULT '',
+    class_scores BLOB
+);
+CREATE INDEX IF NOT EXISTS idx_results_confidence ON results (confidence_percent);
+CREATE INDEX IF NOT EXISTS idx_results_detected ON results (nudity_detected, confidence_percent);
+CREATE INDEX IF NOT EXISTS idx_results_model ON results (model_name);
+CREATE INDEX IF NOT EXISTS idx_results_date ON results (date_classified);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+_COLUMNS = (
+    'file', 'media_type', 'model_name', 'threshold_percent', 'confidence_percent',
+    'nudity_detected', 'detected_classes', 'thumbnail', 'date_classified', 'duplicate_of', 'class_scores',
+)
+_INSERT = (
+    f'INSERT INTO results ({", ".join(_COLUMNS)}) VALUES ({", ".join("?" * len(_COLUMNS))}) '
+    f'ON CONFLICT (file) DO UPDATE SET {", ".join(f"{c} = excluded.{c}" for c in _COLUMNS[1:])}'
+)
+
+# Upsert that keeps a stored thumbnail when the entry has none
+_UPSERT = _INSERT.replace('thumbnail = excluded.thumbnail', 'thumbnail = COALESCE(excluded.thumbnail, results.thumbnail)')
+
+_SESSION_KEY = 'session'
+_SCORE_CLASSES_KEY = 'score_classes'
+_NOT_ERROR = "detected_classes NOT LIKE 'ERROR:%'"
+
+
+def _thumbnail_blob(thumbnail: str) -> Optional[bytes]:
+    if not thumbnail:
+        return None
+    try:
+        return base64.b64decode(thumbnail, validate=True)
+    except (binascii.Error, ValueError):
+        # Not an encoded image (e.g. a legacy copied-file path)
+        return None
+
+
+def _entry_row(entry: ReportEntry, class_scores: bytes) -> tuple:
+    return (
+        entry.file, entry.media_type, entry.model_name, float(entry.threshold_percent),
+        float(entry.confidence_percent), int(bool(entry.nudity_detected)), entry.detected_classes,
+        _thumbnail_blob(entry.thumbnail), entry.date_classified, entry.duplicate_of or '', class_scores,
+    )
+
+
+class ResultsQuery:
+    """Re-iterable view over a filtered result query.
+
+    Each iteration runs the query again, so a view can be streamed more than
+    once (e.g. by ReportManager.save_entries) without holding rows in memory.
+    """
+
+    def __init__(self, store: 'ResultsStore', **filters) -> None:
+        self._store = store
+        self._filters = filters
+
+    def __iter__(self) -> Iterator[ReportEntry]:
+        return self._store.iter_entries(**self._filters)
+
+    def __len__(self) -> int:
+        filters = {key: value for key, value in self._filters.items() if key != 'include_thumbnails'}
+        return self._store.count(**filters)
+
+
+class ResultsStore:
+    """Per-run SQLite results database with indexed lookups and exports.
+
+    Besides the detector payload, each row keeps its class scores packed as a
+    float32 vector over the store's class vocabulary (see src.core.scoring),
+    so the run can be re-thresholded without rescanning.
+    """
+
+    def __init__(self, db_path: str) -> None:
+        self.db_path = db_path
+        if db_path != ':memory:':
+            os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self._lock = Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.executescript(_SCHEMA)
+            columns = {row['name'] for row in self._conn.execute('PRAGMA table_info(results)')}
+            if 'class_scores' not in columns:
+                # Stores from before class scores were kept; rows are backfilled on rethreshold()
+                self._conn.execute('ALTER TABLE results ADD COLUMN class_scores BLOB')
+            row = self._conn.execute('SELECT value FROM meta WHERE key = ?', (_SCORE_CLASSES_KEY,)).fetchone()
+        self._score_classes: List[str] = json.loads(row['value']) if row else []
+        self._class_index: Dict[str, int] = {name: column for column, name in enumerate(self._score_classes)}
+        self._score_classes_saved = len(self._score_classes)
+
+    @classmethod
+    def for_report(cls, report_file_path: str) -> 'ResultsStore':
+        """Open the store that belongs to a report workbook path."""
+        return cls(ReportManager.get_results_db_path(report_file_path))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> 'ResultsStore':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def add_entries(self, entries: Iterable[ReportEntry], batch_size: int = constants.RESULTS_STORE_BATCH_SIZE) -> int:
+        """Insert or update entries (one row per file) in batched transactions.
+
+        Safe to call from worker threads; returns the number of entries written.
+        """
+        written = 0
+        batch: List[tuple] = []
+        for entry in entries:
+            batch.append(self._row(entry))
+            if len(batch) >= batch_size:
+                written += self._write_batch(batch)
+                batch = []
+        if batch:
+            written += self._write_batch(batch)
+        return written
+
+    def _row(self, entry: ReportEntry) -> tuple:
+        scores = parse_class_scores(entry.detected_classes)
+        return _entry_row(entry, self._pack_scores(scores))
+
+    def _pack_scores(self, scores: Dict[str, float]) -> bytes:
+        with self._lock:
+            for name in scores:
+                if name not in self._class_index:
+                    self._class_index[name] = len(self._score_classes)
+                    self._score_classes.append(name)
+            return pack_scores(scores, self._class_index)
+
+    def _save_score_classes(self) -> None:
+        """Persist new vocabulary classes; call with the lock held, inside the write transaction."""
+        if len(self._score_classes) != self._score_classes_saved:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (_SCORE_CLASSES_KEY, json.dumps(self._score_classes)),
+            )
+            self._score_classes_saved = len(self._score_classes)
+
+    def _write_batch(self, rows: List[tuple]) -> int:
+        with self._lock, self._conn:
+            self._save_score_classes()
+            self._conn.executemany(_INSERT, rows)
+        return len(rows)
+
+    def replace_entries(self, entries: Iterable[ReportEntry]) -> int:
+        """Make the store hold exactly *entries*, in one transaction.
+
+        Entries without a thumbnail keep the one already stored for their file,
+        so results loaded without thumbnails can be saved back safely.
+        """
+        rows = [self._row(entry) for entry in entries]
+        missing = [(row[0],) for row in rows if row[7] is None]
+        with self._lock, self._conn:
+            self._save_score_classes()
+            if missing:
+                self._conn.execute('CREATE TEMP TABLE IF NOT EXISTS kept_thumbnails (file TEXT PRIMARY KEY, thumbnail BLOB)')
+                self._conn.executemany(
+                    'INSERT OR IGNORE INTO kept_thumbnails SELECT file, thumbnail FROM results WHERE file = ? AND thumbnail IS NOT NULL',
+                    missing,
+                )
+            self._conn.execute('DELETE FROM results')
+            self._conn.executemany(_INSERT, rows)
+            if missing:
+                self._conn.execute(
+                    'UPDATE results SET thumbnail = (SELECT k.thumbnail FROM kept_thumbnails k WHERE k.file = results.file) '
+                    'WHERE thumbnail IS NULL AND file IN (SELECT file FROM kept_thumbnails)',
+                )
+                self._conn.execute('DROP TABLE kept_thumbnails')
+        return len(rows)
+
+    def update_entries(self, entries: Iterable[ReportEntry], removed: Iterable[str] = ()) -> int:
+        """Upsert *entries* and delete the rows of *removed* files, in one transaction.
+
+        Rows of other files are left alone, so a save only writes what changed
+        since the last one. Entries without a thumbnail keep the stored one.
+        Returns the number of entries written.
+        """
+        rows = [self._row(entry) for entry in entries]
+        removed = [(file_path,) for file_path in removed]
+        with self._lock, self._conn:
+            self._save_score_classes()
+            if removed:
+                self._conn.executemany('DELETE FROM results WHERE file = ?', removed)
+            self._conn.executemany(_UPSERT, rows)
+        return len(rows)
+
+    def delete_file(self, file_path: str) -> bool:
+        with self._lock, self._conn:
+            return self._conn.execute('DELETE FROM results WHERE file = ?', (file_path,)).rowcount > 0
+
+    def save_session_state(self, session_state: SessionState) -> None:
+        """Store the session metadata; its results are the detected rows of the store."""
+        data = {'version': session_state.version, 'saved_at': session_state.saved_at,
+                'scan_config': session_state.scan_config.to_dict()}
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (_SESSION_KEY, json.dumps(data)),
+            )
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _where(nudity_detected: Optional[bool], min_confidence: Optional[float], model_name: Optional[str]):
+        clauses, params = [], []
+        if nudity_detected is not None:
+            clauses.append('nudity_detected = ?')
+            params.append(int(nudity_detected))
+        if min_confidence is not None:
+            clauses.append('confidence_percent >= ?')
+            params.append(float(min_confidence))
+        if model_name is not None:
+            clauses.append('model_name = ?')
+            params.append(model_name)
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+    def count(self, nudity_detected: Optional[bool] = None, min_confidence: Optional[float] = None,
+              model_name: Optional[str] = None) -> int:
+        where, params = self._where(nudity_detected, min_confidence, model_name)
+        with self._lock:
+            return self._conn.execute(f'SELECT COUNT(*) FROM results{where}', params).fetchone()[0]
+
+    def file_paths(self) -> Set[str]:
+        """Return every file in the store (resume and skip checks)."""
+        with self._lock:
+            return {row[0] for row in self._conn.execute('SELECT file FROM results')}
+
+    def get_entry(self, file_path: str) -> Optional[ReportEntry]:
+        with self._lock:
+            row = self._conn.execute('SELECT * FROM results WHERE file = ?', (file_path,)).fetchone()
+        return self._row_entry(row, include_thumbnails=True) if row else None
+
+    def iter_entries(self, nudity_detected: Optional[bool] = None, min_confidence: Optional[float] = None,
+                     model_name: Optional[str] = None, include_thumbnails: bool = True,
+                     batch_size: int = constants.RESULTS_STORE_BATCH_SIZE) -> Iterator[ReportEntry]:
+        """Yield matching entries in insertion order, fetched in batches.
+
+        Args:
+            nudity_detected: Only detected (True) or clean (False) rows
+            min_confidence: Minimum confidence percent
+            model_name: Only rows classified by this model
+            include_thumbnails: Set False to skip reading thumbnail blobs
+            batch_size: Rows fetched per query
+        """
+        where, params = self._where(nudity_detected, min_confidence, model_name)
+        columns = ', '.join(c for c in ('seq',) + _COLUMNS if c != 'class_scores' and (include_thumbnails or c != 'thumbnail'))
+        where = f'{where} AND seq > ?' if where else ' WHERE seq > ?'
+        last_seq = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    f'SELECT {columns} FROM results{where} ORDER BY seq LIMIT ?', (*params, last_seq, batch_size),
+                ).fetchall()
+            for row in rows:
+                yield self._row_entry(row, include_thumbnails)
+            if len(rows) < batch_size:
+                return
+            last_seq = rows[-1]['seq']
+
+    def query(self, **filters) -> ResultsQuery:
+        """Return a re-iterable view of iter_entries(**filters)."""
+        return ResultsQuery(self, **filters)
+
+    @staticmethod
+    def _row_entry(row: sqlite3.Row, include_thumbnails: bool) -> ReportEntry:
+        thumbnail = ''
+        if include_thumbnails and row['thumbnail']:
+            thumbnail = base64.b64encode(row['thumbnail']).decode('ascii')
+        return ReportEntry(
+            file=row['file'], media_type=row['media_type'], model_name=row['model_name'],
+            threshold_percent=row['threshold_percent'], confidence_percent=row['confidence_percent'],
+            nudity_detected=bool(row['nudity_detected']), detected_classes=row['detected_classes'],
+            thumbnail=thumbnail, date_classified=row['date_classified'], duplicate_of=row['duplicate_of'],
+        )
+
+    def _session_meta(self) -> dict:
+        with self._lock:
+            row = self._conn.execute('SELECT value FROM meta WHERE key = ?', (_SESSION_KEY,)).fetchone()
+        return json.loads(row['value']) if row else {}
+
+    def load_scan_config(self) -> ScanConfig:
+        """Return the stored scan config without reading any rows."""
+        return ScanConfig.from_dict(self._session_meta().get('scan_config', {}))
+
+    def load_session_state(self) -> SessionState:
+        """Return the stored session metadata with the detected rows as results."""
+        data = self._session_meta()
+        return SessionState(
+            version=data.get('version', constants.SESSION_VERSION),
+            saved_at=data.get('saved_at', ''),
+            scan_config=ScanConfig.from_dict(data.get('scan_config', {})),
+            results=list(self.iter_entries(nudity_detected=True)),
+        )
+
+    def summary(self) -> ScanRunSummary:
+        """Summarize the run from the session metadata and row counts, without loading rows."""
+        data = self._session_meta()
+        scan_config = ScanConfig.from_dict(data.get('scan_config', {}))
+        return ScanRunSummary(
+            saved_at=data.get('saved_at', ''),
+            model_name=scan_config.model_name,
+            source_folder=scan_config.source_folder,
+            threshold_percent=scan_config.threshold_percent,
+            result_count=self.count(nudity_detected=True),
+            total_count=self.count(),
+        )
+
+    # ------------------------------------------------------------------
+    # Re-thresholding
+    # ------------------------------------------------------------------
+
+    def _backfill_class_scores(self, batch_size: int = constants.RESULTS_STORE_BATCH_SIZE) -> int:
+        """Pack class scores for rows stored before they were kept; returns how many were filled."""
+        filled = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    'SELECT seq, detected_classes FROM results WHERE class_scores IS NULL LIMIT ?', (batch_size,),
+                ).fetchall()
+            if not rows:
+                return filled
+            updates = [(self._pack_scores(parse_class_scores(row['detected_classes'])), row['seq']) for row in rows]
+            with self._lock, self._conn:
+                self._save_score_classes()
+                self._conn.executemany('UPDATE results SET class_scores = ? WHERE seq = ?', updates)
+            filled += len(updates)
+
+    def rethreshold(self, threshold_percent: float, class_thresholds: Optional[Dict[str, float]] = None,
+                    class_weights: Optional[Dict[str, float]] = None) -> int:
+        """Re-apply thresholds to every stored result from its class scores.
+
+        Sets each row's threshold, confidence and detected flag in one
+        transaction and records the thresholds in the session metadata.
+        Error rows are left as they are. Returns the new detected count.
+        """
+        self._backfill_class_scores()
+        with self._lock:
+            cursor = self._conn.cursor()
+            cursor.row_factory = None  # plain tuples, transposed below without per-row Python work
+            rows = cursor.execute(
+                f'SELECT seq, model_name, confidence_percent, nudity_detected, class_scores FROM results WHERE {_NOT_ERROR}',
+            ).fetchall()
+            classes = list(self._score_classes)
+        changed = []
+        if rows:
+            seqs, model_names, old_confidence, old_detected, blobs = zip(*rows)
+            confidence, detected = apply_thresholds(
+                score_matrix(blobs, len(classes)), classes, model_names, threshold_percent, class_thresholds, class_weights,
+            )
+            updated = (np.asarray(old_confidence) != confidence) | (np.asarray(old_detected, dtype=bool) != detected)
+            changed = list(zip(
+                confidence[updated].tolist(), detected[updated].astype(int).tolist(), np.asarray(seqs)[updated].tolist(),
+            ))
+        data = self._session_meta()
+        scan_config = data.setdefault('scan_config', ScanConfig().to_dict())
+        scan_config['threshold_percent'] = float(threshold_percent)
+        scan_config['class_thresholds'] = dict(class_thresholds or {})
+        scan_config['class_weights'] = dict(class_weights or {})
+        with self._lock, self._conn:
+            self._conn.execute(f'UPDATE results SET threshold_percent = ? WHERE {_NOT_ERROR}', (float(threshold_percent),))
+            self._conn.executemany('UPDATE results SET confidence_percent = ?, nudity_detected = ? WHERE seq = ?', changed)
+            self._conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (_SESSION_KEY, json.dumps(data)))
+        return self.count(nudity_detected=True)
+
+    # ------------------------------------------------------------------
+    # Exports
+    # ------------------------------------------------------------------
+
+    def copy_to(self, db_path: str) -> None:
+        """Write a consistent copy of the whole store to *db_path* (replacing it)."""
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        target = sqlite3.connect(db_path)
+        try:
+            with self._lock:
+                self._conn.backup(target)
+        finally:
+            target.close()
+
+    def export_xlsx(self, file_path: str, max_thumbnails: Optional[int] = None) -> bool:
+        """Stream every row into an Excel report."""
+        return ReportManager.save_entries(self.query(), file_path, max_thumbnails=max_thumbnails)
+
+    def export_csv(self, file_path: str, nudity_detected: Optional[bool] = None) -> bool:
+        """Write rows to CSV with the report headers, without thumbnails."""
+        return ReportManager.save_csv(
+            self.iter_entries(nudity_detected=nudity_detected, include_thumbnails=False), file_path,
+        )
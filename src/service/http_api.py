@@ -0,0 +1,217 @@
+"""
+Local HTTP API for the headless scan service.
+
+Endpoints (JSON unless noted):
+    GET    /health                  Service liveness
+    GET    /jobs                    All jobs, oldest first
+    POST   /jobs                    Submit {"folders": [...], "model": ..., "threshold_percent": ...}
+    GET    /jobs/<id>               Job status and progress
+    GET    /jobs/<id>/results       Results as NDJSON; ?after=<id> resumes, ?follow=1
+                                    keeps streaming until the job ends, ?thumbnails=1
+                                    includes base64 thumbnails
+    POST   /jobs/<id>/cancel        Cancel a job (DELETE /jobs/<id> is equivalent)
+"""
+
+import json
+import logging
+import os
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+from ..core import constants
+from .job_store import TERMINAL_STATUSES, JobStore
+from .scheduler import DetectorPool, ScanScheduler
+
+
+def _job_view(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Public representation of a job with a derived progress percentage."""
+    view = dict(job)
+    total = job['total']
+    view['progress_percent'] = round(100.0 * job['processed'] / total, 2) if total else (
+        100.0 if job['status'] in TERMINAL_STATUSES else 0.0
+    )
+    return view
+
+
+class ScanRequestHandler(BaseHTTPRequestHandler):
+    """Routes API requests to the server's ScanScheduler."""
+
+    server_version = 'NudityDetectorService/1.0'
+    protocol_version = 'HTTP/1.1'
+
+    @property
+    def scheduler(self) -> ScanScheduler:
+        return self.server.scheduler
+
+    def log_message(self, format, *args):
+        logging.debug('%s - %s', self.address_string(), format % args)
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status: int, message: str) -> None:
+        self._send_json(status, {'error': message})
+
+    def _read_json(self) -> Optional[Dict[str, Any]]:
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            length = -1
+        if length < 0 or length > constants.SERVICE_MAX_REQUEST_BYTES:
+            self._send_error(413, 'Request body too large')
+            return None
+        try:
+            payload = json.loads(self.rfile.read(length) or b'{}')
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            self._send_error(400, 'Request body must be JSON')
+            return None
+        if not isinstance(payload, dict):
+            self._send_error(400, 'Request body must be a JSON object')
+            return None
+        return payload
+
+    def _route(self):
+        """Split the path into (parts, query) with empty segments removed."""
+        parsed = urlparse(self.path)
+        return [part for part in parsed.path.split('/') if part], parse_qs(parsed.query)
+
+    def _get_job_or_404(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self.scheduler.store.get_job(job_id)
+        if job is None:
+            self._send_error(404, f'Unknown job: {job_id}')
+        return job
+
+    # ------------------------------------------------------------------
+    # Verbs
+    # ------------------------------------------------------------------
+
+    def do_GET(self):
+        parts, query = self._route()
+        if parts == ['health']:
+            self._send_json(200, {'status': 'ok'})
+        elif parts == ['jobs']:
+            self._send_json(200, {'jobs': [_job_view(job) for job in self.scheduler.store.list_jobs()]})
+        elif len(parts) == 2 and parts[0] == 'jobs':
+            job = self._get_job_or_404(parts[1])
+            if job is not None:
+                self._send_json(200, {'job': _job_view(job)})
+        elif len(parts) == 3 and parts[0] == 'jobs' and parts[2] == 'results':
+            if self._get_job_or_404(parts[1]) is not None:
+                self._stream_results(parts[1], query)
+        else:
+            self._send_error(404, 'Not found')
+
+    def do_POST(self):
+        parts, _query = self._route()
+        if parts == ['jobs']:
+            payload = self._read_json()
+            if payload is None:
+                return
+            try:
+                job = self.scheduler.submit(
+                    payload.get('folders'),
+                    payload.get('model', constants.MODEL_NUDENET),
+                    payload.get('threshold_percent', constants.DEFAULT_THRESHOLD_PERCENT),
+                )
+            except ValueError as error:
+                self._send_error(400, str(error))
+                return
+            self._send_json(201, {'job': _job_view(job)})
+        elif len(parts) == 3 and parts[0] == 'jobs' and parts[2] == 'cancel':
+            self._cancel(parts[1])
+        else:
+            self._send_error(404, 'Not found')
+
+    def do_DELETE(self):
+        parts, _query = self._route()
+        if len(parts) == 2 and parts[0] == 'jobs':
+            self._cancel(parts[1])
+        else:
+            self._send_error(404, 'Not found')
+
+    def _cancel(self, job_id: str) -> None:
+        job = self.scheduler.cancel(job_id)
+        if job is None:
+            self._send_error(404, f'Unknown job: {job_id}')
+        else:
+            self._send_json(200, {'job': _job_view(job)})
+
+    def _stream_results(self, job_id: str, query: Dict[str, list]) -> None:
+        """Write results as newline-delimited JSON using chunked encoding."""
+        try:
+            after_id = int(query.get('after', ['0'])[0])
+        except ValueError:
+            self._send_error(400, 'after must be an integer')
+            return
+        follow = query.get('follow', ['0'])[0] in ('1', 'true')
+        thumbnails = query.get('thumbnails', ['0'])[0] in ('1', 'true')
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        try:
+            while True:
+                # Read the status before the batch so results recorded just
+                # before the job finished are never missed.
+                job = self.scheduler.store.get_job(job_id)
+                batch = self.scheduler.store.get_results(job_id, after_id)
+                if batch:
+                    lines = []
+                    for result_id, entry in batch:
+                        after_id = result_id
+                        data = entry.to_dict()
+                        if not thumbnails:
+                            data.pop(constants.RESULT_FIELD_THUMBNAIL, None)
+                        lines.append(json.dumps({'id': result_id, 'entry': data}, ensure_ascii=False))
+                    self._write_chunk(('\n'.join(lines) + '\n').encode('utf-8'))
+                    continue
+                if not follow or job is None or job['status'] in TERMINAL_STATUSES:
+                    break
+                time.sleep(constants.SERVICE_STREAM_POLL_INTERVAL)
+            self._write_chunk(b'')
+        except (BrokenPipeError, ConnectionResetError):
+            logging.debug('Result stream for job %s closed by client', job_id)
+
+    def _write_chunk(self, data: bytes) -> None:
+        self.wfile.write(f'{len(data):X}\r\n'.encode('ascii') + data + b'\r\n')
+        self.wfile.flush()
+
+
+def create_server(scheduler: ScanScheduler, host: str = constants.SERVICE_HOST,
+                  port: int = constants.SERVICE_PORT) -> ThreadingHTTPServer:
+    """Create (but do not start) an HTTP server bound to *host*:*port*."""
+    server = ThreadingHTTPServer((host, port), ScanRequestHandler)
+    server.daemon_threads = True
+    server.scheduler = scheduler
+    return server
+
+
+def main(host: str = constants.SERVICE_HOST, port: int = constants.SERVICE_PORT,
+         worker_count: int = constants.SERVICE_WORKER_COUNT) -> None:
+    """Run the scan service until interrupted."""
+    report_dir = os.path.join(constants.DEFAULT_REPORT_DIR, constants.SERVICE_REPORT_SUBDIR)
+    store = JobStore(os.path.join(report_dir, constants.SERVICE_DB_FILE_NAME))
+    scheduler = ScanScheduler(store, DetectorPool(), worker_count=worker_count, report_dir=report_dir)
+    scheduler.start()
+    server = create_server(scheduler, host, port)
+    logging.info('Scan service listening on http://%s:%d', host, server.server_address[1])
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logging.info('Shutting down scan service')
+    finally:
+        server.server_close()
+        scheduler.stop()
+        store.close()
@@ -0,0 +1,210 @@
+"""
+Persistent job queue for the headless scan service.
+Stores submitted jobs, the files discovered for each job, and the results
+recorded so far in SQLite so queued and running scans survive a restart.
+"""
+
+import json
+import os
+import sqlite3
+import uuid
+from datetime import datetime
+from threading import Lock
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from ..core.models import ReportEntry
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_COMPLETED = 'completed'
+JOB_CANCELLED = 'cancelled'
+JOB_FAILED = 'failed'
+TERMINAL_STATUSES = frozenset({JOB_COMPLETED, JOB_CANCELLED, JOB_FAILED})
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    folders TEXT NOT NULL,
+    model_name TEXT NOT NULL,
+    threshold_percent REAL NOT NULL,
+    status TEXT NOT NULL,
+    total INTEGER NOT NULL DEFAULT 0,
+    processed INTEGER NOT NULL DEFAULT 0,
+    detected INTEGER NOT NULL DEFAULT 0,
+    discovered INTEGER NOT NULL DEFAULT 0,
+    report_path TEXT NOT NULL DEFAULT '',
+    error TEXT NOT NULL DEFAULT '',
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS job_files (
+    job_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    path TEXT NOT NULL,
+    done INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (job_id, seq)
+);
+CREATE TABLE IF NOT EXISTS job_results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL,
+    entry TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_job_files_pending ON job_files (job_id, done, seq);
+CREATE INDEX IF NOT EXISTS idx_job_results_job ON job_results (job_id, id);
+"""
+
+_JOB_COLUMNS = (
+    'id', 'folders', 'model_name', 'threshold_percent', 'status', 'total', 'processed',
+    'detected', 'discovered', 'report_path', 'error', 'created_at', 'updated_at',
+)
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec='seconds')
+
+
+class JobStore:
+    """SQLite-backed job queue shared by the scheduler and the HTTP API.
+
+    A single connection is shared across threads and serialised with a lock;
+    WAL journaling keeps readers from blocking the writer.
+    """
+
+    def __init__(self, db_path: str) -> None:
+        self.db_path = db_path
+        if db_path != ':memory:':
+            os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self._lock = Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _job_from_row(row) -> Dict[str, Any]:
+        job = {column: row[column] for column in _JOB_COLUMNS}
+        job['folders'] = json.loads(job['folders'])
+        job['discovered'] = bool(job['discovered'])
+        return job
+
+    # ------------------------------------------------------------------
+    # Jobs
+    # ------------------------------------------------------------------
+
+    def create_job(self, folders: List[str], model_name: str, threshold_percent: float) -> Dict[str, Any]:
+        job_id = uuid.uuid4().hex
+        now = _now()
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT INTO jobs (id, folders, model_name, threshold_percent, status, created_at, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (job_id, json.dumps(folders), model_name, float(threshold_percent), JOB_QUEUED, now, now),
+            )
+        return self.get_job(job_id)
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return self._job_from_row(row) if row else None
+
+    def list_jobs(self, statuses: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """Return jobs in submission order, optionally filtered by status."""
+        query = 'SELECT * FROM jobs'
+        params: Tuple = ()
+        if statuses is not None:
+            statuses = tuple(statuses)
+            query += f' WHERE status IN ({",".join("?" * len(statuses))})'
+            params = statuses
+        with self._lock:
+            rows = self._conn.execute(query + ' ORDER BY created_at, rowid', params).fetchall()
+        return [self._job_from_row(row) for row in rows]
+
+    def update_job(self, job_id: str, **fields) -> None:
+        """Update columns of a job; ``updated_at`` is refreshed automatically."""
+        unknown = set(fields) - set(_JOB_COLUMNS)
+        if unknown:
+            raise ValueError(f'Unknown job field(s): {", ".join(sorted(unknown))}')
+        fields['updated_at'] = _now()
+        assignments = ', '.join(f'{name} = ?' for name in fields)
+        with self._lock, self._conn:
+            self._conn.execute(f'UPDATE jobs SET {assignments} WHERE id = ?', (*fields.values(), job_id))
+
+    def requeue_interrupted(self) -> int:
+        """Return jobs left running by a previous process to the queue."""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                'UPDATE jobs SET status = ?, updated_at = ? WHERE status = ?',
+                (JOB_QUEUED, _now(), JOB_RUNNING),
+            )
+        return cursor.rowcount
+
+    # ------------------------------------------------------------------
+    # Files
+    # ------------------------------------------------------------------
+
+    def add_files(self, job_id: str, paths: Iterable[str]) -> int:
+        """Record the files discovered for a job and mark discovery complete."""
+        rows = [(job_id, seq, path) for seq, path in enumerate(paths)]
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM job_files WHERE job_id = ?', (job_id,))
+            self._conn.executemany('INSERT INTO job_files (job_id, seq, path) VALUES (?, ?, ?)', rows)
+            self._conn.execute(
+                'UPDATE jobs SET total = ?, discovered = 1, updated_at = ? WHERE id = ?',
+                (len(rows), _now(), job_id),
+            )
+        return len(rows)
+
+    def pending_files(self, job_id: str, after_seq: int = -1, limit: int = 1000) -> List[Tuple[int, str]]:
+        """Return up to *limit* unfinished (seq, path) pairs after *after_seq*."""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT seq, path FROM job_files WHERE job_id = ? AND done = 0 AND seq > ? ORDER BY seq LIMIT ?',
+                (job_id, after_seq, limit),
+            ).fetchall()
+        return [(row['seq'], row['path']) for row in rows]
+
+    def complete_file(self, job_id: str, seq: int, entry: Optional[ReportEntry]) -> None:
+        """Mark a file done and append its result (if any) in one transaction."""
+        with self._lock, self._conn:
+            self._conn.execute('UPDATE job_files SET done = 1 WHERE job_id = ? AND seq = ?', (job_id, seq))
+            detected = 0
+            if entry is not None:
+                self._conn.execute(
+                    'INSERT INTO job_results (job_id, entry) VALUES (?, ?)',
+                    (job_id, json.dumps(entry.to_dict(), ensure_ascii=False)),
+                )
+                detected = int(entry.nudity_detected)
+            self._conn.execute(
+                'UPDATE jobs SET processed = processed + 1, detected = detected + ?, updated_at = ? WHERE id = ?',
+                (detected, _now(), job_id),
+            )
+
+    # ------------------------------------------------------------------
+    # Results
+    # ------------------------------------------------------------------
+
+    def get_results(self, job_id: str, after_id: int = 0, limit: int = 1000) -> List[Tuple[int, ReportEntry]]:
+        """Return up to *limit* (result id, entry) pairs recorded after *after_id*."""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT id, entry FROM job_results WHERE job_id = ? AND id > ? ORDER BY id LIMIT ?',
+                (job_id, after_id, limit),
+            ).fetchall()
+        return [(row['id'], ReportEntry.from_dict(json.loads(row['entry']))) for row in rows]
+
+    def iter_results(self, job_id: str, batch_size: int = 1000):
+        """Yield every recorded entry for a job, reading in batches."""
+        after_id = 0
+        while True:
+            batch = self.get_results(job_id, after_id, batch_size)
+            if not batch:
+                return
+            for result_id, entry in batch:
+                after_id = result_id
+                yield entry
@@ -0,0 +1,347 @@
+"""
+Job scheduling for the headless scan service.
+Runs submitted scan jobs on one shared worker pool and one shared detector per
+model, interleaving files from all active jobs round-robin so a large job
+cannot starve smaller ones submitted after it.
+"""
+
+import logging
+import os
+from collections import deque
+from threading import Condition, Lock, Thread
+from typing import Any, Dict, List, Optional
+
+from ..core import constants
+from ..core.scan_session import ScanSession
+from ..core.utils import (
+    create_session_state,
+    end_report_run,
+    get_detected_results,
+    get_report_path,
+    make_scan_config,
+    process_file,
+    save_nudity_report,
+)
+from ..detectors.registry import backend_names, get_backend
+from ..processing.media_processor import hold_frame_decoders, release_frame_decoders
+from .job_store import (
+    JOB_CANCELLED,
+    JOB_COMPLETED,
+    JOB_FAILED,
+    JOB_QUEUED,
+    JOB_RUNNING,
+    TERMINAL_STATUSES,
+    JobStore,
+)
+
+
+class DetectorPool:
+    """Loads each detection model once and builds per-job classifiers on it.
+
+    Models come from the detector backend registry. A backend's model is
+    loaded on first use and shared by every job, so submitting a scan never
+    reloads it; remote backends such as Helloz NSFW load nothing. Classifiers
+    of backends that are not thread-safe are serialised across workers.
+    """
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._models: Dict[str, Any] = {}
+
+    def get_model(self, model_name: str):
+        backend = get_backend(model_name)
+        with self._lock:
+            if model_name not in self._models:
+                logging.info('Loading %s detector', model_name)
+                self._models[model_name] = backend.load_model()
+            return self._models[model_name]
+
+    def get_nudenet_detector(self):
+        return self.get_model(constants.MODEL_NUDENET)
+
+    def make_classifiers(self, model_name: str, threshold_percent: float, session: ScanSession):
+        """Return (classify_image, classify_video) recording into *session*."""
+        backend = get_backend(model_name)
+        classify_image, classify_video = backend.make_classifiers(self.get_model(model_name), session, threshold_percent, set())
+        return backend.guard(classify_image), backend.guard(classify_video)
+
+
+class _ActiveJob:
+    """In-memory scheduling state for a job that has files being processed."""
+
+    def __init__(self, job: Dict[str, Any], session: ScanSession, classify_image, classify_video) -> None:
+        self.job = job
+        self.id = job['id']
+        self.session = session
+        self.classify_image = classify_image
+        self.classify_video = classify_video
+        self.pending = deque()
+        self.last_seq = -1
+        self.exhausted = False
+        self.in_flight = 0
+        self.cancelled = False
+        self.finished = False
+
+
+def discover_files(folders: List[str]):
+    """Yield supported media files below *folders* (extension check only).
+
+    Content (MIME) verification happens later in process_file so discovery
+    stays cheap on large trees.
+    """
+    for folder in folders:
+        for root, _dirs, files in os.walk(folder):
+            for file_name in files:
+                if os.path.splitext(file_name)[1].lower() in constants.SUPPORTED_EXTENSIONS:
+                    yield os.path.join(root, file_name)
+
+
+class ScanScheduler:
+    """Fair scheduler running queued scan jobs on a shared worker pool.
+
+    Up to *max_active_jobs* jobs run at once; workers take one file at a time
+    from each active job in turn. Progress and results are written to the
+    JobStore as each file finishes, and a report workbook is saved per job
+    when it completes or is cancelled.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        detector_pool: Optional[DetectorPool] = None,
+        worker_count: int = constants.SERVICE_WORKER_COUNT,
+        max_active_jobs: int = constants.SERVICE_MAX_ACTIVE_JOBS,
+        report_dir: str = os.path.join(constants.DEFAULT_REPORT_DIR, constants.SERVICE_REPORT_SUBDIR),
+        batch_size: int = 1000,
+    ) -> None:
+        if worker_count < 1:
+            raise ValueError(f'worker_count must be at least 1, got {worker_count}')
+        self.store = store
+        self.detector_pool = detector_pool or DetectorPool()
+        self.worker_count = worker_count
+        self.max_active_jobs = max(1, max_active_jobs)
+        self.report_dir = report_dir
+        self.batch_size = batch_size
+        self._condition = Condition()
+        self._active: deque = deque()
+        self._starting: set = set()
+        self._cancel_requested: set = set()
+        self._stopping = False
+        self._workers: List[Thread] = []
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self) -> None:
+        requeued = self.store.requeue_interrupted()
+        if requeued:
+            logging.info('Resuming %d interrupted job(s)', requeued)
+        self._stopping = False
+        for index in range(self.worker_count):
+            worker = Thread(target=self._worker, daemon=True, name=f'scan-service-worker-{index}')
+            worker.start()
+            self._workers.append(worker)
+
+    def stop(self, timeout: float = constants.WORKER_THREAD_TIMEOUT) -> None:
+        """Stop workers after their current file; unfinished jobs resume on next start."""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        for worker in self._workers:
+            worker.join(timeout=timeout)
+        self._workers = []
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def submit(self, folders: List[str], model_name: str = constants.MODEL_NUDENET,
+               threshold_percent: float = constants.DEFAULT_THRESHOLD_PERCENT) -> Dict[str, Any]:
+        """Validate and queue a scan job.
+
+        Raises:
+            ValueError: If the folders, model or threshold are invalid
+        """
+        if not folders or not isinstance(folders, list) or not all(isinstance(f, str) for f in folders):
+            raise ValueError('folders must be a non-empty list of paths')
+        missing = [folder for folder in folders if not os.path.isdir(folder)]
+        if missing:
+            raise ValueError(f'Folder(s) not found: {", ".join(missing)}')
+        if model_name not in backend_names():
+            raise ValueError(f'model must be one of: {", ".join(backend_names())}')
+        try:
+            threshold_percent = float(threshold_percent)
+        except (TypeError, ValueError):
+            raise ValueError('threshold_percent must be a number') from None
+        if not constants.MIN_THRESHOLD_PERCENT <= threshold_percent <= constants.MAX_THRESHOLD_PERCENT:
+            raise ValueError(
+                f'threshold_percent must be between {constants.MIN_THRESHOLD_PERCENT:g} '
+                f'and {constants.MAX_THRESHOLD_PERCENT:g}'
+            )
+
+        job = self.store.create_job([os.path.abspath(folder) for folder in folders], model_name, threshold_percent)
+        logging.info('Queued scan job %s for %s', job['id'], ', '.join(job['folders']))
+        with self._condition:
+            self._condition.notify_all()
+        return job
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Cancel a queued or running job; returns the updated job or None if unknown."""
+        job = self.store.get_job(job_id)
+        if job is None or job['status'] in TERMINAL_STATUSES:
+            return job
+        finish = None
+        with self._condition:
+            active = next((a for a in self._active if a.id == job_id), None)
+            if active is not None:
+                active.cancelled = True
+                active.pending.clear()
+                finish = self._claim_finish(active)
+            elif job_id in self._starting:
+                self._cancel_requested.add(job_id)
+            else:
+                self.store.update_job(job_id, status=JOB_CANCELLED)
+        if finish is not None:
+            self._finish(finish)
+        logging.info('Cancelled scan job %s', job_id)
+        return self.store.get_job(job_id)
+
+    # ------------------------------------------------------------------
+    # Workers
+    # ------------------------------------------------------------------
+
+    def _worker(self) -> None:
+        while True:
+            task = self._next_task()
+            if task is None:
+                return
+            if task[0] == 'start':
+                self._start_job(task[1])
+            else:
+                self._process(*task[1:])
+
+    def _next_task(self):
+        with self._condition:
+            while not self._stopping:
+                # Starting a queued job comes first so it joins the rotation
+                # instead of waiting for the running jobs' files to drain.
+                if len(self._active) + len(self._starting) < self.max_active_jobs:
+                    for job in self.store.list_jobs([JOB_QUEUED]):
+                        if job['id'] not in self._starting:
+                            self._starting.add(job['id'])
+                            self.store.update_job(job['id'], status=JOB_RUNNING)
+                            return ('start', job)
+
+                for _ in range(len(self._active)):
+                    active = self._active[0]
+                    self._active.rotate(-1)
+                    if active.cancelled:
+                        continue
+                    if not active.pending and not active.exhausted:
+                        batch = self.store.pending_files(active.id, active.last_seq, self.batch_size)
+                        active.pending.extend(batch)
+                        if batch:
+                            active.last_seq = batch[-1][0]
+                        active.exhausted = len(batch) < self.batch_size
+                    if active.pending:
+                        active.in_flight += 1
+                        seq, path = active.pending.popleft()
+                        return ('file', active, seq, path)
+
+                self._condition.wait(timeout=1.0)
+        return None
+
+    def _start_job(self, job: Dict[str, Any]) -> None:
+        """Discover files (or restore a resumed job's results) and activate the job."""
+        session = ScanSession()
+        try:
+            if job['discovered']:
+                for entry in self.store.iter_results(job['id']):
+                    session.add_result(entry)
+            else:
+                total = self.store.add_files(job['id'], discover_files(job['folders']))
+                logging.info('Job %s: %d file(s) to scan', job['id'], total)
+            classify_image, classify_video = self.detector_pool.make_classifiers(
+                job['model_name'], job['threshold_percent'], session,
+            )
+        except Exception as error:
+            logging.exception('Failed to start job %s', job['id'])
+            with self._condition:
+                self._starting.discard(job['id'])
+                self._cancel_requested.discard(job['id'])
+                self._condition.notify_all()
+            self.store.update_job(job['id'], status=JOB_FAILED, error=str(error))
+            return
+
+        hold_frame_decoders()  # Released by _finish
+        active = _ActiveJob(job, session, classify_image, classify_video)
+        finish = None
+        with self._condition:
+            self._starting.discard(job['id'])
+            if job['id'] in self._cancel_requested:
+                self._cancel_requested.discard(job['id'])
+                active.cancelled = True
+                active.exhausted = True
+            self._active.append(active)
+            finish = self._claim_finish(active)
+            self._condition.notify_all()
+        if finish is not None:
+            self._finish(finish)
+
+    def _process(self, active: _ActiveJob, seq: int, file_path: str) -> None:
+        try:
+            process_file(file_path, active.classify_image, active.classify_video)
+        except Exception as error:
+            logging.error('Error processing file %s: %s', file_path, error)
+        try:
+            self.store.complete_file(active.id, seq, active.session.find_result(file_path))
+        except Exception:
+            logging.exception('Failed to record result for %s', file_path)
+
+        finish = None
+        with self._condition:
+            active.in_flight -= 1
+            finish = self._claim_finish(active)
+            self._condition.notify_all()
+        if finish is not None:
+            self._finish(finish)
+
+    def _claim_finish(self, active: _ActiveJob) -> Optional[_ActiveJob]:
+        """Remove *active* from scheduling once no work is left; caller holds the lock."""
+        if active.finished or active.in_flight:
+            return None
+        if not active.cancelled and (active.pending or not active.exhausted):
+            return None
+        active.finished = True
+        if active in self._active:
+            self._active.remove(active)
+        return active
+
+    def _finish(self, active: _ActiveJob) -> None:
+        """Write the job's report and record its terminal status."""
+        release_frame_decoders()
+        job = active.job
+        all_results = active.session.get_results()
+        report_path = get_report_path(os.path.join(self.report_dir, active.id))
+        scan_config = make_scan_config(
+            source_folder=os.pathsep.join(job['folders']),
+            model_name=job['model_name'],
+            threshold_percent=job['threshold_percent'],
+            theme_mode=constants.THEME_SYSTEM,
+        )
+        try:
+            save_nudity_report(
+                all_results,
+                report_path,
+                session_state=create_session_state(scan_config=scan_config, results=get_detected_results(all_results)),
+            )
+        except Exception as error:
+            logging.exception('Failed to save report for job %s', active.id)
+            self.store.update_job(active.id, status=JOB_FAILED, error=f'Report save failed: {error}')
+            return
+        finally:
+            end_report_run(report_path)
+        status = JOB_CANCELLED if active.cancelled else JOB_COMPLETED
+        self.store.update_job(active.id, status=status, report_path=report_path)
+        logging.info('Job %s %s; report saved to %s', active.id, status, report_path)
@@ -0,0 +1,287 @@
+"""
+Shared shard store for multi-host scanning.
+
+A coordinator splits a run's discovery manifest into shards; worker processes
+(possibly on other hosts sharing the database file) lease shards, classify
+them, and write results back. Leases expire so shards held by a crashed or
+stalled worker are handed to another one, and a shard that keeps failing is
+given up after a bounded number of attempts.
+
+The store is a single SQLite database. Every state change runs inside a
+``BEGIN IMMEDIATE`` transaction, which serialises writers across processes;
+the shared volume must therefore provide working POSIX file locks. The default
+rollback journal is kept because WAL mode does not work across hosts.
+"""
+
+import json
+import os
+import sqlite3
+import time
+import uuid
+from datetime import datetime
+from threading import Lock
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from ..core import constants
+from ..core.models import ReportEntry
+
+RUN_ACTIVE = 'active'
+RUN_MERGED = 'merged'
+
+SHARD_PENDING = 'pending'
+SHARD_LEASED = 'leased'
+SHARD_DONE = 'done'
+SHARD_FAILED = 'failed'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id TEXT PRIMARY KEY,
+    folders TEXT NOT NULL,
+    model_name TEXT NOT NULL,
+    threshold_percent REAL NOT NULL,
+    status TEXT NOT NULL,
+    shard_count INTEGER NOT NULL,
+    file_count INTEGER NOT NULL,
+    report_path TEXT NOT NULL DEFAULT '',
+    created_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS shards (
+    run_id TEXT NOT NULL,
+    shard_id INTEGER NOT NULL,
+    paths TEXT NOT NULL,
+    status TEXT NOT NULL,
+    lease_owner TEXT NOT NULL DEFAULT '',
+    lease_expires REAL NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (run_id, shard_id)
+);
+CREATE TABLE IF NOT EXISTS shard_results (
+    run_id TEXT NOT NULL,
+    shard_id INTEGER NOT NULL,
+    entry TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_shards_status ON shards (status, lease_expires);
+CREATE INDEX IF NOT EXISTS idx_shard_results_run ON shard_results (run_id, shard_id);
+"""
+
+
+def _chunks(items: List[str], size: int) -> Iterator[List[str]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class ShardStore:
+    """SQLite-backed shard queue shared by a coordinator and many workers."""
+
+    def __init__(self, db_path: str, busy_timeout: float = constants.SHARD_DB_BUSY_TIMEOUT) -> None:
+        self.db_path = db_path
+        if db_path != ':memory:':
+            os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self._lock = Lock()
+        # isolation_level=None: transactions are managed explicitly so each one
+        # can start with BEGIN IMMEDIATE and take the write lock up front.
+        self._conn = sqlite3.connect(db_path, timeout=busy_timeout, isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _write(self, fn):
+        """Run *fn(conn)* inside a BEGIN IMMEDIATE transaction and return its result."""
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                result = fn(self._conn)
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+            return result
+
+    # ------------------------------------------------------------------
+    # Runs
+    # ------------------------------------------------------------------
+
+    def create_run(self, folders: List[str], model_name: str, threshold_percent: float,
+                   file_paths: Iterable[str], shard_size: int = constants.SHARD_SIZE) -> str:
+        """Split *file_paths* into shards of *shard_size* and register a new run."""
+        if shard_size < 1:
+            raise ValueError(f'shard_size must be at least 1, got {shard_size}')
+        paths = list(file_paths)
+        shards = list(_chunks(paths, shard_size))
+        run_id = uuid.uuid4().hex
+
+        def _insert(conn):
+            conn.execute(
+                'INSERT INTO runs (id, folders, model_name, threshold_percent, status, shard_count, file_count, created_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (run_id, json.dumps(folders), model_name, float(threshold_percent), RUN_ACTIVE,
+                 len(shards), len(paths), datetime.now().isoformat(timespec='seconds')),
+            )
+            conn.executemany(
+                'INSERT INTO shards (run_id, shard_id, paths, status) VALUES (?, ?, ?, ?)',
+                [(run_id, shard_id, json.dumps(chunk), SHARD_PENDING) for shard_id, chunk in enumerate(shards)],
+            )
+
+        self._write(_insert)
+        return run_id
+
+    def get_run(self, run_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute('SELECT * FROM runs WHERE id = ?', (run_id,)).fetchone()
+        if row is None:
+            return None
+        run = dict(row)
+        run['folders'] = json.loads(run['folders'])
+        return run
+
+    def mark_merged(self, run_id: str, report_path: str) -> None:
+        self._write(lambda conn: conn.execute(
+            'UPDATE runs SET status = ?, report_path = ? WHERE id = ?', (RUN_MERGED, report_path, run_id),
+        ))
+
+    def progress(self, run_id: str) -> Dict[str, int]:
+        """Return shard counts per status for a run."""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT status, COUNT(*) AS n FROM shards WHERE run_id = ? GROUP BY status', (run_id,),
+            ).fetchall()
+        counts = {SHARD_PENDING: 0, SHARD_LEASED: 0, SHARD_DONE: 0, SHARD_FAILED: 0}
+        counts.update({row['status']: row['n'] for row in rows})
+        return counts
+
+    def is_finished(self, run_id: str) -> bool:
+        counts = self.progress(run_id)
+        return counts[SHARD_PENDING] == 0 and counts[SHARD_LEASED] == 0
+
+    def failed_shards(self, run_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT shard_id, paths, attempts, error FROM shards WHERE run_id = ? AND status = ? ORDER BY shard_id',
+                (run_id, SHARD_FAILED),
+            ).fetchall()
+        return [{**dict(row), 'paths': json.loads(row['paths'])} for row in rows]
+
+    # ------------------------------------------------------------------
+    # Leases
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _fail_exhausted(conn, now: float, max_attempts: int) -> int:
+        cursor = conn.execute(
+            'UPDATE shards SET status = ?, error = ? WHERE status = ? AND lease_expires < ? AND attempts >= ?',
+            (SHARD_FAILED, 'Lease expired too many times', SHARD_LEASED, now, max_attempts),
+        )
+        return cursor.rowcount
+
+    def reap_expired_leases(self, max_attempts: int = constants.SHARD_MAX_ATTEMPTS) -> int:
+        """Fail expired shards that are out of attempts; returns how many were failed.
+
+        Workers do this when leasing; the coordinator calls it while waiting so
+        a run can finish even when no worker is left to lease.
+        """
+        return self._write(lambda conn: self._fail_exhausted(conn, time.time(), max_attempts))
+
+    def lease_shard(self, worker_id: str, lease_seconds: float = constants.SHARD_LEASE_SECONDS,
+                    max_attempts: int = constants.SHARD_MAX_ATTEMPTS) -> Optional[Dict[str, Any]]:
+        """Lease the next available shard of any active run.
+
+        A shard is available when pending, or leased with an expired lease
+        (its worker is presumed dead). An expired shard that has already used
+        *max_attempts* leases is marked failed instead of being handed out.
+
+        Returns:
+            Dict with run/shard identity, paths and run settings, or None
+        """
+        def _lease(conn):
+            now = time.time()
+            self._fail_exhausted(conn, now, max_attempts)
+            row = conn.execute(
+                'SELECT s.run_id, s.shard_id, s.paths, s.attempts, r.model_name, r.threshold_percent '
+                'FROM shards s JOIN runs r ON r.id = s.run_id '
+                'WHERE r.status = ? AND (s.status = ? OR (s.status = ? AND s.lease_expires < ?)) '
+                'ORDER BY r.created_at, s.shard_id LIMIT 1',
+                (RUN_ACTIVE, SHARD_PENDING, SHARD_LEASED, now),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                'UPDATE shards SET status = ?, lease_owner = ?, lease_expires = ?, attempts = attempts + 1 '
+                'WHERE run_id = ? AND shard_id = ?',
+                (SHARD_LEASED, worker_id, now + lease_seconds, row['run_id'], row['shard_id']),
+            )
+            return {
+                'run_id': row['run_id'],
+                'shard_id': row['shard_id'],
+                'paths': json.loads(row['paths']),
+                'attempt': row['attempts'] + 1,
+                'model_name': row['model_name'],
+                'threshold_percent': row['threshold_percent'],
+            }
+
+        return self._write(_lease)
+
+    def renew_lease(self, run_id: str, shard_id: int, worker_id: str,
+                    lease_seconds: float = constants.SHARD_LEASE_SECONDS) -> bool:
+        """Extend a lease; False means the lease was lost to another worker."""
+        def _renew(conn):
+            cursor = conn.execute(
+                'UPDATE shards SET lease_expires = ? WHERE run_id = ? AND shard_id = ? AND status = ? AND lease_owner = ?',
+                (time.time() + lease_seconds, run_id, shard_id, SHARD_LEASED, worker_id),
+            )
+            return cursor.rowcount == 1
+
+        return self._write(_renew)
+
+    def complete_shard(self, run_id: str, shard_id: int, worker_id: str, entries: List[ReportEntry]) -> bool:
+        """Store a shard's results if *worker_id* still holds its lease.
+
+        Results from an earlier attempt are replaced, so a retried shard never
+        contributes duplicate rows. Returns False when the lease was lost.
+        """
+        def _complete(conn):
+            cursor = conn.execute(
+                'UPDATE shards SET status = ?, lease_expires = 0, error = ? '
+                'WHERE run_id = ? AND shard_id = ? AND status = ? AND lease_owner = ?',
+                (SHARD_DONE, '', run_id, shard_id, SHARD_LEASED, worker_id),
+            )
+            if cursor.rowcount != 1:
+                return False
+            conn.execute('DELETE FROM shard_results WHERE run_id = ? AND shard_id = ?', (run_id, shard_id))
+            conn.executemany(
+                'INSERT INTO shard_results (run_id, shard_id, entry) VALUES (?, ?, ?)',
+                [(run_id, shard_id, json.dumps(entry.to_dict(), ensure_ascii=False)) for entry in entries],
+            )
+            return True
+
+        return self._write(_complete)
+
+    def fail_shard(self, run_id: str, shard_id: int, worker_id: str, error: str,
+                   max_attempts: int = constants.SHARD_MAX_ATTEMPTS) -> None:
+        """Release a shard after an error: back to pending, or failed once out of attempts."""
+        self._write(lambda conn: conn.execute(
+            'UPDATE shards SET status = CASE WHEN attempts >= ? THEN ? ELSE ? END, '
+            'lease_owner = ?, lease_expires = 0, error = ? '
+            'WHERE run_id = ? AND shard_id = ? AND status = ? AND lease_owner = ?',
+            (max_attempts, SHARD_FAILED, SHARD_PENDING, '', error, run_id, shard_id, SHARD_LEASED, worker_id),
+        ))
+
+    # ------------------------------------------------------------------
+    # Results
+    # ------------------------------------------------------------------
+
+    def iter_results(self, run_id: str) -> Iterator[ReportEntry]:
+        """Yield all stored entries for a run, shard by shard in manifest order."""
+        run = self.get_run(run_id)
+        for shard_id in range(run['shard_count'] if run else 0):
+            with self._lock:
+                rows = self._conn.execute(
+                    'SELECT entry FROM shard_results WHERE run_id = ? AND shard_id = ? ORDER BY rowid',
+                    (run_id, shard_id),
+                ).fetchall()
+            for row in rows:
+                yield ReportEntry.from_dict(json.loads(row['entry']))
@@ -0,0 +1,267 @@
+"""
+Coordinator and worker roles for multi-host sharded scanning.
+
+    coordinate  Discover files, split them into shards in a ShardStore, wait
+                for workers to finish, then merge all results into one report
+    work        Lease shards, classify them with the existing detector code,
+                and write results back (run one per host, any number of hosts)
+    merge       Merge a run's results into a report without waiting
+    status      Print per-status shard counts for a run
+
+All roles share one SQLite database file, e.g. on an NFS volume.
+"""
+
+import argparse
+import logging
+import os
+import socket
+import time
+import uuid
+from threading import Event, Thread
+from typing import List, Optional
+
+from ..core import constants
+from ..core.scan_session import ScanSession
+from ..core.utils import (
+    classify_files,
+    configure_schedule,
+    create_session_state,
+    end_report_run,
+    get_detected_results,
+    get_report_path,
+    make_scan_config,
+    save_nudity_report,
+)
+from ..detectors.registry import backend_names, get_backend
+from .scheduler import DetectorPool, discover_files
+from .shard_store import SHARD_DONE, SHARD_FAILED, SHARD_LEASED, SHARD_PENDING, ShardStore
+
+
+def default_worker_id() -> str:
+    """Return a worker identity unique across hosts and processes."""
+    return f'{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}'
+
+
+# ============================================================================
+# Coordinator
+# ============================================================================
+def create_sharded_run(store: ShardStore, folders: List[str], model_name: str = constants.MODEL_NUDENET,
+                       threshold_percent: float = constants.DEFAULT_THRESHOLD_PERCENT,
+                       shard_size: int = constants.SHARD_SIZE) -> str:
+    """Discover the files under *folders* and register them as a sharded run.
+
+    Raises:
+        ValueError: If a folder does not exist or the model is unknown
+    """
+    missing = [folder for folder in folders if not os.path.isdir(folder)]
+    if missing:
+        raise ValueError(f'Folder(s) not found: {", ".join(missing)}')
+    if model_name not in backend_names():
+        raise ValueError(f'model must be one of: {", ".join(backend_names())}')
+    folders = [os.path.abspath(folder) for folder in folders]
+    run_id = store.create_run(folders, model_name, threshold_percent, discover_files(folders), shard_size)
+    run = store.get_run(run_id)
+    logging.info('Created run %s: %d file(s) in %d shard(s)', run_id, run['file_count'], run['shard_count'])
+    return run_id
+
+
+def wait_for_run(store: ShardStore, run_id: str, poll_interval: float = constants.SHARD_POLL_INTERVAL,
+                 max_attempts: int = constants.SHARD_MAX_ATTEMPTS) -> None:
+    """Block until every shard of *run_id* is done or failed."""
+    last_counts = None
+    while True:
+        store.reap_expired_leases(max_attempts)
+        counts = store.progress(run_id)
+        if counts != last_counts:
+            logging.info(
+                'Run %s: %d done, %d leased, %d pending, %d failed',
+                run_id, counts[SHARD_DONE], counts[SHARD_LEASED], counts[SHARD_PENDING], counts[SHARD_FAILED],
+            )
+            last_counts = counts
+        if store.is_finished(run_id):
+            return
+        time.sleep(poll_interval)
+
+
+def merge_run(store: ShardStore, run_id: str,
+              report_dir: str = os.path.join(constants.DEFAULT_REPORT_DIR, constants.SHARD_REPORT_SUBDIR)) -> str:
+    """Write every stored result of *run_id* into one report; returns its path.
+
+    Raises:
+        ValueError: If the run does not exist
+    """
+    run = store.get_run(run_id)
+    if run is None:
+        raise ValueError(f'Unknown run: {run_id}')
+    entries = list(store.iter_results(run_id))
+    report_path = get_report_path(os.path.join(report_dir, run_id))
+    scan_config = make_scan_config(
+        source_folder=os.pathsep.join(run['folders']),
+        model_name=run['model_name'],
+        threshold_percent=run['threshold_percent'],
+        theme_mode=constants.THEME_SYSTEM,
+    )
+    save_nudity_report(
+        entries,
+        report_path,
+        session_state=create_session_state(scan_config=scan_config, results=get_detected_results(entries)),
+    )
+    end_report_run(report_path)
+    store.mark_merged(run_id, report_path)
+
+    failed = store.failed_shards(run_id)
+    if failed:
+        logging.warning(
+            'Run %s: %d shard(s) (%d file(s)) failed and are missing from the report',
+            run_id, len(failed), sum(len(shard['paths']) for shard in failed),
+        )
+    logging.info('Merged %d result(s) for run %s into %s', len(entries), run_id, report_path)
+    return report_path
+
+
+# ============================================================================
+# Worker
+# ============================================================================
+class ShardWorker:
+    """Leases shards from a ShardStore and classifies them.
+
+    While a shard is processed a heartbeat thread renews its lease. If the
+    lease is lost anyway (e.g. the host was suspended past expiry and another
+    worker took the shard), the results are discarded rather than written.
+    """
+
+    def __init__(
+        self,
+        store: ShardStore,
+        worker_id: Optional[str] = None,
+        detector_pool: Optional[DetectorPool] = None,
+        worker_count: int = constants.WORKER_THREAD_COUNT,
+        lease_seconds: float = constants.SHARD_LEASE_SECONDS,
+        max_attempts: int = constants.SHARD_MAX_ATTEMPTS,
+    ) -> None:
+        self.store = store
+        self.worker_id = worker_id or default_worker_id()
+        self.detector_pool = detector_pool or DetectorPool()
+        self.worker_count = worker_count
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+    def run(self, exit_when_idle: bool = False, poll_interval: float = constants.SHARD_POLL_INTERVAL,
+            should_stop=None) -> int:
+        """Process shards until stopped (or, with *exit_when_idle*, none are left).
+
+        Returns:
+            Number of shards completed by this worker
+        """
+        completed = 0
+        logging.info('Shard worker %s started', self.worker_id)
+        while should_stop is None or not should_stop():
+            if self.run_once():
+                completed += 1
+            elif exit_when_idle:
+                break
+            else:
+                time.sleep(poll_interval)
+        return completed
+
+    def run_once(self) -> bool:
+        """Lease and process one shard; returns True if its results were stored."""
+        shard = self.store.lease_shard(self.worker_id, self.lease_seconds, self.max_attempts)
+        if shard is None:
+            return False
+        run_id, shard_id = shard['run_id'], shard['shard_id']
+        logging.info(
+            'Processing shard %d of run %s (%d file(s), attempt %d)',
+            shard_id, run_id, len(shard['paths']), shard['attempt'],
+        )
+
+        lease_lost = Event()
+        done = Event()
+
+        def _heartbeat():
+            while not done.wait(self.lease_seconds / 3):
+                try:
+                    if not self.store.renew_lease(run_id, shard_id, self.worker_id, self.lease_seconds):
+                        lease_lost.set()
+                        return
+                except Exception as error:
+                    logging.warning('Could not renew lease on shard %d of run %s: %s', shard_id, run_id, error)
+
+        heartbeat = Thread(target=_heartbeat, daemon=True, name='shard-lease-heartbeat')
+        heartbeat.start()
+        session = ScanSession()
+        try:
+            classify_image, classify_video = self.detector_pool.make_classifiers(
+                shard['model_name'], shard['threshold_percent'], session,
+            )
+            worker_count = get_backend(shard['model_name']).worker_count(self.worker_count)
+            classify_files(shard['paths'], classify_image, classify_video, worker_count=worker_count, schedule=configure_schedule())
+        except Exception as error:
+            logging.exception('Shard %d of run %s failed', shard_id, run_id)
+            self.store.fail_shard(run_id, shard_id, self.worker_id, str(error), self.max_attempts)
+            return False
+        finally:
+            done.set()
+            heartbeat.join()
+
+        if lease_lost.is_set() or not self.store.complete_shard(run_id, shard_id, self.worker_id, session.get_results()):
+            logging.warning('Lost lease on shard %d of run %s; discarding its results', shard_id, run_id)
+            return False
+        return True
+
+
+# ============================================================================
+# Command line
+# ============================================================================
+def _build_parser() -> argparse.ArgumentParser:
+    default_db = os.path.join(constants.DEFAULT_REPORT_DIR, constants.SHARD_REPORT_SUBDIR, 'shards.sqlite3')
+    parser = argparse.ArgumentParser(description='Sharded multi-host scanning.')
+    parser.add_argument('--db', default=default_db, help='Shared shard database (default: %(default)s)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    coordinate = commands.add_parser('coordinate', help='Create a run, wait for workers, merge the report')
+    coordinate.add_argument('folders', nargs='+')
+    coordinate.add_argument('--model', default=constants.MODEL_NUDENET, choices=backend_names())
+    coordinate.add_argument('--threshold', type=float, default=constants.DEFAULT_THRESHOLD_PERCENT)
+    coordinate.add_argument('--shard-size', type=int, default=constants.SHARD_SIZE)
+    coordinate.add_argument('--no-wait', action='store_true', help='Create the run and exit (merge later)')
+
+    work = commands.add_parser('work', help='Lease and classify shards')
+    work.add_argument('--workers', type=int, default=constants.WORKER_THREAD_COUNT, help='Threads per shard')
+    work.add_argument('--exit-when-idle', action='store_true', help='Exit once no shard is available')
+
+    merge = commands.add_parser('merge', help='Merge a run into one report now')
+    merge.add_argument('run_id')
+
+    status = commands.add_parser('status', help='Show shard counts for a run')
+    status.add_argument('run_id')
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = _build_parser().parse_args(argv)
+    store = ShardStore(args.db)
+    try:
+        if args.command == 'coordinate':
+            run_id = create_sharded_run(store, args.folders, args.model, args.threshold, args.shard_size)
+            print(run_id)
+            if not args.no_wait:
+                wait_for_run(store, run_id)
+                merge_run(store, run_id)
+        elif args.command == 'work':
+            try:
+                ShardWorker(store, worker_count=args.workers).run(exit_when_idle=args.exit_when_idle)
+            except KeyboardInterrupt:
+                logging.info('Shard worker stopped; any leased shard will be retried after its lease expires')
+        elif args.command == 'merge':
+            merge_run(store, args.run_id)
+        else:
+            if store.get_run(args.run_id) is None:
+                raise ValueError(f'Unknown run: {args.run_id}')
+            print(' '.join(f'{status}={count}' for status, count in store.progress(args.run_id).items()))
+    except ValueError as error:
+        logging.error('%s', error)
+        return 1
+    finally:
+        store.close()
+    return 0
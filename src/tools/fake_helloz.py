@@ -0,0 +1,210 @@
+"""
+Lightweight stand-in for the Helloz NSFW scoring container.
+FakeHellozServer answers POST /api/upload_check like helloz/nsfw does, with
+an nsfw score derived from the uploaded bytes (the same file always gets the
+same score), so the client path can be load tested without the docker image.
+
+Response time follows a configurable LatencyModel, a share of requests can
+fail with HTTP 500, and at most *max_concurrency* uploads are scored at once;
+the rest queue, or are refused with HTTP 503 when *reject_when_busy* is set.
+Counters in FakeHellozServer.snapshot() show what the server saw.
+"""
+
+import hashlib
+import json
+import logging
+import math
+import random
+import threading
+import time
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+from ..core import constants
+
+
+class LatencyModel:
+    """Samples the seconds a fake request takes to score.
+
+    *distribution* is one of SUPPORTED_LATENCY_DISTRIBUTIONS around *mean*:
+    uniform draws from mean +/- *spread*, lognormal uses *mean* as the median
+    and *spread* as the sigma of the log. *per_mb* adds decode time in
+    proportion to the upload size.
+    """
+
+    def __init__(self, distribution: str = constants.LATENCY_FIXED, mean: float = constants.FAKE_HELLOZ_LATENCY,
+                 spread: float = 0.0, per_mb: float = 0.0, seed: Optional[int] = None) -> None:
+        if distribution not in constants.SUPPORTED_LATENCY_DISTRIBUTIONS:
+            raise ValueError(f'Unsupported latency distribution: {distribution}')
+        self.distribution = distribution
+        self.mean = max(0.0, mean)
+        self.spread = max(0.0, spread)
+        self.per_mb = max(0.0, per_mb)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self, upload_bytes: int = 0) -> float:
+        with self._lock:
+            if self.mean == 0 or self.distribution == constants.LATENCY_FIXED:
+                seconds = self.mean
+            elif self.distribution == constants.LATENCY_UNIFORM:
+                seconds = self._random.uniform(self.mean - self.spread, self.mean + self.spread)
+            elif self.distribution == constants.LATENCY_EXPONENTIAL:
+                seconds = self._random.expovariate(1.0 / self.mean)
+            else:
+                seconds = self._random.lognormvariate(math.log(self.mean), self.spread)
+        return max(0.0, seconds) + self.per_mb * upload_bytes / (1024 * 1024)
+
+
+def _uploaded_file(body: bytes, content_type: str) -> Optional[bytes]:
+    """Return the bytes of the multipart 'file' field, or None when there is none."""
+    message = BytesParser(policy=HTTP).parsebytes(b'Content-Type: ' + content_type.encode('latin-1') + b'\r\n\r\n' + body)
+    if not message.is_multipart():
+        return None
+    for part in message.iter_parts():
+        if part.get_param('name', header='content-disposition') == 'file':
+            return part.get_payload(decode=True) or b''
+    return None
+
+
+def nsfw_score(data: bytes) -> float:
+    """Deterministic 0-1 score for *data*."""
+    return int.from_bytes(hashlib.sha256(data).digest()[:4], 'big') / 0xFFFFFFFF
+
+
+class FakeHellozRequestHandler(BaseHTTPRequestHandler):
+    """Serves the Helloz NSFW upload endpoint and a health check on every other path."""
+
+    server_version = 'FakeHellozNsfw/1.0'
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        logging.debug('%s - %s', self.address_string(), format % args)
+
+    def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._send_json(200, {'code': 0, 'msg': 'ok'})
+
+    def do_POST(self):
+        server = self.server
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self._send_json(400, {'code': 1, 'msg': 'Content-Length required'})
+            return
+        body = self.rfile.read(length)
+        if self.path.split('?', 1)[0] != server.api_endpoint:
+            self._send_json(404, {'code': 1, 'msg': 'not found'})
+            return
+        data = _uploaded_file(body, self.headers.get('Content-Type', ''))
+        if data is None:
+            self._send_json(400, {'code': 1, 'msg': 'multipart field "file" required'})
+            return
+
+        status, payload = server.score(data, len(body))
+        self._send_json(status, payload)
+
+
+class FakeHellozServer(ThreadingHTTPServer):
+    """A Helloz NSFW stand-in on a background thread; port 0 picks a free port.
+
+    Use as a context manager, or call start() and close().
+    """
+
+    daemon_threads = True
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: Optional[LatencyModel] = None,
+                 error_rate: float = 0.0, max_concurrency: int = constants.FAKE_HELLOZ_MAX_CONCURRENCY,
+                 reject_when_busy: bool = False, api_endpoint: str = constants.HELLOZ_NSFW_API_ENDPOINT,
+                 seed: Optional[int] = None) -> None:
+        super().__init__((host, port), FakeHellozRequestHandler)
+        self.latency = latency or LatencyModel(seed=seed)
+        self.error_rate = min(1.0, max(0.0, error_rate))
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.reject_when_busy = reject_when_busy
+        self.api_endpoint = api_endpoint
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._requests = self._errors = self._rejected = self._bytes = 0
+        self._in_flight = self._max_in_flight = 0
+        self._busy_seconds = 0.0
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    @property
+    def upload_url(self) -> str:
+        return f'{self.base_url}{self.api_endpoint}'
+
+    def score(self, data: bytes, upload_bytes: int):
+        """Score one upload under the concurrency limit; returns (status, payload)."""
+        with self._lock:
+            self._requests += 1
+            self._bytes += upload_bytes
+        if not self._slots.acquire(blocking=not self.reject_when_busy):
+            with self._lock:
+                self._rejected += 1
+            return 503, {'code': 1, 'msg': 'busy'}
+        try:
+            with self._lock:
+                self._in_flight += 1
+                self._max_in_flight = max(self._max_in_flight, self._in_flight)
+                fail = self._random.random() < self.error_rate
+            seconds = self.latency.sample(upload_bytes)
+            time.sleep(seconds)
+            with self._lock:
+                self._in_flight -= 1
+                self._busy_seconds += seconds
+                self._errors += int(fail)
+        finally:
+            self._slots.release()
+        if fail:
+            return 500, {'code': 1, 'msg': 'injected failure'}
+        score = nsfw_score(data)
+        return 200, {'code': 0, 'msg': 'success', 'data': {'nsfw': score, 'normal': 1.0 - score}}
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Counters since the server started."""
+        with self._lock:
+            return {
+                'url': self.base_url,
+                'requests': self._requests,
+                'errors': self._errors,
+                'rejected': self._rejected,
+                'bytes_received': self._bytes,
+                'max_in_flight': self._max_in_flight,
+                'busy_seconds': self._busy_seconds,
+            }
+
+    def start(self) -> 'FakeHellozServer':
+        self._thread = threading.Thread(target=self.serve_forever, name='fake-helloz', daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self) -> None:
+        if self._thread is not None:
+            self.shutdown()
+            self._thread.join()
+            self._thread = None
+        self.server_close()
+
+    def __enter__(self) -> 'FakeHellozServer':
+        return self.start()
+
+    def __exit__(self, *_exc) -> None:
+        self.close()
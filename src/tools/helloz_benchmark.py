@@ -0,0 +1,247 @@
+"""
+Load test for the Helloz NSFW client path against FakeHellozServer replicas.
+A benchmark run generates synthetic images, starts one or more fake servers
+and scans the images with the real Helloz NSFW classifiers, so endpoint
+pooling, retries, the circuit breaker, the adaptive limit and the upload
+transform all take part. It reports throughput and what each replica saw.
+
+The scan reads its settings from a scratch app_config.json in a temporary
+working directory; the user's own config and reports are not touched.
+
+    python run_helloz_benchmark.py bench --replicas 2 --files 500 --error-rate 0.02
+    python run_helloz_benchmark.py serve --port 6086 --latency 0.2
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from PIL import Image
+
+from ..core import constants
+from ..core.scan_session import ScanSession
+from ..core.utils import classify_files_in_folder, normalize_threshold
+from ..detectors import helloz_nsfw
+from ..detectors.registry import get_backend, scan_folder_async
+from .fake_helloz import FakeHellozServer, LatencyModel
+
+STRATEGY_ASYNC = 'async'
+STRATEGY_THREADS = 'threads'
+
+_THRESHOLD_PERCENT = constants.DEFAULT_THRESHOLD_PERCENT
+
+
+def make_images(folder: str, count: int = constants.BENCHMARK_FILE_COUNT,
+                size: int = constants.BENCHMARK_IMAGE_SIZE, seed: int = 0) -> List[str]:
+    """Write *count* distinct synthetic images (alternately PNG and JPEG) to *folder*."""
+    os.makedirs(folder, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    gradient = np.linspace(0, 255, size, dtype=np.float32)
+    paths = []
+    for n in range(count):
+        base = (gradient[None, :, None] + rng.integers(0, 256, 3)) % 256
+        noise = rng.normal(0, 24, (size, size, 3))
+        pixels = np.clip(base + noise, 0, 255).astype(np.uint8)
+        fmt, ext = ('PNG', 'png') if n % 2 else ('JPEG', 'jpg')
+        path = os.path.join(folder, f'bench_{n:05d}.{ext}')
+        Image.fromarray(pixels, 'RGB').save(path, format=fmt)
+        paths.append(path)
+    return paths
+
+
+@contextlib.contextmanager
+def scratch_config(workdir: str, settings: Dict[str, Any]):
+    """Run with *workdir* as the working directory and *settings* as its app_config.json."""
+    config_dir = os.path.join(workdir, constants.CONFIG_DIR)
+    os.makedirs(config_dir, exist_ok=True)
+    with open(os.path.join(config_dir, constants.CONFIG_FILE_NAME), 'w') as f:
+        json.dump(settings, f)
+    previous = os.getcwd()
+    os.chdir(workdir)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def _scan(folder: str, strategy: str, workers: int, concurrency: int) -> ScanSession:
+    session = ScanSession()
+    backend = get_backend(constants.MODEL_HELLOZ_NSFW)
+    if strategy == STRATEGY_ASYNC:
+        asyncio.run(scan_folder_async(backend, folder, session, _THRESHOLD_PERCENT, concurrency=concurrency))
+    else:
+        threshold_value = normalize_threshold(_THRESHOLD_PERCENT)
+        classify_files_in_folder(
+            folder,
+            helloz_nsfw.make_classify_image(frozenset(), threshold_value, _THRESHOLD_PERCENT, session),
+            helloz_nsfw.make_classify_video(frozenset(), threshold_value, _THRESHOLD_PERCENT, session),
+            worker_count=backend.worker_count(workers),
+        )
+    return session
+
+
+def run_benchmark(folder: str, servers: Sequence[FakeHellozServer], strategy: str = STRATEGY_ASYNC,
+                  workers: int = constants.WORKER_THREAD_COUNT, concurrency: int = constants.REMOTE_ASYNC_CONCURRENCY,
+                  settings: Optional[Dict[str, Any]] = None, workdir: Optional[str] = None) -> Dict[str, Any]:
+    """Scan *folder* against *servers* and return throughput and per-replica counters.
+
+    *settings* are extra app_config.json keys (balance policy, breaker,
+    upload transform); the endpoints always point at *servers*.
+    """
+    config = dict(settings or {})
+    config['helloz_nsfw_endpoints'] = [server.base_url for server in servers]
+    config['remote_concurrency'] = concurrency
+    before = [server.snapshot() for server in servers]
+    with contextlib.ExitStack() as stack:
+        if workdir is None:
+            workdir = stack.enter_context(tempfile.TemporaryDirectory(prefix='helloz_bench_'))
+        stack.enter_context(scratch_config(workdir, config))
+        files = sum(len(names) for _root, _dirs, names in os.walk(folder))
+        transform = helloz_nsfw.get_upload_transform()
+        if transform is not None:
+            transform.stats.reset()  # The transform is shared process-wide; count this run only
+        started = time.perf_counter()
+        session = _scan(folder, strategy, workers, concurrency)
+        seconds = time.perf_counter() - started
+        pool = helloz_nsfw.get_endpoint_pool()
+        flow = helloz_nsfw.get_flow_control(pool)
+
+    results = session.get_results()
+    error_entries = sum(1 for entry in results if str(entry.detected_classes).startswith('ERROR:'))
+    replicas = []
+    for server, start in zip(servers, before):
+        after = server.snapshot()
+        replicas.append({key: after[key] if key in ('url', 'max_in_flight') else after[key] - start[key] for key in after})
+    requests_sent = sum(replica['requests'] for replica in replicas)
+    return {
+        'strategy': strategy,
+        'files': files,
+        'classified': len(results) - error_entries,
+        'error_entries': error_entries,
+        'deferred': files - len(results),
+        'seconds': round(seconds, 3),
+        'files_per_second': round(files / seconds, 2) if seconds else 0.0,
+        'requests': requests_sent,
+        'retries': requests_sent - len(results),
+        'server_errors': sum(replica['errors'] for replica in replicas),
+        'rejected': sum(replica['rejected'] for replica in replicas),
+        'bytes_sent': sum(replica['bytes_received'] for replica in replicas),
+        'concurrency_limit': int(flow.limiter.limit),
+        'breaker': flow.breaker.state,
+        'upload_transform': transform.stats.summary() if transform is not None else '',
+        'replicas': replicas,
+        'endpoints': pool.snapshot(),
+    }
+
+
+def format_report(result: Dict[str, Any]) -> str:
+    """Human-readable summary of one run_benchmark result."""
+    lines = [
+        f"Strategy: {result['strategy']}",
+        f"Files: {result['files']} ({result['classified']} classified, {result['error_entries']} errors, {result['deferred']} deferred)",
+        f"Time: {result['seconds']:.2f}s  Throughput: {result['files_per_second']:.1f} files/s",
+        f"Requests: {result['requests']} ({result['retries']} retries, {result['server_errors']} server errors, {result['rejected']} rejected)",
+        f"Uploaded: {result['bytes_sent'] / (1024 * 1024):.1f} MB",
+        f"Final concurrency limit: {result['concurrency_limit']}  Breaker: {result['breaker']}",
+    ]
+    if result['upload_transform']:
+        lines.append(result['upload_transform'])
+    for replica in result['replicas']:
+        lines.append(
+            f"  {replica['url']}: {replica['requests']} requests, {replica['errors']} errors, "
+            f"{replica['rejected']} rejected, peak {replica['max_in_flight']} in flight"
+        )
+    return '\n'.join(lines)
+
+
+# ============================================================================
+# Command line
+# ============================================================================
+def _server_options() -> argparse.ArgumentParser:
+    options = argparse.ArgumentParser(add_help=False)
+    options.add_argument('--latency', type=float, default=constants.FAKE_HELLOZ_LATENCY, help='Mean seconds per request (default: %(default)s)')
+    options.add_argument('--latency-distribution', default=constants.LATENCY_FIXED, choices=constants.SUPPORTED_LATENCY_DISTRIBUTIONS)
+    options.add_argument('--latency-spread', type=float, default=0.0, help='Uniform +/- range, or lognormal sigma')
+    options.add_argument('--latency-per-mb', type=float, default=0.0, help='Extra seconds per MB uploaded (decode cost)')
+    options.add_argument('--error-rate', type=float, default=0.0, help='Share of requests answered with HTTP 500')
+    options.add_argument('--max-concurrency', type=int, default=constants.FAKE_HELLOZ_MAX_CONCURRENCY, help='Requests scored at once per server')
+    options.add_argument('--reject-when-busy', action='store_true', help='Answer HTTP 503 instead of queueing over the limit')
+    options.add_argument('--seed', type=int, default=None)
+    return options
+
+
+def _make_server(args, host: str = '127.0.0.1', port: int = 0, seed: Optional[int] = None) -> FakeHellozServer:
+    latency = LatencyModel(args.latency_distribution, args.latency, args.latency_spread, args.latency_per_mb, seed)
+    return FakeHellozServer(
+        host, port, latency, error_rate=args.error_rate, max_concurrency=args.max_concurrency,
+        reject_when_busy=args.reject_when_busy, seed=seed,
+    )
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='Helloz NSFW stand-in server and client benchmark.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    server_options = _server_options()
+
+    serve = commands.add_parser('serve', parents=[server_options], help='Run a stand-in server until interrupted')
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=constants.HELLOZ_NSFW_PORT)
+
+    bench = commands.add_parser('bench', parents=[server_options], help='Scan synthetic images against stand-in servers')
+    bench.add_argument('--replicas', type=int, default=1)
+    bench.add_argument('--files', type=int, default=constants.BENCHMARK_FILE_COUNT)
+    bench.add_argument('--image-size', type=int, default=constants.BENCHMARK_IMAGE_SIZE)
+    bench.add_argument('--strategy', default=STRATEGY_ASYNC, choices=(STRATEGY_ASYNC, STRATEGY_THREADS, 'both'))
+    bench.add_argument('--concurrency', type=int, default=constants.REMOTE_ASYNC_CONCURRENCY, help='Requests in flight (async strategy)')
+    bench.add_argument('--workers', type=int, default=constants.WORKER_THREAD_COUNT, help='Worker threads (threads strategy)')
+    bench.add_argument('--balance', default=constants.HELLOZ_NSFW_BALANCE_LEAST_OUTSTANDING, choices=constants.SUPPORTED_HELLOZ_NSFW_BALANCE)
+    bench.add_argument('--upload-max-edge', type=int, default=constants.HELLOZ_NSFW_UPLOAD_MAX_EDGE)
+    bench.add_argument('--upload-format', default=constants.HELLOZ_NSFW_UPLOAD_FORMAT, choices=constants.SUPPORTED_UPLOAD_FORMATS)
+    bench.add_argument('--json', action='store_true', help='Print results as JSON')
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = _build_parser().parse_args(argv)
+    if args.command == 'serve':
+        server = _make_server(args, args.host, args.port, args.seed)
+        logging.info('Stand-in Helloz NSFW server listening on %s', server.upload_url)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            logging.info('Shutting down stand-in server')
+        finally:
+            server.server_close()
+        return 0
+
+    settings = {
+        'helloz_nsfw_balance': args.balance,
+        'helloz_nsfw_upload_max_edge': args.upload_max_edge,
+        'helloz_nsfw_upload_format': args.upload_format,
+    }
+    strategies = (STRATEGY_ASYNC, STRATEGY_THREADS) if args.strategy == 'both' else (args.strategy,)
+    results = []
+    with tempfile.TemporaryDirectory(prefix='helloz_bench_') as workdir:
+        folder = os.path.join(workdir, 'images')
+        logging.info('Generating %d synthetic %dpx images', args.files, args.image_size)
+        make_images(folder, args.files, args.image_size, args.seed or 0)
+        for strategy in strategies:
+            # Fresh servers (new ports) per strategy, so no run inherits another's pool or breaker state
+            with contextlib.ExitStack() as stack:
+                servers = [
+                    stack.enter_context(_make_server(args, seed=None if args.seed is None else args.seed + n))
+                    for n in range(max(1, args.replicas))
+                ]
+                results.append(run_benchmark(folder, servers, strategy, args.workers, args.concurrency, settings, workdir))
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print('\n\n'.join(format_report(result) for result in results))
+    return 0
@@ -0,0 +1,186 @@
+"""Tests for src/core/async_pipeline.py (asyncio scan pipeline)."""
+import asyncio
+import shutil
+from unittest.mock import patch
+
+import pytest
+from PIL import Image
+
+from src.core import constants
+from src.core.async_pipeline import classify_files_async, classify_folder_async, walk_files
+from src.core.utils import DeferredFile
+
+
+def _image(path, colour=(200, 120, 90)):
+    Image.new("RGB", (32, 32), colour).save(path, format="JPEG")
+    return str(path)
+
+
+class _Recorder:
+    """Async classifier that records calls and how many ran at once."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+
+    async def __call__(self, file_path):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(self.delay)
+        self.calls.append(file_path)
+        self.active -= 1
+
+
+class _Stage:
+    def __init__(self, handled=()):
+        self.handled = set(handled)
+        self.before_calls = []
+        self.after_calls = []
+
+    def before(self, file_path):
+        self.before_calls.append(file_path)
+        return file_path in self.handled
+
+    def after(self, file_path):
+        self.after_calls.append(file_path)
+
+
+def test_walk_files_lists_nested_folders(tmp_path):
+    (tmp_path / "a" / "b").mkdir(parents=True)
+    expected = {str(tmp_path / "top.txt"), str(tmp_path / "a" / "mid.txt"), str(tmp_path / "a" / "b" / "deep.txt")}
+    for path in expected:
+        open(path, "w").close()
+
+    async def collect():
+        return {path async for path in walk_files(str(tmp_path))}
+
+    assert asyncio.run(collect()) == expected
+
+
+def test_classify_folder_async_runs_images_concurrently(tmp_path):
+    images = {_image(tmp_path / f"{n}.jpg") for n in range(8)}
+    (tmp_path / "notes.txt").write_text("not media")
+    classify_image, classify_video = _Recorder(delay=0.02), _Recorder()
+
+    asyncio.run(classify_folder_async(str(tmp_path), classify_image, classify_video, concurrency=4))
+
+    assert set(classify_image.calls) == images
+    assert classify_video.calls == []
+    assert 1 < classify_image.max_active <= 4
+
+
+def test_classify_folder_async_groups_exact_duplicates(tmp_path):
+    original = _image(tmp_path / "original.jpg")
+    copy = str(tmp_path / "copy.jpg")
+    shutil.copyfile(original, copy)
+    classify_image = _Recorder()
+
+    groups = asyncio.run(classify_folder_async(str(tmp_path), classify_image, _Recorder(), concurrency=2, deduplicate=True))
+
+    assert len(classify_image.calls) == 1
+    [(canonical, skipped)] = groups.items()
+    assert {canonical, *skipped} == {original, copy}
+
+
+def test_classify_files_async_applies_image_stages(tmp_path):
+    kept = _image(tmp_path / "kept.jpg")
+    handled = _image(tmp_path / "handled.jpg", (10, 10, 10))
+    seen = _image(tmp_path / "seen.jpg", (90, 90, 90))
+    first, second = _Stage(), _Stage(handled=[handled])
+    classify_image = _Recorder()
+
+    asyncio.run(classify_files_async(
+        [kept, handled, seen], classify_image, _Recorder(), concurrency=1,
+        image_stages=[first, second], existing_files={seen},
+    ))
+
+    assert classify_image.calls == [kept, seen]
+    assert first.before_calls == [kept, handled]
+    assert second.before_calls == [kept, handled]
+    # after() runs for each stage the file passed, not for the stage that handled it
+    assert first.after_calls == [kept, handled]
+    assert second.after_calls == [kept]
+
+
+def test_classify_files_async_logs_errors_and_continues(tmp_path, caplog):
+    paths = [_image(tmp_path / f"{n}.jpg") for n in range(3)]
+    done = []
+
+    async def classify_image(file_path):
+        if file_path == paths[1]:
+            raise RuntimeError("boom")
+        done.append(file_path)
+
+    asyncio.run(classify_files_async(paths, classify_image, _Recorder(), concurrency=2))
+
+    assert sorted(done) == [paths[0], paths[2]]
+    assert "boom" in caplog.text
+
+
+def test_classify_files_async_rejects_zero_concurrency():
+    with pytest.raises(ValueError):
+        asyncio.run(classify_files_async([], _Recorder(), _Recorder(), concurrency=0))
+
+
+def test_classify_files_async_retries_deferred_files(tmp_path):
+    paths = [_image(tmp_path / f"{n}.jpg") for n in range(2)]
+    attempts = {}
+    done = []
+
+    async def classify_image(file_path):
+        attempts[file_path] = attempts.get(file_path, 0) + 1
+        if file_path == paths[0] and attempts[file_path] == 1:
+            raise DeferredFile(file_path, retry_after=0.01)
+        done.append(file_path)
+
+    asyncio.run(classify_files_async(paths, classify_image, _Recorder(), concurrency=2))
+
+    assert sorted(done) == sorted(paths)
+    assert attempts[paths[0]] == 2
+
+
+def test_classify_files_async_orders_queued_files_by_schedule(tmp_path):
+    paths = [_image(tmp_path / f"{n}.jpg") for n in range(5)]
+    cost = {path: n for n, path in enumerate(paths)}
+    started = []
+
+    async def run():
+        queued = asyncio.Event()
+
+        async def source():
+            for path in paths:
+                yield path
+            queued.set()
+
+        async def classify_image(file_path):
+            await queued.wait()
+            started.append(file_path)
+
+        await classify_files_async(source(), classify_image, _Recorder(), concurrency=1, schedule=lambda path: (0, -cost[path]))
+
+    asyncio.run(run())
+    # The worker may take one file before the rest are queued; after that, cost order
+    first, rest = started[0], started[1:]
+    assert rest == sorted((path for path in paths if path != first), key=lambda path: -cost[path])
+
+
+def test_classify_files_async_keeps_a_bounded_window_with_a_schedule(tmp_path):
+    paths = [_image(tmp_path / f"{n}.jpg") for n in range(10)]
+    listed, ahead = [], []
+
+    async def source():
+        for path in paths:
+            listed.append(path)
+            yield path
+
+    async def classify_image(file_path):
+        ahead.append(len(listed) - len(ahead))
+        await asyncio.sleep(0)
+
+    with patch.object(constants, "SCAN_LOOKAHEAD", 3):
+        asyncio.run(classify_files_async(source(), classify_image, _Recorder(), concurrency=1, schedule=lambda path: (0,)))
+
+    assert len(ahead) == len(paths)
+    assert max(ahead) <= 3 + 2  # The queue window, plus the file being keyed and the one in the worker
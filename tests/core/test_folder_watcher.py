@@ -0,0 +1,168 @@
+"""Tests for src/core/folder_watcher.py and watch_folder()."""
+import os
+import sys
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+sys.modules.setdefault("nudenet", MagicMock())
+
+from src.core import folder_watcher
+from src.core.folder_watcher import FolderWatcher
+from src.core.utils import start_folder_watcher, watch_folder
+
+
+def _collect(watcher, expected, timeout=5.0):
+    """Drain get_changes() until *expected* paths were seen or *timeout* passes."""
+    seen = set()
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and not expected <= seen:
+        seen.update(watcher.get_changes(timeout=0.2))
+    return seen
+
+
+@pytest.fixture(params=["inotify", "polling"])
+def watcher_factory(request):
+    if request.param == "inotify" and folder_watcher._load_libc() is None:
+        pytest.skip("inotify not available")
+    created = []
+
+    def factory(folder, **kw):
+        watcher = FolderWatcher(
+            [str(folder)], debounce_seconds=0.1, poll_interval=0.1,
+            use_inotify=request.param == "inotify", **kw,
+        )
+        watcher.start()
+        assert watcher.backend == request.param
+        created.append(watcher)
+        return watcher
+
+    yield factory
+    for watcher in created:
+        watcher.stop()
+
+
+# ---------------------------------------------------------------------------
+# FolderWatcher
+# ---------------------------------------------------------------------------
+
+def test_reports_new_and_modified_files(tmp_path, watcher_factory):
+    existing = tmp_path / "existing.jpg"
+    existing.write_bytes(b"old")
+    watcher = watcher_factory(tmp_path)
+
+    new_file = tmp_path / "new.jpg"
+    new_file.write_bytes(b"new")
+    time.sleep(0.05)
+    existing.write_bytes(b"changed-content")
+
+    assert _collect(watcher, {str(new_file), str(existing)}) == {str(new_file), str(existing)}
+
+
+def test_ignores_untouched_files(tmp_path, watcher_factory):
+    (tmp_path / "existing.jpg").write_bytes(b"old")
+    watcher = watcher_factory(tmp_path)
+    assert _collect(watcher, {"never"}, timeout=0.6) == set()
+
+
+def test_reports_files_in_new_subfolder(tmp_path, watcher_factory):
+    watcher = watcher_factory(tmp_path)
+    nested = tmp_path / "upload" / "batch"
+    nested.mkdir(parents=True)
+    target = nested / "a.jpg"
+    target.write_bytes(b"data")
+
+    assert str(target) in _collect(watcher, {str(target)})
+
+
+def test_reports_files_moved_in(tmp_path, watcher_factory):
+    outside = tmp_path / "outside"
+    watched = tmp_path / "watched"
+    outside.mkdir()
+    watched.mkdir()
+    source = outside / "a.jpg"
+    source.write_bytes(b"data")
+    watcher = watcher_factory(watched)
+
+    os.rename(source, watched / "a.jpg")
+
+    assert str(watched / "a.jpg") in _collect(watcher, {str(watched / "a.jpg")})
+
+
+def test_debounce_coalesces_repeated_writes(tmp_path):
+    watcher = FolderWatcher([str(tmp_path)], debounce_seconds=0.3, use_inotify=False)
+    path = str(tmp_path / "a.jpg")
+    watcher._mark_changed(path)
+    open(path, "wb").close()
+
+    assert watcher.get_changes(timeout=0.1) == []
+    watcher._mark_changed(path)
+    assert watcher.get_changes(timeout=1.0) == [path]
+    assert watcher.get_changes(timeout=0.1) == []
+
+
+def test_deleted_files_are_dropped(tmp_path):
+    watcher = FolderWatcher([str(tmp_path)], debounce_seconds=0.0, use_inotify=False)
+    watcher._mark_changed(str(tmp_path / "gone.jpg"))
+    assert watcher.get_changes(timeout=0.1) == []
+
+
+# ---------------------------------------------------------------------------
+# watch_folder
+# ---------------------------------------------------------------------------
+
+def test_watch_folder_classifies_changes_and_flushes(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.core.utils.is_supported_file", lambda path: True)
+    monkeypatch.setattr("src.core.utils.detect_media_type", lambda path: "image")
+    (tmp_path / "before.jpg").write_bytes(b"x")
+    classified, changed, flushes = [], [], []
+    stop = threading.Event()
+
+    def classify_image(file_path):
+        classified.append(file_path)
+        stop.set()
+
+    result = {}
+    thread = threading.Thread(target=lambda: result.setdefault("count", watch_folder(
+        str(tmp_path), classify_image, MagicMock(), should_stop=stop.is_set,
+        on_change=changed.append, on_flush=flushes.append, worker_count=1,
+        debounce_seconds=0.1, poll_interval=0.1, save_interval=60,
+    )))
+    thread.start()
+    time.sleep(0.3)
+    (tmp_path / "after.jpg").write_bytes(b"y")
+    thread.join(timeout=10)
+
+    assert not thread.is_alive()
+    assert classified == [str(tmp_path / "after.jpg")]
+    assert changed == classified
+    assert result["count"] == 1
+    assert flushes == [1]  # final flush on stop even though save_interval was not reached
+
+
+def test_watch_folder_classifies_files_created_during_the_initial_scan(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.core.utils.is_supported_file", lambda path: True)
+    monkeypatch.setattr("src.core.utils.detect_media_type", lambda path: "image")
+    watcher = start_folder_watcher(str(tmp_path), debounce_seconds=0.1, poll_interval=0.1)
+    # Created after the watcher started but before watching began, e.g. in a folder the scan had already walked
+    (tmp_path / "during_scan.jpg").write_bytes(b"x")
+    classified = []
+    stop = threading.Event()
+
+    def classify_image(file_path):
+        classified.append(file_path)
+        stop.set()
+
+    deadline = time.monotonic() + 5
+    count = watch_folder(str(tmp_path), classify_image, MagicMock(),
+                         should_stop=lambda: stop.is_set() or time.monotonic() > deadline, worker_count=1, watcher=watcher)
+
+    assert classified == [str(tmp_path / "during_scan.jpg")]
+    assert count == 1
+
+
+def test_watch_folder_rejects_zero_workers(tmp_path):
+    with pytest.raises(ValueError):
+        watch_folder(str(tmp_path), MagicMock(), MagicMock(), should_stop=lambda: True, worker_count=0)
@@ -1,8 +1,9 @@
 """Tests for issue #24 - Fix periodic report save inside report_lock blocking.
 
-Ensures that:
-1. ReportManager.save_entries is never called while ScanSession._lock is held.
-2. Checkpoint saves fire every 500 entries.
+Checkpoints now insert into the run's results store (ResultsStore.add_entries)
+instead of rewriting the workbook. Ensures that:
+1. The results store is never written while ScanSession._lock is held.
+2. Checkpoint saves fire every 500 entries, each with only the new entries.
 3. Worker throughput does not degrade at the 500-entry boundary under concurrency.
 """
 import sys
@@ -37,7 +38,7 @@ def _make_entry_kwargs(tmp_path, idx=0):
 
 
 class _LockSpy:
-    """Wraps a threading.Lock and records whether save_entries is ever called
+    """Wraps a threading.Lock and records whether the store is ever written
     while the lock is held."""
 
     def __init__(self, real_lock):
@@ -68,16 +69,16 @@ class _LockSpy:
 
 
 def test_checkpoint_fires_every_500_entries(tmp_path):
-    """ReportManager.save_entries must be called once per 500 entries added."""
+    """ResultsStore.add_entries must be called once per 500 entries added."""
     session = ScanSession()
 
     save_calls = []
 
-    def fake_save(entries, path):
+    def fake_save(entries):
         save_calls.append(len(entries))
 
-    with patch("src.core.utils.ReportManager") as MockRM:
-        MockRM.save_entries.side_effect = fake_save
+    with patch("src.reporting.checkpoint_writer.ResultsStore") as MockStore:
+        MockStore.for_report.return_value.__enter__.return_value.add_entries.side_effect = fake_save
 
         for i in range(1500):
             kwargs = _make_entry_kwargs(tmp_path, i)
@@ -86,12 +87,12 @@ def test_checkpoint_fires_every_500_entries(tmp_path):
 
         assert _wait_until(lambda: len(save_calls) == 3)
 
-    # Should have fired at counts 500, 1000, 1500
-    assert save_calls == [500, 1000, 1500]
+    # Should have fired at counts 500, 1000, 1500 with the 500 new entries each time
+    assert save_calls == [500, 500, 500]
 
 
-def test_save_entries_not_called_while_lock_held(tmp_path):
-    """save_entries must never be called while ScanSession._lock is held."""
+def test_store_not_written_while_lock_held(tmp_path):
+    """The results store must never be written while ScanSession._lock is held."""
     session = ScanSession()
 
     import threading as _threading
@@ -102,13 +103,13 @@ def test_save_entries_not_called_while_lock_held(tmp_path):
     violation_flag = threading.Event()
     save_called = threading.Event()
 
-    def fake_save(entries, path):
+    def fake_save(entries):
         save_called.set()
         if spy.held:
             violation_flag.set()
 
-    with patch("src.core.utils.ReportManager") as MockRM:
-        MockRM.save_entries.side_effect = fake_save
+    with patch("src.reporting.checkpoint_writer.ResultsStore") as MockStore:
+        MockStore.for_report.return_value.__enter__.return_value.add_entries.side_effect = fake_save
 
         # Add exactly 500 entries to trigger the checkpoint
         for i in range(500):
@@ -119,7 +120,7 @@ def test_save_entries_not_called_while_lock_held(tmp_path):
         assert save_called.wait(timeout=2)
 
     assert not violation_flag.is_set(), (
-        "save_entries was called while ScanSession._lock was held (lock contention bug)"
+        "add_entries was called while ScanSession._lock was held (lock contention bug)"
     )
 
 
@@ -134,13 +135,13 @@ def test_concurrent_throughput_at_500_boundary(tmp_path):
     allow_save_to_finish = threading.Event()
     save_calls = []
 
-    def fake_save(entries, path):
+    def fake_save(entries):
         save_calls.append(len(entries))
         save_started.set()
         assert allow_save_to_finish.wait(timeout=2), "Timed out waiting to release checkpoint save"
 
-    with patch("src.core.utils.ReportManager") as MockRM:
-        MockRM.save_entries.side_effect = fake_save
+    with patch("src.reporting.checkpoint_writer.ResultsStore") as MockStore:
+        MockStore.for_report.return_value.__enter__.return_value.add_entries.side_effect = fake_save
 
         def worker(thread_idx):
             for i in range(ENTRIES_PER_THREAD):
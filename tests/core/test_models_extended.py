@@ -102,3 +102,29 @@ def test_detection_result_clamps_confidence():
     )
     entry = dr.to_report_entry()
     assert entry.confidence_percent == pytest.approx(100.0, abs=0.1)
+
+
+# ---------------------------------------------------------------------------
+# ReportEntry.class_scores
+# ---------------------------------------------------------------------------
+
+def _scored_entry(detected_classes):
+    return ReportEntry(
+        file="/tmp/a.jpg", media_type="image", model_name="nudenet", threshold_percent=60.0,
+        confidence_percent=90.0, nudity_detected=True, detected_classes=detected_classes,
+    )
+
+
+@pytest.mark.parametrize("payload, expected", [
+    ([{"class": "FACE_F", "score": 0.4}, {"class": "FACE_F", "score": 0.7}], {"FACE_F": 0.7}),
+    ([{"frame": 0, "detections": [{"class": "BUTTOCKS_EXPOSED", "score": 0.9}]}], {"BUTTOCKS_EXPOSED": 0.9}),
+    ([{"frame": 0, "unsafe_score": 0.3}, {"frame": 1, "unsafe_score": 0.8}], {"nsfw": 0.8}),
+    ({"code": 200, "data": {"sfw": 0.1, "nsfw": 0.9}}, {"sfw": 0.1, "nsfw": 0.9}),
+])
+def test_report_entry_class_scores_formats(payload, expected):
+    assert _scored_entry(json.dumps(payload)).class_scores() == pytest.approx(expected)
+
+
+def test_report_entry_class_scores_errors_and_garbage():
+    assert _scored_entry("ERROR: timed out").class_scores() == {}
+    assert _scored_entry("not json").class_scores() == {}
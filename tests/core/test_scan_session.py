@@ -122,3 +122,61 @@ def test_result_deletion_no_global_side_effects():
     s1.reset()
     assert len(s1.get_results()) == 0
     assert len(s2.get_results()) == 1
+
+
+def test_find_result_returns_latest_entry_for_file():
+    session = ScanSession(initial_results=[_make_entry("g.jpg", nudity_detected=False)])
+    assert session.find_result("g.jpg").nudity_detected is False
+    session.add_result(_make_entry("g.jpg", nudity_detected=True))
+    assert session.find_result("g.jpg").nudity_detected is True
+    assert session.find_result("missing.jpg") is None
+    session.reset()
+    assert session.find_result("g.jpg") is None
+
+
+def test_discard_results_removes_every_entry_for_file():
+    session = ScanSession()
+    session.add_result(_make_entry("/a.jpg"))
+    session.add_result(_make_entry("/b.jpg"))
+    session.add_result(_make_entry("/a.jpg"))
+
+    assert session.discard_results("/a.jpg") == 2
+    assert [entry.file for entry in session.get_results()] == ["/b.jpg"]
+    assert session.find_result("/a.jpg") is None
+    assert session.discard_results("/a.jpg") == 0
+
+
+def test_replace_result_swaps_the_latest_entry_for_file():
+    session = ScanSession()
+    session.add_result(_make_entry("/a.jpg"))
+    session.add_result(_make_entry("/a.jpg"))
+    replacement = _make_entry("/a.jpg", nudity_detected=False)
+
+    assert session.replace_result(replacement) is True
+    assert session.get_results()[1] is replacement
+    assert session.find_result("/a.jpg") is replacement
+    assert session.replace_result(_make_entry("/b.jpg")) is False
+    assert len(session.get_results()) == 2
+
+
+def test_take_checkpoint_returns_each_result_once():
+    session = ScanSession()
+    for name in ("/a.jpg", "/b.jpg"):
+        session.add_result(_make_entry(name))
+    assert session.take_checkpoint(3) is None
+
+    session.add_result(_make_entry("/c.jpg"))
+    assert [entry.file for entry in session.take_checkpoint(3)] == ["/a.jpg", "/b.jpg", "/c.jpg"]
+    assert session.take_checkpoint(1) is None
+
+
+def test_take_checkpoint_is_not_shifted_by_discarded_results():
+    session = ScanSession()
+    for name in ("/a.jpg", "/b.jpg"):
+        session.add_result(_make_entry(name))
+    assert len(session.take_checkpoint(2)) == 2
+
+    session.add_result(_make_entry("/c.jpg"))
+    session.discard_results("/a.jpg")
+    session.add_result(_make_entry("/d.jpg"))
+    assert [entry.file for entry in session.take_checkpoint(2)] == ["/c.jpg", "/d.jpg"]
@@ -0,0 +1,135 @@
+"""Tests for src/core/scoring.py (packed class scores and bulk re-thresholding)."""
+import json
+from unittest import mock
+
+import numpy as np
+import pytest
+
+from src.core import constants
+from src.core.models import ReportEntry
+from src.core.scoring import (
+    ScoringEngine,
+    apply_thresholds,
+    pack_scores,
+    rethreshold_entries,
+    score_matrix,
+    unpack_scores,
+)
+
+
+def _nudenet_entry(file, detections, confidence=0.0, detected=False):
+    return ReportEntry(
+        file=file, media_type="image", model_name=constants.MODEL_NUDENET, threshold_percent=60.0,
+        confidence_percent=confidence, nudity_detected=detected,
+        detected_classes=json.dumps([{"class": name, "score": score} for name, score in detections]),
+    )
+
+
+def test_pack_and_unpack_scores_roundtrip():
+    class_index = {"FACE_F": 0, "EXPOSED_BREAST_F": 1, "nsfw": 2}
+    blob = pack_scores({"EXPOSED_BREAST_F": 0.75}, class_index)
+    assert len(blob) == 8  # trailing unscored columns are not stored
+    assert unpack_scores(blob, list(class_index)) == {"EXPOSED_BREAST_F": 0.75}
+    assert pack_scores({}, class_index) == b""
+    assert unpack_scores(None, list(class_index)) == {}
+
+
+def test_score_matrix_pads_vectors_packed_before_the_vocabulary_grew():
+    class_index = {"a": 0, "b": 1, "c": 2}
+    blobs = [pack_scores({"a": 0.5}, class_index), None, pack_scores({"c": 0.25}, class_index), b""]
+    matrix = score_matrix(blobs, 3)
+    assert matrix.dtype == np.float32
+    np.testing.assert_allclose(matrix, [[0.5, 0, 0], [0, 0, 0], [0, 0, 0.25], [0, 0, 0]])
+
+
+def test_apply_thresholds_counts_only_the_models_scored_classes():
+    classes = ["FACE_F", "EXPOSED_BREAST_F", "nsfw"]
+    scores = np.array([[0.9, 0.5, 0.0], [0.0, 0.0, 0.7], [0.9, 0.0, 0.0]], dtype=np.float32)
+    models = [constants.MODEL_NUDENET, constants.MODEL_HELLOZ_NSFW, constants.MODEL_NUDENET]
+
+    confidence, detected = apply_thresholds(scores, classes, models, 60.0)
+    assert confidence.tolist() == [50.0, 70.0, 0.0]
+    assert detected.tolist() == [False, True, False]
+
+    confidence, detected = apply_thresholds(scores, classes, models, 40.0)
+    assert detected.tolist() == [True, True, False]
+
+
+def test_apply_thresholds_per_class_overrides():
+    classes = ["FACE_F", "EXPOSED_BREAST_F", "EXPOSED_BELLY"]
+    scores = np.array([[0.0, 0.5, 0.0], [0.0, 0.0, 0.8]], dtype=np.float32)
+    models = [constants.MODEL_NUDENET] * 2
+
+    # Lower the breast threshold, and count belly (not scored by default) at 75%
+    confidence, detected = apply_thresholds(scores, classes, models, 60.0,
+                                            {"EXPOSED_BREAST_F": 45.0, "EXPOSED_BELLY": 75.0})
+    assert detected.tolist() == [True, True]
+    assert confidence.tolist() == [50.0, 80.0]
+
+
+def test_rethreshold_entries_rescores_and_keeps_errors():
+    entries = [
+        _nudenet_entry("/a.jpg", [("EXPOSED_BREAST_F", 0.5), ("FACE_F", 0.95)], 50.0, False),
+        _nudenet_entry("/b.jpg", [("EXPOSED_BUTTOCKS", 0.7)], 70.0, True),
+        ReportEntry(file="/c.jpg", media_type="image", model_name=constants.MODEL_NUDENET, threshold_percent=60.0,
+                    confidence_percent=0.0, nudity_detected=False, detected_classes="ERROR: timed out"),
+    ]
+    result = rethreshold_entries(entries, 45.0)
+
+    assert [e.nudity_detected for e in result] == [True, True, False]
+    assert [e.threshold_percent for e in result] == [45.0, 45.0, 60.0]
+    assert result[0].confidence_percent == pytest.approx(50.0)
+    assert result[2] is entries[2]
+    assert entries[0].nudity_detected is False  # inputs are not modified
+
+
+def test_scoring_engine_scores_one_detection_result():
+    engine = ScoringEngine(constants.MODEL_NUDENET, 60.0)
+    detections = [
+        {"label": "FACE_F", "score": 0.99},
+        {"label": "EXPOSED_BREAST_F", "score": 0.55},
+        {"label": "EXPOSED_BREAST_F", "score": 0.65},
+    ]
+    confidence, detected = engine.score(detections)
+    assert confidence == pytest.approx(0.65)
+    assert detected is True
+    assert engine.score([]) == (0.0, False)
+
+
+def test_scoring_engine_per_class_thresholds_and_weights():
+    engine = ScoringEngine(constants.MODEL_NUDENET, 60.0,
+                           class_thresholds={"EXPOSED_BELLY": 70.0}, class_weights={"EXPOSED_BREAST_F": 0.5})
+    # Weighted breast score 0.4 stays below 60%; belly now counts at its own 70% threshold
+    assert engine.score([{"label": "EXPOSED_BREAST_F", "score": 0.8}]) == (pytest.approx(0.4), False)
+    assert engine.score([{"label": "EXPOSED_BELLY", "score": 0.75}]) == (pytest.approx(0.75), True)
+    assert engine.score([{"label": "EXPOSED_BELLY", "score": 0.65}])[1] is False
+
+
+def test_scoring_engine_adds_unknown_labels_without_counting_them():
+    engine = ScoringEngine(constants.MODEL_NUDENET, 60.0)
+    size = len(engine.classes)
+    assert engine.score([{"label": "NEW_LABEL", "score": 0.99}]) == (0.0, False)
+    assert engine.classes[size:] == ["NEW_LABEL"]
+    assert engine.class_index("NEW_LABEL") == size
+
+
+def test_scan_time_score_matches_rethreshold():
+    detections = [("EXPOSED_BUTTOCKS", 0.58), ("EXPOSED_BELLY", 0.9), ("FACE_F", 0.9)]
+    overrides = {"EXPOSED_BUTTOCKS": 55.0}
+    engine = ScoringEngine(constants.MODEL_NUDENET, 60.0, class_thresholds=overrides)
+    confidence, detected = engine.score([{"label": name, "score": score} for name, score in detections])
+
+    [entry] = rethreshold_entries([_nudenet_entry("/a.jpg", detections)], 60.0, overrides)
+    assert entry.nudity_detected is detected is True
+    assert entry.confidence_percent == pytest.approx(round(confidence * 100, 2))
+
+
+def test_get_scoring_config_reads_numeric_class_maps(tmp_path):
+    config_path = tmp_path / "app_config.json"
+    config_path.write_text(json.dumps({
+        "class_thresholds": {"EXPOSED_BELLY": 70, "BAD": "x"},
+        "class_weights": {"FACE_F": "0.5"},
+    }))
+    with mock.patch("src.core.constants._config_path", return_value=str(config_path)):
+        assert constants.get_scoring_config() == ({"EXPOSED_BELLY": 70.0}, {"FACE_F": 0.5})
+        assert constants.get_scoring_config(constants.MODEL_HELLOZ_NSFW) == ({}, {})
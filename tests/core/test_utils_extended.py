@@ -1,6 +1,7 @@
 """Extended tests for src/core/utils.py to boost coverage."""
 import os
 import sys
+import threading
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -10,6 +11,8 @@ sys.modules.setdefault("nudenet", MagicMock())
 
 from src.core.scan_session import ScanSession
 from src.core.utils import (
+    MediaQueues,
+    classify_files,
     count_supported_files,
     create_session_state,
     delete_file_safely,
@@ -340,6 +343,80 @@ def test_classify_files_in_folder_invalid_worker_count(tmp_path):
         classify_files_in_folder(str(tmp_path), MagicMock(), MagicMock(), worker_count=0)
 
 
+def test_media_queues_rebalance_when_one_runs_dry():
+    queues = MediaQueues(video_workers=1)
+    queues.put("/scan/a.mp4")
+    queues.put("/scan/b.jpg")
+    queues.put("/scan/c.mp4")
+
+    assert queues.get("video") == "/scan/a.mp4"
+    assert queues.get("image") == "/scan/b.jpg"
+    assert queues.get("video") == "/scan/c.mp4"
+    queues.put("/scan/d.mp4")
+    queues.put("/scan/e.jpg")
+    assert queues.get("video") == "/scan/d.mp4"
+    assert queues.get("video") == "/scan/e.jpg"  # Video workers take images when no video waits
+
+    queues.put("/scan/f.mp4")
+    queues.close()  # Image workers take videos once discovery is over
+    assert queues.get("image") == "/scan/f.mp4"
+    assert queues.get("image") is None and queues.get("video") is None
+
+
+def test_media_queues_bound_the_lookahead_window():
+    queues = MediaQueues(video_workers=1, maxsize=2)
+    queues.put("/scan/a.mp4", (0, -5))
+    queues.put("/scan/b.mp4", (0, -9))
+    blocked = threading.Thread(target=queues.put, args=("/scan/c.jpg",))
+    blocked.start()
+    blocked.join(0.1)
+    assert blocked.is_alive()  # The window is full until a worker takes a file
+
+    assert queues.get("image") == "/scan/b.mp4"  # A full window lets image workers take videos
+    blocked.join(2)
+    assert not blocked.is_alive()
+    assert queues.get("image") == "/scan/c.jpg"
+    assert queues.get("video") == "/scan/a.mp4"
+
+
+def test_classify_files_keeps_images_moving_while_videos_run():
+    files = ["/scan/long.mp4", "/scan/other.mp4", "/scan/a.jpg", "/scan/b.jpg", "/scan/c.jpg"]
+    images_done = threading.Event()
+    images, stalled = [], []
+
+    def classify_image(file_path):
+        images.append(file_path)
+        if len(images) == 3:
+            images_done.set()
+
+    def classify_video(file_path):
+        if not images_done.wait(2):
+            stalled.append(file_path)  # Every worker was held by a video while images waited
+
+    def media_type(file_path):
+        return "video" if file_path.endswith(".mp4") else "image"
+
+    with patch("src.core.utils.is_supported_file", return_value=True), \
+         patch("src.core.utils.detect_media_type", side_effect=media_type):
+        classify_files(files, classify_image, classify_video, worker_count=2, video_workers=1)
+
+    assert sorted(images) == ["/scan/a.jpg", "/scan/b.jpg", "/scan/c.jpg"]
+    assert stalled == []
+
+
+def test_classify_files_single_worker_runs_every_file_on_one_thread():
+    threads = set()
+
+    def classify(file_path):
+        threads.add(threading.current_thread().name)
+
+    with patch("src.core.utils.is_supported_file", return_value=True), \
+         patch("src.core.utils.detect_media_type", return_value="image"):
+        classify_files(["/scan/a.jpg", "/scan/b.mp4", "/scan/c.jpg"], classify, classify, worker_count=1, video_workers=4)
+
+    assert threads == {"image-worker-0"}
+
+
 # ---------------------------------------------------------------------------
 # get_thumbnail (delegates to ThumbnailGenerator)
 # ---------------------------------------------------------------------------
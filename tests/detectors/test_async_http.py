@@ -0,0 +1,152 @@
+"""Tests for src/detectors/async_http.py and the Helloz NSFW asyncio classifiers."""
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import pytest
+from PIL import Image
+
+from src.core import constants
+from src.core.scan_session import ScanSession
+from src.detectors.async_http import AsyncHttpClient, AsyncHttpError, encode_multipart
+from src.detectors.helloz_nsfw import make_classify_image_async
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *_args):
+        pass
+
+    def do_GET(self):
+        self.server.connections.add(self.client_address)
+        if self.path == "/chunked":
+            self.send_response(200)
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for part in (b"hello ", b"world"):
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(part), part))
+            self.wfile.write(b"0\r\n\r\n")
+            return
+        self._reply(200, {"path": self.path})
+
+    def do_POST(self):
+        self.server.connections.add(self.client_address)
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.uploads.append((self.headers["Content-Type"], body))
+        status = self.server.statuses.pop(0) if self.server.statuses else 200
+        self._reply(status, {"data": {"nsfw": self.server.nsfw}})
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    httpd.daemon_threads = True
+    httpd.connections, httpd.uploads, httpd.statuses, httpd.nsfw = set(), [], [], 0.9
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    httpd.url = f"http://127.0.0.1:{httpd.server_address[1]}"
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_encode_multipart_wraps_the_file():
+    content_type, body = encode_multipart("file", 'a"b.jpg', b"DATA")
+    boundary = content_type.split("boundary=")[1]
+    assert body.startswith(f"--{boundary}\r\n".encode())
+    assert b'filename="a_b.jpg"' in body
+    assert body.endswith(f"DATA\r\n--{boundary}--\r\n".encode())
+
+
+def test_client_reuses_keep_alive_connections(server):
+    async def run():
+        async with AsyncHttpClient(max_connections=1) as client:
+            responses = [await client.get(f"{server.url}/item/{n}") for n in range(3)]
+            chunked = await client.get(f"{server.url}/chunked")
+            upload = await client.post_file(f"{server.url}/classify", "file", "x.jpg", b"payload")
+        return responses, chunked, upload
+
+    responses, chunked, upload = asyncio.run(run())
+    assert [r.json()["path"] for r in responses] == ["/item/0", "/item/1", "/item/2"]
+    assert chunked.body == b"hello world"
+    assert upload.json() == {"data": {"nsfw": 0.9}}
+    assert b"payload" in server.uploads[0][1]
+    assert len(server.connections) == 1
+
+
+def test_client_does_not_resend_a_request_the_connection_dropped():
+    received = []
+
+    async def handle(reader, writer):
+        # Answer the first request with keep-alive, then read the second and drop the connection
+        while True:
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = int(head.lower().split(b"content-length:")[1].split(b"\r\n")[0])
+            received.append(await reader.readexactly(length))
+            if len(received) > 1:
+                writer.close()
+                return
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\n{}")
+            await writer.drain()
+
+    async def run():
+        tcp = await asyncio.start_server(handle, "127.0.0.1", 0)
+        url = f"http://127.0.0.1:{tcp.sockets[0].getsockname()[1]}/classify"
+        try:
+            async with AsyncHttpClient(max_connections=1) as client:
+                await client.post_file(url, "file", "a.jpg", b"first")
+                with pytest.raises(AsyncHttpError):
+                    await client.post_file(url, "file", "b.jpg", b"second")
+        finally:
+            tcp.close()
+            await tcp.wait_closed()
+
+    asyncio.run(run())
+    assert len(received) == 2
+
+
+def test_client_raises_async_http_error_when_unreachable():
+    async def run():
+        async with AsyncHttpClient() as client:
+            await client.get("http://127.0.0.1:1/")
+
+    with pytest.raises(AsyncHttpError):
+        asyncio.run(run())
+
+
+def test_classify_image_async_records_results_and_errors(server, tmp_path):
+    images = []
+    for n in range(3):
+        path = tmp_path / f"{n}.jpg"
+        Image.new("RGB", (16, 16), (n * 40, 80, 80)).save(path)
+        images.append(str(path))
+    server.statuses = [200, 200, 400]
+    session = ScanSession()
+
+    async def run():
+        with ThreadPoolExecutor(2) as executor, \
+                patch.object(constants, "get_helloz_nsfw_url", return_value=f"{server.url}/classify"):
+            async with AsyncHttpClient(4) as client:
+                classify_image = make_classify_image_async(client, executor, frozenset(), 0.6, 60, session)
+                for path in images:
+                    await classify_image(path)
+
+    asyncio.run(run())
+
+    results = {entry.file: entry for entry in session.get_results()}
+    assert results[images[0]].nudity_detected is True
+    assert results[images[1]].model_name == constants.MODEL_HELLOZ_NSFW
+    assert str(results[images[2]].detected_classes).startswith("ERROR:")
+    assert len(server.uploads) == 3
@@ -0,0 +1,115 @@
+"""Tests for src/detectors/endpoint_pool.py (Helloz NSFW replica load balancing)."""
+import json
+from collections import Counter
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+from src.core import constants
+from src.detectors.endpoint_pool import EndpointPool, shared_endpoint_pool
+from src.detectors.helloz_nsfw import _post_with_retry
+
+URLS = ["http://localhost:1/api", "http://localhost:2/api", "http://localhost:3/api"]
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_least_outstanding_spreads_concurrent_requests():
+    pool = EndpointPool(URLS)
+    held = [pool.acquire() for _ in range(6)]
+    assert Counter(endpoint.url for endpoint in held) == {url: 2 for url in URLS}
+    for endpoint in held:
+        pool.release(endpoint, ok=True, latency=0.1)
+    assert all(state["outstanding"] == 0 for state in pool.snapshot())
+
+
+def test_latency_policy_prefers_the_faster_replica():
+    clock = _Clock()
+    pool = EndpointPool(URLS[:2], policy=constants.HELLOZ_NSFW_BALANCE_LATENCY, clock=clock)
+    slow, fast = pool.endpoints
+    slow.latency, fast.latency = 1.0, 0.15
+
+    picks = [pool.acquire() for _ in range(8)]
+    # Expected wait is (in flight + 1) x latency, so the fast replica takes most of the load
+    assert Counter(endpoint.url for endpoint in picks) == {fast.url: 7, slow.url: 1}
+
+
+def test_failing_endpoint_is_ejected_and_readmitted_by_a_probe():
+    clock = _Clock()
+    pool = EndpointPool(URLS[:2], eject_after=2, eject_seconds=30, clock=clock)
+    bad, good = pool.endpoints
+    for _ in range(2):
+        bad.outstanding += 1  # As if acquired
+        pool.release(bad, ok=False)
+
+    assert {pool.acquire().url for _ in range(4)} == {good.url}
+    good.outstanding = 0
+
+    clock.now += 31
+    probe = pool.acquire()
+    assert probe is bad
+    # Only one probe at a time while the endpoint is on trial
+    assert pool.acquire() is good
+    pool.release(probe, ok=True, latency=0.05)
+    assert bad.failures == 0
+    assert bad in {pool.acquire() for _ in range(4)}
+
+
+def test_all_ejected_falls_back_to_the_endpoint_due_back_first():
+    clock = _Clock()
+    pool = EndpointPool(URLS[:2], eject_after=1, eject_seconds=10, clock=clock)
+    first, second = pool.endpoints
+    pool.release(pool.acquire(), ok=False)
+    clock.now += 5
+    pool.release(pool.acquire(), ok=False)
+    assert first.failures == 1 and second.failures == 1
+    assert pool.acquire() is first
+
+
+def test_send_records_5xx_and_exceptions_as_failures():
+    pool = EndpointPool(URLS[:1], eject_after=5)
+    pool.send(lambda url: MagicMock(status_code=503))
+    with pytest.raises(OSError):
+        pool.send(MagicMock(side_effect=OSError("refused")))
+    assert pool.send(lambda url: MagicMock(status_code=404)).status_code == 404
+    [state] = pool.snapshot()
+    assert state["failures"] == 0 and state["requests"] == 3 and state["outstanding"] == 0
+
+
+def test_post_with_retry_retries_on_another_replica():
+    pool = EndpointPool(URLS[:2])
+    ok = MagicMock(status_code=200)
+    posted = []
+
+    def post(url, **_kwargs):
+        posted.append(url)
+        if url == URLS[0]:
+            raise requests.exceptions.ConnectionError("down")
+        return ok
+
+    with patch("src.detectors.helloz_nsfw.requests.post", side_effect=post), \
+         patch("src.detectors.flow_control.time.sleep"):
+        assert _post_with_retry(pool, files={}, timeout=5) is ok
+    assert posted == URLS[:2]
+
+
+def test_configured_endpoints_and_shared_pool(tmp_path):
+    config = tmp_path / "app_config.json"
+    config.write_text(json.dumps({
+        "helloz_nsfw_endpoints": ["localhost:7001", "http://127.0.0.1:7002", "http://remote:7003", "localhost:7001"],
+        "helloz_nsfw_balance": "latency",
+    }))
+    with patch("src.core.constants._config_path", return_value=str(config)):
+        assert constants.get_helloz_nsfw_endpoints() == ["http://localhost:7001", "http://127.0.0.1:7002"]
+        urls = constants.get_helloz_nsfw_urls()
+        assert urls == ["http://localhost:7001/api/upload_check", "http://127.0.0.1:7002/api/upload_check"]
+        pool = shared_endpoint_pool(urls)
+        assert pool.policy == constants.HELLOZ_NSFW_BALANCE_LATENCY
+        assert shared_endpoint_pool(urls) is pool
@@ -0,0 +1,211 @@
+"""Tests for src/detectors/flow_control.py (circuit breaker, AIMD limiter, deferral)."""
+import asyncio
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+from src.core.scan_session import ScanSession
+from src.core.utils import DeferredFile, classify_files
+from src.detectors import helloz_nsfw
+from src.detectors.flow_control import (
+    BREAKER_CLOSED,
+    BREAKER_HALF_OPEN,
+    BREAKER_OPEN,
+    AdaptiveLimiter,
+    CircuitBreaker,
+    CircuitOpenError,
+    FlowControl,
+    call_with_retry,
+    call_with_retry_async,
+)
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 50.0
+
+    def __call__(self):
+        return self.now
+
+
+def _flow(clock=None, failures=2, reset_seconds=10, maximum=8):
+    clock = clock or _Clock()
+    return FlowControl(CircuitBreaker(failures, reset_seconds, clock=clock), AdaptiveLimiter(maximum), clock=clock)
+
+
+def test_breaker_opens_after_consecutive_failures_and_probes_once():
+    clock = _Clock()
+    breaker = CircuitBreaker(failure_threshold=3, reset_seconds=10, clock=clock)
+    for ok in (False, False, True, False, False):
+        breaker.admit()
+        breaker.record(ok)
+    assert breaker.state == BREAKER_CLOSED  # the success reset the count
+
+    breaker.admit()
+    breaker.record(False)
+    assert breaker.state == BREAKER_OPEN
+    with pytest.raises(CircuitOpenError) as excinfo:
+        breaker.admit()
+    assert excinfo.value.retry_after == 10
+
+    clock.now += 10
+    assert breaker.state == BREAKER_HALF_OPEN
+    probe = breaker.admit()
+    with pytest.raises(CircuitOpenError):
+        breaker.admit()
+    breaker.record(False, probe)
+    assert breaker.state == BREAKER_OPEN
+
+    clock.now += 10
+    probe = breaker.admit()
+    breaker.record(True, probe)
+    assert breaker.state == BREAKER_CLOSED
+
+
+def test_only_the_probe_decides_whether_the_breaker_closes():
+    clock = _Clock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=10, clock=clock)
+    assert breaker.admit() is None
+    stale = breaker.admit()  # admitted while closed, still in flight when it opens
+    breaker.record(False)
+    assert breaker.state == BREAKER_OPEN
+
+    clock.now += 10
+    probe = breaker.admit()
+    assert probe is not None
+    breaker.record(True, stale)  # a late success does not close the breaker or free the probe slot
+    assert breaker.state == BREAKER_HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.admit()
+    breaker.record(False, stale)
+    assert breaker.state == BREAKER_HALF_OPEN
+
+    breaker.record(True, probe)
+    assert breaker.state == BREAKER_CLOSED
+
+
+def test_limiter_is_additive_increase_multiplicative_decrease():
+    limiter = AdaptiveLimiter(maximum=16, latency_target=1.0)
+    limiter.in_flight = 16
+    limiter.release(ok=False)
+    assert limiter.limit == 8
+    # Further failures in the same window do not collapse the limit
+    for _ in range(7):
+        limiter.release(ok=False)
+    assert limiter.limit == 8
+    limiter.in_flight = 1
+    limiter.release(ok=True, latency=5.0)  # slow counts as congestion
+    assert limiter.limit == 4
+    for _ in range(4):
+        limiter.in_flight = 1
+        limiter.release(ok=True, latency=0.1)
+    assert 4.9 < limiter.limit < 5.1
+
+
+def test_limiter_caps_threads_in_flight():
+    limiter = AdaptiveLimiter(maximum=2)
+    active, peak, lock = [0], [0], threading.Lock()
+
+    def work():
+        limiter.acquire()
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        threading.Event().wait(0.01)
+        with lock:
+            active[0] -= 1
+        limiter.release(ok=True, latency=0.01)
+
+    threads = [threading.Thread(target=work) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peak[0] == 2 and limiter.in_flight == 0
+
+
+def test_limiter_caps_coroutines_in_flight():
+    limiter = AdaptiveLimiter(maximum=3)
+    active, peak = [0], [0]
+
+    async def work():
+        await limiter.acquire_async()
+        active[0] += 1
+        peak[0] = max(peak[0], active[0])
+        await asyncio.sleep(0.01)
+        active[0] -= 1
+        limiter.release(ok=True, latency=0.01)
+
+    async def run():
+        await asyncio.gather(*(work() for _ in range(10)))
+
+    asyncio.run(run())
+    assert peak[0] == 3 and limiter.in_flight == 0
+
+
+def test_call_with_retry_stops_once_the_breaker_opens():
+    flow = _flow(failures=2)
+    request = MagicMock(side_effect=requests.exceptions.ConnectionError("refused"))
+    with patch("src.detectors.flow_control.time.sleep"), pytest.raises(CircuitOpenError):
+        call_with_retry(request, flow, retries=5)
+    assert request.call_count == 2
+    assert flow.is_open
+
+
+def test_call_with_retry_async_retries_5xx():
+    responses = iter([MagicMock(status_code=503), MagicMock(status_code=200)])
+
+    async def request():
+        return next(responses)
+
+    response = asyncio.run(call_with_retry_async(request, _flow(), retries=3, backoff=0))
+    assert response.status_code == 200
+
+
+def test_helloz_classifier_defers_instead_of_recording_errors(tmp_path):
+    image = tmp_path / "image.jpg"
+    image.write_bytes(b"fake")
+    flow = _flow(failures=1)
+    session = ScanSession()
+    with patch.object(helloz_nsfw, "get_flow_control", return_value=flow), \
+         patch("src.detectors.helloz_nsfw.requests.post", side_effect=requests.exceptions.ConnectionError("down")), \
+         patch("src.detectors.flow_control.time.sleep"):
+        classify_image = helloz_nsfw.make_classify_image(frozenset(), 0.6, 60, session)
+        with pytest.raises(DeferredFile) as excinfo:
+            classify_image(str(image))
+    assert excinfo.value.retry_after == 10
+    assert session.get_results() == []
+
+
+def test_classify_files_retries_deferred_files_in_later_rounds(tmp_path):
+    paths = []
+    for n in range(3):
+        path = tmp_path / f"{n}.jpg"
+        path.write_bytes(b"x")
+        paths.append(str(path))
+    attempts, classified = {}, []
+
+    def classify_image(file_path):
+        attempts[file_path] = attempts.get(file_path, 0) + 1
+        if file_path == paths[0] and attempts[file_path] < 3:
+            raise DeferredFile(file_path, retry_after=0.5)
+        classified.append(file_path)
+
+    with patch("src.core.utils.is_supported_file", return_value=True), \
+         patch("src.core.utils.detect_media_type", return_value="image"), \
+         patch("src.core.utils.time.sleep") as sleep:
+        classify_files(paths, classify_image, MagicMock(), worker_count=2)
+
+    assert sorted(classified) == sorted(paths)
+    assert attempts[paths[0]] == 3
+    assert [call.args[0] for call in sleep.call_args_list] == [0.5, 0.5]
+
+    attempts.clear()
+    classified.clear()
+    with patch("src.core.utils.is_supported_file", return_value=True), \
+         patch("src.core.utils.detect_media_type", return_value="image"), \
+         patch("src.core.utils.time.sleep"):
+        classify_files(paths[:1], classify_image, MagicMock(), worker_count=1, max_deferred_rounds=1)
+    assert classified == [] and attempts[paths[0]] == 2
@@ -7,6 +7,13 @@ import requests
 
 from src.core.scan_session import ScanSession
 from src.detectors.helloz_nsfw import _post_with_retry
+from src.detectors.registry import EXECUTION_THREADS, HellozNsfwBackend
+
+
+@pytest.fixture(autouse=True)
+def threaded_helloz(monkeypatch):
+    """Run main() on the threaded classifiers these tests patch around."""
+    monkeypatch.setattr(HellozNsfwBackend, 'execution_strategy', lambda self: EXECUTION_THREADS)
 
 
 # ---------------------------------------------------------------------------
@@ -31,7 +38,7 @@ def test_post_with_retry_succeeds_on_second_attempt():
     side_effects = [requests.exceptions.ConnectionError('conn error'), ok_response]
 
     with patch('src.detectors.helloz_nsfw.requests.post', side_effect=side_effects), \
-         patch('src.detectors.helloz_nsfw.time.sleep'):
+         patch('src.detectors.flow_control.time.sleep'):
         result = _post_with_retry('http://example.com', files={}, timeout=5)
 
     assert result.status_code == 200
@@ -43,7 +50,7 @@ def test_post_with_retry_succeeds_on_second_attempt():
 def test_post_with_retry_raises_after_all_retries_request_exception():
     exc = requests.exceptions.ConnectionError('gone')
     with patch('src.detectors.helloz_nsfw.requests.post', side_effect=exc), \
-         patch('src.detectors.helloz_nsfw.time.sleep'):
+         patch('src.detectors.flow_control.time.sleep'):
         with pytest.raises(requests.exceptions.ConnectionError):
             _post_with_retry('http://example.com', files={}, timeout=5, retries=3)
 
@@ -56,7 +63,7 @@ def test_post_with_retry_raises_runtime_error_on_503_exhaustion():
     bad_response.status_code = 503
 
     with patch('src.detectors.helloz_nsfw.requests.post', return_value=bad_response), \
-         patch('src.detectors.helloz_nsfw.time.sleep'):
+         patch('src.detectors.flow_control.time.sleep'):
         with pytest.raises(RuntimeError, match='service unavailable'):
             _post_with_retry('http://example.com', files={}, timeout=5, retries=3)
 
@@ -69,7 +76,7 @@ def test_post_with_retry_returns_immediately_on_200():
     ok_response.status_code = 200
 
     with patch('src.detectors.helloz_nsfw.requests.post', return_value=ok_response) as mock_post, \
-         patch('src.detectors.helloz_nsfw.time.sleep') as mock_sleep:
+         patch('src.detectors.flow_control.time.sleep') as mock_sleep:
         result = _post_with_retry('http://example.com', files={}, timeout=5, retries=3)
 
     assert result.status_code == 200
@@ -88,7 +95,7 @@ def test_post_with_retry_5xx_then_success():
 
     with patch('src.detectors.helloz_nsfw.requests.post',
                side_effect=[bad_response, ok_response]) as mock_post, \
-         patch('src.detectors.helloz_nsfw.time.sleep'):
+         patch('src.detectors.flow_control.time.sleep'):
         result = _post_with_retry('http://example.com', files={}, timeout=5, retries=3)
 
     assert result.status_code == 200
@@ -101,7 +108,7 @@ def test_post_with_retry_5xx_then_success():
 def test_post_with_retry_all_request_exception_reraises():
     exc = requests.exceptions.ConnectionError('network down')
     with patch('src.detectors.helloz_nsfw.requests.post', side_effect=exc), \
-         patch('src.detectors.helloz_nsfw.time.sleep'):
+         patch('src.detectors.flow_control.time.sleep'):
         with pytest.raises(requests.exceptions.ConnectionError, match='network down'):
             _post_with_retry('http://example.com', files={}, timeout=5, retries=2)
 
@@ -122,7 +129,7 @@ def test_post_with_retry_rewinds_file_before_each_attempt():
 
     with patch('src.detectors.helloz_nsfw.requests.post',
                side_effect=[bad_response, ok_response]), \
-         patch('src.detectors.helloz_nsfw.time.sleep'):
+         patch('src.detectors.flow_control.time.sleep'):
         result = _post_with_retry('http://example.com', files=files, timeout=5, retries=3)
 
     assert result.status_code == 200
@@ -39,7 +39,7 @@ class TestClassifyImageErrorSentinel:
                             with patch('src.detectors.nudenet.get_report_path', return_value='/tmp/report.json'):
                                 captured_classify_image = {}
 
-                                def fake_classify_files(folder, classify_image, classify_video):
+                                def fake_classify_files(folder, classify_image, classify_video, **kw):
                                     captured_classify_image['fn'] = classify_image
                                     captured_classify_image['video_fn'] = classify_video
 
@@ -77,7 +77,7 @@ class TestClassifyImageErrorSentinel:
 
                                     captured = {}
 
-                                    def fake_classify_files(folder, classify_image, classify_video):
+                                    def fake_classify_files(folder, classify_image, classify_video, **kw):
                                         captured['video_fn'] = classify_video
 
                                     mock_classify.side_effect = fake_classify_files
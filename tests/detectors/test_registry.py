@@ -0,0 +1,91 @@
+"""Tests for src/detectors/registry.py (detector backends and capabilities)."""
+import threading
+import time
+
+import pytest
+
+from src.core import constants
+from src.core.scan_session import ScanSession
+from src.detectors import registry
+from src.detectors.registry import (
+    EXECUTION_ASYNC,
+    EXECUTION_SERIAL,
+    EXECUTION_THREADS,
+    BackendCapabilities,
+    DetectorBackend,
+    backend_names,
+    get_backend,
+    register_backend,
+)
+from src.service.scheduler import DetectorPool
+
+
+class _InHouseBackend(DetectorBackend):
+    name = "in_house"
+    capabilities = BackendCapabilities(thread_safe=False)
+
+    def __init__(self):
+        self.loads = 0
+        self.active = 0
+        self.max_active = 0
+
+    def load_model(self):
+        self.loads += 1
+        return object()
+
+    def make_classifiers(self, model, session, threshold_percent, existing_files=frozenset()):
+        def classify(file_path):
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            time.sleep(0.01)
+            self.active -= 1
+        return classify, classify
+
+
+@pytest.fixture
+def in_house(monkeypatch):
+    monkeypatch.setattr(registry, "_BACKENDS", dict(registry._BACKENDS))
+    return register_backend(_InHouseBackend())
+
+
+def test_builtin_backends_are_registered_with_capabilities():
+    assert backend_names()[:2] == (constants.MODEL_NUDENET, constants.MODEL_HELLOZ_NSFW)
+    nudenet = get_backend(constants.MODEL_NUDENET)
+    helloz = get_backend(constants.MODEL_HELLOZ_NSFW)
+    assert nudenet.capabilities.remote is False and nudenet.capabilities.thread_safe is True
+    assert helloz.capabilities.remote is True
+    assert nudenet.execution_strategy() == EXECUTION_THREADS
+    assert helloz.execution_strategy() == EXECUTION_ASYNC
+    with pytest.raises(ValueError, match="Unsupported model"):
+        get_backend("no_such_model")
+
+
+def test_worker_count_follows_capabilities(monkeypatch, in_house, caplog):
+    monkeypatch.setattr(registry.os, "cpu_count", lambda: 4)
+    with caplog.at_level("INFO"):
+        assert get_backend(constants.MODEL_NUDENET).worker_count(10) == 4
+    assert "instead of the configured 10" in caplog.text
+    assert get_backend(constants.MODEL_NUDENET).worker_count(3) == 3
+    assert get_backend(constants.MODEL_HELLOZ_NSFW).worker_count(10) == 10
+    assert in_house.execution_strategy() == EXECUTION_SERIAL
+    assert in_house.worker_count(10) == 1
+
+
+def test_detector_pool_uses_registered_backend(in_house):
+    pool = DetectorPool()
+    classify_image, _ = pool.make_classifiers("in_house", 60.0, ScanSession())
+    pool.make_classifiers("in_house", 60.0, ScanSession())
+    assert in_house.loads == 1
+
+    # Not thread-safe, so concurrent calls are serialised
+    threads = [threading.Thread(target=classify_image, args=(f"/{n}.jpg",)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert in_house.max_active == 1
+
+
+def test_register_backend_requires_a_name():
+    with pytest.raises(ValueError):
+        register_backend(DetectorBackend())
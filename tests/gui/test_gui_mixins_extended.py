@@ -1,6 +1,7 @@
 """Tests for GUI mixin modules — dialogs.py, result_item.py, results.py,
 preview.py, scan_history.py (extended), session.py (extended), scanning.py
 All GTK/GObject imports are stubbed via sys.modules before any src.gui import."""
+import contextlib
 import json
 import sys
 import types
@@ -116,6 +117,26 @@ from src.reporting.report_manager import ReportManager  # noqa: E402
 # Helpers — build a fake window object that satisfies mixin method calls
 # ---------------------------------------------------------------------------
 
+def _run_inline(module):
+    """Run a GUI module's background threads and main-loop callbacks inline."""
+    thread = MagicMock(side_effect=lambda target, **kw: MagicMock(start=MagicMock(side_effect=target)))
+    glib = MagicMock()
+    glib.idle_add.side_effect = lambda fn, *args: fn(*args)
+    stack = contextlib.ExitStack()
+    stack.enter_context(patch.object(module.threading, "Thread", thread))
+    stack.enter_context(patch.object(module, "GLib", glib))
+    return stack
+
+
+def _load_session_inline(win, report_path, show_feedback):
+    """Run SessionMixin.load_session_from_path to completion on the calling thread."""
+    import src.gui.session as sess_module
+    win._apply_loaded_scan_config = lambda cfg: SessionMixin._apply_loaded_scan_config(win, cfg)
+    win.append_results = lambda entries, start: ResultsMixin.append_results(win, entries, start)
+    with _run_inline(sess_module):
+        SessionMixin.load_session_from_path(win, report_path, show_feedback=show_feedback)
+
+
 def _make_window(**extra_attrs):
     """Build a MagicMock that has all the attributes GUI mixins reference."""
     win = MagicMock()
@@ -139,6 +160,8 @@ def _make_window(**extra_attrs):
     win._history_store = MagicMock()
     win._history_selection = MagicMock()
     win._history_selection.set_selected = MagicMock()
+    win._history_refresh_generation = 0
+    win._session_load_generation = 0
     win.history_load_button = MagicMock()
     win.history_export_button = MagicMock()
     win.history_delete_button = MagicMock()
@@ -153,6 +176,7 @@ def _make_window(**extra_attrs):
     win.update_result_action_state = MagicMock()
     win.clear_thumbnail_preview = MagicMock()
     win.get_selected_entry = MagicMock(return_value=None)
+    win.get_selected_index = lambda: ResultsMixin.get_selected_index(win)
     win._show_error = MagicMock()
     win._show_warning = MagicMock()
     win._get_model = MagicMock(return_value=constants.MODEL_NUDENET)
@@ -238,16 +262,24 @@ class TestResultsMixin:
     def test_populate_results_empty(self):
         win = _make_window()
         ResultsMixin.populate_results(win, [])
-        win.summary_label.set_text.assert_called()
+        win.update_results_summary.assert_called_once_with(0)
         win.update_result_action_state.assert_called()
 
+    def test_update_results_summary(self):
+        win = _make_window()
+        ResultsMixin.update_results_summary(win, 0)
+        assert "No explicit media" in win.summary_label.set_text.call_args[0][0]
+        ResultsMixin.update_results_summary(win, 3)
+        assert win.summary_label.set_text.call_args[0][0].startswith("3 explicit item(s)")
+
     def test_populate_results_with_entries(self):
         win = _make_window()
         results = [
             {"file": "/a/b.jpg", "media_type": "image", "confidence_percent": 80.0, "model_name": "helloz_nsfw"},
         ]
         ResultsMixin.populate_results(win, results)
-        win._list_store.append.assert_called_once()
+        win._list_store.splice.assert_called_once()
+        assert len(win._list_store.splice.call_args[0][2]) == 1
 
     def test_populate_results_multiple_entries(self):
         win = _make_window()
@@ -256,7 +288,8 @@ class TestResultsMixin:
             for i in range(3)
         ]
         ResultsMixin.populate_results(win, results)
-        assert win._list_store.append.call_count == 3
+        items = win._list_store.splice.call_args[0][2]
+        assert [item.index for item in items] == [0, 1, 2]
 
     def test_on_open_file_clicked(self):
         win = _make_window()
@@ -315,6 +348,16 @@ class TestPreviewMixin:
             preview_module.Image = original
         win._thumb_placeholder.set_text.assert_called()
 
+    def test_decode_preview_fetches_stored_thumbnail_for_missing_file(self):
+        win = _make_window()
+        win._load_preview_image.return_value = None
+        entry = {"file": "/gone/a.jpg", "thumbnail": "", "media_type": "image"}
+        with patch("src.gui.preview.load_entry_thumbnail", return_value="c3RvcmVk") as fetch:
+            assert PreviewMixin._decode_preview(win, entry) is None
+            PreviewMixin._decode_preview(win, entry)
+        fetch.assert_called_once_with(win.last_report_path, "/gone/a.jpg")
+        assert entry["thumbnail"] == "c3RvcmVk"
+
     def test_update_thumbnail_preview_no_thumbnail_data(self):
         win = _make_window()
         win.get_selected_entry.return_value = {
@@ -412,7 +455,8 @@ class TestScanHistoryMixinExtended:
 
         win = _make_window()
         # Patch ScanRunItem so it returns a simple namespace object
-        with patch.object(sh_module, "ScanRunItem", side_effect=lambda **kw: types.SimpleNamespace(**kw)):
+        with patch.object(sh_module, "ScanRunItem", side_effect=lambda **kw: types.SimpleNamespace(**kw)), \
+             _run_inline(sh_module):
             ScanHistoryMixin.refresh_scan_history(win)
         win._history_store.remove_all.assert_called()
         win._history_store.append.assert_called()
@@ -424,7 +468,8 @@ class TestScanHistoryMixinExtended:
 
         (tmp_path / "not_a_date").mkdir()
         win = _make_window()
-        with patch.object(sh_module, "ScanRunItem", side_effect=lambda **kw: types.SimpleNamespace(**kw)):
+        with patch.object(sh_module, "ScanRunItem", side_effect=lambda **kw: types.SimpleNamespace(**kw)), \
+             _run_inline(sh_module):
             ScanHistoryMixin.refresh_scan_history(win)
         win._history_store.remove_all.assert_called()
 
@@ -526,7 +571,7 @@ class TestSessionMixinExtended:
         ReportManager.save_session(state, report_path)
 
         win = _make_window()
-        SessionMixin.load_session_from_path(win, report_path, show_feedback=False)
+        _load_session_inline(win, report_path, show_feedback=False)
         win.folder_entry.set_text.assert_called_with("/hello")
 
     def test_load_session_from_path_show_feedback(self, tmp_path):
@@ -534,7 +579,7 @@ class TestSessionMixinExtended:
         ReportManager.save_entries([], report_path)
         ReportManager.save_session(SessionState(), report_path)
         win = _make_window()
-        SessionMixin.load_session_from_path(win, report_path, show_feedback=True)
+        _load_session_inline(win, report_path, show_feedback=True)
         win.log_message.assert_called()
 
 
@@ -550,13 +595,13 @@ class TestResultsMixinExtended:
             {"file": "/c/d.mp4", "media_type": "video", "confidence_percent": 50.0, "model_name": "test"},
         ]
         ResultsMixin.append_results(win, entries, start_index=5)
-        assert win._list_store.append.call_count == 2
+        assert len(win._list_store.splice.call_args[0][2]) == 2
         win.update_result_action_state.assert_called()
 
     def test_append_results_empty_list(self):
         win = _make_window()
         ResultsMixin.append_results(win, [], start_index=0)
-        win._list_store.append.assert_not_called()
+        win._list_store.splice.assert_not_called()
         win.update_result_action_state.assert_called()
 
     def test_on_result_selection_changed_delegates(self):
@@ -587,6 +632,7 @@ class TestResultsMixinExtended:
 
         class FakeSingleSelection:
             def get_selected(self): return 0
+            def get_selected_item(self): return types.SimpleNamespace(index=self.get_selected())
 
         with patch.object(results_module.Gtk, "SingleSelection", FakeSingleSelection), \
              patch.object(results_module.Gtk, "INVALID_LIST_POSITION", 4294967295):
@@ -605,6 +651,7 @@ class TestResultsMixinExtended:
 
         class FakeSingleSelection:
             def get_selected(self): return 0
+            def get_selected_item(self): return types.SimpleNamespace(index=self.get_selected())
 
         with patch.object(results_module.Gtk, "SingleSelection", FakeSingleSelection), \
              patch.object(results_module.Gtk, "INVALID_LIST_POSITION", 4294967295):
@@ -636,6 +683,7 @@ class TestResultsMixinExtended:
 
         class FakeSingleSelection:
             def get_selected(self): return 4294967295  # INVALID
+            def get_selected_item(self): return types.SimpleNamespace(index=self.get_selected())
 
         with patch.object(results_module.Gtk, "SingleSelection", FakeSingleSelection), \
              patch.object(results_module.Gtk, "INVALID_LIST_POSITION", 4294967295):
@@ -650,6 +698,7 @@ class TestResultsMixinExtended:
 
         class FakeSingleSelection:
             def get_selected(self): return 99  # beyond list length
+            def get_selected_item(self): return types.SimpleNamespace(index=self.get_selected())
 
         with patch.object(results_module.Gtk, "SingleSelection", FakeSingleSelection), \
              patch.object(results_module.Gtk, "INVALID_LIST_POSITION", 4294967295):
@@ -664,6 +713,7 @@ class TestResultsMixinExtended:
 
         class FakeSingleSelection:
             def get_selected(self): return 0
+            def get_selected_item(self): return types.SimpleNamespace(index=self.get_selected())
 
         with patch.object(results_module.Gtk, "SingleSelection", FakeSingleSelection), \
              patch.object(results_module.Gtk, "INVALID_LIST_POSITION", 4294967295):
@@ -741,6 +791,7 @@ class TestResultsMixinExtended:
 
         class FakeSingleSelection:
             def get_selected(self): return 0
+            def get_selected_item(self): return types.SimpleNamespace(index=self.get_selected())
 
         with patch.object(results_module.Gtk, "SingleSelection", FakeSingleSelection), \
              patch.object(results_module.Gtk, "INVALID_LIST_POSITION", 4294967295):
@@ -754,6 +805,7 @@ class TestResultsMixinExtended:
 
         class FakeSingleSelection:
             def get_selected(self): return 0
+            def get_selected_item(self): return types.SimpleNamespace(index=self.get_selected())
 
         with patch.object(results_module.Gtk, "SingleSelection", FakeSingleSelection), \
              patch.object(results_module.Gtk, "INVALID_LIST_POSITION", 4294967295):
@@ -780,7 +832,9 @@ class TestResultsMixinExtended:
         win.populate_results = MagicMock()
         with patch("src.core.utils.delete_file_safely", return_value=(True, "Deleted")), \
              patch("src.core.utils.ReportManager.save_entries"), \
-             patch("src.core.utils.ReportManager.save_session"):
+             patch("src.core.utils.ReportManager.save_session"), \
+             patch("src.core.utils.ReportManager.save_summary"), \
+             patch("src.reporting.report_writer.ResultsStore"):
             ResultsMixin._do_delete(win, 0, {"file": str(f)})
         win.populate_results.assert_called()
         win.log_message.assert_called()
@@ -796,7 +850,9 @@ class TestResultsMixinExtended:
         win.populate_results = MagicMock()
         with patch("src.core.utils.delete_file_safely", return_value=(True, "Deleted")), \
              patch("src.core.utils.ReportManager.save_entries"), \
-             patch("src.core.utils.ReportManager.save_session"):
+             patch("src.core.utils.ReportManager.save_session"), \
+             patch("src.core.utils.ReportManager.save_summary"), \
+             patch("src.reporting.report_writer.ResultsStore"):
             ResultsMixin._do_delete(win, 0, {"file": str(f)})
         win.populate_results.assert_called()
 
@@ -840,7 +896,9 @@ class TestSessionMixinMore:
         mock_dialog = MagicMock()
         mock_dialog.save_finish.return_value = mock_file
         with patch("src.core.utils.ReportManager.save_entries"), \
-             patch("src.core.utils.ReportManager.save_session"):
+             patch("src.core.utils.ReportManager.save_session"), \
+             patch("src.core.utils.ReportManager.save_summary"), \
+             patch("src.reporting.report_writer.ResultsStore"):
             SessionMixin._on_save_session_done(win, mock_dialog, MagicMock())
         win.open_report_button.set_sensitive.assert_called_with(True)
         win.log_message.assert_called()
@@ -854,7 +912,9 @@ class TestSessionMixinMore:
         mock_dialog = MagicMock()
         mock_dialog.save_finish.return_value = mock_file
         with patch("src.core.utils.ReportManager.save_entries"), \
-             patch("src.core.utils.ReportManager.save_session"):
+             patch("src.core.utils.ReportManager.save_session"), \
+             patch("src.core.utils.ReportManager.save_summary"), \
+             patch("src.reporting.report_writer.ResultsStore"):
             SessionMixin._on_save_session_done(win, mock_dialog, MagicMock())
         assert win.last_report_path.endswith(".xlsx")
 
@@ -900,7 +960,7 @@ class TestSessionMixinMore:
         ReportManager.save_entries([], report_path)
         ReportManager.save_session(state, report_path)
         win = _make_window()
-        SessionMixin.load_session_from_path(win, report_path, show_feedback=False)
+        _load_session_inline(win, report_path, show_feedback=False)
         win.helloz_nsfw_radio.set_active.assert_called_with(True)
 
     def test_load_session_from_path_invalid_theme(self, tmp_path):
@@ -910,7 +970,7 @@ class TestSessionMixinMore:
         ReportManager.save_entries([], report_path)
         ReportManager.save_session(state, report_path)
         win = _make_window()
-        SessionMixin.load_session_from_path(win, report_path, show_feedback=False)
+        _load_session_inline(win, report_path, show_feedback=False)
         win.theme_dropdown.set_selected.assert_called_with(0)
 
     def test_open_report_not_exists_shows_warning(self):
@@ -0,0 +1,225 @@
+"""
+Tests for PreviewMixin and PreviewLoader (src/gui/preview.py).
+Uses full gi stubs — no real GTK display needed.
+"""
+import contextlib
+import sys
+import threading
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+
+# GI stubs
+def _ensure_gi_stubs():
+    if "gi" in sys.modules:
+        return
+    gi_mock = MagicMock()
+    sys.modules["gi"] = gi_mock
+    sys.modules["gi.repository"] = gi_mock.repository
+    class _GObjectBase:
+        def __init__(self, **kwargs): pass
+    gobject_mod = MagicMock()
+    gobject_mod.Object = _GObjectBase
+    sys.modules["gi.repository.GObject"] = gobject_mod
+    for mod in ["gi.repository.Gtk","gi.repository.Gdk","gi.repository.Adw",
+                "gi.repository.Gio","gi.repository.GLib","gi.repository.GdkPixbuf","gi.repository.Pango"]:
+        sys.modules[mod] = MagicMock()
+
+_ensure_gi_stubs()
+sys.modules.setdefault("nudenet", MagicMock())
+
+from src.gui import preview as preview_module  # noqa: E402
+from src.gui.preview import PreviewLoader, PreviewMixin  # noqa: E402
+
+
+def _entry(path):
+    return {"file": path, "media_type": "image", "confidence_percent": 80.0, "model_name": "nudenet", "thumbnail": ""}
+
+
+class FakePreviewWindow(PreviewMixin):
+    """Minimal concrete mix-in host whose decoder records calls."""
+    def __init__(self, results, selected=0):
+        self.detected_results = results
+        self.last_report_path = "/reports/run/nudity_report.xlsx"
+        self.thumbnail_picture = MagicMock()
+        self._thumb_placeholder = MagicMock()
+        self.thumbnail_meta_label = MagicMock()
+        self.column_view = MagicMock()
+        self.select(selected)
+        self.decoded = []
+
+    def select(self, position, order=None):
+        """Select a display row; *order* maps display rows to result indexes."""
+        order = list(range(len(self.detected_results))) if order is None else order
+        self.order = order
+        selection = self.column_view.get_model.return_value
+        selection.get_selected.return_value = position
+        selection.get_n_items.return_value = len(order)
+        selection.get_item.side_effect = lambda row: SimpleNamespace(index=order[row])
+
+    def get_selected_entry(self):
+        return self.detected_results[self.order[self.column_view.get_model().get_selected()]]
+
+    def _decode_preview(self, entry):
+        self.decoded.append(entry["file"])
+        return f"texture:{entry['file']}"
+
+
+@contextlib.contextmanager
+def _inline_loader():
+    """Run PreviewLoader jobs inside request() and idle callbacks at once."""
+    glib_mock = MagicMock()
+    glib_mock.idle_add.side_effect = lambda fn, *args: fn(*args)
+    original_request = PreviewLoader.request
+
+    def _request(self, *args, **kwargs):
+        original_request(self, *args, **kwargs)
+        while self._pending:
+            self._process(*self._pending.popleft())
+
+    with patch.object(preview_module.threading, "Thread"), \
+         patch.object(preview_module, "GLib", glib_mock), \
+         patch.object(PreviewLoader, "request", _request):
+        yield
+
+
+# -----------------------------------------------------------------------
+# PreviewLoader
+# -----------------------------------------------------------------------
+
+def test_loader_decodes_on_worker_and_calls_back():
+    ready = threading.Event()
+    results = []
+    glib_mock = MagicMock()
+    glib_mock.idle_add.side_effect = lambda fn, *args: fn(*args)
+    loader = PreviewLoader(lambda entry: f"texture:{entry['file']}")
+
+    def on_ready(key, texture):
+        results.append((key, texture))
+        ready.set()
+
+    with patch.object(preview_module, "GLib", glib_mock):
+        loader.request(("/a.jpg", 1), _entry("/a.jpg"), on_ready)
+        assert ready.wait(5)
+
+    assert results == [(("/a.jpg", 1), "texture:/a.jpg")]
+    assert loader.get(("/a.jpg", 1)) == "texture:/a.jpg"
+
+
+def test_loader_evicts_least_recently_used_and_caches_failures():
+    def decode(entry):
+        if entry["file"] == "/bad.jpg":
+            raise OSError("corrupt")
+        return entry["file"]
+
+    loader = PreviewLoader(decode, capacity=2)
+    with _inline_loader():
+        loader.request("a", _entry("/a.jpg"))
+        loader.request("b", _entry("/b.jpg"))
+        assert loader.get("a") == "/a.jpg"  # touch a so b is evicted next
+        loader.request("bad", _entry("/bad.jpg"))
+
+    missing = object()
+    assert loader.get("b", missing) is missing
+    assert loader.get("a") == "/a.jpg"
+    assert loader.get("bad", missing) is None
+
+
+def test_loader_new_request_replaces_queued_work():
+    loader = PreviewLoader(lambda entry: entry["file"])
+    with patch.object(preview_module.threading, "Thread"):
+        loader.request("a", _entry("/a.jpg"), prefetch=[("b", _entry("/b.jpg"))])
+        loader.request("c", _entry("/c.jpg"))
+    assert [key for key, _entry_, _cb in loader._pending] == ["c"]
+
+
+# -----------------------------------------------------------------------
+# PreviewMixin
+# -----------------------------------------------------------------------
+
+def test_update_preview_decodes_selection_then_prefetches_neighbours():
+    results = [_entry(f"/{i}.jpg") for i in range(6)]
+    win = FakePreviewWindow(results, selected=2)
+    with _inline_loader():
+        win.update_thumbnail_preview()
+
+    assert win.decoded == ["/2.jpg", "/3.jpg", "/1.jpg", "/4.jpg", "/0.jpg"]
+    win.thumbnail_picture.set_paintable.assert_called_with("texture:/2.jpg")
+
+
+def test_update_preview_uses_cache_for_prefetched_row():
+    results = [_entry(f"/{i}.jpg") for i in range(3)]
+    win = FakePreviewWindow(results, selected=0)
+    with _inline_loader():
+        win.update_thumbnail_preview()
+        win.select(1)
+        win.thumbnail_picture.reset_mock()
+        win.update_thumbnail_preview()
+
+    assert win.decoded.count("/1.jpg") == 1
+    win.thumbnail_picture.set_paintable.assert_called_once_with("texture:/1.jpg")
+
+
+def test_prefetch_follows_display_order():
+    results = [_entry(f"/{i}.jpg") for i in range(4)]
+    win = FakePreviewWindow(results)
+    win.select(1, order=[3, 1, 0, 2])  # e.g. sorted by confidence
+    with _inline_loader():
+        win.update_thumbnail_preview()
+
+    assert win.decoded == ["/1.jpg", "/0.jpg", "/3.jpg", "/2.jpg"]
+
+
+def test_stale_preview_result_is_ignored():
+    win = FakePreviewWindow([_entry("/a.jpg"), _entry("/b.jpg")], selected=1)
+    win._preview_key = ("/b.jpg", "/reports/run/nudity_report.xlsx")
+    win._on_preview_ready(("/a.jpg", "/reports/run/nudity_report.xlsx"), "texture:/a.jpg")
+    win.thumbnail_picture.set_paintable.assert_not_called()
+
+
+def test_failed_preview_shows_placeholder():
+    entry = _entry("/a.jpg")
+    entry["thumbnail"] = "abc"
+    win = FakePreviewWindow([entry])
+    win._show_preview_texture(entry, None)
+    win.thumbnail_picture.set_paintable.assert_called_once_with(None)
+    win._thumb_placeholder.set_text.assert_called_once_with("Thumbnail unavailable")
+
+
+# -----------------------------------------------------------------------
+# pil_to_texture
+# -----------------------------------------------------------------------
+
+def _texture_args(pil_image):
+    gdk_mock, glib_mock = MagicMock(), MagicMock()
+    with patch.object(preview_module, "Gdk", gdk_mock), patch.object(preview_module, "GLib", glib_mock):
+        texture = preview_module.pil_to_texture(pil_image)
+    assert texture is gdk_mock.MemoryTexture.new.return_value
+    width, height, memory_format, _data, stride = gdk_mock.MemoryTexture.new.call_args.args
+    raw = glib_mock.Bytes.new.call_args.args[0]
+    return (width, height, stride, len(raw)), memory_format, gdk_mock
+
+
+def test_pil_to_texture_wraps_rgb_pixels():
+    from PIL import Image
+    args, memory_format, gdk_mock = _texture_args(Image.new("RGB", (5, 3), (10, 20, 30)))
+    assert args == (5, 3, 15, 45)
+    assert memory_format is gdk_mock.MemoryFormat.R8G8B8
+
+
+def test_pil_to_texture_keeps_alpha():
+    from PIL import Image
+    args, memory_format, gdk_mock = _texture_args(Image.new("RGBA", (4, 2)))
+    assert args == (4, 2, 16, 32)
+    assert memory_format is gdk_mock.MemoryFormat.R8G8B8A8
+
+
+def test_pil_to_texture_converts_other_modes():
+    from PIL import Image
+    args, memory_format, gdk_mock = _texture_args(Image.new("L", (3, 3)))
+    assert args == (3, 3, 9, 27)
+    assert memory_format is gdk_mock.MemoryFormat.R8G8B8
+
+    args, memory_format, gdk_mock = _texture_args(Image.new("LA", (2, 2)))
+    assert args == (2, 2, 8, 16)
+    assert memory_format is gdk_mock.MemoryFormat.R8G8B8A8
@@ -62,15 +62,25 @@ from src.gui.results import ResultsMixin  # noqa: E402
 # ---------------------------------------------------------------------------
 
 class _FakeSingleSelection:
-    """Stand-in for Gtk.SingleSelection."""
+    """Stand-in for Gtk.SingleSelection over a sorted model.
+
+    *order* maps display positions to result indexes (identity by default).
+    """
     INVALID = 4294967295  # GTK_INVALID_LIST_POSITION
 
-    def __init__(self, selected=INVALID):
+    def __init__(self, selected=INVALID, order=None):
         self._selected = selected
+        self._order = order
 
     def get_selected(self):
         return self._selected
 
+    def get_selected_item(self):
+        if self._selected == self.INVALID:
+            return None
+        index = self._selected if self._order is None else self._order[self._selected]
+        return _FakeResultItem(index=index, name="", media_type="", confidence="", model_name="", path="")
+
 
 # Make Gtk.SingleSelection a real class so isinstance() works
 class _FakeGtkSingleSelection:
@@ -90,8 +100,9 @@ results_mod.Gtk.INVALID_LIST_POSITION = _FakeGtkSingleSelection.INVALID
 
 class _FakeResultItem:
     """Minimal stub for ResultItem so it doesn't hit the GObject mock."""
-    def __init__(self, *, index, name, media_type, confidence, model_name, path):
+    def __init__(self, *, index, name, media_type, confidence, model_name, path, confidence_value=0.0):
         self.index = index
+        self.confidence_value = confidence_value
         self.name = name
         self.media_type = media_type
         self.confidence = confidence
@@ -150,21 +161,23 @@ def test_append_results_appends_to_store():
          "model_name": "helloz"},
     ]
     win.append_results(entries, start_index=0)
-    assert win._list_store.append.call_count == 2
+    win._list_store.splice.assert_called_once()
+    assert len(win._list_store.splice.call_args[0][2]) == 2
 
 
 def test_append_results_uses_start_index():
     win = FakeResultsWindow()
     entries = [{"file": "/tmp/c.jpg", "media_type": "image", "confidence_percent": 50.0, "model_name": "m"}]
     win.append_results(entries, start_index=5)
-    appended_item = win._list_store.append.call_args[0][0]
+    appended_item = win._list_store.splice.call_args[0][2][0]
     assert appended_item.index == 5
+    assert appended_item.confidence_value == 50.0
 
 
 def test_append_results_empty_list():
     win = FakeResultsWindow()
     win.append_results([], start_index=0)
-    win._list_store.append.assert_not_called()
+    win._list_store.splice.assert_not_called()
 
 
 # ---------------------------------------------------------------------------
@@ -258,6 +271,58 @@ def test_get_selected_entry_out_of_range():
     assert result is None
 
 
+def test_get_selected_entry_maps_sorted_position_to_result_index():
+    win = FakeResultsWindow()
+    win.detected_results = [{"file": "/tmp/low.jpg"}, {"file": "/tmp/high.jpg"}]
+    sel = _FakeSingleSelection(selected=0, order=[1, 0])  # sorted by confidence, descending
+    win.column_view.get_model.return_value = sel
+
+    with patch.object(results_mod.Gtk, "SingleSelection", _FakeSingleSelection), \
+         patch.object(results_mod.Gtk, "INVALID_LIST_POSITION", _FakeSingleSelection.INVALID):
+        assert win.get_selected_index() == 1
+        assert win.get_selected_entry() == {"file": "/tmp/high.jpg"}
+
+
+def test_results_column_sorters():
+    with patch.object(results_mod, "Gtk") as gtk_mock:
+        numeric = ResultsMixin._results_column_sorter("confidence")
+        text = ResultsMixin._results_column_sorter("media_type")
+        assert ResultsMixin._results_column_sorter("unknown") is None
+    assert numeric is gtk_mock.NumericSorter.return_value
+    assert text is gtk_mock.StringSorter.return_value
+    expression_props = [c.args[2] for c in gtk_mock.PropertyExpression.new.call_args_list]
+    assert expression_props == ["confidence-value", "media-type"]
+
+
+def test_min_confidence_filter():
+    win = FakeResultsWindow()
+    win._results_confidence_filter = MagicMock()
+    low = _FakeResultItem(index=0, name="", media_type="", confidence="", model_name="", path="", confidence_value=40.0)
+    high = _FakeResultItem(index=1, name="", media_type="", confidence="", model_name="", path="", confidence_value=90.0)
+    spin = MagicMock()
+
+    with patch.object(results_mod, "Gtk") as gtk_mock:
+        spin.get_value.return_value = 50.0
+        win._on_results_min_confidence_changed(spin)
+        win._results_confidence_filter.changed.assert_called_once_with(gtk_mock.FilterChange.MORE_STRICT)
+        assert not win._result_meets_min_confidence(low)
+        assert win._result_meets_min_confidence(high)
+
+        spin.get_value.return_value = 10.0
+        win._on_results_min_confidence_changed(spin)
+        win._results_confidence_filter.changed.assert_called_with(gtk_mock.FilterChange.LESS_STRICT)
+        assert win._result_meets_min_confidence(low)
+
+
+def test_search_sets_text_filter():
+    win = FakeResultsWindow()
+    win._results_text_filter = MagicMock()
+    entry = MagicMock()
+    entry.get_text.return_value = "  holiday "
+    win._on_results_search_changed(entry)
+    win._results_text_filter.set_search.assert_called_once_with("holiday")
+
+
 # ---------------------------------------------------------------------------
 # Tests: open_selected_file
 # ---------------------------------------------------------------------------
@@ -1,4 +1,5 @@
 """Tests for ScanHistoryMixin methods (GTK/GObject fully stubbed)."""
+import contextlib
 import json
 import os
 import sys
@@ -108,9 +109,25 @@ def _make_win():
     history_selection = mock.MagicMock()
     history_selection.get_selected.return_value = _INVALID  # nothing selected
     win._history_selection = history_selection
+    win._history_refresh_generation = 0
     return win
 
 
+@contextlib.contextmanager
+def _sync_refresh():
+    """Run the history refresh thread and its main-loop callbacks inline."""
+    def _run_sync(target, **kwargs):
+        t = mock.MagicMock()
+        t.start.side_effect = target
+        return t
+
+    glib_mock = mock.MagicMock()
+    glib_mock.idle_add.side_effect = lambda fn, *args: fn(*args)
+    with mock.patch('src.gui.scan_history.threading.Thread', side_effect=_run_sync), \
+         mock.patch('src.gui.scan_history.GLib', glib_mock):
+        yield glib_mock
+
+
 def _make_item(**kwargs):
     defaults = dict(
         dir_name='2025-01-01_12-00-00',
@@ -386,6 +403,31 @@ def test_on_history_export_done_appends_xlsx_extension(tmp_path):
     win.log_message.assert_called_once()
 
 
+def test_on_history_export_done_writes_csv(tmp_path):
+    win = _make_win()
+    import gi
+    GLib = gi.repository.GLib
+    GLib.Error = Exception
+
+    item = mock.MagicMock()
+    item.report_path = str(tmp_path / 'nudity_report.xlsx')
+    item.session_path = str(tmp_path / 'nudity_report_session.json')
+    open(item.session_path, 'w').close()
+
+    dest = str(tmp_path / 'out.csv')
+    dialog = mock.MagicMock()
+    file_obj = mock.MagicMock()
+    file_obj.get_path.return_value = dest
+    dialog.save_finish.return_value = file_obj
+
+    with mock.patch('src.gui.scan_history.export_report_csv', return_value=True) as export:
+        ScanHistoryMixin._on_history_export_done(win, dialog, None, item)
+
+    export.assert_called_once_with(item.session_path, dest)
+    win.log_message.assert_called_once()
+    win._show_error.assert_not_called()
+
+
 def test_on_history_export_done_no_report_no_session_shows_error(tmp_path):
     win = _make_win()
     import gi
@@ -539,7 +581,7 @@ def test_refresh_scan_history_populates_store(tmp_path):
     }
     (run_dir / 'nudity_report_session.json').write_text(json.dumps(session_data))
 
-    with mock.patch('src.gui.scan_history.DEFAULT_REPORT_DIR', str(tmp_path)):
+    with mock.patch('src.gui.scan_history.DEFAULT_REPORT_DIR', str(tmp_path)), _sync_refresh():
         ScanHistoryMixin.refresh_scan_history(win)
 
     win._history_store.remove_all.assert_called_once()
@@ -555,7 +597,7 @@ def test_refresh_scan_history_invalid_date_format(tmp_path):
     run_dir = tmp_path / 'invalid_date'
     run_dir.mkdir()
 
-    with mock.patch('src.gui.scan_history.DEFAULT_REPORT_DIR', str(tmp_path)):
+    with mock.patch('src.gui.scan_history.DEFAULT_REPORT_DIR', str(tmp_path)), _sync_refresh():
         ScanHistoryMixin.refresh_scan_history(win)
 
     # Should still append the item with display_date == dir name
@@ -571,11 +613,72 @@ def test_refresh_scan_history_broken_session_json(tmp_path):
     run_dir.mkdir()
     (run_dir / 'nudity_report_session.json').write_text('NOT JSON {{{')
 
-    with mock.patch('src.gui.scan_history.DEFAULT_REPORT_DIR', str(tmp_path)):
+    with mock.patch('src.gui.scan_history.DEFAULT_REPORT_DIR', str(tmp_path)), _sync_refresh():
         ScanHistoryMixin.refresh_scan_history(win)
 
     # Still appends — JSON error is swallowed
     win._history_store.append.assert_called_once()
+    assert not (run_dir / 'nudity_report_summary.json').exists()
+
+
+def test_refresh_scan_history_reads_summary_not_session(tmp_path):
+    win = _make_win()
+    run_dir = tmp_path / '2025-05-01_08-00-00'
+    run_dir.mkdir()
+    (run_dir / 'nudity_report_session.json').write_text('NOT JSON {{{')
+    (run_dir / 'nudity_report_summary.json').write_text(json.dumps(
+        {'model_name': 'nudenet', 'source_folder': '/pics', 'result_count': 7},
+    ))
+
+    with mock.patch('src.gui.scan_history.DEFAULT_REPORT_DIR', str(tmp_path)), _sync_refresh():
+        ScanHistoryMixin.refresh_scan_history(win)
+
+    appended_item = win._history_store.append.call_args[0][0]
+    assert (appended_item.model_name, appended_item.result_count) == ('nudenet', '7')
+
+
+def test_refresh_scan_history_backfills_summary_for_old_runs(tmp_path):
+    win = _make_win()
+    run_dir = tmp_path / '2025-03-01_09-00-00'
+    run_dir.mkdir()
+    (run_dir / 'nudity_report_session.json').write_text(json.dumps(
+        {'scan_config': {'model_name': 'helloz_nsfw', 'source_folder': '/pics'}, 'results': [{}]},
+    ))
+
+    with mock.patch('src.gui.scan_history.DEFAULT_REPORT_DIR', str(tmp_path)), _sync_refresh():
+        ScanHistoryMixin.refresh_scan_history(win)
+
+    summary = json.loads((run_dir / 'nudity_report_summary.json').read_text())
+    assert (summary['model_name'], summary['result_count']) == ('helloz_nsfw', 1)
+
+
+def test_refresh_scan_history_appends_in_batches(tmp_path):
+    win = _make_win()
+    for day in range(1, 6):
+        (tmp_path / f'2025-01-0{day}_00-00-00').mkdir()
+
+    with mock.patch('src.gui.scan_history.DEFAULT_REPORT_DIR', str(tmp_path)), \
+         mock.patch('src.gui.scan_history.constants.HISTORY_REFRESH_BATCH_SIZE', 2), \
+         _sync_refresh() as glib_mock:
+        ScanHistoryMixin.refresh_scan_history(win)
+
+    assert glib_mock.idle_add.call_count == 3
+    names = [call.args[0].dir_name for call in win._history_store.append.call_args_list]
+    assert names == [f'2025-01-0{day}_00-00-00' for day in range(5, 0, -1)]
+
+
+def test_refresh_scan_history_drops_rows_from_superseded_refresh(tmp_path):
+    win = _make_win()
+    (tmp_path / '2025-01-01_00-00-00').mkdir()
+
+    with mock.patch('src.gui.scan_history.DEFAULT_REPORT_DIR', str(tmp_path)), _sync_refresh() as glib_mock:
+        def _newer_refresh_first(fn, *args):
+            win._history_refresh_generation += 1
+            return fn(*args)
+        glib_mock.idle_add.side_effect = _newer_refresh_first
+        ScanHistoryMixin.refresh_scan_history(win)
+
+    win._history_store.append.assert_not_called()
 
 
 # ---------------------------------------------------------------------------
@@ -1,6 +1,7 @@
 """Tests for src/gui/scanning.py — ScanningMixin (GTK/GObject stubbed via sys.modules)."""
 import sys
 import types
+from functools import partial
 from unittest.mock import MagicMock, patch
 
 
@@ -63,6 +64,8 @@ sys.modules.setdefault("nudenet", MagicMock())
 
 from src.core import constants  # noqa: E402
 from src.core.scan_session import ScanSession  # noqa: E402
+from src.core.utils import DeferredFile  # noqa: E402
+from src.detectors.registry import EXECUTION_ASYNC  # noqa: E402
 from src.gui.scanning import ScanningMixin  # noqa: E402
 
 
@@ -99,6 +102,7 @@ def _make_win(**extra):
     win._get_video_frame_rate = MagicMock(return_value=10)
     win._get_progress_interval = MagicMock(return_value=10)
     win._get_helloz_nsfw_url = MagicMock(return_value=constants.HELLOZ_NSFW_URL)
+    win._get_helloz_nsfw_urls = MagicMock(return_value=[constants.HELLOZ_NSFW_URL])
     win._get_helloz_nsfw_request_timeout = MagicMock(return_value=10)
     win._get_helloz_nsfw_check_url = MagicMock(return_value="http://localhost:9999/health")
     win._get_helloz_nsfw_health_check_timeout = MagicMock(return_value=1)
@@ -219,6 +223,20 @@ class TestScanningMixinBasics:
         result = ScanningMixin.request_helloz_nsfw_score(win, str(img), mock_requests, None, 10)
         assert result is None
 
+    def test_request_helloz_nsfw_score_routes_through_endpoint_pool(self, tmp_path):
+        from src.detectors.endpoint_pool import EndpointPool
+
+        win = _make_win()
+        img = tmp_path / "img.jpg"
+        img.write_bytes(b"fakeimage")
+        mock_requests = MagicMock()
+        mock_requests.post.return_value = MagicMock(status_code=200, json=MagicMock(return_value={"data": {"nsfw": 0.3}}))
+        pool = EndpointPool(["http://localhost:1/check", "http://localhost:2/check"])
+        ScanningMixin.request_helloz_nsfw_score(win, str(img), mock_requests, pool, 10)
+        ScanningMixin.request_helloz_nsfw_score(win, str(img), mock_requests, pool, 10)
+        urls = [call.args[0] for call in mock_requests.post.call_args_list]
+        assert sorted(urls) == ["http://localhost:1/check", "http://localhost:2/check"]
+
 
 class TestScanningMixinProgress:
     def test_set_scan_total(self):
@@ -554,3 +572,80 @@ class TestScanningMixinStartScanning:
                  patch("src.gui.scanning.os.makedirs"):
                 ScanningMixin.start_scanning(win)
         mock_thread.start.assert_called()
+
+
+class TestScanningMixinProcessFiles:
+    def test_deferred_file_is_classified_in_a_later_round(self, tmp_path):
+        (tmp_path / "a.jpg").write_bytes(b"")
+        win = _make_win()
+        win._get_model.return_value = constants.MODEL_HELLOZ_NSFW
+        win._get_progress_interval.return_value = 1
+        win._get_near_duplicate_skip.return_value = False
+        win._get_exact_duplicate_skip.return_value = False
+        win._get_watch_after_scan.return_value = False
+        win.is_processing = True
+        attempts = []
+
+        def classify_image(file_path):
+            attempts.append(file_path)
+            if len(attempts) == 1:
+                raise DeferredFile(file_path, retry_after=0)
+
+        win.create_helloz_nsfw_classifiers.return_value = (classify_image, MagicMock())
+        backend = MagicMock()
+        backend.worker_count.return_value = 1
+
+        with patch("src.gui.scanning.GLib") as glib, \
+             patch("src.gui.scanning.get_backend", return_value=backend), \
+             patch("src.gui.scanning.count_supported_files", return_value=1), \
+             patch("src.gui.scanning.get_report_path", return_value=str(tmp_path / "report.xlsx")), \
+             patch("src.gui.scanning.save_nudity_report"), \
+             patch("src.gui.scanning.constants.get_prefilter_config", return_value=("", 0.0)), \
+             patch("src.core.utils.is_supported_file", return_value=True), \
+             patch("src.core.utils.detect_media_type", return_value=constants.MEDIA_TYPE_IMAGE):
+            ScanningMixin.process_files(win, str(tmp_path), str(tmp_path))
+
+        assert attempts == [str(tmp_path / "a.jpg")] * 2
+        messages = [call.args[1] for call in glib.idle_add.call_args_list if len(call.args) > 1 and isinstance(call.args[1], str)]
+        assert any(message.startswith("Scan complete: 1/1 file(s) processed") for message in messages)
+
+    def test_helloz_scan_runs_on_the_asyncio_pipeline(self, tmp_path):
+        (tmp_path / "a.jpg").write_bytes(b"")
+        (tmp_path / "b.jpg").write_bytes(b"")
+        win = _make_win()
+        win._get_model.return_value = constants.MODEL_HELLOZ_NSFW
+        win._get_progress_interval.return_value = 1
+        win._get_near_duplicate_skip.return_value = False
+        win._get_exact_duplicate_skip.return_value = False
+        win._get_watch_after_scan.return_value = False
+        win.is_processing = True
+        win.scan_helloz_nsfw_async = partial(ScanningMixin.scan_helloz_nsfw_async, win)
+        threaded = MagicMock()
+        win.create_helloz_nsfw_classifiers.return_value = (threaded, MagicMock())
+        backend = MagicMock()
+        backend.execution_strategy.return_value = EXECUTION_ASYNC
+        uploaded = []
+
+        def make_classify_image_async(client, executor, existing_files, threshold_value, threshold_percent, session,
+                                      **options):
+            assert options["request_timeout"] == 10
+
+            async def classify_image(file_path):
+                uploaded.append(file_path)
+            return classify_image
+
+        with patch("src.gui.scanning.GLib") as glib, \
+             patch("src.gui.scanning.get_backend", return_value=backend), \
+             patch("src.gui.scanning.helloz_nsfw.make_classify_image_async", side_effect=make_classify_image_async), \
+             patch("src.gui.scanning.count_supported_files", return_value=2), \
+             patch("src.gui.scanning.get_report_path", return_value=str(tmp_path / "report.xlsx")), \
+             patch("src.gui.scanning.save_nudity_report"), \
+             patch("src.gui.scanning.constants.get_prefilter_config", return_value=("", 0.0)), \
+             patch("src.core.utils.is_supported_file", return_value=True), \
+             patch("src.core.async_pipeline.detect_media_type", return_value=constants.MEDIA_TYPE_IMAGE):
+            ScanningMixin.process_files(win, str(tmp_path), str(tmp_path))
+
+        assert sorted(uploaded) == [str(tmp_path / "a.jpg"), str(tmp_path / "b.jpg")]
+        threaded.assert_not_called()
+        messages = [call.args[1] for call in glib.idle_add.call_args_list if len(call.args) > 1 and isinstance(call.args[1], str)]
+        assert any(message.startswith("Scan complete: 2/2 file(s) processed") for message in messages)
@@ -3,9 +3,10 @@ Tests for SessionMixin (src/gui/session.py) — covers load_initial_session,
 load_session_from_path, open_reports_folder, open_report.
 Uses full gi stubs.
 """
+import contextlib
 import json
 import sys
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock, call, patch
 
 
 # GI stubs
@@ -27,6 +28,8 @@ def _ensure_gi_stubs():
 _ensure_gi_stubs()
 sys.modules.setdefault("nudenet", MagicMock())
 
+from src.core.models import ReportEntry, ScanConfig, SessionState  # noqa: E402
+from src.core.utils import save_nudity_report  # noqa: E402
 from src.gui.session import SessionMixin  # noqa: E402
 
 
@@ -43,8 +46,15 @@ class FakeSessionWindow(SessionMixin):
         self.detected_results = []
         self._scan_session = None
         self.view_stack = MagicMock()
+        self.summary_label = MagicMock()
+        self.progress_bar = MagicMock()
+        self.apply_threshold_button = MagicMock()
+        self.is_processing = False
+        self.appended = []
 
     def populate_results(self, results): pass
+    def append_results(self, entries, start_index): self.appended.append((start_index, list(entries)))
+    def update_results_summary(self, count): self.summary_count = count
     def log_message(self, *a, **kw): pass
     def _show_error(self, *a, **kw): pass
     def _show_warning(self, *a, **kw): pass
@@ -102,34 +112,141 @@ def test_load_initial_session_error_logged():
 # load_session_from_path
 # -----------------------------------------------------------------------
 
+@contextlib.contextmanager
+def _inline_load():
+    """Run the session load thread and its main-loop callbacks inline."""
+    def _run_sync(target, **kwargs):
+        thread = MagicMock()
+        thread.start.side_effect = target
+        return thread
+
+    glib_mock = MagicMock()
+    glib_mock.idle_add.side_effect = lambda fn, *args: fn(*args)
+    with patch("src.gui.session.threading.Thread", side_effect=_run_sync), \
+         patch("src.gui.session.GLib", glib_mock):
+        yield glib_mock
+
+
+def _entry(file, detected=True):
+    return ReportEntry(
+        file=file, media_type="image", model_name="nudenet", threshold_percent=60.0,
+        confidence_percent=90.0 if detected else 10.0, nudity_detected=detected, detected_classes="[]",
+    )
+
+
 def test_load_session_from_path_xlsx():
     win = FakeSessionWindow()
-    session_state = {"scan_config": {"source_folder": "/scans", "model_name": "helloz"}, "results": []}
+    logs = []
+    win.log_message = lambda msg, *a, **kw: logs.append(msg)
+    config = ScanConfig(source_folder="/scans", model_name="helloz")
+    chunks = iter([[_entry("/a.jpg"), _entry("/b.jpg", detected=False)], [_entry("/c.jpg")]])
 
-    with patch("src.gui.session.load_scan_session", return_value=session_state), \
-         patch("src.gui.session.load_report_entries", return_value=[]), \
-         patch("src.gui.session.get_detected_results", return_value=[]), \
-         patch("os.path.exists", return_value=True), \
-         patch("src.core.constants.SUPPORTED_THEMES", ["system", "light", "dark"]), \
-         patch("src.core.constants.MODEL_NUDENET", "nudenet"), \
-         patch("src.core.constants.XLSX_EXTENSION", ".xlsx"):
+    with patch("src.gui.session.open_saved_session", return_value=(config, "/tmp/report.xlsx", 3, chunks)), \
+         patch("os.path.exists", return_value=True), _inline_load():
         win.load_session_from_path("/tmp/report.xlsx", show_feedback=True)
 
     assert win.last_report_path == "/tmp/report.xlsx"
+    win.folder_entry.set_text.assert_called_with("/scans")
+    win.helloz_nsfw_radio.set_active.assert_called_with(True)
+    assert [e["file"] for e in win.detected_results] == ["/a.jpg", "/c.jpg"]
+    assert [(start, [e["file"] for e in entries]) for start, entries in win.appended] == [(0, ["/a.jpg"]), (1, ["/c.jpg"])]
+    assert [e.file for e in win._scan_session.get_results()] == ["/a.jpg", "/b.jpg", "/c.jpg"]
+    assert win.summary_count == 2
+    assert call(2 / 3) in win.progress_bar.set_fraction.call_args_list
+    assert any("Loaded session" in m for m in logs)
+
+
+def test_load_session_from_path_session_json(tmp_path):
+    win = FakeSessionWindow()
+    report_path = str(tmp_path / "nudity_report.xlsx")
+    save_nudity_report([_entry("/a.jpg", detected=False), _entry("/b.jpg")], report_path,
+                       session_state=SessionState(scan_config=ScanConfig(source_folder="/src")), write_workbook=False)
+
+    with _inline_load():
+        win.load_session_from_path(str(tmp_path / "nudity_report_session.json"), show_feedback=False)
+
+    assert win.last_report_path == report_path
+    assert [e["file"] for e in win.detected_results] == ["/b.jpg"]
+    assert win.detected_results[0]["thumbnail"] == ""  # fetched on selection instead
+
+
+def test_load_session_from_path_abandoned_by_newer_load():
+    win = FakeSessionWindow()
+
+    def _chunks():
+        yield [_entry("/a.jpg")]
+        win._session_load_generation += 1  # another load or a scan started
+        yield [_entry("/b.jpg")]
+
+    with patch("src.gui.session.open_saved_session", return_value=(ScanConfig(), "/r.xlsx", 2, _chunks())), \
+         _inline_load():
+        win.load_session_from_path("/r.xlsx", show_feedback=True)
+
+    assert [e["file"] for e in win.detected_results] == ["/a.jpg"]
+    assert not hasattr(win, "summary_count")
 
 
-def test_load_session_from_path_session_json():
+def test_load_session_from_path_error_logged():
     win = FakeSessionWindow()
-    session_state = {"scan_config": {}, "results": []}
+    logs = []
+    win.log_message = lambda msg, *a, **kw: logs.append((msg, a))
+
+    with patch("src.gui.session.open_saved_session", side_effect=OSError("gone")), _inline_load():
+        win.load_session_from_path("/r.xlsx", show_feedback=True)
+
+    assert logs == [("Could not load session from /r.xlsx: gone", ("error",))]
+
+
+# -----------------------------------------------------------------------
+# apply_threshold_to_session
+# -----------------------------------------------------------------------
+
+def test_apply_threshold_rethresholds_stored_run_and_reloads(tmp_path):
+    win = FakeSessionWindow()
+    report_path = str(tmp_path / "nudity_report.xlsx")
+    scored = ReportEntry(
+        file="/a.jpg", media_type="image", model_name="nudenet", threshold_percent=60.0, confidence_percent=50.0,
+        nudity_detected=False, detected_classes=json.dumps([{"class": "EXPOSED_BUTTOCKS", "score": 0.5}]),
+    )
+    save_nudity_report([scored, _entry("/b.jpg")], report_path, write_workbook=False)
+    win.last_report_path = report_path
+    win.threshold_spin.get_value.return_value = 40.0
 
-    with patch("src.gui.session.load_scan_session", return_value=session_state), \
-         patch("src.gui.session.load_report_entries", return_value=[]), \
-         patch("src.gui.session.get_detected_results", return_value=[]), \
-         patch("os.path.exists", return_value=False), \
-         patch("src.core.constants.SUPPORTED_THEMES", ["system", "light", "dark"]), \
-         patch("src.core.constants.MODEL_NUDENET", "nudenet"), \
-         patch("src.core.constants.XLSX_EXTENSION", ".xlsx"):
-        win.load_session_from_path("/tmp/report_session.json", show_feedback=False)
+    with _inline_load():
+        win.apply_threshold_to_session()
+
+    assert [e["file"] for e in win.detected_results] == ["/a.jpg"]  # /b.jpg has no class scores
+    win.threshold_spin.set_value.assert_called_with(40.0)
+    win.apply_threshold_button.set_sensitive.assert_called_with(True)
+
+
+def test_apply_threshold_uses_the_scoring_config_of_the_runs_model(tmp_path):
+    win = FakeSessionWindow()
+    report_path = str(tmp_path / "nudity_report.xlsx")
+    session = SessionState(scan_config=ScanConfig(model_name="helloz_nsfw", threshold_percent=60.0))
+    save_nudity_report([_entry("/a.jpg")], report_path, session_state=session, write_workbook=False)
+    win.last_report_path = report_path
+    win.threshold_spin.get_value.return_value = 40.0
+    config = tmp_path / "app_config.json"
+    config.write_text(json.dumps({"class_thresholds": {"FACE_F": 10}}))
+
+    with _inline_load(), \
+         patch("src.core.constants._config_path", return_value=str(config)), \
+         patch("src.gui.session.rethreshold_report", return_value=(0, 1)) as rethreshold:
+        win.apply_threshold_to_session()
+
+    # The NudeNet class thresholds in the config do not apply to a Helloz NSFW run
+    rethreshold.assert_called_once_with(report_path, 40.0, {}, {})
+
+
+def test_apply_threshold_without_saved_run_warns():
+    win = FakeSessionWindow()
+    win.last_report_path = "/nonexistent/nudity_report.xlsx"
+    win._show_warning = MagicMock()
+    with patch("src.gui.session.rethreshold_report") as rethreshold:
+        win.apply_threshold_to_session()
+    win._show_warning.assert_called_once()
+    rethreshold.assert_not_called()
 
 
 # -----------------------------------------------------------------------
@@ -0,0 +1,172 @@
+"""Tests for src/processing/content_hash.py and exact-duplicate fan-out."""
+import os
+import sys
+from unittest.mock import MagicMock
+
+import pytest
+
+sys.modules.setdefault("nudenet", MagicMock())
+
+from src.core import constants
+from src.core.models import ReportEntry
+from src.core.scan_session import ScanSession
+from src.core.utils import classify_files_in_folder, record_duplicate_results, save_nudity_report
+from src.processing import content_hash
+from src.processing.content_hash import find_duplicate_files, hash_file_contents
+
+
+@pytest.fixture(autouse=True)
+def _supported_by_extension(monkeypatch):
+    # The fixtures are not real media; judge support by extension instead of magic bytes
+    monkeypatch.setattr(content_hash, "is_supported_file",
+                        lambda path: os.path.splitext(path)[1].lower() in constants.SUPPORTED_EXTENSIONS)
+
+
+def _write(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return str(path)
+
+
+# ---------------------------------------------------------------------------
+# hash_file_contents
+# ---------------------------------------------------------------------------
+
+def test_hash_identical_content_matches(tmp_path):
+    a = _write(tmp_path / "a.bin", b"x" * 5000)
+    b = _write(tmp_path / "b.bin", b"x" * 5000)
+    c = _write(tmp_path / "c.bin", b"y" * 5000)
+    assert hash_file_contents(a, chunk_size=1024) == hash_file_contents(b, chunk_size=1024)
+    assert hash_file_contents(a) != hash_file_contents(c)
+
+
+def test_hash_max_bytes_only_reads_prefix(tmp_path):
+    a = _write(tmp_path / "a.bin", b"same-head" + b"1" * 100)
+    b = _write(tmp_path / "b.bin", b"same-head" + b"2" * 100)
+    assert hash_file_contents(a, max_bytes=9) == hash_file_contents(b, max_bytes=9)
+    assert hash_file_contents(a) != hash_file_contents(b)
+
+
+def test_hash_missing_file_returns_none(tmp_path):
+    assert hash_file_contents(str(tmp_path / "missing.bin")) is None
+
+
+# ---------------------------------------------------------------------------
+# find_duplicate_files
+# ---------------------------------------------------------------------------
+
+def test_find_duplicates_groups_identical_files(tmp_path):
+    a = _write(tmp_path / "one" / "a.jpg", b"content-1")
+    b = _write(tmp_path / "two" / "a_copy.jpg", b"content-1")
+    c = _write(tmp_path / "c.jpg", b"content-2")  # same size, different bytes
+    d = _write(tmp_path / "d.jpg", b"unique-size-file")
+
+    unique, groups = find_duplicate_files([a, b, c, d])
+
+    assert unique == [a, c, d]
+    assert groups == {a: [b]}
+
+
+def test_find_duplicates_only_hashes_size_collisions(tmp_path, monkeypatch):
+    a = _write(tmp_path / "a.jpg", b"1")
+    b = _write(tmp_path / "b.jpg", b"22")
+    hashed = []
+    monkeypatch.setattr(content_hash, "hash_file_contents", lambda path, **kw: hashed.append(path))
+
+    unique, groups = find_duplicate_files([a, b])
+
+    assert hashed == []
+    assert unique == [a, b]
+    assert groups == {}
+
+
+def test_find_duplicates_large_files_compare_head_then_full(tmp_path, monkeypatch):
+    monkeypatch.setattr(content_hash.constants, "CONTENT_HASH_CHUNK_SIZE", 4)
+    a = _write(tmp_path / "a.mp4", b"HEAD" + b"body-1")
+    b = _write(tmp_path / "b.mp4", b"HEAD" + b"body-1")
+    c = _write(tmp_path / "c.mp4", b"HEAD" + b"body-2")
+
+    unique, groups = find_duplicate_files([a, b, c])
+
+    assert unique == [a, c]
+    assert groups == {a: [b]}
+
+
+def test_find_duplicates_never_hashes_unsupported_files(tmp_path, monkeypatch):
+    a = _write(tmp_path / "a.txt", b"same")
+    b = _write(tmp_path / "b.txt", b"same")
+    hashed = []
+    monkeypatch.setattr(content_hash, "hash_file_contents", lambda path, **kw: hashed.append(path))
+
+    unique, groups = find_duplicate_files([a, b])
+
+    assert hashed == []
+    assert unique == [a, b]
+    assert groups == {}
+
+
+def test_find_duplicates_ignores_empty_and_missing_files(tmp_path):
+    a = _write(tmp_path / "a.jpg", b"")
+    b = _write(tmp_path / "b.jpg", b"")
+    missing = str(tmp_path / "missing.jpg")
+
+    unique, groups = find_duplicate_files([a, b, missing])
+
+    assert unique == [a, b, missing]
+    assert groups == {}
+
+
+# ---------------------------------------------------------------------------
+# classify_files_in_folder(deduplicate=True) / record_duplicate_results
+# ---------------------------------------------------------------------------
+
+def test_classify_files_in_folder_deduplicates(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.core.utils.DEFAULT_REPORT_DIR", str(tmp_path / "reports"))
+    monkeypatch.setattr("src.core.utils.is_supported_file", lambda path: True)
+    monkeypatch.setattr("src.core.utils.detect_media_type", lambda path: "image")
+    original = _write(tmp_path / "src" / "a.jpg", b"image-bytes")
+    copy = _write(tmp_path / "src" / "backup" / "a.jpg", b"image-bytes")
+    classified = []
+
+    groups = classify_files_in_folder(
+        str(tmp_path / "src"), classified.append, MagicMock(), worker_count=2, deduplicate=True,
+    )
+
+    assert len(classified) == 1
+    canonical = classified[0]
+    assert groups == {canonical: [copy if canonical == original else original]}
+
+
+def test_record_duplicate_results_fans_out():
+    session = ScanSession()
+    session.add_result(ReportEntry(
+        file="/a.jpg", media_type="image", model_name="nudenet", threshold_percent=60.0,
+        confidence_percent=90.0, nudity_detected=True, detected_classes="[]", thumbnail="abc",
+    ))
+
+    added = record_duplicate_results(session, {"/a.jpg": ["/b.jpg", "/c.jpg"], "/missing.jpg": ["/d.jpg"]})
+
+    assert added == 2
+    copy = session.find_result("/c.jpg")
+    assert copy.duplicate_of == "/a.jpg"
+    assert copy.confidence_percent == 90.0
+    assert copy.thumbnail == "abc"
+    assert session.find_result("/d.jpg") is None
+    assert os.path.basename(session.get_results()[-1].file) == "c.jpg"
+
+
+def test_record_duplicate_results_uses_stored_result_of_skipped_canonical(tmp_path):
+    report_path = str(tmp_path / "report.xlsx")
+    stored = ReportEntry(
+        file="/a.jpg", media_type="image", model_name="nudenet", threshold_percent=60.0,
+        confidence_percent=75.0, nudity_detected=True, detected_classes="[]",
+    )
+    save_nudity_report([stored], report_path)
+    session = ScanSession()
+
+    added = record_duplicate_results(session, {"/a.jpg": ["/b.jpg", "/c.jpg"]}, report_path, {"/a.jpg", "/c.jpg"})
+
+    assert added == 1
+    copy = session.find_result("/b.jpg")
+    assert copy.duplicate_of == "/a.jpg" and copy.confidence_percent == 75.0
+    assert session.find_result("/c.jpg") is None  # Already has its own row in the report
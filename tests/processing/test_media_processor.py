@@ -1,6 +1,7 @@
 """Tests for src/processing/media_processor.py"""
 import sys
-from unittest.mock import MagicMock
+import threading
+from unittest.mock import MagicMock, patch
 
 import pytest
 
@@ -17,7 +18,15 @@ if "cv2" not in sys.modules:
         sys.modules["cv2"] = MagicMock()
 
 from src.core import constants
-from src.processing.media_processor import FrameExtractor, detect_media_type, is_supported_file
+from src.processing.media_processor import (
+    FrameDecoder,
+    FrameExtractor,
+    detect_media_type,
+    frame_decoder_scope,
+    is_supported_file,
+    prefetch_frames,
+    shared_frame_decoder,
+)
 
 
 @pytest.mark.parametrize("file_path,mime,expected", [
@@ -88,3 +97,55 @@ def test_frame_extractor_invalid_frame_rate():
 def test_frame_extractor_default_frame_rate():
     extractor = FrameExtractor()
     assert extractor.frame_rate >= 1
+
+
+def test_prefetch_frames_reads_the_next_frame_on_the_pool():
+    reader_threads = []
+    closed = threading.Event()
+
+    def frames():
+        try:
+            for index in range(3):
+                reader_threads.append(threading.current_thread().name)
+                yield f"frame_{index}.jpg"
+        finally:
+            closed.set()
+
+    prefetched = prefetch_frames(frames(), FrameDecoder(1))
+    assert next(prefetched) == "frame_0.jpg"
+    prefetched.close()  # An early exit waits for the read ahead and closes the source
+
+    assert closed.is_set()
+    assert reader_threads == ["frame-decode_0", "frame-decode_0"]
+    assert list(prefetch_frames(iter(["a.jpg", "b.jpg"]))) == ["a.jpg", "b.jpg"]
+
+
+def test_prefetch_frames_reads_inline_when_every_decode_thread_is_busy():
+    decoder = FrameDecoder(1)
+    release = threading.Event()
+    busy = decoder.submit(release.wait, 5)
+    readers = []
+
+    def frames():
+        for index in range(2):
+            readers.append(threading.current_thread().name)
+            yield index
+
+    try:
+        assert list(prefetch_frames(frames(), decoder)) == [0, 1]
+    finally:
+        release.set()
+        busy.result()
+    assert readers == [threading.current_thread().name] * 2
+
+
+def test_shared_frame_decoder_lives_for_the_scan():
+    with patch("src.core.constants.get_worker_pool_config", return_value=(0, 1)):
+        assert shared_frame_decoder() is None  # No scan running
+        with frame_decoder_scope():
+            decoder = shared_frame_decoder()
+            with frame_decoder_scope():
+                assert shared_frame_decoder() is decoder  # Overlapping scans share it
+            assert decoder.submit(str, 1).result() == "1"
+        assert shared_frame_decoder() is None
+    assert decoder.submit(str, 1) is None  # Shut down with the last scan; callers read inline
@@ -0,0 +1,265 @@
+"""Tests for src/processing/perceptual_hash.py and near-duplicate skipping."""
+import json
+import sys
+from unittest.mock import MagicMock, patch
+
+sys.modules.setdefault("nudenet", MagicMock())
+
+from PIL import Image
+
+from src.core.models import ReportEntry
+from src.core.scan_session import ScanSession
+from src.core.utils import load_phash_index, save_phash_index, skip_near_duplicates
+from src.processing.perceptual_hash import (
+    BKTree,
+    PerceptualHashIndex,
+    compute_dhash,
+    hamming_distance,
+)
+
+
+def _gradient_image(path, size=(256, 192), fmt="PNG"):
+    img = Image.new("RGB", size)
+    img.putdata([((x * 255) // size[0], (y * 255) // size[1], 128) for y in range(size[1]) for x in range(size[0])])
+    img.save(path, format=fmt)
+    return str(path)
+
+
+def _make_entry(file="/tmp/a.jpg", confidence_percent=80.0, model_name="nudenet"):
+    return ReportEntry(
+        file=file,
+        media_type="image",
+        model_name=model_name,
+        threshold_percent=60.0,
+        confidence_percent=confidence_percent,
+        nudity_detected=confidence_percent >= 60.0,
+        detected_classes=json.dumps([{"class": "EXPOSED_BUTTOCKS", "score": confidence_percent / 100}]),
+    )
+
+
+# ---------------------------------------------------------------------------
+# compute_dhash / hamming_distance
+# ---------------------------------------------------------------------------
+
+def test_dhash_stable_across_resize_and_reencode(tmp_path):
+    original = _gradient_image(tmp_path / "original.png")
+    with Image.open(original) as img:
+        img.resize((128, 96)).convert("RGB").save(tmp_path / "copy.jpg", quality=70)
+
+    first = compute_dhash(original)
+    second = compute_dhash(str(tmp_path / "copy.jpg"))
+    assert first is not None and second is not None
+    assert hamming_distance(first, second) <= 6
+
+
+def test_dhash_returns_none_for_unreadable_file(tmp_path):
+    bad = tmp_path / "bad.jpg"
+    bad.write_bytes(b"not an image")
+    assert compute_dhash(str(bad)) is None
+
+
+def test_hamming_distance():
+    assert hamming_distance(0b1010, 0b1010) == 0
+    assert hamming_distance(0b1010, 0b0101) == 4
+
+
+# ---------------------------------------------------------------------------
+# BKTree
+# ---------------------------------------------------------------------------
+
+def test_bktree_query_matches_linear_scan():
+    import random
+
+    rng = random.Random(42)
+    hashes = [rng.getrandbits(64) for _ in range(500)]
+    tree = BKTree()
+    for i, h in enumerate(hashes):
+        tree.add(h, i)
+
+    probe = hashes[7] ^ 0b111  # three bits away from a known hash
+    expected = sorted(i for i, h in enumerate(hashes) if hamming_distance(probe, h) <= 10)
+    found = sorted(value for _d, _h, value in tree.query(probe, 10))
+    assert found == expected
+    assert len(tree) == 500
+
+
+def test_bktree_identical_hashes_share_node():
+    tree = BKTree()
+    tree.add(5, "a")
+    tree.add(5, "b")
+    assert sorted(v for _d, _h, v in tree.query(5, 0)) == ["a", "b"]
+    assert len(list(tree.items())) == 2
+
+
+def test_bktree_empty_query():
+    assert BKTree().query(0, 64) == []
+
+
+# ---------------------------------------------------------------------------
+# PerceptualHashIndex
+# ---------------------------------------------------------------------------
+
+def test_index_find_match_respects_model():
+    index = PerceptualHashIndex()
+    index.add(0xFF, _make_entry(model_name="nudenet"))
+    assert index.find_match(0xFE, 2, "nudenet").file == "/tmp/a.jpg"
+    assert index.find_match(0xFE, 2, "helloz_nsfw") is None
+    assert index.find_match(0x00, 2, "nudenet") is None
+
+
+def test_index_save_and_load_round_trip(tmp_path):
+    path = str(tmp_path / "phash_index.json")
+    index = PerceptualHashIndex()
+    index.add(0xABCDEF, _make_entry(file="/tmp/x.jpg", confidence_percent=91.5))
+    assert index.save(path) is True
+
+    loaded = PerceptualHashIndex.load(path)
+    assert len(loaded) == 1
+    match = loaded.find_match(0xABCDEF, 0)
+    assert match.file == "/tmp/x.jpg"
+    assert match.confidence_percent == 91.5
+
+
+def test_index_replaces_the_earlier_hash_of_a_file(tmp_path):
+    path = str(tmp_path / "phash_index.json")
+    index = PerceptualHashIndex()
+    index.add(0xFF, _make_entry(file="/tmp/x.jpg", confidence_percent=70.0))
+    index.add(0xFF, _make_entry(file="/tmp/x.jpg", confidence_percent=75.0))
+    index.add(0x00, _make_entry(file="/tmp/x.jpg", confidence_percent=90.0))
+
+    assert len(index) == 1
+    assert index.find_match(0xFF, 0) is None
+    assert index.find_match(0x00, 0).confidence_percent == 90.0
+    index.save(path)
+    assert len(json.loads((tmp_path / "phash_index.json").read_text())) == 1
+
+
+def test_index_keeps_one_entry_per_model_for_a_file(tmp_path):
+    path = str(tmp_path / "phash_index.json")
+    index = PerceptualHashIndex()
+    index.add(0xFF, _make_entry(file="/tmp/x.jpg", model_name="nudenet"))
+    index.add(0xFF, _make_entry(file="/tmp/x.jpg", model_name="helloz_nsfw"))
+
+    assert len(index) == 2
+    index.save(path)
+    loaded = PerceptualHashIndex.load(path)
+    assert loaded.find_match(0xFF, 0, "nudenet").model_name == "nudenet"
+    assert loaded.find_match(0xFF, 0, "helloz_nsfw").model_name == "helloz_nsfw"
+
+
+def test_save_phash_index_prunes_missing_files(tmp_path):
+    kept = _gradient_image(tmp_path / "kept.png")
+    index = PerceptualHashIndex()
+    index.add(0x0F, _make_entry(file=kept))
+    index.add(0xF0, _make_entry(file=str(tmp_path / "deleted.png")))
+
+    assert save_phash_index(index, report_dir=str(tmp_path)) is True
+    loaded = load_phash_index(report_dir=str(tmp_path))
+    assert len(loaded) == 1
+    assert loaded.find_match(0x0F, 0).file == kept
+
+
+def test_index_load_missing_or_corrupt_returns_empty(tmp_path):
+    assert len(PerceptualHashIndex.load(str(tmp_path / "missing.json"))) == 0
+    corrupt = tmp_path / "corrupt.json"
+    corrupt.write_text("{not json")
+    assert len(PerceptualHashIndex.load(str(corrupt))) == 0
+
+
+# ---------------------------------------------------------------------------
+# skip_near_duplicates
+# ---------------------------------------------------------------------------
+
+def test_skip_near_duplicates_reuses_score(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.core.utils.ThumbnailGenerator.generate", lambda *a, **kw: "")
+    original = _gradient_image(tmp_path / "original.png")
+    copy = str(tmp_path / "copy.png")
+    with Image.open(original) as img:
+        img.resize((200, 150)).save(copy)
+
+    session = ScanSession()
+    calls = []
+
+    def classify_image(file_path):
+        calls.append(file_path)
+        session.add_result(_make_entry(file=file_path, confidence_percent=88.0))
+
+    wrapped = skip_near_duplicates(
+        classify_image, session, PerceptualHashIndex(), "nudenet",
+        threshold_percent=60, report_dir=str(tmp_path),
+    )
+    wrapped(original)
+    wrapped(copy)
+
+    assert calls == [original]
+    duplicate = session.find_result(copy)
+    assert duplicate.duplicate_of == original
+    assert duplicate.confidence_percent == 88.0
+    assert duplicate.nudity_detected is True
+
+
+def test_skip_near_duplicates_applies_current_threshold(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.core.utils.ThumbnailGenerator.generate", lambda *a, **kw: "")
+    image = _gradient_image(tmp_path / "img.png")
+    index = PerceptualHashIndex()
+    index.add(compute_dhash(image), _make_entry(file="/elsewhere/img.png", confidence_percent=70.0))
+
+    session = ScanSession()
+    classify_image = MagicMock()
+    wrapped = skip_near_duplicates(
+        classify_image, session, index, "nudenet", threshold_percent=80, report_dir=str(tmp_path),
+    )
+    wrapped(image)
+
+    classify_image.assert_not_called()
+    entry = session.find_result(image)
+    assert entry.nudity_detected is False
+    assert entry.duplicate_of == "/elsewhere/img.png"
+
+
+def test_skip_near_duplicates_applies_per_class_scoring(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.core.utils.ThumbnailGenerator.generate", lambda *a, **kw: "")
+    image = _gradient_image(tmp_path / "img.png")
+    index = PerceptualHashIndex()
+    index.add(compute_dhash(image), _make_entry(file="/elsewhere/img.png", confidence_percent=80.0))
+    config = tmp_path / "app_config.json"
+    config.write_text(json.dumps({"class_thresholds": {"EXPOSED_BUTTOCKS": 90}, "class_weights": {"EXPOSED_BUTTOCKS": 0.5}}))
+
+    session = ScanSession()
+    with patch("src.core.constants._config_path", return_value=str(config)):
+        wrapped = skip_near_duplicates(
+            MagicMock(), session, index, "nudenet", threshold_percent=30, report_dir=str(tmp_path),
+        )
+    wrapped(image)
+
+    entry = session.find_result(image)
+    assert entry.confidence_percent == 40.0
+    assert entry.nudity_detected is False
+
+
+def test_skip_near_duplicates_passes_existing_files_through(tmp_path):
+    image = _gradient_image(tmp_path / "img.png")
+    index = PerceptualHashIndex()
+    index.add(compute_dhash(image), _make_entry(file="/elsewhere/img.png"))
+    classify_image = MagicMock()
+    session = ScanSession()
+
+    wrapped = skip_near_duplicates(classify_image, session, index, "nudenet", existing_files={image})
+    wrapped(image)
+
+    classify_image.assert_called_once_with(image)
+    assert session.get_results() == []
+
+
+def test_skip_near_duplicates_does_not_index_errors(tmp_path):
+    image = _gradient_image(tmp_path / "img.png")
+    index = PerceptualHashIndex()
+    session = ScanSession()
+
+    def classify_image(file_path):
+        entry = _make_entry(file=file_path)
+        entry.detected_classes = "ERROR: boom"
+        session.add_result(entry)
+
+    skip_near_duplicates(classify_image, session, index, "nudenet")(image)
+    assert len(index) == 0
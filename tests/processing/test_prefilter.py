@@ -0,0 +1,142 @@
+"""Tests for src/processing/prefilter.py and the cascade prefilter wrapper."""
+import json
+import sys
+from unittest.mock import MagicMock
+
+sys.modules.setdefault("nudenet", MagicMock())
+
+from PIL import Image
+
+from src.core import constants
+from src.core.models import ReportEntry
+from src.core.scan_session import ScanSession
+from src.core.utils import cascade_prefilter
+from src.processing.prefilter import SkinTonePrefilter, create_prefilter
+
+SKIN = (224, 172, 150)
+
+
+def _image(path, colour, size=(320, 240), fmt="JPEG"):
+    Image.new("RGB", size, colour).save(path, format=fmt)
+    return str(path)
+
+
+# ---------------------------------------------------------------------------
+# SkinTonePrefilter / create_prefilter
+# ---------------------------------------------------------------------------
+
+def test_skin_tone_prefilter_scores_skin_fraction(tmp_path):
+    prefilter = SkinTonePrefilter()
+    assert prefilter(_image(tmp_path / "skin.jpg", SKIN)) > 0.9
+    assert prefilter(_image(tmp_path / "grass.jpg", (30, 120, 40))) == 0.0
+    assert prefilter(_image(tmp_path / "sky.png", (90, 140, 220), fmt="PNG")) == 0.0
+
+    half = Image.new("RGB", (200, 100), (30, 120, 40))
+    half.paste(Image.new("RGB", (100, 100), SKIN), (0, 0))
+    half.save(tmp_path / "half.png")
+    assert 0.4 < prefilter(str(tmp_path / "half.png")) < 0.6
+
+
+def test_skin_tone_prefilter_returns_none_without_chroma(tmp_path):
+    prefilter = SkinTonePrefilter()
+    grey = Image.new("L", (320, 240))
+    grey.putdata([(x * 255) // 320 for _y in range(240) for x in range(320)])
+    grey.save(tmp_path / "grey.jpg")
+    grey.convert("1").save(tmp_path / "bw.png")
+    grey.convert("RGB").save(tmp_path / "grey_rgb.jpg")
+
+    assert prefilter(str(tmp_path / "grey.jpg")) is None
+    assert prefilter(str(tmp_path / "bw.png")) is None
+    assert prefilter(str(tmp_path / "grey_rgb.jpg")) is None
+    assert prefilter(_image(tmp_path / "document.jpg", (250, 250, 250))) is None
+
+
+def test_skin_tone_prefilter_returns_none_for_unreadable_file(tmp_path):
+    broken = tmp_path / "broken.jpg"
+    broken.write_bytes(b"not an image")
+    assert SkinTonePrefilter()(str(broken)) is None
+
+
+def test_create_prefilter():
+    assert isinstance(create_prefilter(constants.PREFILTER_SKIN_TONE), SkinTonePrefilter)
+    assert create_prefilter("") is None
+    assert create_prefilter("no_such_prefilter") is None
+
+
+# ---------------------------------------------------------------------------
+# cascade_prefilter
+# ---------------------------------------------------------------------------
+
+def test_cascade_prefilter_clears_low_scores_and_escalates_the_rest(tmp_path):
+    session = ScanSession()
+    classify_image = MagicMock()
+    scores = {"/safe.jpg": 0.01, "/ambiguous.jpg": 0.3, "/unreadable.jpg": None}
+    prefilter = MagicMock(side_effect=scores.get)
+    prefilter.name = "stub"
+
+    wrapped = cascade_prefilter(
+        classify_image, session, prefilter, "nudenet", threshold_percent=60, min_score=0.05, report_dir=str(tmp_path),
+    )
+    for path in scores:
+        wrapped(path)
+
+    assert [call.args[0] for call in classify_image.call_args_list] == ["/ambiguous.jpg", "/unreadable.jpg"]
+    [entry] = session.get_results()
+    assert entry.file == "/safe.jpg"
+    assert entry.nudity_detected is False
+    assert entry.confidence_percent == 0.0
+    assert entry.model_name == "nudenet"
+    assert json.loads(entry.detected_classes) == {"cascade": "cleared", "prefilter": "stub", "score": 0.01}
+    assert entry.class_scores() == {}
+
+
+def test_cascade_prefilter_records_the_decision_for_escalated_images(tmp_path):
+    session = ScanSession()
+    detections = [{"class": "FEMALE_BREAST_EXPOSED", "score": 0.9}]
+
+    def classify_image(file_path):
+        session.add_result(ReportEntry(
+            file=file_path, media_type="image", model_name="nudenet", threshold_percent=60.0,
+            confidence_percent=90.0, nudity_detected=True, detected_classes=json.dumps(detections),
+        ))
+
+    scores = {"/ambiguous.jpg": 0.3, "/unreadable.jpg": None}
+    prefilter = MagicMock(side_effect=scores.get)
+    prefilter.name = "stub"
+    wrapped = cascade_prefilter(classify_image, session, prefilter, "nudenet", min_score=0.05, report_dir=str(tmp_path))
+    for path in scores:
+        wrapped(path)
+
+    ambiguous, unreadable = session.get_results()
+    assert json.loads(ambiguous.detected_classes) == {
+        "cascade": "escalated", "prefilter": "stub", "score": 0.3, "result": detections,
+    }
+    assert json.loads(unreadable.detected_classes)["score"] is None
+    assert ambiguous.class_scores() == {"FEMALE_BREAST_EXPOSED": 0.9}
+    assert session.find_result("/ambiguous.jpg") is ambiguous
+
+
+def test_cascade_prefilter_sends_greyscale_images_to_the_detector(tmp_path):
+    grey = Image.new("L", (320, 240), 180)
+    grey.save(tmp_path / "grey.jpg")
+    session = ScanSession()
+    classify_image = MagicMock()
+
+    wrapped = cascade_prefilter(classify_image, session, SkinTonePrefilter(), "nudenet", min_score=0.05, report_dir=str(tmp_path))
+    wrapped(str(tmp_path / "grey.jpg"))
+
+    classify_image.assert_called_once_with(str(tmp_path / "grey.jpg"))
+    assert session.get_results() == []
+
+
+def test_cascade_prefilter_passes_existing_files_through():
+    prefilter = MagicMock(return_value=0.0)
+    classify_image = MagicMock()
+    session = ScanSession()
+
+    wrapped = cascade_prefilter(classify_image, session, prefilter, "nudenet", existing_files={"/seen.jpg"})
+    wrapped("/seen.jpg")
+
+    prefilter.assert_not_called()
+    classify_image.assert_called_once_with("/seen.jpg")
+    assert session.get_results() == []
@@ -0,0 +1,100 @@
+"""Tests for src/processing/upload_transform.py (pre-upload downscale and re-encode)."""
+import io
+import json
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from src.core import constants
+from src.core.scan_session import ScanSession
+from src.detectors import helloz_nsfw
+from src.processing.upload_transform import (
+    UploadTransform,
+    create_upload_transform,
+    read_upload,
+    shared_upload_transform,
+)
+
+
+def _noise(path, size, fmt="PNG", mode="RGB"):
+    # Random pixels so the original cannot compress to almost nothing
+    channels = len(mode)
+    pixels = np.random.default_rng(0).integers(0, 256, (size[1], size[0], channels), dtype=np.uint8)
+    Image.fromarray(pixels.squeeze(), mode).save(path, format=fmt)
+    return str(path)
+
+
+def test_large_png_is_downsized_and_reencoded(tmp_path):
+    path = _noise(tmp_path / "large.png", (1200, 800))
+    transform = UploadTransform(max_edge=300)
+
+    file_name, data = transform(path)
+
+    assert file_name == "large.jpg"
+    with Image.open(io.BytesIO(data)) as img:
+        assert img.format == "JPEG" and img.size == (300, 200)
+    stats = transform.stats.snapshot()
+    assert stats["files"] == 1 and stats["transformed"] == 1
+    assert stats["bytes_out"] == len(data) < stats["bytes_in"]
+    assert "1/1 file(s) re-encoded" in transform.stats.summary()
+
+
+def test_webp_output_and_transparency_flattened(tmp_path):
+    path = _noise(tmp_path / "alpha.png", (600, 600), mode="RGBA")
+    file_name, data = UploadTransform(max_edge=200, upload_format=constants.UPLOAD_FORMAT_WEBP)(path)
+
+    assert file_name == "alpha.webp"
+    with Image.open(io.BytesIO(data)) as img:
+        assert img.format == "WEBP" and img.mode == "RGB" and max(img.size) == 200
+
+
+def test_small_jpeg_and_undecodable_files_are_sent_unchanged(tmp_path):
+    small = _noise(tmp_path / "small.jpg", (100, 80), fmt="JPEG")
+    broken = tmp_path / "broken.png"
+    broken.write_bytes(b"not an image")
+    transform = UploadTransform(max_edge=300)
+
+    assert transform(small) == ("small.jpg", open(small, "rb").read())
+    assert transform(str(broken)) == ("broken.png", b"not an image")
+    assert transform.stats.snapshot()["transformed"] == 0
+
+
+def test_read_upload_without_transform_returns_original(tmp_path):
+    path = tmp_path / "frame.png"
+    path.write_bytes(b"raw")
+    assert read_upload(str(path)) == ("frame.png", b"raw")
+    assert create_upload_transform(0) is None
+    with pytest.raises(ValueError):
+        UploadTransform(max_edge=300, upload_format="gif")
+
+
+def test_upload_config_and_shared_transform(tmp_path):
+    config = tmp_path / "app_config.json"
+    config.write_text(json.dumps({
+        "helloz_nsfw_upload_max_edge": 512,
+        "helloz_nsfw_upload_format": "tiff",
+        "helloz_nsfw_upload_quality": 150,
+    }))
+    with patch("src.core.constants._config_path", return_value=str(config)):
+        assert constants.get_helloz_nsfw_upload_config() == (512, constants.UPLOAD_FORMAT_JPEG, 95)
+        transform = shared_upload_transform()
+        assert transform.max_edge == 512
+        assert shared_upload_transform() is transform
+    with patch("src.core.constants._config_path", return_value=str(tmp_path / "missing.json")):
+        assert shared_upload_transform() is None
+
+
+def test_helloz_classifier_uploads_the_transformed_image(tmp_path):
+    path = _noise(tmp_path / "photo.png", (900, 900))
+    transform = UploadTransform(max_edge=128)
+    response = MagicMock(status_code=200, json=MagicMock(return_value={"data": {"nsfw": 0.1}}))
+    with patch.object(helloz_nsfw, "get_upload_transform", return_value=transform), \
+         patch("src.detectors.helloz_nsfw.requests.post", return_value=response) as post, \
+         patch("src.detectors.helloz_nsfw.handle_results"):
+        helloz_nsfw.make_classify_image(frozenset(), 0.6, 60, ScanSession())(path)
+
+    file_name, data = post.call_args.kwargs["files"]["file"]
+    assert file_name == "photo.jpg"
+    assert transform.stats.snapshot()["bytes_out"] == len(data)
@@ -0,0 +1,90 @@
+"""Tests for src/processing/work_cost.py and cost-ordered scheduling in classify_files."""
+import json
+import os
+import threading
+import time
+from unittest.mock import patch
+
+import cv2
+import numpy as np
+import pytest
+
+from src.core import constants
+from src.core.utils import classify_files, configure_schedule
+from src.processing.work_cost import CostEstimator, RecentFirst, WorkSchedule, create_schedule, probe_video_frames
+
+
+def _video(path, frames):
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), 10, (32, 32))
+    for n in range(frames):
+        writer.write(np.full((32, 32, 3), n % 255, dtype=np.uint8))
+    writer.release()
+    return str(path)
+
+
+def _file(path, size):
+    path.write_bytes(b"\0" * size)
+    return str(path)
+
+
+def test_estimator_costs_videos_by_sampled_frames_and_images_by_size(tmp_path):
+    video = _video(tmp_path / "clip.avi", 40)
+    assert probe_video_frames(video) == 40
+    estimate = CostEstimator(frame_step=5)
+
+    assert estimate(video) == pytest.approx(8)
+    small, large = _file(tmp_path / "small.jpg", 1024), _file(tmp_path / "large.png", 20 * 1024 * 1024)
+    assert constants.COST_IMAGE <= estimate(small) < estimate(large)
+    # Unreadable videos fall back to a size-based estimate
+    broken = _file(tmp_path / "broken.mp4", 3 * 1024 * 1024)
+    assert probe_video_frames(broken) is None
+    assert estimate(broken) == pytest.approx(3 * constants.COST_VIDEO_PER_MB)
+    assert estimate(str(tmp_path / "missing.jpg")) == 0.0
+
+
+def test_recent_first_and_schedule_keys(tmp_path):
+    old, new = _file(tmp_path / "old.jpg", 10), _file(tmp_path / "new.jpg", 10)
+    os.utime(old, (time.time() - 30 * 86400,) * 2)
+    recent = RecentFirst()
+    assert (recent(new), recent(old)) == (0, 1)
+
+    schedule = WorkSchedule(estimate={old: 5.0, new: 1.0}.get, priority=recent)
+    assert sorted([old, new], key=schedule) == [new, old]
+    assert sorted([new, old], key=WorkSchedule(estimate={old: 5.0, new: 1.0}.get)) == [old, new]
+
+
+def test_create_schedule_from_config(tmp_path):
+    assert create_schedule(constants.SCAN_ORDER_DISCOVERY) is None
+    assert create_schedule(constants.SCAN_ORDER_DISCOVERY, "no-such-priority") is None
+    assert isinstance(create_schedule(constants.SCAN_ORDER_DISCOVERY, constants.SCAN_PRIORITY_RECENT).priority, RecentFirst)
+
+    config = tmp_path / "app_config.json"
+    config.write_text(json.dumps({"scan_order": "shuffle", "scan_priority": "recent"}))
+    with patch("src.core.constants._config_path", return_value=str(config)):
+        assert constants.get_scan_schedule_config() == (constants.SCAN_ORDER_DISCOVERY, "recent")
+        assert configure_schedule().estimate is None
+        config.write_text(json.dumps({"scan_order": "cost", "scan_priority": "recent"}))
+        schedule = configure_schedule(frame_step=2)
+    assert schedule.estimate.frame_step == 2 and schedule.priority is not None
+
+
+def test_classify_files_starts_the_most_expensive_queued_file_first():
+    costs = {f"/scan/{name}": cost for name, cost in [("a.jpg", 1), ("b.mp4", 90), ("c.jpg", 2), ("d.mp4", 40), ("e.jpg", 1.5)]}
+    queued = threading.Event()
+    calls = []
+
+    def discovered():
+        yield from costs
+        queued.set()
+
+    def classify(file_path):
+        queued.wait(5)
+        calls.append(file_path)
+
+    with patch("src.core.utils.is_supported_file", return_value=True), \
+         patch("src.core.utils.detect_media_type", return_value="image"):
+        classify_files(discovered(), classify, classify, worker_count=1, schedule=WorkSchedule(estimate=costs.get))
+
+    # The single worker may take one file before the rest are queued; after that, cost order
+    first, rest = calls[0], calls[1:]
+    assert rest == sorted((path for path in costs if path != first), key=lambda path: -costs[path])
@@ -0,0 +1,112 @@
+"""Tests for src/reporting/parquet_export.py."""
+import json
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+sys.modules.setdefault("nudenet", MagicMock())
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+from src.core import constants  # noqa: E402
+from src.core.models import ReportEntry  # noqa: E402
+from src.core.utils import end_report_run, save_nudity_report  # noqa: E402
+from src.reporting import parquet_export, report_writer  # noqa: E402
+from src.reporting.parquet_export import ParquetResultsWriter, concat_datasets, export_report  # noqa: E402
+from src.reporting.report_manager import ReportManager  # noqa: E402
+from src.reporting.results_store import ResultsStore  # noqa: E402
+
+
+def _entry(file, detected_classes='[{"class": "FACE_F", "score": 0.5}]'):
+    return ReportEntry(
+        file=file, media_type="image", model_name="nudenet", threshold_percent=60.0,
+        confidence_percent=50.0, nudity_detected=False, detected_classes=detected_classes,
+        date_classified="2024-01-01 12:00:00",
+    )
+
+
+def test_writer_writes_typed_columns_in_row_groups(tmp_path):
+    path = str(tmp_path / "out.parquet")
+    with ParquetResultsWriter(path, run_id="run1", chunk_size=2) as writer:
+        writer.write([_entry("/a.jpg"), _entry("/b.jpg"), _entry("/c.jpg", "ERROR: boom")])
+
+    parquet_file = pq.ParquetFile(path)
+    assert parquet_file.metadata.num_row_groups == 2
+    rows = parquet_file.read().to_pylist()
+    assert [row["file"] for row in rows] == ["/a.jpg", "/b.jpg", "/c.jpg"]
+    assert rows[0]["run_id"] == "run1"
+    assert rows[0]["class_scores"] == [("FACE_F", 0.5)]
+    assert rows[0]["date_classified"].year == 2024
+    assert (rows[2]["error"], rows[2]["class_scores"]) == ("ERROR: boom", [])
+
+
+def test_export_report_prefers_store_then_workbook(tmp_path):
+    store_report = str(tmp_path / "run_a" / "nudity_report.xlsx")
+    with ResultsStore.for_report(store_report) as store:
+        store.add_entries([_entry("/a.jpg")])
+    workbook_report = str(tmp_path / "run_b" / "nudity_report.xlsx")
+    ReportManager.save_entries([_entry("/b.jpg")], workbook_report)
+
+    out = tmp_path / "out"
+    assert export_report(store_report, str(out / "a.parquet")) == 1
+    assert export_report(workbook_report, str(out / "b.parquet")) == 1
+    assert pq.read_table(str(out / "a.parquet")).column("run_id").to_pylist() == ["run_a"]
+
+
+def test_concat_datasets_combines_runs(tmp_path):
+    reports = tmp_path / "reports"
+    with ResultsStore.for_report(str(reports / "run_a" / "nudity_report.xlsx")) as store:
+        store.add_entries([_entry("/a.jpg"), _entry("/b.jpg")])
+    parquet_export.export_entries([_entry("/c.jpg")], str(reports / "run_b.parquet"), run_id="run_b")
+
+    output = str(reports / "all.parquet")
+    assert parquet_export.main(["concat", output, str(reports)]) == 0
+    table = pq.read_table(output)
+    assert sorted(zip(table.column("run_id").to_pylist(), table.column("file").to_pylist())) == [
+        ("run_a", "/a.jpg"), ("run_a", "/b.jpg"), ("run_b", "/c.jpg"),
+    ]
+    # Re-running over the same folder skips its own output
+    assert concat_datasets([str(reports)], output) == 3
+
+
+def test_scan_saves_append_to_parquet_output(tmp_path):
+    config = tmp_path / "app_config.json"
+    config.write_text(json.dumps({"parquet_output": True}))
+    reports = tmp_path / "reports"
+    report_path = str(reports / "run_a" / "nudity_report.xlsx")
+    with patch("src.core.constants._config_path", return_value=str(config)):
+        save_nudity_report([_entry("/a.jpg")], report_path, write_workbook=False)
+        save_nudity_report([_entry("/a.jpg"), _entry("/b.jpg")], report_path, write_workbook=False)
+        save_nudity_report([_entry("/a.jpg"), _entry("/b.jpg"), _entry("/c.jpg")], report_path)
+
+    output = reports / "run_a" / constants.PARQUET_OUTPUT_DIR_NAME
+    [part] = sorted(output.glob("part-*.parquet"))
+    assert pq.read_table(str(part)).column("file").to_pylist() == ["/a.jpg", "/b.jpg", "/c.jpg"]
+    # The results store holds the same rows, so combining the reports folder counts them once
+    assert concat_datasets([str(reports)], str(tmp_path / "all.parquet")) == 3
+
+
+def test_parquet_output_is_written_outside_the_save_lock_and_released_at_run_end(tmp_path):
+    config = tmp_path / "app_config.json"
+    config.write_text(json.dumps({"parquet_output": True}))
+    report_path = str(tmp_path / "run_a" / "nudity_report.xlsx")
+    append = parquet_export.ParquetScanOutput.append
+    lock_held = []
+
+    def checked_append(self, entries):
+        lock_held.append(report_writer._saved_entries_lock.locked())
+        return append(self, entries)
+
+    with patch("src.core.constants._config_path", return_value=str(config)), \
+         patch.object(parquet_export.ParquetScanOutput, "append", checked_append):
+        save_nudity_report([_entry("/a.jpg")], report_path, write_workbook=False)
+        end_report_run(report_path)
+
+    assert lock_held == [False]
+    db_path = os.path.abspath(ReportManager.get_results_db_path(report_path))
+    assert db_path not in report_writer._saved_entries and db_path not in report_writer._parquet_outputs
+    [part] = (tmp_path / "run_a" / constants.PARQUET_OUTPUT_DIR_NAME).glob("part-*.parquet")
+    assert pq.read_table(str(part)).column("file").to_pylist() == ["/a.jpg"]
@@ -138,20 +138,18 @@ def test_embed_thumbnails_skips_when_xlimage_none(monkeypatch, tmp_path):
 
     entry = _entry(thumbnail="abc")
     # Should not raise; just log debug and return
-    ReportManager._embed_thumbnails(ws, [entry])
+    ReportManager._embed_thumbnails(ws, [(2, entry.thumbnail)])
 
 
-def test_embed_thumbnails_no_thumbnail_column(monkeypatch):
+def test_embed_thumbnails_skips_invalid_thumbnail(monkeypatch):
     import openpyxl
-    monkeypatch.setattr(rm_mod, "XLImage", MagicMock())
+    monkeypatch.setattr(rm_mod, "XLImage", MagicMock(side_effect=OSError("cannot identify image")))
     monkeypatch.setattr(rm_mod, "Image", MagicMock())
 
     wb = openpyxl.Workbook()
     ws = wb.active
-    ws.append(["File", "Model"])  # no Thumbnail column
-
-    entry = _entry(thumbnail="abc")
-    ReportManager._embed_thumbnails(ws, [entry])  # should return early, no error
+    ReportManager._embed_thumbnails(ws, [(2, "not-an-image")])  # logged and skipped, no error
+    assert ws._images == []
 
 
 # ---------------------------------------------------------------------------
@@ -64,6 +64,60 @@ def test_load_entries_returns_empty_for_empty_xlsx(tmp_path):
     assert loaded == []
 
 
+# ---------------------------------------------------------------------------
+# iter_entries / load_file_paths (streaming, projected reads)
+# ---------------------------------------------------------------------------
+
+def test_iter_entries_streams_lazily(tmp_path):
+    report = str(tmp_path / "report.xlsx")
+    ReportManager.save_entries([_make_entry(file=f"/tmp/{i}.jpg") for i in range(3)], report)
+
+    entries = ReportManager.iter_entries(report)
+    assert not isinstance(entries, list)
+    assert next(entries).file == "/tmp/0.jpg"
+    assert [entry.file for entry in entries] == ["/tmp/1.jpg", "/tmp/2.jpg"]
+
+
+def test_iter_entries_projects_columns(tmp_path):
+    report = str(tmp_path / "report.xlsx")
+    ReportManager.save_entries([_make_entry(confidence_percent=88.0, nudity_detected=True, thumbnail="abc")], report)
+
+    entry = next(ReportManager.iter_entries(report, columns=("Confidence Percent",)))
+    assert (entry.file, entry.confidence_percent) == ("/tmp/img.jpg", 88.0)
+    assert (entry.nudity_detected, entry.thumbnail, entry.model_name) == (False, "", "")
+
+
+def test_iter_entries_rejects_unknown_column(tmp_path):
+    report = str(tmp_path / "report.xlsx")
+    ReportManager.save_entries([_make_entry()], report)
+    with pytest.raises(ValueError, match="Unknown report column"):
+        list(ReportManager.iter_entries(report, columns=("Nope",)))
+
+
+def test_iter_entries_falls_back_to_legacy_positions(tmp_path):
+    """Reports with renamed headers (e.g. Copied File) still map by position."""
+    import openpyxl
+    report = str(tmp_path / "legacy.xlsx")
+    wb = openpyxl.Workbook()
+    wb.active.append(["Path", "Kind", "Model", "T", "C", "N", "Classes", "Copied File", "Date"])
+    wb.active.append(["/tmp/old.jpg", "image", "nudenet", 50.0, 70.0, True, "[]", "/copy.jpg", "2023-01-01"])
+    wb.save(report)
+
+    (entry,) = ReportManager.iter_entries(report)
+    assert (entry.file, entry.confidence_percent, entry.nudity_detected, entry.duplicate_of) == ("/tmp/old.jpg", 70.0, True, "")
+
+
+def test_load_file_paths(tmp_path):
+    report = str(tmp_path / "report.xlsx")
+    ReportManager.save_entries([_make_entry(file="/tmp/a.jpg"), _make_entry(file="/tmp/b.jpg")], report)
+    assert ReportManager.load_file_paths(report) == {"/tmp/a.jpg", "/tmp/b.jpg"}
+    assert ReportManager.load_file_paths(str(tmp_path / "missing.xlsx")) == set()
+
+    corrupt = tmp_path / "corrupt.xlsx"
+    corrupt.write_text("not an xlsx file")
+    assert ReportManager.load_file_paths(str(corrupt)) == set()
+
+
 # ---------------------------------------------------------------------------
 # save_session / load_session round-trip
 # ---------------------------------------------------------------------------
@@ -129,6 +183,19 @@ def test_create_demo_session_existing_file(tmp_path):
     assert result is True
 
 
+def test_save_entries_keeps_session_sheet(tmp_path):
+    report = str(tmp_path / "report.xlsx")
+    ReportManager.save_entries([], report)
+    ReportManager.create_demo_session(report, SessionState(scan_config=ScanConfig(source_folder="/demo")))
+
+    entry = ReportEntry(file="/a.jpg", media_type="image", model_name="nudenet", threshold_percent=60.0,
+                        confidence_percent=70.0, nudity_detected=True, detected_classes="[]")
+    assert ReportManager.save_entries([entry], report) is True
+
+    assert [e.file for e in ReportManager.load_entries(report)] == ["/a.jpg"]
+    assert ReportManager.load_session(report).scan_config.source_folder == "/demo"
+
+
 # ---------------------------------------------------------------------------
 # _embed_thumbnails — with actual base64 PNG thumbnail
 # ---------------------------------------------------------------------------
@@ -152,6 +219,54 @@ def test_embed_thumbnails_with_valid_thumbnail(tmp_path):
     assert result is True
 
 
+def _png_b64():
+    from io import BytesIO
+
+    from PIL import Image as PILImage
+    buf = BytesIO()
+    PILImage.new("RGB", (10, 10), color=(255, 0, 0)).save(buf, format="PNG")
+    return __import__("base64").b64encode(buf.getvalue()).decode()
+
+
+def test_save_entries_embeds_only_top_confidence_thumbnails(tmp_path):
+    import openpyxl
+    pytest.importorskip("PIL")
+    thumb = _png_b64()
+    entries = [_make_entry(file=f"/tmp/{i}.jpg", confidence_percent=c, thumbnail=thumb)
+               for i, c in enumerate([10.0, 90.0, 50.0, 90.0])]
+    report = str(tmp_path / "report.xlsx")
+
+    assert ReportManager.save_entries(iter(entries), report, max_thumbnails=2) is True
+
+    sheet = openpyxl.load_workbook(report).active
+    anchored_rows = sorted(img.anchor._from.row + 1 for img in sheet._images)
+    assert anchored_rows == [3, 5]  # the two 90% rows
+    assert sheet.row_dimensions[3].height == 105
+    assert sheet.cell(row=2, column=8).value == thumb  # base64 kept for every row
+    assert [e.file for e in ReportManager.load_entries(report)] == [e.file for e in entries]
+
+
+def test_save_entries_streams_generator_without_thumbnails(tmp_path):
+    import openpyxl
+    report = str(tmp_path / "report.xlsx")
+    entries = (_make_entry(file=f"/tmp/{i}.jpg", thumbnail="abc") for i in range(50))
+
+    assert ReportManager.save_entries(entries, report, max_thumbnails=0) is True
+    assert openpyxl.load_workbook(report).active._images == []
+    assert len(ReportManager.load_file_paths(report)) == 50
+
+
+def test_save_entries_reads_thumbnail_cap_from_config(tmp_path, monkeypatch):
+    import openpyxl
+    pytest.importorskip("PIL")
+    monkeypatch.setattr("src.core.constants._load_app_config", lambda: {"report_max_embedded_thumbnails": 1})
+    report = str(tmp_path / "report.xlsx")
+    thumb = _png_b64()
+
+    ReportManager.save_entries([_make_entry(file=f"/tmp/{i}.jpg", thumbnail=thumb) for i in range(3)], report)
+    assert len(openpyxl.load_workbook(report).active._images) == 1
+
+
 # ---------------------------------------------------------------------------
 # validate_report_dir — system protected
 # ---------------------------------------------------------------------------
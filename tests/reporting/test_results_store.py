@@ -0,0 +1,320 @@
+"""Tests for src/reporting/results_store.py and its use by save_nudity_report."""
+import base64
+import csv
+import json
+import os
+import sqlite3
+import sys
+import threading
+from unittest.mock import MagicMock
+
+sys.modules.setdefault("nudenet", MagicMock())
+
+from src.core.models import ReportEntry, ScanConfig, SessionState
+from src.core.utils import (
+    copy_results_store,
+    export_report_csv,
+    load_entry_thumbnail,
+    load_existing_report,
+    load_report_entries,
+    load_scan_run_summary,
+    load_scan_session,
+    open_saved_session,
+    rethreshold_report,
+    save_nudity_report,
+)
+from src.reporting.report_manager import ReportManager
+from src.reporting.results_store import ResultsStore
+
+THUMBNAIL = base64.b64encode(b"\x89PNG fake bytes").decode()
+
+
+def _entry(file, confidence=10.0, detected=False, model="nudenet", thumbnail=""):
+    return ReportEntry(
+        file=file, media_type="image", model_name=model, threshold_percent=60.0,
+        confidence_percent=confidence, nudity_detected=detected, detected_classes="[]",
+        thumbnail=thumbnail, date_classified="2024-01-01 00:00:00",
+    )
+
+
+def _scored(file, score, detected, model="nudenet"):
+    """Entry whose detected_classes carries one nudity class score (0-1)."""
+    payload = {"data": {"nsfw": score}} if model == "helloz_nsfw" else [{"class": "EXPOSED_BUTTOCKS", "score": score}]
+    return ReportEntry(
+        file=file, media_type="image", model_name=model, threshold_percent=60.0,
+        confidence_percent=round(score * 100, 2), nudity_detected=detected, detected_classes=json.dumps(payload),
+        date_classified="2024-01-01 00:00:00",
+    )
+
+
+def _store(tmp_path):
+    return ResultsStore(str(tmp_path / "run" / "nudity_report_results.sqlite3"))
+
+
+# ---------------------------------------------------------------------------
+# Writes and queries
+# ---------------------------------------------------------------------------
+
+def test_add_entries_upserts_by_file_and_roundtrips_thumbnails(tmp_path):
+    with _store(tmp_path) as store:
+        store.add_entries([_entry("/a.jpg"), _entry("/b.jpg", 95.0, True, thumbnail=THUMBNAIL)], batch_size=1)
+        store.add_entries([_entry("/a.jpg", 70.0, True)])
+
+        assert store.count() == 2
+        assert [e.file for e in store.iter_entries()] == ["/a.jpg", "/b.jpg"]
+        assert store.get_entry("/a.jpg").confidence_percent == 70.0
+        assert store.get_entry("/b.jpg").thumbnail == THUMBNAIL
+        assert store.get_entry("/missing.jpg") is None
+
+
+def test_filtered_queries(tmp_path):
+    with _store(tmp_path) as store:
+        store.add_entries([
+            _entry("/a.jpg", 20.0), _entry("/b.jpg", 80.0, True, thumbnail=THUMBNAIL),
+            _entry("/c.jpg", 90.0, True, model="helloz_nsfw"),
+        ])
+        assert store.count(nudity_detected=True) == 2
+        assert [e.file for e in store.iter_entries(min_confidence=85)] == ["/c.jpg"]
+        assert [e.file for e in store.iter_entries(model_name="nudenet", nudity_detected=True)] == ["/b.jpg"]
+        assert [e.thumbnail for e in store.iter_entries(include_thumbnails=False)] == ["", "", ""]
+        assert store.file_paths() == {"/a.jpg", "/b.jpg", "/c.jpg"}
+
+        detected = store.query(nudity_detected=True)
+        assert len(detected) == 2
+        assert list(detected) == list(detected)  # re-iterable
+
+
+def test_iter_entries_pages_through_large_results(tmp_path):
+    with _store(tmp_path) as store:
+        store.add_entries(_entry(f"/{i}.jpg") for i in range(25))
+        assert [e.file for e in store.iter_entries(batch_size=10)] == [f"/{i}.jpg" for i in range(25)]
+
+
+def test_replace_entries_and_delete_file(tmp_path):
+    with _store(tmp_path) as store:
+        store.add_entries([_entry("/a.jpg"), _entry("/b.jpg")])
+        store.replace_entries([_entry("/c.jpg"), _entry("/b.jpg")])
+        assert [e.file for e in store.iter_entries()] == ["/c.jpg", "/b.jpg"]
+        assert store.delete_file("/c.jpg") is True
+        assert store.delete_file("/c.jpg") is False
+
+
+def test_concurrent_writers(tmp_path):
+    with _store(tmp_path) as store:
+        threads = [
+            threading.Thread(target=store.add_entries, args=([_entry(f"/{t}/{i}.jpg") for i in range(50)],))
+            for t in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert store.count() == 200
+
+
+def test_session_state_uses_detected_rows(tmp_path):
+    with _store(tmp_path) as store:
+        store.add_entries([_entry("/a.jpg"), _entry("/b.jpg", 90.0, True)])
+        store.save_session_state(SessionState(scan_config=ScanConfig(source_folder="/in", threshold_percent=55.0)))
+
+        state = store.load_session_state()
+        assert (state.scan_config.source_folder, state.scan_config.threshold_percent) == ("/in", 55.0)
+        assert [e.file for e in state.results] == ["/b.jpg"]
+
+
+def test_replace_entries_keeps_stored_thumbnail_for_entries_without_one(tmp_path):
+    with _store(tmp_path) as store:
+        store.add_entries([_entry("/a.jpg", thumbnail=THUMBNAIL), _entry("/b.jpg", thumbnail=THUMBNAIL)])
+        lazily_loaded = list(store.iter_entries(include_thumbnails=False))
+        store.replace_entries(lazily_loaded[1:])
+
+        assert [e.file for e in store.iter_entries()] == ["/b.jpg"]
+        assert store.get_entry("/b.jpg").thumbnail == THUMBNAIL
+
+
+# ---------------------------------------------------------------------------
+# Exports
+# ---------------------------------------------------------------------------
+
+def test_export_xlsx_and_csv(tmp_path):
+    with _store(tmp_path) as store:
+        store.add_entries([_entry("/a.jpg"), _entry("/b.jpg", 90.0, True, thumbnail=THUMBNAIL)])
+        xlsx_path = str(tmp_path / "out" / "report.xlsx")
+        csv_path = str(tmp_path / "out" / "report.csv")
+
+        assert store.export_xlsx(xlsx_path, max_thumbnails=0) is True
+        assert store.export_csv(csv_path, nudity_detected=True) is True
+
+    assert [e.file for e in ReportManager.load_entries(xlsx_path)] == ["/a.jpg", "/b.jpg"]
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    assert "Thumbnail" not in rows[0]
+    assert [row[0] for row in rows[1:]] == ["/b.jpg"]
+
+
+def test_export_report_csv_reads_store_or_workbook(tmp_path):
+    entries = [_entry("/a.jpg"), _entry("/b.jpg", 90.0, True)]
+    stored = str(tmp_path / "stored" / "nudity_report.xlsx")
+    save_nudity_report(entries, stored)
+    legacy = str(tmp_path / "legacy" / "nudity_report.xlsx")
+    ReportManager.save_entries(entries, legacy)
+
+    for report_path in (stored, legacy):
+        csv_path = str(tmp_path / "out.csv")
+        assert export_report_csv(ReportManager.get_session_path(report_path), csv_path, nudity_detected=True) is True
+        with open(csv_path, newline="", encoding="utf-8") as f:
+            assert [row[0] for row in list(csv.reader(f))[1:]] == ["/b.jpg"]
+
+
+# ---------------------------------------------------------------------------
+# save_nudity_report integration
+# ---------------------------------------------------------------------------
+
+def test_save_nudity_report_writes_store_then_exports(tmp_path):
+    report_path = str(tmp_path / "run" / "nudity_report.xlsx")
+    entries = [_entry("/a.jpg"), _entry("/b.jpg", 90.0, True)]
+
+    save_nudity_report(entries, report_path, write_workbook=False)
+    assert os.path.exists(ReportManager.get_results_db_path(report_path))
+    assert not os.path.exists(ReportManager.get_session_path(report_path))
+    assert not os.path.exists(report_path)
+    assert [r["file"] for r in load_scan_session(report_path)["results"]] == ["/b.jpg"]
+
+    save_nudity_report(entries, report_path)
+    assert os.path.exists(report_path)
+    assert os.path.exists(ReportManager.get_session_path(report_path))
+    assert load_existing_report(report_path) == {"/a.jpg", "/b.jpg"}
+    assert [e["file"] for e in load_report_entries(report_path)] == ["/a.jpg", "/b.jpg"]
+
+
+def test_repeated_saves_write_only_changed_rows(tmp_path, monkeypatch):
+    report_path = str(tmp_path / "run" / "nudity_report.xlsx")
+    written = []
+    update_entries = ResultsStore.update_entries
+    monkeypatch.setattr(ResultsStore, "update_entries",
+                        lambda self, entries, removed=(): written.append(([e.file for e in entries], list(removed)))
+                        or update_entries(self, entries, removed))
+
+    save_nudity_report([_entry("/a.jpg"), _entry("/b.jpg")], report_path, write_workbook=False)
+    save_nudity_report([_entry("/a.jpg"), _entry("/b.jpg", 90.0, True), _entry("/c.jpg")], report_path, write_workbook=False)
+    save_nudity_report([_entry("/b.jpg", 90.0, True), _entry("/c.jpg")], report_path, write_workbook=False)
+
+    assert written == [(["/b.jpg", "/c.jpg"], []), ([], ["/a.jpg"])]
+    assert load_existing_report(report_path) == {"/b.jpg", "/c.jpg"}
+    with ResultsStore.for_report(report_path) as store:
+        assert store.get_entry("/b.jpg").nudity_detected is True
+
+    save_nudity_report([_entry("/d.jpg")], report_path, write_workbook=False, full=True)
+    assert len(written) == 2
+    assert load_existing_report(report_path) == {"/d.jpg"}
+
+
+def test_loaders_fall_back_to_workbook_without_store(tmp_path):
+    report_path = str(tmp_path / "legacy" / "nudity_report.xlsx")
+    ReportManager.save_entries([_entry("/old.jpg")], report_path)
+
+    assert load_existing_report(report_path) == {"/old.jpg"}
+    assert [e["file"] for e in load_report_entries(report_path)] == ["/old.jpg"]
+    assert not os.path.exists(ReportManager.get_results_db_path(report_path))
+
+
+def test_scan_run_summary_written_on_save_and_backfilled_from_store(tmp_path):
+    report_path = str(tmp_path / "run" / "nudity_report.xlsx")
+    save_nudity_report([_entry("/a.jpg"), _entry("/b.jpg", 90.0, True)], report_path, write_workbook=False)
+
+    summary = ReportManager.load_summary(report_path)
+    assert (summary.result_count, summary.total_count) == (1, 2)
+
+    os.remove(ReportManager.get_summary_path(report_path))
+    assert load_scan_run_summary(report_path) == summary
+    assert os.path.exists(ReportManager.get_summary_path(report_path))
+
+
+def test_open_saved_session_streams_store_without_thumbnails(tmp_path):
+    report_path = str(tmp_path / "run" / "nudity_report.xlsx")
+    entries = [_entry(f"/{i}.jpg", thumbnail=THUMBNAIL) for i in range(5)]
+    save_nudity_report(entries, report_path, session_state=SessionState(scan_config=ScanConfig(source_folder="/in")),
+                       write_workbook=False)
+
+    scan_config, path, total, chunks = open_saved_session(ReportManager.get_session_path(report_path), chunk_size=2)
+    assert (scan_config.source_folder, path, total) == ("/in", report_path, 5)
+    chunks = list(chunks)
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    assert all(e.thumbnail == "" for chunk in chunks for e in chunk)
+    assert load_entry_thumbnail(report_path, "/3.jpg") == THUMBNAIL
+    assert load_entry_thumbnail(report_path, "/missing.jpg") == ""
+
+
+def test_open_saved_session_reads_workbook_without_store(tmp_path):
+    report_path = str(tmp_path / "legacy" / "nudity_report.xlsx")
+    ReportManager.save_entries([_entry("/old.jpg")], report_path)
+
+    _config, _path, total, chunks = open_saved_session(report_path)
+    assert total == 1
+    assert [e.file for chunk in chunks for e in chunk] == ["/old.jpg"]
+    assert load_entry_thumbnail(report_path, "/old.jpg") == ""
+
+
+def test_copy_results_store(tmp_path):
+    source = str(tmp_path / "a" / "nudity_report.xlsx")
+    target = str(tmp_path / "b" / "saved.xlsx")
+    assert copy_results_store(source, target) is False
+    with ResultsStore.for_report(source) as store:
+        store.add_entries([_entry("/a.jpg", thumbnail=THUMBNAIL)])
+
+    assert copy_results_store(source, target) is True
+    assert copy_results_store(source, source) is False
+    assert load_entry_thumbnail(target, "/a.jpg") == THUMBNAIL
+
+
+# ---------------------------------------------------------------------------
+# Re-thresholding
+# ---------------------------------------------------------------------------
+
+def test_rethreshold_updates_rows_and_session_config(tmp_path):
+    with _store(tmp_path) as store:
+        store.add_entries([
+            _scored("/a.jpg", 0.5, False), _scored("/b.jpg", 0.8, True),
+            _scored("/c.jpg", 0.45, False, model="helloz_nsfw"),
+            ReportEntry(file="/err.jpg", media_type="image", model_name="nudenet", threshold_percent=60.0,
+                        confidence_percent=0.0, nudity_detected=False, detected_classes="ERROR: boom"),
+        ])
+        assert store.rethreshold(40.0) == 3
+        assert store.get_entry("/err.jpg").threshold_percent == 60.0
+        assert store.get_entry("/a.jpg").threshold_percent == 40.0
+
+        assert store.rethreshold(60.0, {"EXPOSED_BUTTOCKS": 75.0}) == 1
+        assert [e.file for e in store.iter_entries(nudity_detected=True)] == ["/b.jpg"]
+        config = store.load_scan_config()
+        assert (config.threshold_percent, config.class_thresholds) == (60.0, {"EXPOSED_BUTTOCKS": 75.0})
+
+
+def test_rethreshold_backfills_stores_without_class_scores(tmp_path):
+    db_path = str(tmp_path / "run" / "nudity_report_results.sqlite3")
+    with ResultsStore(db_path) as store:
+        store.add_entries([_scored("/a.jpg", 0.5, False)])
+    # Simulate a store written before class scores were kept
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute("ALTER TABLE results DROP COLUMN class_scores")
+        conn.execute("DELETE FROM meta WHERE key = 'score_classes'")
+    conn.close()
+
+    with ResultsStore(db_path) as store:
+        assert store.rethreshold(30.0) == 1
+        assert store.get_entry("/a.jpg").confidence_percent == 50.0
+
+
+def test_rethreshold_report_with_and_without_store(tmp_path):
+    report_path = str(tmp_path / "run" / "nudity_report.xlsx")
+    save_nudity_report([_scored("/a.jpg", 0.5, False), _scored("/b.jpg", 0.8, True)], report_path, write_workbook=False)
+
+    assert rethreshold_report(report_path, 40.0, write_workbook=False) == (2, 2)
+    assert ReportManager.load_summary(report_path).result_count == 2
+    assert ReportManager.load_session(report_path).scan_config.threshold_percent == 40.0
+
+    legacy_path = str(tmp_path / "legacy" / "nudity_report.xlsx")
+    ReportManager.save_entries([_scored("/a.jpg", 0.5, False), _scored("/b.jpg", 0.8, True)], legacy_path)
+    assert rethreshold_report(legacy_path, 70.0) == (1, 2)
+    assert os.path.exists(ReportManager.get_results_db_path(legacy_path))
+    assert [e["file"] for e in load_report_entries(legacy_path) if e["nudity_detected"]] == ["/b.jpg"]
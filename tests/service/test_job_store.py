@@ -0,0 +1,80 @@
+"""Tests for src/service/job_store.py."""
+import pytest
+
+from src.core.models import ReportEntry
+from src.service.job_store import JOB_QUEUED, JOB_RUNNING, JobStore
+
+
+def _entry(file, nudity_detected=True):
+    return ReportEntry(
+        file=file, media_type="image", model_name="nudenet", threshold_percent=60.0,
+        confidence_percent=90.0 if nudity_detected else 10.0, nudity_detected=nudity_detected,
+        detected_classes="[]", thumbnail="dGh1bWI=",
+    )
+
+
+@pytest.fixture
+def store(tmp_path):
+    job_store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    yield job_store
+    job_store.close()
+
+
+def test_create_and_get_job(store):
+    job = store.create_job(["/data/in"], "nudenet", 55)
+    fetched = store.get_job(job["id"])
+    assert fetched["folders"] == ["/data/in"]
+    assert fetched["status"] == JOB_QUEUED
+    assert fetched["threshold_percent"] == 55.0
+    assert fetched["discovered"] is False
+    assert store.get_job("missing") is None
+
+
+def test_list_jobs_filters_by_status(store):
+    first = store.create_job(["/a"], "nudenet", 60)
+    second = store.create_job(["/b"], "nudenet", 60)
+    store.update_job(first["id"], status=JOB_RUNNING)
+
+    assert [job["id"] for job in store.list_jobs()] == [first["id"], second["id"]]
+    assert [job["id"] for job in store.list_jobs([JOB_QUEUED])] == [second["id"]]
+
+
+def test_update_job_rejects_unknown_fields(store):
+    job = store.create_job(["/a"], "nudenet", 60)
+    with pytest.raises(ValueError):
+        store.update_job(job["id"], bogus=1)
+
+
+def test_files_progress_and_results(store):
+    job = store.create_job(["/a"], "nudenet", 60)
+    assert store.add_files(job["id"], ["/a/1.jpg", "/a/2.jpg", "/a/3.jpg"]) == 3
+
+    assert store.pending_files(job["id"], limit=2) == [(0, "/a/1.jpg"), (1, "/a/2.jpg")]
+    store.complete_file(job["id"], 1, _entry("/a/2.jpg"))
+    store.complete_file(job["id"], 0, None)  # e.g. unsupported file: no result row
+
+    assert store.pending_files(job["id"]) == [(2, "/a/3.jpg")]
+    fetched = store.get_job(job["id"])
+    assert (fetched["total"], fetched["processed"], fetched["detected"]) == (3, 2, 1)
+    assert fetched["discovered"] is True
+
+    results = store.get_results(job["id"])
+    assert [entry.file for _id, entry in results] == ["/a/2.jpg"]
+    assert results[0][1].thumbnail == "dGh1bWI="
+    assert store.get_results(job["id"], after_id=results[0][0]) == []
+
+
+def test_state_survives_reopen_and_running_jobs_are_requeued(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    store = JobStore(path)
+    job = store.create_job(["/a"], "nudenet", 60)
+    store.add_files(job["id"], ["/a/1.jpg"])
+    store.complete_file(job["id"], 0, _entry("/a/1.jpg"))
+    store.update_job(job["id"], status=JOB_RUNNING)
+    store.close()
+
+    reopened = JobStore(path)
+    assert reopened.requeue_interrupted() == 1
+    assert reopened.get_job(job["id"])["status"] == JOB_QUEUED
+    assert [entry.file for entry in reopened.iter_results(job["id"], batch_size=1)] == ["/a/1.jpg"]
+    reopened.close()
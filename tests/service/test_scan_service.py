@@ -0,0 +1,269 @@
+"""Tests for src/service/scheduler.py and src/service/http_api.py."""
+import http.client
+import json
+import sys
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+sys.modules.setdefault("nudenet", MagicMock())
+
+from src.core.models import ReportEntry
+from src.service import scheduler as scheduler_module
+from src.service.http_api import create_server
+from src.service.job_store import JOB_CANCELLED, JOB_COMPLETED, JOB_FAILED, JOB_QUEUED, JobStore
+from src.service.scheduler import DetectorPool, ScanScheduler, discover_files
+
+
+class FakePool:
+    """Detector pool whose classifiers record an entry per file without a model."""
+
+    def __init__(self, gate=None):
+        self.calls = []
+        self.gate = gate
+        self.lock = threading.Lock()
+
+    def make_classifiers(self, model_name, threshold_percent, session):
+        def classify(file_path):
+            if self.gate is not None:
+                self.gate.wait(timeout=5)
+            with self.lock:
+                self.calls.append(file_path)
+            session.add_result(ReportEntry(
+                file=file_path, media_type="image", model_name=model_name,
+                threshold_percent=threshold_percent, confidence_percent=80.0,
+                nudity_detected=file_path.endswith("nsfw.jpg"), detected_classes="[]",
+            ))
+        return classify, classify
+
+
+def _make_files(folder, names):
+    folder.mkdir(parents=True, exist_ok=True)
+    for name in names:
+        (folder / name).write_bytes(b"x")
+    return str(folder)
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.core.utils.is_supported_file", lambda path: True)
+    monkeypatch.setattr("src.core.utils.detect_media_type", lambda path: "image")
+    monkeypatch.setattr(scheduler_module, "save_nudity_report", MagicMock())
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    started = []
+
+    def factory(pool=None, start=True, **kw):
+        sched = ScanScheduler(store, pool or FakePool(), report_dir=str(tmp_path / "reports"), **kw)
+        if start:
+            sched.start()
+        started.append(sched)
+        return sched
+
+    yield factory
+    for sched in started:
+        sched.stop()
+    store.close()
+
+
+# ---------------------------------------------------------------------------
+# Scheduler
+# ---------------------------------------------------------------------------
+
+def test_discover_files_filters_by_extension(tmp_path):
+    folder = _make_files(tmp_path / "in", ["a.jpg", "b.MP4", "notes.txt"])
+    assert sorted(p.rsplit("/", 1)[1] for p in discover_files([folder])) == ["a.jpg", "b.MP4"]
+
+
+def test_job_runs_to_completion_and_saves_report(tmp_path, service):
+    folder = _make_files(tmp_path / "in", ["a.jpg", "nsfw.jpg"])
+    sched = service(worker_count=2)
+
+    job = sched.submit([folder], "nudenet", 60)
+    assert _wait_for(lambda: sched.store.get_job(job["id"])["status"] == JOB_COMPLETED)
+
+    finished = sched.store.get_job(job["id"])
+    assert (finished["total"], finished["processed"], finished["detected"]) == (2, 2, 1)
+    assert finished["report_path"].endswith("nudity_report.xlsx")
+    saved_entries = scheduler_module.save_nudity_report.call_args[0][0]
+    assert len(saved_entries) == 2
+
+
+def test_jobs_are_interleaved_round_robin(tmp_path, service):
+    first = _make_files(tmp_path / "big", [f"{i}.jpg" for i in range(6)])
+    second = _make_files(tmp_path / "small", ["a.jpg", "b.jpg"])
+    pool = FakePool()
+    sched = service(pool=pool, start=False, worker_count=1)
+
+    job_a = sched.submit([first], "nudenet", 60)
+    sched.submit([second], "nudenet", 60)
+    sched.start()
+    assert _wait_for(lambda: sched.store.get_job(job_a["id"])["status"] == JOB_COMPLETED)
+
+    owners = ["small" if "/small/" in path else "big" for path in pool.calls]
+    # The small job finishes long before the big one despite being submitted second.
+    assert owners.index("small") <= 2
+    assert len([o for o in owners[:5] if o == "small"]) == 2
+
+
+def test_cancel_running_job(tmp_path, service):
+    folder = _make_files(tmp_path / "in", [f"{i}.jpg" for i in range(5)])
+    gate = threading.Event()
+    sched = service(pool=FakePool(gate=gate), worker_count=1)
+
+    job = sched.submit([folder], "nudenet", 60)
+    assert _wait_for(lambda: sched.store.get_job(job["id"])["total"] == 5)
+    sched.cancel(job["id"])
+    gate.set()
+
+    assert _wait_for(lambda: sched.store.get_job(job["id"])["status"] == JOB_CANCELLED)
+    assert sched.store.get_job(job["id"])["processed"] < 5
+
+
+def test_cancel_queued_job(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    sched = ScanScheduler(store, FakePool())  # not started: jobs stay queued
+    job = sched.submit([str(tmp_path)], "nudenet", 60)
+    assert job["status"] == JOB_QUEUED
+    assert sched.cancel(job["id"])["status"] == JOB_CANCELLED
+    assert sched.cancel("missing") is None
+    store.close()
+
+
+@pytest.mark.parametrize("kwargs, message", [
+    ({"folders": []}, "non-empty"),
+    ({"folders": ["/definitely/missing"]}, "not found"),
+    ({"model_name": "other"}, "model"),
+    ({"threshold_percent": 150}, "between"),
+    ({"threshold_percent": "high"}, "number"),
+])
+def test_submit_validation(tmp_path, kwargs, message):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    sched = ScanScheduler(store, FakePool())
+    args = {"folders": [str(tmp_path)], "model_name": "nudenet", "threshold_percent": 60, **kwargs}
+    with pytest.raises(ValueError, match=message):
+        sched.submit(**args)
+    store.close()
+
+
+def test_job_fails_when_classifiers_cannot_be_built(tmp_path, service):
+    pool = MagicMock()
+    pool.make_classifiers.side_effect = RuntimeError("model missing")
+    sched = service(pool=pool)
+
+    job = sched.submit([_make_files(tmp_path / "in", ["a.jpg"])], "nudenet", 60)
+    assert _wait_for(lambda: sched.store.get_job(job["id"])["status"] == JOB_FAILED)
+    assert sched.store.get_job(job["id"])["error"] == "model missing"
+
+
+def test_interrupted_job_resumes_without_reprocessing(tmp_path, service):
+    folder = _make_files(tmp_path / "in", ["a.jpg", "b.jpg"])
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    job = store.create_job([folder], "nudenet", 60)
+    store.add_files(job["id"], [f"{folder}/a.jpg", f"{folder}/b.jpg"])
+    store.complete_file(job["id"], 0, ReportEntry(
+        file=f"{folder}/a.jpg", media_type="image", model_name="nudenet", threshold_percent=60.0,
+        confidence_percent=1.0, nudity_detected=False, detected_classes="[]",
+    ))
+    store.update_job(job["id"], status="running")
+    store.close()
+
+    pool = FakePool()
+    sched = service(pool=pool)
+    assert _wait_for(lambda: sched.store.get_job(job["id"])["status"] == JOB_COMPLETED)
+    assert pool.calls == [f"{folder}/b.jpg"]
+    assert len(scheduler_module.save_nudity_report.call_args[0][0]) == 2
+
+
+def test_detector_pool_loads_nudenet_once(monkeypatch):
+    fake_module = MagicMock()
+    monkeypatch.setitem(sys.modules, "nudenet", fake_module)
+    pool = DetectorPool()
+    assert pool.get_nudenet_detector() is pool.get_nudenet_detector()
+    assert fake_module.NudeDetector.call_count == 1
+
+
+# ---------------------------------------------------------------------------
+# HTTP API
+# ---------------------------------------------------------------------------
+
+@pytest.fixture
+def api(service):
+    def factory(**kw):
+        sched = service(**kw)
+        server = create_server(sched, "127.0.0.1", 0)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        servers.append(server)
+        return sched, server.server_address[1]
+
+    servers = []
+    yield factory
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def _request(port, method, path, body=None):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    payload = json.dumps(body).encode() if body is not None else None
+    conn.request(method, path, body=payload, headers={"Content-Type": "application/json"})
+    response = conn.getresponse()
+    data = response.read()
+    conn.close()
+    return response.status, data
+
+
+def test_http_submit_poll_stream_and_cancel(tmp_path, api):
+    folder = _make_files(tmp_path / "in", ["a.jpg", "nsfw.jpg"])
+    sched, port = api()
+
+    status, data = _request(port, "POST", "/jobs", {"folders": [folder], "threshold_percent": 50})
+    assert status == 201
+    job_id = json.loads(data)["job"]["id"]
+
+    status, data = _request(port, "GET", f"/jobs/{job_id}/results?follow=1")
+    assert status == 200
+    lines = [json.loads(line) for line in data.decode().splitlines()]
+    assert sorted(line["entry"]["file"].rsplit("/", 1)[1] for line in lines) == ["a.jpg", "nsfw.jpg"]
+    assert "thumbnail" not in lines[0]["entry"]
+
+    status, data = _request(port, "GET", f"/jobs/{job_id}/results?after={lines[0]['id']}")
+    assert len(data.decode().splitlines()) == 1
+
+    assert _wait_for(lambda: sched.store.get_job(job_id)["status"] == JOB_COMPLETED)
+    status, data = _request(port, "GET", f"/jobs/{job_id}")
+    assert status == 200
+    assert json.loads(data)["job"]["progress_percent"] == 100.0
+
+    status, data = _request(port, "GET", "/jobs")
+    assert [job["id"] for job in json.loads(data)["jobs"]] == [job_id]
+
+    status, data = _request(port, "DELETE", f"/jobs/{job_id}")
+    assert status == 200
+    assert json.loads(data)["job"]["status"] == JOB_COMPLETED  # already finished: unchanged
+
+
+def test_http_errors(tmp_path, api):
+    _sched, port = api()
+    assert _request(port, "GET", "/health") == (200, b'{"status": "ok"}')
+    assert _request(port, "GET", "/jobs/missing")[0] == 404
+    assert _request(port, "POST", "/jobs/missing/cancel")[0] == 404
+    assert _request(port, "GET", "/nope")[0] == 404
+
+    status, data = _request(port, "POST", "/jobs", {"folders": ["/definitely/missing"]})
+    assert status == 400
+    assert "not found" in json.loads(data)["error"]
+
+    status, _data = _request(port, "POST", "/jobs", ["not", "an", "object"])
+    assert status == 400
@@ -0,0 +1,186 @@
+"""Tests for src/service/shard_store.py and src/service/sharding.py."""
+import sys
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+sys.modules.setdefault("nudenet", MagicMock())
+
+from src.core.models import ReportEntry
+from src.reporting.report_manager import ReportManager
+from src.service import sharding
+from src.service.shard_store import SHARD_DONE, SHARD_FAILED, SHARD_LEASED, SHARD_PENDING, ShardStore
+from src.service.sharding import ShardWorker, create_sharded_run, merge_run, wait_for_run
+
+
+def _entry(file):
+    return ReportEntry(
+        file=file, media_type="image", model_name="nudenet", threshold_percent=60.0,
+        confidence_percent=90.0, nudity_detected=True, detected_classes="[]",
+    )
+
+
+class FakePool:
+    """Detector pool whose classifiers record an entry per file without a model."""
+
+    def __init__(self):
+        self.calls = []
+
+    def make_classifiers(self, model_name, threshold_percent, session):
+        def classify(file_path):
+            self.calls.append(file_path)
+            session.add_result(_entry(file_path))
+        return classify, classify
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "shared" / "shards.sqlite3")
+
+
+@pytest.fixture
+def store(db_path):
+    shard_store = ShardStore(db_path)
+    yield shard_store
+    shard_store.close()
+
+
+# ---------------------------------------------------------------------------
+# ShardStore
+# ---------------------------------------------------------------------------
+
+def test_create_run_splits_into_shards(store):
+    run_id = store.create_run(["/in"], "nudenet", 60, [f"/in/{i}.jpg" for i in range(5)], shard_size=2)
+    run = store.get_run(run_id)
+    assert (run["shard_count"], run["file_count"]) == (3, 5)
+    assert store.progress(run_id) == {SHARD_PENDING: 3, SHARD_LEASED: 0, SHARD_DONE: 0, SHARD_FAILED: 0}
+
+
+def test_each_shard_is_leased_to_one_worker_across_connections(store, db_path):
+    run_id = store.create_run(["/in"], "nudenet", 60, ["/in/a.jpg", "/in/b.jpg"], shard_size=1)
+    other_host = ShardStore(db_path)
+
+    first = store.lease_shard("host-a")
+    second = other_host.lease_shard("host-b")
+    assert {first["shard_id"], second["shard_id"]} == {0, 1}
+    assert store.lease_shard("host-a") is None
+    assert store.progress(run_id)[SHARD_LEASED] == 2
+    other_host.close()
+
+
+def test_expired_lease_is_retried_and_stale_completion_rejected(store):
+    run_id = store.create_run(["/in"], "nudenet", 60, ["/in/a.jpg"], shard_size=1)
+    stale = store.lease_shard("host-a", lease_seconds=0.01)
+    time.sleep(0.05)
+
+    retry = store.lease_shard("host-b")
+    assert retry["attempt"] == 2
+    assert store.renew_lease(run_id, 0, "host-a") is False
+    assert store.complete_shard(run_id, stale["shard_id"], "host-a", [_entry("/in/a.jpg")]) is False
+    assert store.complete_shard(run_id, 0, "host-b", [_entry("/in/a.jpg")]) is True
+    assert [entry.file for entry in store.iter_results(run_id)] == ["/in/a.jpg"]
+
+
+def test_shard_fails_after_max_attempts(store):
+    run_id = store.create_run(["/in"], "nudenet", 60, ["/in/a.jpg"], shard_size=1)
+    for attempt in range(2):
+        store.lease_shard("host", max_attempts=2)
+        store.fail_shard(run_id, 0, "host", f"error {attempt}", max_attempts=2)
+
+    assert store.progress(run_id)[SHARD_FAILED] == 1
+    assert store.failed_shards(run_id)[0]["error"] == "error 1"
+    assert store.lease_shard("host", max_attempts=2) is None
+    assert store.is_finished(run_id)
+
+
+def test_reap_expired_leases_fails_abandoned_shards(store):
+    run_id = store.create_run(["/in"], "nudenet", 60, ["/in/a.jpg"], shard_size=1)
+    store.lease_shard("host", lease_seconds=0.01, max_attempts=1)
+    time.sleep(0.05)
+
+    assert store.reap_expired_leases(max_attempts=1) == 1
+    assert store.is_finished(run_id)
+
+
+# ---------------------------------------------------------------------------
+# Coordinator / worker
+# ---------------------------------------------------------------------------
+
+def _make_tree(tmp_path, count):
+    folder = tmp_path / "archive"
+    folder.mkdir()
+    for i in range(count):
+        (folder / f"{i:02d}.jpg").write_bytes(b"x")
+    (folder / "readme.txt").write_text("not media")
+    return str(folder)
+
+
+@pytest.fixture
+def patched_media(monkeypatch):
+    monkeypatch.setattr("src.core.utils.is_supported_file", lambda path: True)
+    monkeypatch.setattr("src.core.utils.detect_media_type", lambda path: "image")
+
+
+def test_workers_share_run_and_merge_single_report(tmp_path, store, db_path, patched_media):
+    folder = _make_tree(tmp_path, 7)
+    run_id = create_sharded_run(store, [folder], shard_size=3)
+    worker_a = ShardWorker(ShardStore(db_path), "host-a", FakePool(), worker_count=2)
+    worker_b = ShardWorker(ShardStore(db_path), "host-b", FakePool(), worker_count=2)
+
+    assert worker_a.run_once() and worker_b.run_once() and worker_a.run_once()
+    assert worker_b.run(exit_when_idle=True) == 0
+    wait_for_run(store, run_id, poll_interval=0.01)
+
+    report_path = merge_run(store, run_id, report_dir=str(tmp_path / "reports"))
+    assert store.get_run(run_id)["report_path"] == report_path
+    files = [entry.file for entry in ReportManager.load_entries(report_path)]
+    assert sorted(files) == sorted(f"{folder}/{i:02d}.jpg" for i in range(7))
+    assert len(worker_a.detector_pool.calls) + len(worker_b.detector_pool.calls) == 7
+
+
+def test_worker_releases_shard_on_error(tmp_path, store, patched_media, monkeypatch):
+    folder = _make_tree(tmp_path, 1)
+    run_id = create_sharded_run(store, [folder], shard_size=1)
+    monkeypatch.setattr(sharding, "classify_files", MagicMock(side_effect=RuntimeError("disk gone")))
+
+    assert ShardWorker(store, "host", FakePool()).run_once() is False
+    assert store.progress(run_id)[SHARD_PENDING] == 1
+
+
+def test_worker_discards_results_when_lease_lost(tmp_path, store, patched_media):
+    folder = _make_tree(tmp_path, 1)
+    run_id = create_sharded_run(store, [folder], shard_size=1)
+    worker = ShardWorker(store, "host", FakePool(), lease_seconds=0.03)
+    original = worker.detector_pool.make_classifiers
+
+    def slow_classifiers(*args):
+        classify_image, classify_video = original(*args)
+
+        def slow(path):
+            # Another worker steals the shard while this one is stalled.
+            store._write(lambda conn: conn.execute("UPDATE shards SET lease_owner = 'thief'"))
+            time.sleep(0.05)
+            classify_image(path)
+        return slow, classify_video
+
+    worker.detector_pool.make_classifiers = slow_classifiers
+    assert worker.run_once() is False
+    assert list(store.iter_results(run_id)) == []
+
+
+def test_create_sharded_run_validates(tmp_path, store):
+    with pytest.raises(ValueError, match="not found"):
+        create_sharded_run(store, [str(tmp_path / "missing")])
+    with pytest.raises(ValueError, match="model"):
+        create_sharded_run(store, [str(tmp_path)], model_name="other")
+
+
+def test_cli_coordinate_no_wait_and_status(tmp_path, db_path, capsys, patched_media):
+    folder = _make_tree(tmp_path, 2)
+    assert sharding.main(["--db", db_path, "coordinate", folder, "--shard-size", "1", "--no-wait"]) == 0
+    run_id = capsys.readouterr().out.strip()
+
+    assert sharding.main(["--db", db_path, "status", run_id]) == 0
+    assert "pending=2" in capsys.readouterr().out
+    assert sharding.main(["--db", db_path, "status", "missing"]) == 1
@@ -0,0 +1,79 @@
+"""Tests for src/tools/fake_helloz.py and the Helloz NSFW client benchmark."""
+import threading
+
+import pytest
+import requests
+
+from src.core import constants
+from src.tools.fake_helloz import FakeHellozServer, LatencyModel, nsfw_score
+from src.tools.helloz_benchmark import STRATEGY_ASYNC, STRATEGY_THREADS, format_report, main, make_images, run_benchmark
+
+
+def _post(server, data=b"image bytes"):
+    return requests.post(server.upload_url, files={"file": ("a.jpg", data)}, timeout=5)
+
+
+def test_server_scores_uploads_deterministically():
+    with FakeHellozServer(latency=LatencyModel(mean=0)) as server:
+        first, second = _post(server), _post(server)
+        assert requests.get(server.base_url, timeout=5).status_code == 200
+        assert requests.post(server.upload_url, data=b"no multipart", timeout=5).status_code == 400
+        assert requests.post(f"{server.base_url}/other", files={"file": b"x"}, timeout=5).status_code == 404
+
+    assert first.status_code == 200
+    assert first.json()["data"]["nsfw"] == second.json()["data"]["nsfw"] == nsfw_score(b"image bytes")
+    assert server.snapshot()["requests"] == 2  # Only well-formed uploads are counted
+
+
+def test_server_injects_errors_at_the_configured_rate():
+    with FakeHellozServer(latency=LatencyModel(mean=0), error_rate=0.3, seed=7) as server:
+        statuses = [_post(server).status_code for _ in range(100)]
+    assert set(statuses) == {200, 500}
+    assert 15 <= statuses.count(500) <= 45
+    assert server.snapshot()["errors"] == statuses.count(500)
+
+
+def test_server_limits_concurrency_and_can_reject_when_busy():
+    with FakeHellozServer(latency=LatencyModel(mean=0.2), max_concurrency=2, reject_when_busy=True) as server:
+        statuses = []
+        threads = [threading.Thread(target=lambda: statuses.append(_post(server).status_code)) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    snapshot = server.snapshot()
+    assert snapshot["max_in_flight"] == 2
+    assert statuses.count(503) == snapshot["rejected"] >= 1
+
+
+def test_latency_model_distributions():
+    for distribution in constants.SUPPORTED_LATENCY_DISTRIBUTIONS:
+        model = LatencyModel(distribution, mean=0.1, spread=0.05, seed=1)
+        samples = [model.sample() for _ in range(2000)]
+        assert min(samples) >= 0
+        assert 0.07 < sum(samples) / len(samples) < 0.13
+    assert LatencyModel(mean=0.1, per_mb=1.0).sample(512 * 1024) == pytest.approx(0.6)
+    with pytest.raises(ValueError):
+        LatencyModel("bimodal")
+
+
+@pytest.mark.parametrize("strategy", [STRATEGY_ASYNC, STRATEGY_THREADS])
+def test_benchmark_drives_the_client_path_across_replicas(tmp_path, strategy):
+    folder = tmp_path / "images"
+    make_images(str(folder), count=12, size=64)
+    with FakeHellozServer(latency=LatencyModel(mean=0.01)) as first, FakeHellozServer(latency=LatencyModel(mean=0.01)) as second:
+        result = run_benchmark(
+            str(folder), [first, second], strategy, workers=4, concurrency=8,
+            settings={"helloz_nsfw_upload_max_edge": 32}, workdir=str(tmp_path / "work"),
+        )
+
+    assert result["files"] == result["classified"] == 12
+    assert result["requests"] == 12 and result["error_entries"] == result["deferred"] == 0
+    assert all(replica["requests"] > 0 for replica in result["replicas"])
+    assert "Throughput" in format_report(result)
+    assert "12/12 file(s) re-encoded" in result["upload_transform"]
+
+
+def test_benchmark_command_prints_json(capsys):
+    assert main(["bench", "--files", "4", "--image-size", "32", "--latency", "0", "--json"]) == 0
+    assert '"files_per_second"' in capsys.readouterr().out